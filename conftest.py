@@ -100,3 +100,13 @@ def jwt_secret(test_constants):
 def jwt_algorithm(test_constants):
     """JWT algorithm para todos los tests"""
     return test_constants["jwt_algorithm"]
+
+
+@pytest.fixture(autouse=True)
+def reset_mcp_server_guards():
+    """Circuit breakers y límites MCP limpios en cada test (el estado es global)"""
+    from backoffice.mcp.resilience import reset_server_guards
+
+    reset_server_guards()
+    yield
+    reset_server_guards()
@@ -1,5 +1,6 @@
 import { api } from './api';
-import { LogEntry, LogFilters, LogsResponse, ExportOptions } from '../types/logs';
+import { LogEntry, LogFilters, LogsResponse, LogsStreamMessage, ExportOptions } from '../types/logs';
+import { storage } from '@/utils/storage';
 import { mockLogs, largeMockDataset } from '../mocks/logs.mock';
 
 // Flag para cambiar entre mock y API real
@@ -216,19 +217,24 @@ export function connectToLogStream(
     return () => clearInterval(interval);
   }
 
-  // Conexión real a SSE (cuando esté implementada)
-  const eventSource = new EventSource(
-    `${import.meta.env.VITE_API_URL}/api/v1/logs/stream`,
-    {
-      withCredentials: false,
-    }
-  );
+  // Conexión real a SSE. EventSource no permite headers: el token va en query
+  const token = storage.getToken();
+  const url = new URL(`${import.meta.env.VITE_API_URL}/api/v1/logs/stream`);
+  if (token) {
+    url.searchParams.set('token', token);
+  }
+
+  const eventSource = new EventSource(url.toString(), {
+    withCredentials: false,
+  });
 
   eventSource.onmessage = (event) => {
     try {
-      const data = JSON.parse(event.data);
+      const data: LogsStreamMessage = JSON.parse(event.data);
       if (data.type === 'log' && data.data) {
         onLog(data.data);
+      } else if (data.type === 'dropped') {
+        console.warn('SSE: logs descartados por el servidor', data.count ?? '');
       }
     } catch (error) {
       console.error('Error parsing SSE message:', error);
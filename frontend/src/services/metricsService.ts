@@ -3,7 +3,7 @@ import { DashboardMetrics, ExecutionHistoryPoint, MetricsFilter, PIIHistoryPoint
 import { api } from './api';
 
 // Flag para usar datos mock o la API real
-const USE_MOCK_DATA = true; // Cambiar a false cuando la API esté disponible
+const USE_MOCK_DATA = false; // Métricas servidas por /api/v1/dashboard (índice de logs)
 
 /**
  * Obtiene las métricas del dashboard
@@ -26,8 +26,7 @@ export const getMetrics = async (filter?: MetricsFilter): Promise<DashboardMetri
         }
       : {};
 
-    /* const response = await api.get<DashboardMetrics>('/api/v1/dashboard/metrics', { params }); */
-    const response = await api.get<DashboardMetrics>('/metrics', { params });
+    const response = await api.get<DashboardMetrics>('/api/v1/dashboard/metrics', { params });
     return response.data;
   } catch (error) {
     console.error('Error fetching metrics:', error);
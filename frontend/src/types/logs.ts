@@ -54,12 +54,14 @@ export interface LogsResponse {
   page: number;
   page_size: number;
   has_more: boolean;
+  next_cursor?: string | null; // Cursor para `after` (paginación por cursor)
 }
 
 export interface LogsStreamMessage {
-  type: 'log' | 'ping' | 'error';
+  type: 'log' | 'ping' | 'error' | 'dropped';
   data?: LogEntry;
   message?: string;
+  count?: number; // Logs descartados por el servidor (type 'dropped')
 }
 
 export interface ExportOptions {
@@ -10,13 +10,17 @@ FastAPI app que expone endpoints para:
 - Métricas Prometheus
 """
 
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from prometheus_fastapi_instrumentator import Instrumentator
 
-from .routers import agent, auth, health, logs
+from .routers import agent, auth, dashboard, health, logs
+from .services.log_index import get_log_index, run_log_indexer
+from .services.mcp_metrics import register_mcp_metrics
+from backoffice.mcp.stdio_client import close_stdio_pools
 from backoffice.settings import settings
 
 # Configurar logging
@@ -45,11 +49,29 @@ async def lifespan(app: FastAPI):
     logger.info(f"CORS Origins: {settings.CORS_ORIGINS}")
     logger.info("=" * 60)
 
+    # Indexador de logs en background
+    indexer_task = None
+    if settings.LOG_INDEX_ENABLED:
+        index = get_log_index(settings.LOG_DIR, settings.LOG_INDEX_PATH or None)
+        indexer_task = asyncio.create_task(
+            run_log_indexer(index, settings.LOG_INDEX_REFRESH_SECONDS)
+        )
+
     yield
 
     # Shutdown
     logger.info("aGEntiX API cerrando...")
 
+    if indexer_task is not None:
+        indexer_task.cancel()
+        try:
+            await indexer_task
+        except asyncio.CancelledError:
+            pass
+
+    # Procesos de los servidores MCP stdio
+    await close_stdio_pools()
+
 
 # Crear app FastAPI
 app = FastAPI(
@@ -97,9 +119,16 @@ app.include_router(
     tags=["Logs"]
 )
 
+app.include_router(
+    dashboard.router,
+    prefix="/api/v1/dashboard",
+    tags=["Dashboard"]
+)
+
 # Configurar Prometheus
 logger.info("Configurando métricas Prometheus")
 Instrumentator().instrument(app).expose(app, endpoint="/metrics")
+register_mcp_metrics()
 
 
 @app.get(
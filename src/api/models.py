@@ -159,6 +159,30 @@ class ExecuteAgentResponse(BaseModel):
         example="https://bpmn.example.com/api/v1/tasks/callback",
         description="URL donde se enviará el resultado (si se especificó)"
     )
+    deduplicated: bool = Field(
+        False,
+        description="True si la petición repetía una anterior (misma clave de "
+                    "idempotencia) y se devuelve la ejecución ya existente"
+    )
+
+
+class CancelRunResponse(BaseModel):
+    """Response al cancelar una ejecución"""
+
+    agent_run_id: str = Field(
+        ...,
+        example="RUN-20241208-143022-123456",
+        description="ID de la ejecución"
+    )
+    status: str = Field(
+        "cancelled",
+        description="Nuevo estado de la ejecución (cancelled)"
+    )
+    message: str = Field(
+        ...,
+        example="Ejecución cancelada",
+        description="Mensaje informativo"
+    )
 
 
 class AgentStatusResponse(BaseModel):
@@ -172,7 +196,7 @@ class AgentStatusResponse(BaseModel):
     status: str = Field(
         ...,
         example="running",
-        description="Estado: pending, running, completed, failed"
+        description="Estado: pending, running, completed, failed, cancelled"
     )
     expediente_id: str = Field(
         ...,
@@ -256,7 +280,7 @@ class HealthResponse(BaseModel):
     status: str = Field(
         ...,
         example="healthy",
-        description="Estado general: healthy, unhealthy"
+        description="Estado general: healthy, degraded, unhealthy"
     )
     timestamp: str = Field(
         ...,
@@ -273,13 +297,18 @@ class HealthResponse(BaseModel):
         example={"mcp_expedientes": "healthy"},
         description="Estado de dependencias externas"
     )
+    mcp_servers: Dict[str, Dict[str, Any]] = Field(
+        default_factory=dict,
+        example={"expedientes": {"state": "closed", "limit": 20, "in_flight": 0}},
+        description="Circuit breaker y límite de concurrencia por servidor MCP"
+    )
 
 
 class WebhookPayload(BaseModel):
     """Payload enviado al webhook del BPMN"""
 
     agent_run_id: str = Field(..., description="ID de la ejecución")
-    status: str = Field(..., description="completed o failed")
+    status: str = Field(..., description="completed, failed o cancelled")
     success: bool = Field(..., description="True si éxito, False si error")
     timestamp: str = Field(..., description="Timestamp ISO 8601")
     resultado: Optional[Dict[str, Any]] = Field(None, description="Resultado si éxito")
@@ -5,25 +5,36 @@ Endpoints para ejecución y gestión de agentes.
 
 - POST /execute: Ejecuta un agente de forma asíncrona
 - GET /status/{agent_run_id}: Consulta estado de ejecución
+- DELETE /runs/{agent_run_id}: Cancela una ejecución
 - GET /agents: Lista agentes disponibles
 """
 
 import asyncio
+import hashlib
+import json
 import logging
 from datetime import datetime, timezone
 from typing import Optional
+
 from fastapi import APIRouter, Header, HTTPException, BackgroundTasks
 
 from ..models import (
     ExecuteAgentRequest,
     ExecuteAgentResponse,
     AgentStatusResponse,
+    CancelRunResponse,
     ListAgentsResponse,
     AgentInfo
 )
 from ..services.webhook import send_webhook
-from ..services.task_tracker import get_task_tracker
+from ..services.task_tracker import (
+    FINAL_STATUSES,
+    IdempotencyConflictError,
+    get_task_tracker
+)
+from backoffice.auth.jwt_validator import JWTClaims, JWTValidationError, validate_jwt
 from backoffice.executor_factory import create_default_executor
+from backoffice.mcp.deadline import Deadline
 from backoffice.models import AgentConfig
 from backoffice.settings import settings
 from backoffice.config import get_agent_loader
@@ -31,6 +42,35 @@ from backoffice.config import get_agent_loader
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+# Errores de JWT de un token válido pero sin acceso (403; el resto son 401)
+AUTH_FORBIDDEN_CODES = frozenset({
+    "AUTH_PERMISSION_DENIED",
+    "AUTH_EXPEDIENTE_MISMATCH",
+    "AUTH_INSUFFICIENT_PERMISSIONS",
+})
+
+
+def verify_run_token(token: str, expediente_id: str) -> JWTClaims:
+    """
+    Valida el JWT de una petición sobre una ejecución del expediente.
+
+    Args:
+        token: Token JWT (sin el prefijo "Bearer ")
+        expediente_id: Expediente al que debe dar acceso el token
+
+    Returns:
+        JWTClaims validados
+
+    Raises:
+        JWTValidationError: Si el token no es válido o es de otro expediente
+    """
+    return validate_jwt(
+        token,
+        secret=settings.JWT_SECRET,
+        algorithm=settings.JWT_ALGORITHM,
+        expected_expediente_id=expediente_id
+    )
+
 
 @router.get(
     "/agents",
@@ -77,7 +117,8 @@ async def list_agents():
 async def execute_agent(
     request: ExecuteAgentRequest,
     background_tasks: BackgroundTasks,
-    authorization: Optional[str] = Header(None)
+    authorization: Optional[str] = Header(None),
+    idempotency_key: Optional[str] = Header(None)
 ):
     """
     Ejecuta un agente de forma asíncrona.
@@ -92,10 +133,19 @@ async def execute_agent(
     1. Valida JWT presente
     2. Carga configuración del agente desde YAML
     3. Crea executor con DI
-    4. Registra tarea en tracker
+    4. Registra tarea en tracker (o la asocia a una ejecución idéntica)
     5. Inicia ejecución en background
     6. Retorna 202 Accepted inmediatamente
 
+    **Idempotencia:**
+    Un reintento del BPMN con la misma clave (header `Idempotency-Key`, o
+    la misma petición con el mismo JWT) no lanza otra ejecución: devuelve
+    el `agent_run_id` de la que sigue en curso o se completó con éxito
+    hace menos de AGENT_IDEMPOTENCY_WINDOW_SECONDS, con
+    `deduplicated=true`. El callback es el de la petición original.
+    Solo se deduplica con un JWT válido para el expediente: la clave
+    queda ligada a su emisor, subject y expediente.
+
     **Callback:**
     Si se especifica callback_url, cuando el agente termine (éxito o error),
     se enviará un POST con el resultado completo.
@@ -104,6 +154,7 @@ async def execute_agent(
     - 401: Token JWT ausente
     - 404: Agente no encontrado
     - 400: Request inválido (validación Pydantic)
+    - 422: Idempotency-Key reutilizada con otra petición
     """
 
     # 1. Validar JWT presente
@@ -146,18 +197,57 @@ async def execute_agent(
         system_prompt=agent_definition.system_prompt,
         modelo=agent_definition.model,
         herramientas=agent_definition.tools,
-        additional_goal=request.additional_goal  # Se interpola en {additional_goal} del goal
+        additional_goal=request.additional_goal,  # Se interpola en {additional_goal} del goal
+        prefetch=[call.model_dump() for call in agent_definition.prefetch]
     )
 
-    # 5. Generar run_id y registrar tarea
-    agent_run_id = f"RUN-{datetime.now(timezone.utc).strftime('%Y%m%d-%H%M%S-%f')}"
+    # 5. Generar run_id y registrar tarea (salvo petición repetida). Se
+    # registra con todo preparado: una ejecución que no llega a lanzarse
+    # no debe quedar pending capturando su clave de idempotencia
+    callback_url = str(request.callback_url) if request.callback_url else None
 
     task_tracker = get_task_tracker()
-    task_tracker.register(
-        agent_run_id=agent_run_id,
-        expediente_id=request.context.expediente_id,
-        tarea_id=request.context.tarea_id
-    )
+    agent_run_id = f"RUN-{datetime.now(timezone.utc).strftime('%Y%m%d-%H%M%S-%f')}"
+
+    try:
+        claims = verify_run_token(token, request.context.expediente_id)
+    except JWTValidationError as e:
+        # La ejecución fallará al validar el JWT (error en el callback);
+        # sin identidad verificada no se deduplica
+        logger.info(f"JWT no verificado, ejecución sin idempotencia: [{e.codigo}]")
+        claims = None
+
+    if claims is None:
+        task_tracker.register(agent_run_id, request.context.expediente_id, request.context.tarea_id)
+        created = True
+    else:
+        fingerprint = _request_fingerprint(request)
+        try:
+            agent_run_id, created = task_tracker.register_idempotent(
+                idempotency_key=_idempotency_key(idempotency_key, claims, fingerprint),
+                fingerprint=fingerprint,
+                window_seconds=settings.AGENT_IDEMPOTENCY_WINDOW_SECONDS,
+                agent_run_id=agent_run_id,
+                expediente_id=request.context.expediente_id,
+                tarea_id=request.context.tarea_id
+            )
+        except IdempotencyConflictError as e:
+            logger.warning(f"Idempotency-Key reutilizada con otra petición: {e}")
+            raise HTTPException(status_code=422, detail=str(e))
+
+    if not created:
+        logger.info(
+            f"Petición repetida asociada a la ejecución {agent_run_id} "
+            f"(expediente={request.context.expediente_id}, "
+            f"tarea={request.context.tarea_id}, "
+            f"agente={request.agent})"
+        )
+        return ExecuteAgentResponse(
+            agent_run_id=agent_run_id,
+            message="Ejecución de agente ya iniciada (petición repetida)",
+            callback_url=callback_url,
+            deduplicated=True
+        )
 
     logger.info(
         f"Agente registrado: {agent_run_id} "
@@ -166,22 +256,30 @@ async def execute_agent(
         f"agente={request.agent})"
     )
 
-    # 6. Determinar callback_url y timeout
-    callback_url = str(request.callback_url) if request.callback_url else None
+    # 6. Determinar timeout
     timeout_seconds = agent_definition.timeout_seconds
 
-    # 7. Ejecutar en background
-    background_tasks.add_task(
-        execute_and_callback,
-        executor=executor,
-        token=token,
-        expediente_id=request.context.expediente_id,
-        tarea_id=request.context.tarea_id,
-        agent_config=agent_config,
-        agent_run_id=agent_run_id,
-        callback_url=callback_url,
-        timeout_seconds=timeout_seconds
-    )
+    # 7. Ejecutar en background (si no llega a lanzarse, la ejecución
+    # queda failed y un reintento empieza una nueva)
+    try:
+        background_tasks.add_task(
+            execute_and_callback,
+            executor=executor,
+            token=token,
+            expediente_id=request.context.expediente_id,
+            tarea_id=request.context.tarea_id,
+            agent_config=agent_config,
+            agent_run_id=agent_run_id,
+            callback_url=callback_url,
+            timeout_seconds=timeout_seconds
+        )
+    except Exception as e:
+        task_tracker.mark_failed(agent_run_id, {
+            "codigo": "INTERNAL_ERROR",
+            "mensaje": f"Error interno del sistema: {type(e).__name__}",
+            "detalle": str(e)
+        })
+        raise
 
     # 8. Retornar 202 Accepted inmediatamente
     return ExecuteAgentResponse(
@@ -191,6 +289,34 @@ async def execute_agent(
     )
 
 
+def _request_fingerprint(request: ExecuteAgentRequest) -> str:
+    """Huella del contenido de un POST /execute (agente, contexto, goal y callback)"""
+    payload = json.dumps(request.model_dump(mode="json"), sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _idempotency_key(
+    header_key: Optional[str],
+    claims: JWTClaims,
+    fingerprint: str
+) -> str:
+    """
+    Clave de idempotencia de un POST /execute.
+
+    Con header Idempotency-Key, la clave del header dentro del ámbito del
+    token verificado (emisor, subject y expediente): un reintento con un
+    JWT renovado se deduplica, pero la misma clave de otro expediente no.
+    Sin header, se deriva del jti del JWT y del contenido de la petición
+    (un reintento del BPMN reenvía el mismo token).
+    """
+    if header_key:
+        material = "|".join((claims.iss, claims.sub, claims.exp_id, header_key))
+        return "header:" + hashlib.sha256(material.encode()).hexdigest()
+
+    material = "|".join((claims.jti, fingerprint))
+    return "derived:" + hashlib.sha256(material.encode()).hexdigest()
+
+
 async def execute_and_callback(
     executor,
     token: str,
@@ -218,16 +344,32 @@ async def execute_and_callback(
     """
     task_tracker = get_task_tracker()
 
+    # Plazo de la ejecución: se propaga a cada llamada MCP para que, al
+    # vencer, la ejecución deje de ocupar servidores MCP e hilos
+    deadline = Deadline(timeout_seconds)
+
     try:
+        # Cancelada antes de empezar
+        if task_tracker.is_cancelled(agent_run_id):
+            raise asyncio.CancelledError
+
         # Marcar como running
         task_tracker.mark_running(agent_run_id)
         logger.info(f"Ejecutando agente: {agent_run_id}")
 
-        # Ejecutar con timeout
-        result = await asyncio.wait_for(
-            executor.execute(token, expediente_id, tarea_id, agent_config),
-            timeout=timeout_seconds
+        # Ejecutar con timeout, en una tarea propia que DELETE /runs/{id} puede cancelar
+        execution = asyncio.create_task(
+            executor.execute(token, expediente_id, tarea_id, agent_config, deadline=deadline)
         )
+        task_tracker.attach(agent_run_id, execution, deadline)
+        result = await asyncio.wait_for(execution, timeout=deadline.remaining())
+
+        if deadline.cancelled:
+            raise asyncio.CancelledError
+
+        # Una llamada MCP cortada por el plazo es un timeout de la ejecución
+        if not result.success and result.error and result.error.codigo == "MCP_DEADLINE_EXCEEDED":
+            raise asyncio.TimeoutError
 
         # Marcar como completado
         task_tracker.mark_completed(agent_run_id, result)
@@ -246,6 +388,21 @@ async def execute_and_callback(
                     f"Webhook NO enviado (pero agente completó): {agent_run_id}"
                 )
 
+    except asyncio.CancelledError:
+        # Solo se absorbe la cancelación pedida con DELETE /runs/{id}
+        if not task_tracker.is_cancelled(agent_run_id):
+            raise
+
+        logger.warning(f"Ejecución cancelada: {agent_run_id}")
+
+        if callback_url:
+            await send_webhook(
+                callback_url,
+                agent_run_id,
+                error=task_tracker.get_status(agent_run_id)["error"],
+                status="cancelled"
+            )
+
     except asyncio.TimeoutError:
         # Timeout
         logger.error(
@@ -283,6 +440,9 @@ async def execute_and_callback(
         if callback_url:
             await send_webhook(callback_url, agent_run_id, error=error)
 
+    finally:
+        task_tracker.detach(agent_run_id)
+
 
 @router.get(
     "/status/{agent_run_id}",
@@ -316,3 +476,92 @@ async def get_agent_status(agent_run_id: str):
         )
 
     return AgentStatusResponse(**status)
+
+
+@router.delete(
+    "/runs/{agent_run_id}",
+    response_model=CancelRunResponse,
+    status_code=202,
+    tags=["Agent"],
+    summary="Cancelar ejecución",
+    description="Cancela una ejecución pendiente o en curso y libera sus recursos"
+)
+async def cancel_agent_run(
+    agent_run_id: str,
+    authorization: Optional[str] = Header(None)
+):
+    """
+    Cancela una ejecución de agente.
+
+    **Efectos:**
+    - La ejecución queda en estado `cancelled` inmediatamente
+    - Se cancela su tarea asyncio y se cierran sus clientes MCP
+    - Las llamadas MCP siguientes fallan al momento (RUN_CANCELLED) y un
+      crew de CrewAI aborta en su siguiente tool
+    - Si la ejecución tiene callback_url, se envía el callback con
+      status `cancelled`
+
+    **Autorización:**
+    El JWT debe ser válido (firma, fechas, emisor, audiencia) y estar
+    emitido para el expediente de la ejecución.
+
+    **Errores:**
+    - 401: Token JWT ausente o inválido
+    - 403: Token de otro expediente
+    - 404: agent_run_id no encontrado
+    - 409: La ejecución ya había terminado
+    """
+
+    if not authorization or not authorization.startswith("Bearer "):
+        logger.warning("Cancelación sin token JWT")
+        raise HTTPException(
+            status_code=401,
+            detail="Token JWT ausente. Header requerido: Authorization: Bearer <token>"
+        )
+
+    task_tracker = get_task_tracker()
+    status = task_tracker.get_status(agent_run_id)
+
+    if status is None:
+        logger.warning(f"Cancelación de ejecución inexistente: {agent_run_id}")
+        raise HTTPException(
+            status_code=404,
+            detail=f"agent_run_id no encontrado: {agent_run_id}"
+        )
+
+    try:
+        verify_run_token(authorization.replace("Bearer ", ""), status["expediente_id"])
+    except JWTValidationError as e:
+        logger.warning(f"Cancelación de {agent_run_id} rechazada: [{e.codigo}] {e.mensaje}")
+        raise HTTPException(
+            status_code=403 if e.codigo in AUTH_FORBIDDEN_CODES else 401,
+            detail=e.mensaje
+        )
+
+    error = {
+        "codigo": "RUN_CANCELLED",
+        "mensaje": "Ejecución cancelada",
+        "detalle": f"Cancelada mediante DELETE /api/v1/agent/runs/{agent_run_id}"
+    }
+
+    previous = task_tracker.cancel(agent_run_id, error)
+
+    if previous is None:
+        logger.warning(f"Cancelación de ejecución inexistente: {agent_run_id}")
+        raise HTTPException(
+            status_code=404,
+            detail=f"agent_run_id no encontrado: {agent_run_id}"
+        )
+
+    if previous in FINAL_STATUSES:
+        raise HTTPException(
+            status_code=409,
+            detail=f"La ejecución {agent_run_id} ya había terminado (status={previous})"
+        )
+
+    logger.warning(f"Ejecución cancelada: {agent_run_id} (estaba {previous})")
+
+    return CancelRunResponse(
+        agent_run_id=agent_run_id,
+        message=f"Ejecución cancelada (estaba {previous})"
+    )
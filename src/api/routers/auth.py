@@ -19,7 +19,7 @@ GENERACIÓN DE JWT:
 
 import logging
 from typing import List, Optional
-from fastapi import APIRouter, HTTPException, Header, Depends
+from fastapi import APIRouter, HTTPException, Header, Depends, Query
 from pydantic import BaseModel, Field
 
 from backoffice.settings import settings
@@ -174,6 +174,39 @@ async def verify_admin_token(authorization: str = Header(..., description="Beare
     return token
 
 
+async def verify_admin_token_header_or_query(
+    authorization: Optional[str] = Header(None, description="Bearer token de admin"),
+    token: Optional[str] = Query(None, description="Token de admin (alternativa al header)")
+):
+    """
+    Variante de verify_admin_token que acepta el token como query param.
+
+    EventSource (SSE) no permite enviar headers, por lo que los endpoints
+    de streaming aceptan `?token=<admin_token>` además del header.
+
+    Args:
+        authorization: Header Authorization con formato "Bearer <token>"
+        token: Token de admin en query string
+
+    Returns:
+        El token validado
+
+    Raises:
+        HTTPException 401: Si el token no es válido o falta
+    """
+    if authorization:
+        return await verify_admin_token(authorization)
+
+    if token != settings.API_ADMIN_TOKEN:
+        logger.warning("Token de admin inválido o ausente en endpoint protegido")
+        raise HTTPException(
+            status_code=401,
+            detail="Token de administración inválido"
+        )
+
+    return token
+
+
 # ============================================================================
 # Endpoints
 # ============================================================================
@@ -0,0 +1,306 @@
+# api/routers/dashboard.py
+
+"""
+Endpoints de métricas para el dashboard de administración.
+
+- GET /metrics: Métricas agregadas (DashboardMetrics del frontend)
+- GET /execution-history: Ejecuciones por hora
+- GET /pii-history: PII redactados por hora
+
+Todas las métricas se calculan desde los rollups del índice de logs
+(ejecuciones, niveles, PII por minuto), sin leer archivos de log.
+"""
+
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel, Field
+
+from src.api.routers.auth import verify_admin_token
+from src.api.routers.logs import get_index, resolve_window
+from src.backoffice.settings import settings
+from backoffice.config import get_agent_loader
+from backoffice.config.models import MCPServersConfig
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+# ============================================================================
+# Modelos
+# ============================================================================
+
+
+class ExecutionsByStatus(BaseModel):
+    """Ejecuciones por estado"""
+
+    success: int = 0
+    error: int = 0
+    in_progress: int = 0
+
+
+class PerformanceMetrics(BaseModel):
+    """Duración de las ejecuciones de agentes (ms)"""
+
+    avg_response_time: float = 0
+    mcp_calls_per_second: float = Field(
+        0, description="No disponible desde logs de auditoría (siempre 0)"
+    )
+    latency_p50: float = 0
+    latency_p95: float = 0
+    latency_p99: float = 0
+
+
+class DashboardMetricsResponse(BaseModel):
+    """Métricas del dashboard (tipo DashboardMetrics del frontend)"""
+
+    total_executions: int
+    executions_today: int
+    executions_week: int
+    executions_month: int
+    success_rate: float = Field(..., description="Porcentaje sobre ejecuciones finalizadas")
+    avg_execution_time: float = Field(..., description="Segundos (ejecuciones exitosas)")
+    executions_by_agent: Dict[str, int]
+    executions_by_status: ExecutionsByStatus
+
+    mcp_servers_status: Dict[str, str]
+    mcp_tools_available: int = Field(
+        0, description="No disponible desde logs de auditoría (siempre 0)"
+    )
+    external_services_status: Dict[str, str] = {}
+
+    pii_redacted: Dict[str, int]
+    pii_redacted_total: int
+
+    performance: PerformanceMetrics
+    timestamp: str
+
+
+class ExecutionHistoryPoint(BaseModel):
+    """Ejecuciones iniciadas en un bucket horario"""
+
+    timestamp: str
+    total: int = 0
+    success: int = 0
+    error: int = 0
+    in_progress: int = 0
+
+
+class PIIHistoryPoint(BaseModel):
+    """PII redactados en un bucket horario"""
+
+    timestamp: str
+    DNI: int = 0
+    NIE: int = 0
+    email: int = 0
+    telefono: int = 0
+    IBAN: int = 0
+    other: int = 0
+
+
+# Claves de PII del frontend (PIIRedacted) por tipo de PIIRedactor
+PII_DASHBOARD_KEYS = {
+    "dni": "DNI",
+    "nie": "NIE",
+    "email": "email",
+    "telefono_movil": "telefono_movil",
+    "telefono_fijo": "telefono_fijo",
+    "iban": "IBAN",
+    "tarjeta": "tarjeta",
+    "ccc": "CCC",
+}
+
+# Agrupación de PII en el histórico (PIIHistoryPoint)
+PII_HISTORY_KEYS = {
+    "dni": "DNI",
+    "nie": "NIE",
+    "email": "email",
+    "telefono_movil": "telefono",
+    "telefono_fijo": "telefono",
+    "iban": "IBAN",
+    "tarjeta": "other",
+    "ccc": "other",
+}
+
+
+# ============================================================================
+# Utilidades
+# ============================================================================
+
+
+def get_dashboard_index():
+    """
+    Obtiene el índice de logs del que se sirven las métricas.
+
+    Raises:
+        HTTPException 503: Si el índice de logs está deshabilitado
+    """
+    if not settings.LOG_INDEX_ENABLED:
+        raise HTTPException(
+            status_code=503,
+            detail="Métricas no disponibles: requiere LOG_INDEX_ENABLED"
+        )
+    index = get_index()
+    index.refresh_if_stale(settings.LOG_INDEX_REFRESH_SECONDS)
+    return index
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Percentil por rango más cercano sobre una lista ordenada"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def load_mcp_servers_status() -> Dict[str, str]:
+    """Estado configurado de los servidores MCP (enabled -> active)"""
+    try:
+        config = MCPServersConfig.load_from_file(settings.MCP_CONFIG_PATH)
+    except Exception as e:
+        logger.warning(f"No se pudo cargar la configuración MCP: {e}")
+        return {}
+    return {
+        server.id: "active" if server.enabled else "inactive"
+        for server in config.mcp_servers
+    }
+
+
+# ============================================================================
+# Endpoints
+# ============================================================================
+
+
+@router.get(
+    "/metrics",
+    response_model=DashboardMetricsResponse,
+    dependencies=[Depends(verify_admin_token)],
+    summary="Métricas del dashboard",
+)
+def get_dashboard_metrics(
+    start: Optional[datetime] = Query(None, description="Inicio de la ventana (default: hace 30 días)"),
+    end: Optional[datetime] = Query(None, description="Fin de la ventana (default: ahora)"),
+    agent_type: Optional[str] = Query(None, description="Filtrar por agente"),
+):
+    """
+    Métricas agregadas de ejecuciones de agentes.
+
+    `total_executions` y `executions_today/week/month` son absolutos; el
+    resto se calcula sobre la ventana [start, end].
+
+    Las ejecuciones y su estado se derivan de los logs de auditoría
+    (rollup por agent_run_id mantenido al indexar).
+    """
+    index = get_dashboard_index()
+    now = datetime.now(timezone.utc)
+    start, end = resolve_window(start, end, timedelta(days=30))
+
+    runs = index.runs(start, end)
+    if agent_type:
+        runs = [run for run in runs if run["agent"] == agent_type]
+
+    by_status = ExecutionsByStatus()
+    by_agent: Dict[str, int] = {agent.name: 0 for agent in get_agent_loader().list_agents()}
+    durations = []
+
+    for run in runs:
+        setattr(by_status, run["status"], getattr(by_status, run["status"]) + 1)
+        if run["agent"]:
+            by_agent[run["agent"]] = by_agent.get(run["agent"], 0) + 1
+        if run["status"] == "success" and run["duration"] is not None:
+            durations.append(run["duration"])
+
+    finished = by_status.success + by_status.error
+    durations.sort()
+    durations_ms = [d * 1000 for d in durations]
+
+    pii_redacted = {key: 0 for key in PII_DASHBOARD_KEYS.values()}
+    window_seconds = int((end - start).total_seconds()) + 60
+    for _, pii_type, count in index.pii_stats(start, end, bucket_seconds=window_seconds):
+        pii_redacted[PII_DASHBOARD_KEYS.get(pii_type, pii_type)] += count
+
+    start_of_day = now.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    return DashboardMetricsResponse(
+        total_executions=index.run_count(),
+        executions_today=index.count_runs_since(start_of_day),
+        executions_week=index.count_runs_since(now - timedelta(days=7)),
+        executions_month=index.count_runs_since(now - timedelta(days=30)),
+        success_rate=round(by_status.success / finished * 100, 2) if finished else 0.0,
+        avg_execution_time=round(sum(durations) / len(durations), 3) if durations else 0.0,
+        executions_by_agent=by_agent,
+        executions_by_status=by_status,
+        mcp_servers_status=load_mcp_servers_status(),
+        pii_redacted=pii_redacted,
+        pii_redacted_total=sum(pii_redacted.values()),
+        performance=PerformanceMetrics(
+            avg_response_time=round(sum(durations_ms) / len(durations_ms), 1) if durations_ms else 0,
+            latency_p50=round(percentile(durations_ms, 50), 1),
+            latency_p95=round(percentile(durations_ms, 95), 1),
+            latency_p99=round(percentile(durations_ms, 99), 1),
+        ),
+        timestamp=now.isoformat(),
+    )
+
+
+@router.get(
+    "/execution-history",
+    response_model=List[ExecutionHistoryPoint],
+    dependencies=[Depends(verify_admin_token)],
+    summary="Histórico de ejecuciones por hora",
+)
+def get_execution_history(
+    hours: int = Query(24, ge=1, le=24 * 90, description="Horas hacia atrás"),
+):
+    """
+    Ejecuciones iniciadas por hora y estado en las últimas `hours` horas.
+    """
+    index = get_dashboard_index()
+    end = datetime.now(timezone.utc)
+    start = (end - timedelta(hours=hours)).replace(minute=0, second=0, microsecond=0)
+
+    points: Dict[int, ExecutionHistoryPoint] = {}
+    for run in index.runs(start, end):
+        hour = int(run["started"] // 3600) * 3600
+        point = points.get(hour)
+        if point is None:
+            point = ExecutionHistoryPoint(
+                timestamp=datetime.fromtimestamp(hour, tz=timezone.utc).isoformat()
+            )
+            points[hour] = point
+        point.total += 1
+        setattr(point, run["status"], getattr(point, run["status"]) + 1)
+
+    return [points[hour] for hour in sorted(points)]
+
+
+@router.get(
+    "/pii-history",
+    response_model=List[PIIHistoryPoint],
+    dependencies=[Depends(verify_admin_token)],
+    summary="Histórico de PII redactados por hora",
+)
+def get_pii_history(
+    hours: int = Query(24, ge=1, le=24 * 90, description="Horas hacia atrás"),
+):
+    """
+    PII redactados por hora y tipo en las últimas `hours` horas.
+    """
+    index = get_dashboard_index()
+    end = datetime.now(timezone.utc)
+    start = (end - timedelta(hours=hours)).replace(minute=0, second=0, microsecond=0)
+
+    points: Dict[int, PIIHistoryPoint] = {}
+    for bucket, pii_type, count in index.pii_stats(start, end, bucket_seconds=3600):
+        point = points.get(bucket)
+        if point is None:
+            point = PIIHistoryPoint(
+                timestamp=datetime.fromtimestamp(bucket, tz=timezone.utc).isoformat()
+            )
+            points[bucket] = point
+        key = PII_HISTORY_KEYS.get(pii_type, "other")
+        setattr(point, key, getattr(point, key) + count)
+
+    return [points[bucket] for bucket in sorted(points)]
@@ -11,6 +11,7 @@ from datetime import datetime, timezone
 import httpx
 
 from ..models import HealthResponse
+from backoffice.mcp.resilience import OPEN, get_server_guards
 from backoffice.settings import settings
 
 router = APIRouter()
@@ -29,25 +30,35 @@ async def health_check():
 
     Verifica:
     - API funcionando
-    - Conectividad con MCP servers (opcional)
+    - Estado del circuit breaker de cada servidor MCP que ya ha recibido
+      llamadas (sin hacer requests: es el estado observado por el back office)
+
+    Si algún circuito está abierto, el estado general es "degraded".
     """
 
     version = "1.0.0"
     timestamp = datetime.now(timezone.utc).isoformat()
 
-    # Check MCP servers (opcional, puede ser costoso)
-    # Por ahora solo retornamos "not_checked"
     dependencies = {
         "mcp_expedientes": "not_checked",
         "database": "not_applicable"
     }
 
-    # TODO: En producción, podríamos hacer ping a los MCP servers
-    # Para esto necesitaríamos parsear mcp_servers.yaml y hacer requests
+    mcp_servers = {
+        server_id: guard.snapshot()
+        for server_id, guard in sorted(get_server_guards().items())
+    }
+    for server_id, snapshot in mcp_servers.items():
+        dependencies[f"mcp_{server_id}"] = snapshot["state"]
+
+    status = "healthy"
+    if any(snapshot["state"] == OPEN for snapshot in mcp_servers.values()):
+        status = "degraded"
 
     return HealthResponse(
-        status="healthy",
+        status=status,
         timestamp=timestamp,
         version=version,
-        dependencies=dependencies
+        dependencies=dependencies,
+        mcp_servers=mcp_servers
     )
@@ -2,17 +2,30 @@
 Router de logs del sistema.
 
 Proporciona endpoints para consultar logs de ejecuciones de agentes.
+
+- GET /api/v1/logs: Consulta paginada con filtros
+- GET /api/v1/logs/export: Exportación masiva (NDJSON/CSV, opcional gzip)
+- GET /api/v1/logs/stats: Conteos agregados (rollups por minuto)
+- GET /api/v1/logs/stream: Streaming en tiempo real (SSE)
 """
 
+import csv
+import io
 import json
-from pathlib import Path
-from datetime import datetime
-from typing import List, Optional
-from fastapi import APIRouter, Depends, Query, HTTPException
+import zlib
+from dataclasses import astuple
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, Dict, Iterator, List, Literal, Optional
+from fastapi import APIRouter, Depends, Header, Query, HTTPException, Request
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel, Field
 
-from src.api.routers.auth import verify_admin_token
+from src.api.routers.auth import verify_admin_token, verify_admin_token_header_or_query
 from src.backoffice.settings import settings
+from ..services.log_cache import ResponseCache
+from ..services.log_index import LogFilters, encode_cursor, get_log_index, parse_cursor
+from ..services.log_scan import LogMatcher, get_log_scanner
+from ..services.log_stream import LogBroadcaster, LogSubscription, get_log_broadcaster
 
 
 router = APIRouter(prefix="/api/v1/logs", tags=["logs"])
@@ -56,146 +69,45 @@ class LogsResponse(BaseModel):
     page: int
     page_size: int
     has_more: bool
+    next_cursor: Optional[str] = Field(
+        None,
+        description="Cursor para la página siguiente (parámetro `after`); None si no hay más"
+    )
 
 
-# ============================================================================
-# Servicio de Logs
-# ============================================================================
-
+class LogStatsBucket(BaseModel):
+    """Conteos de un bucket temporal"""
 
-def read_all_logs(log_dir: Path) -> List[dict]:
-    """
-    Lee todos los archivos de log del directorio de agent_runs.
+    timestamp: str
+    total: int
+    by_level: Dict[str, int]
 
-    Args:
-        log_dir: Directorio base de logs
 
-    Returns:
-        Lista de logs parseados
-    """
-    all_logs = []
-
-    if not log_dir.exists():
-        return all_logs
-
-    # Recorrer todos los subdirectorios (expedientes) y archivos de log
-    for expediente_dir in log_dir.iterdir():
-        if not expediente_dir.is_dir():
-            continue
-
-        for log_file in expediente_dir.glob("*.log"):
-            try:
-                with open(log_file, "r", encoding="utf-8") as f:
-                    for line_num, line in enumerate(f, 1):
-                        line = line.strip()
-                        if not line:
-                            continue
-
-                        try:
-                            log_entry = json.loads(line)
-                            # Añadir ID único basado en archivo y línea
-                            log_entry["id"] = f"{log_file.stem}-{line_num}"
-                            all_logs.append(log_entry)
-                        except json.JSONDecodeError:
-                            # Ignorar líneas mal formadas
-                            continue
-            except Exception:
-                # Ignorar archivos que no se puedan leer
-                continue
+class LogStatsResponse(BaseModel):
+    """Estadísticas agregadas de logs en una ventana temporal"""
 
-    return all_logs
+    date_from: str
+    date_to: str
+    bucket: str
+    total: int
+    by_level: Dict[str, int]
+    by_agent: Dict[str, int]
+    by_expediente: Dict[str, int] = Field(
+        ..., description="Expedientes con más entradas (limitado por `top`)"
+    )
+    timeline: List[LogStatsBucket]
 
 
-def filter_logs(
-    logs: List[dict],
-    level: Optional[str] = None,
-    component: Optional[str] = None,
-    agent: Optional[str] = None,
-    expediente_id: Optional[str] = None,
-    date_from: Optional[datetime] = None,
-    date_to: Optional[datetime] = None,
-    search: Optional[str] = None,
-) -> List[dict]:
-    """
-    Filtra logs según criterios.
+# Páginas recientes de GET /api/v1/logs, por (generación, consulta)
+logs_cache = ResponseCache(settings.LOG_CACHE_SIZE)
 
-    Args:
-        logs: Lista de logs a filtrar
-        level: Niveles de log separados por comas (ej: "INFO,ERROR")
-        component: Componentes separados por comas
-        agent: Agentes separados por comas
-        expediente_id: ID de expediente (búsqueda parcial)
-        date_from: Fecha desde
-        date_to: Fecha hasta
-        search: Texto de búsqueda en mensaje y metadata
+# Tamaño de bucket del timeline en segundos
+STATS_BUCKETS = {"minute": 60, "hour": 3600, "day": 86400}
 
-    Returns:
-        Lista de logs filtrados
-    """
-    filtered = logs
-
-    # Filtro por nivel
-    if level:
-        levels = [l.strip().upper() for l in level.split(",")]
-        filtered = [log for log in filtered if log.get("level", "").upper() in levels]
-
-    # Filtro por componente
-    if component:
-        components = [c.strip() for c in component.split(",")]
-        filtered = [log for log in filtered if log.get("component", "AgentExecutor") in components]
-
-    # Filtro por agente (puede venir en metadata)
-    if agent:
-        agents = [a.strip() for a in agent.split(",")]
-        filtered = [
-            log
-            for log in filtered
-            if log.get("agent") in agents
-            or (log.get("metadata") and log["metadata"].get("agent") in agents)
-        ]
-
-    # Filtro por expediente_id (búsqueda parcial case-insensitive)
-    if expediente_id:
-        exp_lower = expediente_id.lower()
-        filtered = [
-            log
-            for log in filtered
-            if log.get("expediente_id")
-            and exp_lower in log["expediente_id"].lower()
-        ]
-
-    # Filtro por rango de fechas
-    if date_from:
-        filtered = [
-            log
-            for log in filtered
-            if datetime.fromisoformat(log["timestamp"].replace("Z", "+00:00")) >= date_from
-        ]
-
-    if date_to:
-        filtered = [
-            log
-            for log in filtered
-            if datetime.fromisoformat(log["timestamp"].replace("Z", "+00:00")) <= date_to
-        ]
-
-    # Búsqueda de texto completo
-    if search:
-        search_lower = search.lower()
-        filtered = [
-            log
-            for log in filtered
-            if (
-                search_lower in log.get("mensaje", "").lower()
-                or (
-                    log.get("metadata")
-                    and search_lower in json.dumps(log["metadata"]).lower()
-                )
-                or (log.get("error") and search_lower in str(log.get("error")).lower())
-            )
-        ]
 
-    return filtered
+# ============================================================================
+# Servicio de Logs
+# ============================================================================
 
 
 def map_log_to_response(log: dict) -> LogEntryResponse:
@@ -239,10 +151,55 @@ def map_log_to_response(log: dict) -> LogEntryResponse:
 # ============================================================================
 
 
+def get_index():
+    """
+    Obtiene el índice de logs configurado para LOG_DIR.
+
+    Returns:
+        LogIndex compartido
+    """
+    return get_log_index(settings.LOG_DIR, settings.LOG_INDEX_PATH or None)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Comprueba un header If-None-Match contra el ETag actual.
+
+    Args:
+        if_none_match: Valor del header (lista separada por comas o "*")
+        etag: ETag actual (entre comillas)
+
+    Returns:
+        True si el cliente ya tiene la versión actual
+    """
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+
+def get_scanner():
+    """
+    Obtiene el escáner de archivos para LOG_DIR (modo sin índice).
+
+    Returns:
+        LogScanner compartido
+    """
+    return get_log_scanner(settings.LOG_DIR, settings.LOG_SCAN_WORKERS)
+
+
 @router.get("", response_model=LogsResponse, dependencies=[Depends(verify_admin_token)])
-async def get_logs(
-    page: int = Query(1, ge=1, description="Número de página"),
+def get_logs(
+    response: Response,
+    page: int = Query(
+        1, ge=1,
+        description="Número de página (compatibilidad; lento en páginas profundas, usar `after`)"
+    ),
     page_size: int = Query(50, ge=1, le=500, description="Tamaño de página"),
+    after: Optional[str] = Query(
+        None,
+        description="Cursor `<timestamp>,<id>` (next_cursor de la respuesta anterior)"
+    ),
     level: Optional[str] = Query(None, description="Niveles de log (separados por comas)"),
     component: Optional[str] = Query(None, description="Componentes (separados por comas)"),
     agent: Optional[str] = Query(None, description="Agentes (separados por comas)"),
@@ -250,6 +207,7 @@ async def get_logs(
     date_from: Optional[datetime] = Query(None, description="Fecha desde (ISO 8601)"),
     date_to: Optional[datetime] = Query(None, description="Fecha hasta (ISO 8601)"),
     search: Optional[str] = Query(None, description="Búsqueda de texto completo"),
+    if_none_match: Optional[str] = Header(None),
 ):
     """
     Obtiene logs del sistema con filtros y paginación.
@@ -264,21 +222,42 @@ async def get_logs(
     - `date_from`, `date_to`: Rango de fechas en formato ISO 8601
     - `search`: Búsqueda de texto en mensaje y contexto
 
+    **Paginación:**
+    - `after`: Paginación por cursor (recomendada). Se pasa el `next_cursor`
+      de la respuesta anterior; cada página lee solo `page_size` entradas y
+      no se desplaza al llegar logs nuevos. Si se indica, `page` se ignora.
+    - `page`: Paginación por número de página (ruta lenta, se mantiene por
+      compatibilidad).
+
+    Las consultas se resuelven contra el índice incremental de logs
+    (LOG_INDEX_ENABLED). Sin índice se escanean los archivos de LOG_DIR.
+
+    **Caché:**
+    La respuesta lleva un `ETag` derivado de la generación del almacén de
+    logs (cambia con cada escritura). Con `If-None-Match` y sin logs
+    nuevos se responde 304 sin ejecutar la consulta. Las páginas recientes
+    se guardan en una caché en proceso invalidada por la generación.
+
     **Ejemplo:**
     ```
     GET /api/v1/logs?level=ERROR,CRITICAL&expediente_id=EXP-2024-001&page=1&page_size=50
+    GET /api/v1/logs?level=ERROR&page_size=50&after=2024-01-15T10:00:00+00:00,RUN-001-3
     ```
 
     Returns:
         Respuesta paginada con logs filtrados
     """
-    # Leer todos los logs
-    log_dir = Path(settings.LOG_DIR)
-    all_logs = read_all_logs(log_dir)
+    cursor = None
+    if after:
+        try:
+            cursor = parse_cursor(after)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        page = 1
+
+    start_idx = (page - 1) * page_size
 
-    # Filtrar logs
-    filtered_logs = filter_logs(
-        all_logs,
+    filters = LogFilters(
         level=level,
         component=component,
         agent=agent,
@@ -288,24 +267,446 @@ async def get_logs(
         search=search,
     )
 
-    # Ordenar por timestamp descendente (más reciente primero)
-    filtered_logs.sort(
-        key=lambda x: x.get("timestamp", ""), reverse=True
-    )
+    if settings.LOG_INDEX_ENABLED:
+        # El indexador en background mantiene el índice al día; si no está
+        # corriendo (p.ej. tests o worker sin lifespan) se refresca aquí.
+        index = get_index()
+        index.refresh_if_stale(settings.LOG_INDEX_REFRESH_SECONDS)
+        generation = f"i{index.generation()}"
+    else:
+        scanner = get_scanner()
+        generation = f"s{scanner.generation()}"
+
+    # El contenido de una URL solo depende de la generación del almacén
+    etag = f'"{generation}"'
+    cache_headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=cache_headers)
+    response.headers.update(cache_headers)
+
+    cache_key = (settings.LOG_DIR, generation, start_idx, page_size, cursor, astuple(filters))
+    cached = logs_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    # Se pide una entrada extra para saber si hay más páginas
+    if settings.LOG_INDEX_ENABLED:
+        total = index.count(filters)
+        paginated_logs = index.query(
+            filters, limit=page_size + 1, offset=start_idx, after=cursor
+        )
+    else:
+        total, paginated_logs = scanner.query(
+            filters, limit=page_size + 1, offset=start_idx, after=cursor
+        )
 
-    # Paginación
-    total = len(filtered_logs)
-    start_idx = (page - 1) * page_size
-    end_idx = start_idx + page_size
-    paginated_logs = filtered_logs[start_idx:end_idx]
+    has_more = len(paginated_logs) > page_size
+    paginated_logs = paginated_logs[:page_size]
 
     # Mapear a formato de respuesta
     response_logs = [map_log_to_response(log) for log in paginated_logs]
 
-    return LogsResponse(
+    logs_response = LogsResponse(
         logs=response_logs,
         total=total,
         page=page,
         page_size=page_size,
-        has_more=end_idx < total,
+        has_more=has_more,
+        next_cursor=encode_cursor(paginated_logs[-1]) if has_more else None,
+    )
+    logs_cache.put(cache_key, logs_response)
+    return logs_response
+
+
+
+# ============================================================================
+# Exportación
+# ============================================================================
+
+# Columnas del CSV de exportación
+EXPORT_CSV_COLUMNS = [
+    "id", "timestamp", "level", "component", "agent", "expediente_id",
+    "agent_run_id", "message", "duration_ms", "context", "error",
+]
+
+# Entradas por lote al leer del índice / bytes por chunk enviado
+EXPORT_BATCH_SIZE = 1000
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+
+def iter_export_logs(
+    level: Optional[str] = None,
+    component: Optional[str] = None,
+    agent: Optional[str] = None,
+    expediente_id: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    search: Optional[str] = None,
+) -> Iterator[dict]:
+    """
+    Recorre los logs a exportar sin cargarlos en memoria.
+
+    Con índice se recorre en lotes por cursor (más reciente primero). Sin
+    índice se filtra archivo a archivo, sin orden global.
+
+    Yields:
+        Logs en formato interno
+    """
+    filters = LogFilters(
+        level=level,
+        component=component,
+        agent=agent,
+        expediente_id=expediente_id,
+        date_from=date_from,
+        date_to=date_to,
+        search=search,
+    )
+
+    if settings.LOG_INDEX_ENABLED:
+        index = get_index()
+        index.refresh_if_stale(settings.LOG_INDEX_REFRESH_SECONDS)
+        yield from index.iter_entries(filters, batch_size=EXPORT_BATCH_SIZE)
+    else:
+        yield from get_scanner().iter_entries(filters)
+
+
+def format_export_ndjson(logs: Iterator[dict]) -> Iterator[str]:
+    """Serializa logs como NDJSON (una entrada LogEntryResponse por línea)"""
+    for log in logs:
+        yield map_log_to_response(log).model_dump_json() + "\n"
+
+
+def format_export_csv(logs: Iterator[dict]) -> Iterator[str]:
+    """Serializa logs como CSV (cabecera + una fila por entrada)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow(EXPORT_CSV_COLUMNS)
+    yield buffer.getvalue()
+
+    for log in logs:
+        buffer.seek(0)
+        buffer.truncate()
+
+        entry = map_log_to_response(log)
+        writer.writerow([
+            entry.id,
+            entry.timestamp,
+            entry.level,
+            entry.component,
+            entry.agent or "",
+            entry.expediente_id or "",
+            entry.agent_run_id or "",
+            entry.message,
+            "" if entry.duration_ms is None else entry.duration_ms,
+            json.dumps(entry.context, ensure_ascii=False) if entry.context else "",
+            entry.error.model_dump_json() if entry.error else "",
+        ])
+        yield buffer.getvalue()
+
+
+def encode_export_chunks(lines: Iterator[str], gzip: bool) -> Iterator[bytes]:
+    """
+    Agrupa las líneas en chunks de ~EXPORT_CHUNK_BYTES y opcionalmente comprime.
+
+    La compresión gzip se hace al vuelo con zlib (memoria constante).
+
+    Args:
+        lines: Líneas serializadas
+        gzip: Si True, comprime en formato gzip
+
+    Yields:
+        Bloques de bytes a enviar
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if gzip else None
+    pending: List[bytes] = []
+    pending_size = 0
+
+    def flush() -> bytes:
+        data = b"".join(pending)
+        pending.clear()
+        return compressor.compress(data) if compressor else data
+
+    for line in lines:
+        encoded = line.encode("utf-8")
+        pending.append(encoded)
+        pending_size += len(encoded)
+        if pending_size >= EXPORT_CHUNK_BYTES:
+            pending_size = 0
+            chunk = flush()
+            if chunk:
+                yield chunk
+
+    chunk = flush()
+    if compressor:
+        chunk += compressor.flush()
+    if chunk:
+        yield chunk
+
+
+@router.get("/export", dependencies=[Depends(verify_admin_token)])
+def export_logs(
+    format: Literal["ndjson", "csv"] = Query("ndjson", description="Formato de exportación"),
+    gzip: bool = Query(False, description="Comprimir la respuesta con gzip"),
+    level: Optional[str] = Query(None, description="Niveles de log (separados por comas)"),
+    component: Optional[str] = Query(None, description="Componentes (separados por comas)"),
+    agent: Optional[str] = Query(None, description="Agentes (separados por comas)"),
+    expediente_id: Optional[str] = Query(None, description="ID de expediente (búsqueda parcial)"),
+    date_from: Optional[datetime] = Query(None, description="Fecha desde (ISO 8601)"),
+    date_to: Optional[datetime] = Query(None, description="Fecha hasta (ISO 8601)"),
+    search: Optional[str] = Query(None, description="Búsqueda de texto completo"),
+):
+    """
+    Exporta logs filtrados para auditoría (RGPD/ENS).
+
+    Requiere autenticación con token de administrador. Acepta los mismos
+    filtros que GET /api/v1/logs.
+
+    La respuesta se genera en streaming: las entradas se leen del índice
+    en lotes y se serializan (y comprimen, si `gzip=true`) al vuelo, con
+    memoria constante independientemente del número de entradas.
+
+    **Ejemplo:**
+    ```
+    GET /api/v1/logs/export?format=csv&gzip=true&expediente_id=EXP-2024-001
+    ```
+
+    Returns:
+        StreamingResponse con el archivo de exportación
+    """
+    logs = iter_export_logs(
+        level=level,
+        component=component,
+        agent=agent,
+        expediente_id=expediente_id,
+        date_from=date_from,
+        date_to=date_to,
+        search=search,
+    )
+    lines = format_export_csv(logs) if format == "csv" else format_export_ndjson(logs)
+
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    filename = f"logs-{datetime.now(timezone.utc).strftime('%Y%m%d-%H%M%S')}.{format}"
+    if gzip:
+        media_type = "application/gzip"
+        filename += ".gz"
+
+    return StreamingResponse(
+        encode_export_chunks(lines, gzip=gzip),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+# ============================================================================
+# Estadísticas
+# ============================================================================
+
+
+def resolve_window(
+    date_from: Optional[datetime],
+    date_to: Optional[datetime],
+    default: timedelta
+) -> tuple:
+    """
+    Completa una ventana temporal (por defecto, la última `default` hasta ahora).
+
+    Returns:
+        Tupla (date_from, date_to) con zona horaria
+    """
+    date_to = date_to or datetime.now(timezone.utc)
+    date_from = date_from or date_to - default
+    if date_to.tzinfo is None:
+        date_to = date_to.replace(tzinfo=timezone.utc)
+    if date_from.tzinfo is None:
+        date_from = date_from.replace(tzinfo=timezone.utc)
+    return date_from, date_to
+
+
+@router.get("/stats", response_model=LogStatsResponse, dependencies=[Depends(verify_admin_token)])
+def get_log_stats(
+    date_from: Optional[datetime] = Query(None, description="Fecha desde (ISO 8601, default: hace 24h)"),
+    date_to: Optional[datetime] = Query(None, description="Fecha hasta (ISO 8601, default: ahora)"),
+    bucket: Literal["minute", "hour", "day"] = Query("hour", description="Granularidad del timeline"),
+    top: int = Query(20, ge=1, le=500, description="Máximo de expedientes en by_expediente"),
+):
+    """
+    Conteos de logs por nivel, agente, expediente y bucket temporal.
+
+    Requiere autenticación con token de administrador.
+
+    Se sirve desde rollups por minuto mantenidos por el índice al indexar
+    cada entrada: el tiempo de respuesta depende de la ventana consultada,
+    no del histórico acumulado.
+
+    **Ejemplo:**
+    ```
+    GET /api/v1/logs/stats?date_from=2024-01-15T00:00:00Z&bucket=hour
+    ```
+
+    Returns:
+        Estadísticas agregadas de la ventana
+    """
+    if not settings.LOG_INDEX_ENABLED:
+        raise HTTPException(
+            status_code=503,
+            detail="Estadísticas de logs no disponibles: requiere LOG_INDEX_ENABLED"
+        )
+
+    date_from, date_to = resolve_window(date_from, date_to, timedelta(hours=24))
+
+    index = get_index()
+    index.refresh_if_stale(settings.LOG_INDEX_REFRESH_SECONDS)
+    stats = index.log_stats(date_from, date_to, bucket_seconds=STATS_BUCKETS[bucket], top=top)
+
+    return LogStatsResponse(
+        date_from=date_from.isoformat(),
+        date_to=date_to.isoformat(),
+        bucket=bucket,
+        **stats,
+    )
+
+
+def format_sse(data: dict, event_id: Optional[int] = None) -> str:
+    """
+    Formatea un mensaje Server-Sent Events.
+
+    Args:
+        data: Payload JSON (LogsStreamMessage del frontend)
+        event_id: ID del evento (para Last-Event-ID)
+
+    Returns:
+        Mensaje SSE terminado en línea en blanco
+    """
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"data: {json.dumps(data, ensure_ascii=False)}")
+    return "\n".join(lines) + "\n\n"
+
+
+async def log_event_stream(
+    request: Request,
+    broadcaster: LogBroadcaster,
+    subscription: LogSubscription,
+    ping_seconds: float,
+) -> AsyncIterator[str]:
+    """
+    Genera los mensajes SSE de una suscripción hasta que el cliente se desconecta.
+
+    Args:
+        request: Request HTTP (para detectar desconexión)
+        broadcaster: Broadcaster del que se recibe la suscripción
+        subscription: Suscripción del cliente
+        ping_seconds: Intervalo de keep-alive sin tráfico
+
+    Yields:
+        Mensajes SSE
+    """
+    try:
+        # Reintento del EventSource tras una desconexión (ms)
+        yield "retry: 3000\n\n"
+
+        if subscription.resume_truncated:
+            yield format_sse({
+                "type": "dropped",
+                "message": "Reanudación parcial: el último evento recibido es demasiado antiguo",
+            })
+
+        while not await request.is_disconnected():
+            event = await subscription.get(timeout=ping_seconds)
+
+            dropped = subscription.take_dropped()
+            if dropped:
+                yield format_sse({
+                    "type": "dropped",
+                    "count": dropped,
+                    "message": f"{dropped} logs descartados (cliente lento)",
+                })
+
+            if event is None:
+                yield format_sse({"type": "ping"})
+                continue
+
+            rowid, log = event
+            yield format_sse(
+                {"type": "log", "data": map_log_to_response(log).model_dump()},
+                event_id=rowid,
+            )
+    finally:
+        broadcaster.unsubscribe(subscription)
+
+
+@router.get(
+    "/stream",
+    dependencies=[Depends(verify_admin_token_header_or_query)],
+    response_class=StreamingResponse,
+)
+async def stream_logs(
+    request: Request,
+    level: Optional[str] = Query(None, description="Niveles de log (separados por comas)"),
+    component: Optional[str] = Query(None, description="Componentes (separados por comas)"),
+    agent: Optional[str] = Query(None, description="Agentes (separados por comas)"),
+    expediente_id: Optional[str] = Query(None, description="ID de expediente (búsqueda parcial)"),
+    date_from: Optional[datetime] = Query(None, description="Fecha desde (ISO 8601)"),
+    date_to: Optional[datetime] = Query(None, description="Fecha hasta (ISO 8601)"),
+    search: Optional[str] = Query(None, description="Búsqueda de texto completo"),
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID"),
+):
+    """
+    Streaming de logs en tiempo real (Server-Sent Events).
+
+    Requiere token de administrador en el header Authorization o, dado que
+    EventSource no permite headers, en el query param `token`.
+
+    Acepta los mismos filtros que GET /api/v1/logs y los aplica en el
+    servidor. Cada mensaje `log` lleva como id de evento su posición en el
+    índice; al reconectar, el navegador envía `Last-Event-ID` y se
+    entregan las entradas posteriores.
+
+    **Mensajes (`data:`):**
+    - `{"type": "log", "data": LogEntry}`
+    - `{"type": "ping"}`: keep-alive
+    - `{"type": "dropped", "count": N}`: el cliente no consumió a tiempo y
+      se descartaron las N entradas más antiguas de su cola
+
+    Un único lector por proceso alimenta a todos los clientes conectados.
+    """
+    if not settings.LOG_INDEX_ENABLED:
+        raise HTTPException(
+            status_code=503,
+            detail="Streaming de logs no disponible: requiere LOG_INDEX_ENABLED"
+        )
+
+    matcher = LogMatcher(LogFilters(
+        level=level,
+        component=component,
+        agent=agent,
+        expediente_id=expediente_id,
+        date_from=date_from,
+        date_to=date_to,
+        search=search,
+    ))
+
+    resume_from = None
+    if last_event_id:
+        try:
+            resume_from = int(last_event_id)
+        except ValueError:
+            resume_from = None
+
+    broadcaster = get_log_broadcaster(
+        get_index(),
+        poll_interval=settings.LOG_STREAM_POLL_SECONDS,
+        queue_size=settings.LOG_STREAM_QUEUE_SIZE,
+    )
+    subscription = await broadcaster.subscribe(matcher.match, last_event_id=resume_from)
+
+    return StreamingResponse(
+        log_event_stream(request, broadcaster, subscription, settings.LOG_STREAM_PING_SECONDS),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",  # Desactivar buffering en proxies (nginx)
+        },
     )
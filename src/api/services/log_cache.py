@@ -0,0 +1,78 @@
+# api/services/log_cache.py
+
+"""
+Caché en proceso de respuestas de la API de logs.
+
+El dashboard refresca los paneles cada pocos segundos con los mismos
+filtros. Las respuestas se guardan por (generación, consulta): la
+generación del almacén de logs (LogIndex.generation() o
+LogScanner.generation()) forma parte de la clave, de modo que una
+escritura nueva invalida todas las entradas sin borrado explícito y las
+antiguas salen por LRU.
+"""
+
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Hashable, Optional
+
+
+class ResponseCache:
+    """Caché LRU acotada y thread-safe"""
+
+    def __init__(self, max_entries: int = 128):
+        """
+        Inicializa la caché.
+
+        Args:
+            max_entries: Número máximo de respuestas guardadas (0 deshabilita)
+        """
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Obtiene una respuesta guardada.
+
+        Args:
+            key: Clave (incluye la generación del almacén de logs)
+
+        Returns:
+            Respuesta guardada o None
+        """
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """
+        Guarda una respuesta, descartando la menos usada si está llena.
+
+        Args:
+            key: Clave (incluye la generación del almacén de logs)
+            value: Respuesta a guardar
+        """
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Vacía la caché (útil para tests)."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,1213 @@
+# api/services/log_index.py
+
+"""
+Índice incremental de logs de auditoría (SQLite + FTS5).
+
+Sustituye el re-escaneo completo de LOG_DIR en cada petición a
+GET /api/v1/logs. Un indexador en background sigue ("tail") cada
+archivo `.log` por offset de bytes e inserta solo las líneas nuevas en
+una base de datos SQLite local con índices por timestamp, nivel,
+expediente, agente y ejecución, más una tabla FTS5 para `search`.
+
+El coste de una consulta depende del tamaño de la página y de la
+selectividad de los filtros, no del volumen total de logs.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from threading import Lock, RLock
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Nombre del archivo de índice cuando no se configura LOG_INDEX_PATH
+INDEX_FILENAME = ".log_index.sqlite3"
+
+# Longitud mínima de búsqueda para usar el índice FTS5 (tokenizer trigram)
+FTS_MIN_SEARCH_LENGTH = 3
+
+# Entradas por transacción durante la ingesta
+INGEST_BATCH_SIZE = 50_000
+
+# Versión del esquema; si cambia, el índice se reconstruye desde los archivos
+SCHEMA_VERSION = 3
+
+# Bytes iniciales de cada archivo guardados para detectar reescrituras
+HEAD_BYTES = 256
+
+# Tipos de PII redactados por PIIRedactor (marcador "[<TIPO>-REDACTED]")
+PII_TYPES = [
+    "dni", "nie", "email", "telefono_fijo", "telefono_movil", "iban", "tarjeta", "ccc",
+]
+
+# Tablas del índice (para reconstruirlo al cambiar de versión)
+_TABLES = [
+    "log_entries_fts", "log_entries", "indexed_files", "indexed_expedientes",
+    "log_rollups", "log_runs", "log_pii_rollups", "pii_markers", "index_meta",
+]
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS index_meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO index_meta (key, value) VALUES ('entry_count', 0);
+INSERT OR IGNORE INTO index_meta (key, value) VALUES ('run_count', 0);
+INSERT OR IGNORE INTO index_meta (key, value) VALUES ('forgotten_count', 0);
+
+CREATE TABLE IF NOT EXISTS indexed_files (
+    path TEXT PRIMARY KEY,
+    byte_offset INTEGER NOT NULL DEFAULT 0,
+    line_count INTEGER NOT NULL DEFAULT 0,
+    inode INTEGER,
+    mtime_ns INTEGER,
+    head BLOB
+);
+
+CREATE TABLE IF NOT EXISTS indexed_expedientes (
+    expediente_id TEXT PRIMARY KEY
+);
+
+CREATE TABLE IF NOT EXISTS log_entries (
+    rowid INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    timestamp TEXT NOT NULL,
+    ts_epoch REAL,
+    level TEXT NOT NULL,
+    component TEXT NOT NULL,
+    agent TEXT,
+    expediente_id TEXT,
+    agent_run_id TEXT,
+    search_text TEXT NOT NULL,
+    raw TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_log_entries_ts ON log_entries (timestamp, id);
+CREATE INDEX IF NOT EXISTS idx_log_entries_epoch ON log_entries (ts_epoch);
+CREATE INDEX IF NOT EXISTS idx_log_entries_level ON log_entries (level, timestamp, id);
+CREATE INDEX IF NOT EXISTS idx_log_entries_expediente ON log_entries (expediente_id, timestamp, id);
+CREATE INDEX IF NOT EXISTS idx_log_entries_agent ON log_entries (agent, timestamp, id);
+CREATE INDEX IF NOT EXISTS idx_log_entries_run ON log_entries (agent_run_id, timestamp, id);
+
+CREATE TRIGGER IF NOT EXISTS log_entries_count AFTER INSERT ON log_entries BEGIN
+    UPDATE index_meta SET value = value + 1 WHERE key = 'entry_count';
+    INSERT OR IGNORE INTO indexed_expedientes (expediente_id)
+        SELECT new.expediente_id WHERE new.expediente_id IS NOT NULL;
+END;
+"""
+
+# Rollups mantenidos por trigger al indexar cada entrada: las estadísticas
+# se calculan sobre buckets de un minuto, no sobre las entradas.
+_ROLLUP_SCHEMA = """
+CREATE TABLE IF NOT EXISTS log_rollups (
+    minute INTEGER NOT NULL,
+    level TEXT NOT NULL,
+    agent TEXT NOT NULL,
+    expediente_id TEXT NOT NULL,
+    entries INTEGER NOT NULL,
+    PRIMARY KEY (minute, level, agent, expediente_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS log_runs (
+    agent_run_id TEXT PRIMARY KEY,
+    expediente_id TEXT,
+    agent TEXT,
+    started REAL,
+    finished REAL,
+    entries INTEGER NOT NULL DEFAULT 0,
+    errors INTEGER NOT NULL DEFAULT 0,
+    completed INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_log_runs_started ON log_runs (started);
+
+CREATE TABLE IF NOT EXISTS pii_markers (
+    pii_type TEXT PRIMARY KEY,
+    marker TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS log_pii_rollups (
+    minute INTEGER NOT NULL,
+    pii_type TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (minute, pii_type)
+) WITHOUT ROWID;
+
+CREATE TRIGGER IF NOT EXISTS log_rollups_insert AFTER INSERT ON log_entries
+WHEN new.ts_epoch IS NOT NULL BEGIN
+    INSERT INTO log_rollups (minute, level, agent, expediente_id, entries)
+    VALUES (
+        CAST(new.ts_epoch / 60 AS INTEGER), new.level,
+        COALESCE(new.agent, ''), COALESCE(new.expediente_id, ''), 1
+    )
+    ON CONFLICT (minute, level, agent, expediente_id) DO UPDATE SET entries = entries + 1;
+
+    INSERT INTO log_pii_rollups (minute, pii_type, count)
+    SELECT
+        CAST(new.ts_epoch / 60 AS INTEGER), pii_type,
+        (length(new.raw) - length(replace(new.raw, marker, ''))) / length(marker)
+    FROM pii_markers
+    WHERE instr(new.raw, '-REDACTED]') > 0 AND instr(new.raw, marker) > 0
+    ON CONFLICT (minute, pii_type) DO UPDATE SET count = count + excluded.count;
+END;
+
+CREATE TRIGGER IF NOT EXISTS log_runs_insert AFTER INSERT ON log_entries
+WHEN new.agent_run_id IS NOT NULL BEGIN
+    INSERT INTO log_runs (
+        agent_run_id, expediente_id, agent, started, finished, entries, errors, completed
+    )
+    VALUES (
+        new.agent_run_id, new.expediente_id, new.agent, new.ts_epoch, new.ts_epoch, 1,
+        new.level IN ('ERROR', 'CRITICAL'),
+        IFNULL(json_extract(new.raw, '$.metadata.event'), '') = 'run_completed'
+            OR IFNULL(json_extract(new.raw, '$.mensaje'), '') = 'Agente completado exitosamente'
+    )
+    ON CONFLICT (agent_run_id) DO UPDATE SET
+        agent = COALESCE(agent, excluded.agent),
+        started = min(COALESCE(started, excluded.started), COALESCE(excluded.started, started)),
+        finished = max(COALESCE(finished, excluded.finished), COALESCE(excluded.finished, finished)),
+        entries = entries + 1,
+        errors = errors + excluded.errors,
+        completed = max(completed, excluded.completed);
+END;
+
+CREATE TRIGGER IF NOT EXISTS log_runs_count AFTER INSERT ON log_runs BEGIN
+    UPDATE index_meta SET value = value + 1 WHERE key = 'run_count';
+END;
+"""
+
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS log_entries_fts USING fts5(
+    search_text,
+    content='log_entries',
+    content_rowid='rowid',
+    tokenize='trigram'
+);
+
+CREATE TRIGGER IF NOT EXISTS log_entries_fts_insert AFTER INSERT ON log_entries BEGIN
+    INSERT INTO log_entries_fts (rowid, search_text) VALUES (new.rowid, new.search_text);
+END;
+"""
+
+
+@dataclass
+class LogFilters:
+    """
+    Filtros de consulta de logs.
+
+    Mismo formato que los query params de GET /api/v1/logs
+    (listas como strings separados por comas).
+    """
+
+    level: Optional[str] = None
+    component: Optional[str] = None
+    agent: Optional[str] = None
+    expediente_id: Optional[str] = None
+    date_from: Optional[datetime] = None
+    date_to: Optional[datetime] = None
+    search: Optional[str] = None
+
+    def is_empty(self) -> bool:
+        """Indica si no hay ningún filtro activo"""
+        return not any((
+            self.level, self.component, self.agent, self.expediente_id,
+            self.date_from, self.date_to, self.search
+        ))
+
+
+def _split_csv(value: str, upper: bool = False) -> List[str]:
+    """Divide un string separado por comas en una lista limpia"""
+    items = [v.strip() for v in value.split(",")]
+    return [v.upper() if upper else v for v in items]
+
+
+def _to_epoch(value: datetime) -> float:
+    """Convierte un datetime a epoch; los naive se interpretan como UTC"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def _parse_epoch(timestamp: str) -> Optional[float]:
+    """Parsea un timestamp ISO 8601 del log a epoch (None si no es válido)"""
+    try:
+        return _to_epoch(datetime.fromisoformat(timestamp.replace("Z", "+00:00")))
+    except (ValueError, AttributeError):
+        return None
+
+
+def encode_cursor(log: Dict[str, Any]) -> str:
+    """
+    Genera el cursor de paginación de una entrada: "<timestamp>,<id>".
+
+    Args:
+        log: Log en formato interno (con `id`)
+
+    Returns:
+        Cursor opaco para el parámetro `after`
+    """
+    return f"{log.get('timestamp', '')},{log['id']}"
+
+
+def parse_cursor(cursor: str) -> Tuple[str, str]:
+    """
+    Parsea un cursor "<timestamp>,<id>".
+
+    Args:
+        cursor: Cursor recibido en `after`
+
+    Returns:
+        Tupla (timestamp, id)
+
+    Raises:
+        ValueError: Si el cursor no tiene el formato esperado
+    """
+    timestamp, sep, log_id = cursor.rpartition(",")
+    if not sep or not timestamp or not log_id:
+        raise ValueError(f"Cursor inválido: '{cursor}'. Formato esperado: <timestamp>,<id>")
+    return timestamp, log_id
+
+
+def build_search_text(entry: Dict[str, Any]) -> str:
+    """
+    Construye el texto indexado para `search`.
+
+    Cubre los mismos campos que filter_logs: mensaje, metadata y error.
+    """
+    parts = [str(entry.get("mensaje", ""))]
+    if entry.get("metadata"):
+        parts.append(json.dumps(entry["metadata"], ensure_ascii=False))
+    if entry.get("error"):
+        parts.append(str(entry["error"]))
+    return "\n".join(parts).lower()
+
+
+def entry_to_row(entry: Dict[str, Any]) -> Tuple:
+    """
+    Convierte una entrada de log (con `id` asignado) en fila de log_entries.
+
+    Args:
+        entry: Entrada de log parseada del archivo JSON lines
+
+    Returns:
+        Tupla con los valores de las columnas de log_entries
+    """
+    metadata = entry.get("metadata") if isinstance(entry.get("metadata"), dict) else None
+    agent = entry.get("agent") or (metadata.get("agent") if metadata else None)
+    timestamp = str(entry.get("timestamp", ""))
+
+    return (
+        entry["id"],
+        timestamp,
+        _parse_epoch(timestamp),
+        str(entry.get("level", "")).upper(),
+        entry.get("component", "AgentExecutor"),
+        agent,
+        entry.get("expediente_id"),
+        entry.get("agent_run_id"),
+        build_search_text(entry),
+        json.dumps(entry, ensure_ascii=False),
+    )
+
+
+class LogIndex:
+    """
+    Índice SQLite de los logs de auditoría de un LOG_DIR.
+
+    Usa dos conexiones: una de escritura (indexador) y otra de lectura
+    (consultas). Con WAL las consultas no se bloquean mientras se indexa.
+    Varias instancias (workers) pueden compartir el mismo archivo: la
+    ingesta se hace en transacciones BEGIN IMMEDIATE y las entradas son
+    únicas por id.
+    """
+
+    def __init__(self, log_dir: Path | str, db_path: Optional[Path | str] = None):
+        """
+        Inicializa el índice.
+
+        Args:
+            log_dir: Directorio base de logs (LOG_DIR)
+            db_path: Ruta del archivo SQLite (default: <log_dir>/.log_index.sqlite3)
+        """
+        self.log_dir = Path(log_dir)
+        self.db_path = Path(db_path) if db_path else self.log_dir / INDEX_FILENAME
+        self._write_lock = RLock()
+        self._read_lock = RLock()
+        self._writer: Optional[sqlite3.Connection] = None
+        self._reader: Optional[sqlite3.Connection] = None
+        self._fts_enabled = False
+        self._last_refresh = 0.0
+
+    # ========== CONEXIÓN Y ESQUEMA ==========
+
+    def _open(self) -> sqlite3.Connection:
+        """Abre una conexión SQLite configurada para WAL"""
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(
+            str(self.db_path),
+            check_same_thread=False,
+            isolation_level=None,  # Transacciones explícitas
+            timeout=30.0
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _get_writer(self) -> sqlite3.Connection:
+        """Obtiene la conexión de escritura (lazy init) y crea el esquema"""
+        with self._write_lock:
+            if self._writer is None:
+                conn = self._open()
+                # Caché amplia: la ingesta actualiza varios índices B-tree y FTS5
+                conn.execute("PRAGMA cache_size=-65536")
+                self._check_schema_version(conn)
+                conn.executescript(_SCHEMA)
+                conn.executescript(_ROLLUP_SCHEMA)
+                conn.executemany(
+                    "INSERT OR IGNORE INTO pii_markers (pii_type, marker) VALUES (?, ?)",
+                    [(pii_type, f"[{pii_type.upper()}-REDACTED]") for pii_type in PII_TYPES]
+                )
+                conn.execute(
+                    "INSERT OR REPLACE INTO index_meta (key, value) VALUES ('schema_version', ?)",
+                    (SCHEMA_VERSION,)
+                )
+
+                try:
+                    conn.executescript(_FTS_SCHEMA)
+                    self._fts_enabled = True
+                except sqlite3.OperationalError as e:
+                    # SQLite sin FTS5/trigram: la búsqueda usa instr() sobre search_text
+                    logger.warning(f"FTS5 no disponible, búsqueda sin índice: {e}")
+                    self._fts_enabled = False
+
+                self._writer = conn
+            return self._writer
+
+    @staticmethod
+    def _check_schema_version(conn: sqlite3.Connection) -> None:
+        """
+        Elimina un índice creado con otra versión del esquema.
+
+        El índice es derivado de los archivos de log: la siguiente pasada
+        de refresh() lo reconstruye completo (incluidos los rollups).
+        """
+        tables = {
+            row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+        }
+        if "log_entries" not in tables:
+            return
+
+        version = None
+        if "index_meta" in tables:
+            row = conn.execute(
+                "SELECT value FROM index_meta WHERE key = 'schema_version'"
+            ).fetchone()
+            version = row[0] if row else None
+
+        if version == SCHEMA_VERSION:
+            return
+
+        logger.info(f"Índice de logs con esquema {version}, reconstruyendo (v{SCHEMA_VERSION})")
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for table in _TABLES:
+                conn.execute(f"DROP TABLE IF EXISTS {table}")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _get_reader(self) -> sqlite3.Connection:
+        """Obtiene la conexión de lectura (lazy init)"""
+        if self._reader is None:
+            # El esquema lo crea la conexión de escritura
+            self._get_writer()
+            self._reader = self._open()
+        return self._reader
+
+    def close(self) -> None:
+        """Cierra las conexiones SQLite"""
+        with self._write_lock, self._read_lock:
+            for conn in (self._reader, self._writer):
+                if conn is not None:
+                    conn.close()
+            self._reader = None
+            self._writer = None
+
+    # ========== INGESTA INCREMENTAL ==========
+
+    def refresh(self, blocking: bool = True) -> int:
+        """
+        Indexa las líneas nuevas de todos los archivos de log.
+
+        Cada archivo se lee desde el último offset indexado; las líneas
+        incompletas (sin salto de línea final) se dejan para la siguiente
+        pasada.
+        Si un archivo se ha truncado o sustituido, sus entradas se eliminan
+        del índice y se vuelve a leer desde el principio.
+
+        Args:
+            blocking: Si es False y ya hay una pasada en curso, no espera
+
+        Returns:
+            Número de entradas nuevas indexadas
+        """
+        if not self._write_lock.acquire(blocking=blocking):
+            return 0
+
+        try:
+            conn = self._get_writer()
+            inserted = 0
+            rows: List[Tuple] = []
+            file_offsets: List[Tuple] = []
+
+            if self.log_dir.exists():
+                offsets = {
+                    row[0]: row[1:]
+                    for row in conn.execute(
+                        "SELECT path, byte_offset, line_count, inode, mtime_ns, head "
+                        "FROM indexed_files"
+                    )
+                }
+
+                for expediente_dir in self.log_dir.iterdir():
+                    if not expediente_dir.is_dir():
+                        continue
+
+                    for log_file in expediente_dir.glob("*.log"):
+                        key = str(log_file.relative_to(self.log_dir))
+                        byte_offset, line_count, inode, mtime_ns, head = offsets.get(
+                            key, (0, 0, None, None, None)
+                        )
+                        try:
+                            stat = log_file.stat()
+                        except OSError:
+                            continue
+
+                        if (stat.st_size == byte_offset and stat.st_ino == inode
+                                and stat.st_mtime_ns == mtime_ns):
+                            continue
+                        if byte_offset and self._is_replaced(
+                            log_file, stat, byte_offset, inode, head
+                        ):
+                            # Archivo truncado o sustituido: sus entradas ya
+                            # indexadas dejan de ser válidas
+                            self._forget_file(conn, key, log_file.stem)
+                            byte_offset, line_count = 0, 0
+
+                        file_rows, byte_offset, line_count = self._read_new_lines(
+                            log_file, byte_offset, line_count
+                        )
+                        rows.extend(file_rows)
+                        file_offsets.append((
+                            key, byte_offset, line_count, stat.st_ino, stat.st_mtime_ns,
+                            self._read_head(log_file, min(byte_offset, HEAD_BYTES))
+                        ))
+
+                        # Transacciones grandes: FTS5 genera menos segmentos a fusionar
+                        if len(rows) >= INGEST_BATCH_SIZE:
+                            inserted += self._flush(conn, rows, file_offsets)
+                            rows, file_offsets = [], []
+
+            if file_offsets:
+                inserted += self._flush(conn, rows, file_offsets)
+
+            self._last_refresh = time.monotonic()
+            return inserted
+        finally:
+            self._write_lock.release()
+
+    def refresh_if_stale(self, max_age_seconds: float) -> int:
+        """
+        Ejecuta refresh() si la última pasada es más antigua que max_age_seconds.
+
+        No espera si el indexador en background ya está en plena pasada.
+
+        Args:
+            max_age_seconds: Antigüedad máxima tolerada del índice
+
+        Returns:
+            Número de entradas nuevas indexadas (0 si no fue necesario)
+        """
+        if self._writer is not None and time.monotonic() - self._last_refresh < max_age_seconds:
+            return 0
+        return self.refresh(blocking=self._writer is None)
+
+    @staticmethod
+    def _read_new_lines(
+        log_file: Path,
+        byte_offset: int,
+        line_count: int
+    ) -> Tuple[List[Tuple], int, int]:
+        """
+        Lee las líneas completas de un archivo a partir de byte_offset.
+
+        Args:
+            log_file: Archivo de log
+            byte_offset: Offset (bytes) ya indexado
+            line_count: Líneas ya indexadas (para numerar los IDs)
+
+        Returns:
+            (filas de log_entries, nuevo byte_offset, nuevo line_count)
+        """
+        rows = []
+
+        try:
+            with open(log_file, "rb") as f:
+                f.seek(byte_offset)
+                for raw_line in f:
+                    if not raw_line.endswith(b"\n"):
+                        # Línea a medio escribir: se indexará en la siguiente pasada
+                        break
+
+                    byte_offset += len(raw_line)
+                    line_count += 1
+
+                    line = raw_line.strip()
+                    if not line:
+                        continue
+
+                    try:
+                        entry = json.loads(line)
+                    except (json.JSONDecodeError, UnicodeDecodeError):
+                        # Ignorar líneas mal formadas
+                        continue
+                    if not isinstance(entry, dict):
+                        continue
+
+                    # Mismo ID que el escaneo sin índice: archivo + número de línea
+                    entry["id"] = f"{log_file.stem}-{line_count}"
+                    rows.append(entry_to_row(entry))
+        except OSError:
+            # Ignorar archivos que no se puedan leer (se reintenta en la siguiente pasada)
+            pass
+
+        return rows, byte_offset, line_count
+
+    @staticmethod
+    def _read_head(log_file: Path, length: int) -> Optional[bytes]:
+        """Lee los primeros `length` bytes de un archivo (None si no se puede)"""
+        try:
+            with open(log_file, "rb") as f:
+                return f.read(length)
+        except OSError:
+            return None
+
+    def _is_replaced(
+        self,
+        log_file: Path,
+        stat: os.stat_result,
+        byte_offset: int,
+        inode: Optional[int],
+        head: Optional[bytes]
+    ) -> bool:
+        """
+        Indica si un archivo ya indexado ha sido truncado o sustituido.
+
+        El tamaño no basta: un archivo reescrito puede ser igual o más
+        grande que el offset indexado. Se comparan también el inode y los
+        primeros bytes guardados en la última pasada.
+
+        Args:
+            log_file: Archivo de log
+            stat: Resultado de stat() del archivo
+            byte_offset: Offset (bytes) ya indexado
+            inode: Inode registrado en la última pasada
+            head: Primeros bytes registrados en la última pasada
+
+        Returns:
+            True si las entradas indexadas del archivo ya no son válidas
+        """
+        if stat.st_size < byte_offset:
+            return True
+        if inode is not None and stat.st_ino != inode:
+            return True
+        return bool(head) and self._read_head(log_file, len(head)) != head
+
+    def _forget_file(self, conn: sqlite3.Connection, key: str, stem: str) -> None:
+        """
+        Elimina del índice las entradas de un archivo y reinicia su offset.
+
+        Deshace lo que mantienen los triggers de inserción: FTS, rollups
+        por minuto y de PII, contador de entradas y resumen de ejecuciones
+        (las ejecuciones afectadas se recalculan con las entradas restantes).
+
+        Args:
+            conn: Conexión de escritura
+            key: Ruta relativa del archivo en indexed_files
+            stem: Nombre del archivo sin extensión (prefijo de los IDs)
+        """
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DROP TABLE IF EXISTS temp.forgotten_entries")
+            # IDs "<stem>-<línea>": rango por prefijo y sufijo solo numérico
+            conn.execute(
+                "CREATE TEMP TABLE forgotten_entries AS "
+                "SELECT rowid, ts_epoch, level, agent, expediente_id, agent_run_id, "
+                "search_text, raw FROM log_entries "
+                "WHERE id > ? AND id < ? "
+                "AND substr(id, ?) != '' AND substr(id, ?) NOT GLOB '*[^0-9]*'",
+                (f"{stem}-", f"{stem}.", len(stem) + 2, len(stem) + 2)
+            )
+
+            if self._fts_enabled:
+                conn.execute(
+                    "INSERT INTO log_entries_fts (log_entries_fts, rowid, search_text) "
+                    "SELECT 'delete', rowid, search_text FROM forgotten_entries"
+                )
+
+            conn.execute(
+                "UPDATE log_rollups SET entries = entries - f.n FROM ("
+                "  SELECT CAST(ts_epoch / 60 AS INTEGER) AS minute, level, "
+                "  COALESCE(agent, '') AS agent, COALESCE(expediente_id, '') AS expediente_id, "
+                "  COUNT(*) AS n FROM forgotten_entries WHERE ts_epoch IS NOT NULL "
+                "  GROUP BY 1, 2, 3, 4"
+                ") AS f WHERE log_rollups.minute = f.minute AND log_rollups.level = f.level "
+                "AND log_rollups.agent = f.agent AND log_rollups.expediente_id = f.expediente_id"
+            )
+            conn.execute("DELETE FROM log_rollups WHERE entries <= 0")
+
+            conn.execute(
+                "UPDATE log_pii_rollups SET count = count - f.n FROM ("
+                "  SELECT CAST(e.ts_epoch / 60 AS INTEGER) AS minute, m.pii_type, "
+                "  SUM((length(e.raw) - length(replace(e.raw, m.marker, ''))) / length(m.marker)) AS n "
+                "  FROM forgotten_entries e JOIN pii_markers m ON instr(e.raw, m.marker) > 0 "
+                "  WHERE e.ts_epoch IS NOT NULL GROUP BY 1, 2"
+                ") AS f WHERE log_pii_rollups.minute = f.minute "
+                "AND log_pii_rollups.pii_type = f.pii_type"
+            )
+            conn.execute("DELETE FROM log_pii_rollups WHERE count <= 0")
+
+            # forgotten_count mantiene generation() monótono
+            forgotten = conn.execute("SELECT COUNT(*) FROM forgotten_entries").fetchone()[0]
+            conn.execute(
+                "UPDATE index_meta SET value = value + CASE key "
+                "WHEN 'entry_count' THEN -? ELSE ? END "
+                "WHERE key IN ('entry_count', 'forgotten_count')",
+                (forgotten, forgotten)
+            )
+            runs_deleted = conn.execute(
+                "DELETE FROM log_runs WHERE agent_run_id IN "
+                "(SELECT agent_run_id FROM forgotten_entries)"
+            ).rowcount
+            conn.execute(
+                "UPDATE index_meta SET value = value - ? WHERE key = 'run_count'",
+                (runs_deleted,)
+            )
+            conn.execute(
+                "DELETE FROM log_entries WHERE rowid IN (SELECT rowid FROM forgotten_entries)"
+            )
+
+            # Ejecuciones con entradas en otros archivos: recalcular el resumen
+            # (el trigger log_runs_count vuelve a contarlas)
+            conn.execute(
+                "INSERT INTO log_runs ("
+                "  agent_run_id, expediente_id, agent, started, finished, entries, errors, completed"
+                ") "
+                "SELECT e.agent_run_id, "
+                "  (SELECT expediente_id FROM log_entries "
+                "   WHERE agent_run_id = e.agent_run_id ORDER BY rowid LIMIT 1), "
+                "  (SELECT agent FROM log_entries "
+                "   WHERE agent_run_id = e.agent_run_id AND agent IS NOT NULL ORDER BY rowid LIMIT 1), "
+                "  MIN(e.ts_epoch), MAX(e.ts_epoch), COUNT(*), "
+                "  SUM(e.level IN ('ERROR', 'CRITICAL')), "
+                "  MAX(IFNULL(json_extract(e.raw, '$.metadata.event'), '') = 'run_completed' "
+                "      OR IFNULL(json_extract(e.raw, '$.mensaje'), '') = 'Agente completado exitosamente') "
+                "FROM log_entries e "
+                "WHERE e.agent_run_id IN (SELECT agent_run_id FROM forgotten_entries) "
+                "GROUP BY e.agent_run_id"
+            )
+
+            conn.execute(
+                "UPDATE indexed_files SET byte_offset = 0, line_count = 0, head = NULL "
+                "WHERE path = ?",
+                (key,)
+            )
+            conn.execute("DROP TABLE temp.forgotten_entries")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _flush(
+        self,
+        conn: sqlite3.Connection,
+        rows: List[Tuple],
+        file_offsets: List[Tuple]
+    ) -> int:
+        """
+        Inserta un lote de filas y avanza los offsets en una sola transacción.
+
+        Returns:
+            Número de entradas nuevas insertadas
+        """
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            before = self._entry_count(conn)
+            conn.executemany(
+                "INSERT OR IGNORE INTO log_entries "
+                "(id, timestamp, ts_epoch, level, component, agent, expediente_id, "
+                "agent_run_id, search_text, raw) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            inserted = self._entry_count(conn) - before
+            conn.executemany(
+                "INSERT INTO indexed_files "
+                "(path, byte_offset, line_count, inode, mtime_ns, head) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(path) DO UPDATE SET "
+                "byte_offset = excluded.byte_offset, line_count = excluded.line_count, "
+                "inode = excluded.inode, mtime_ns = excluded.mtime_ns, head = excluded.head",
+                file_offsets
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        return inserted
+
+    @staticmethod
+    def _entry_count(conn: sqlite3.Connection) -> int:
+        """Número de entradas indexadas (mantenido por trigger)"""
+        row = conn.execute(
+            "SELECT value FROM index_meta WHERE key = 'entry_count'"
+        ).fetchone()
+        return int(row[0]) if row else 0
+
+    # ========== CONSULTA ==========
+
+    def _build_where(
+        self,
+        conn: sqlite3.Connection,
+        filters: LogFilters
+    ) -> Optional[Tuple[str, List[Any]]]:
+        """
+        Construye la cláusula WHERE para los filtros.
+
+        Returns:
+            (sql, params) o None si el filtro no puede coincidir con nada
+        """
+        clauses: List[str] = []
+        params: List[Any] = []
+
+        if filters.level:
+            levels = _split_csv(filters.level, upper=True)
+            clauses.append(f"level IN ({','.join('?' * len(levels))})")
+            params.extend(levels)
+
+        if filters.component:
+            components = _split_csv(filters.component)
+            clauses.append(f"component IN ({','.join('?' * len(components))})")
+            params.extend(components)
+
+        if filters.agent:
+            agents = _split_csv(filters.agent)
+            clauses.append(f"agent IN ({','.join('?' * len(agents))})")
+            params.extend(agents)
+
+        if filters.expediente_id:
+            # Búsqueda parcial resuelta contra la tabla (pequeña) de expedientes
+            # para poder usar el índice de log_entries con IN (...)
+            expedientes = [
+                row[0] for row in conn.execute(
+                    "SELECT expediente_id FROM indexed_expedientes "
+                    "WHERE instr(lower(expediente_id), ?) > 0",
+                    (filters.expediente_id.lower(),)
+                )
+            ]
+            if not expedientes:
+                return None
+            clauses.append(f"expediente_id IN ({','.join('?' * len(expedientes))})")
+            params.extend(expedientes)
+
+        if filters.date_from:
+            clauses.append("ts_epoch >= ?")
+            params.append(_to_epoch(filters.date_from))
+
+        if filters.date_to:
+            clauses.append("ts_epoch <= ?")
+            params.append(_to_epoch(filters.date_to))
+
+        if filters.search:
+            search_lower = filters.search.lower()
+            if self._fts_enabled and len(search_lower) >= FTS_MIN_SEARCH_LENGTH:
+                clauses.append(
+                    "rowid IN (SELECT rowid FROM log_entries_fts WHERE log_entries_fts MATCH ?)"
+                )
+                params.append('"' + search_lower.replace('"', '""') + '"')
+            else:
+                clauses.append("instr(search_text, ?) > 0")
+                params.append(search_lower)
+
+        sql = " WHERE " + " AND ".join(clauses) if clauses else ""
+        return sql, params
+
+    def count(self, filters: LogFilters) -> int:
+        """
+        Cuenta las entradas que cumplen los filtros.
+
+        Args:
+            filters: Filtros de consulta
+
+        Returns:
+            Número total de entradas
+        """
+        with self._read_lock:
+            conn = self._get_reader()
+
+            if filters.is_empty():
+                return self._entry_count(conn)
+
+            where = self._build_where(conn, filters)
+            if where is None:
+                return 0
+            sql, params = where
+            return conn.execute(f"SELECT COUNT(*) FROM log_entries{sql}", params).fetchone()[0]
+
+    def query(
+        self,
+        filters: LogFilters,
+        limit: int,
+        offset: int = 0,
+        after: Optional[Tuple[str, str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Obtiene una página de entradas, de la más reciente a la más antigua.
+
+        El orden es estable: (timestamp DESC, id DESC).
+
+        Args:
+            filters: Filtros de consulta
+            limit: Número máximo de entradas
+            offset: Entradas a saltar (paginación por página, lento en páginas profundas)
+            after: Cursor (timestamp, id) de la última entrada ya vista;
+                solo se leen las `limit` entradas siguientes
+
+        Returns:
+            Lista de logs en formato interno (con `id`)
+        """
+        with self._read_lock:
+            conn = self._get_reader()
+            where = self._build_where(conn, filters)
+            if where is None:
+                return []
+            sql, params = where
+
+            if after is not None:
+                sql += " AND " if sql else " WHERE "
+                sql += "(timestamp, id) < (?, ?)"
+                params = [*params, *after]
+
+            cursor = conn.execute(
+                f"SELECT raw FROM log_entries{sql} "
+                "ORDER BY timestamp DESC, id DESC LIMIT ? OFFSET ?",
+                [*params, limit, offset]
+            )
+            return [json.loads(raw) for (raw,) in cursor]
+
+    def iter_entries(
+        self,
+        filters: LogFilters,
+        batch_size: int = 1000
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Recorre todas las entradas que cumplen los filtros en lotes por cursor.
+
+        Memoria constante (un lote) independientemente del volumen total; el
+        lock de lectura se libera entre lotes.
+
+        Args:
+            filters: Filtros de consulta
+            batch_size: Entradas leídas por consulta
+
+        Yields:
+            Logs en formato interno, del más reciente al más antiguo
+        """
+        after: Optional[Tuple[str, str]] = None
+        while True:
+            batch = self.query(filters, limit=batch_size, after=after)
+            yield from batch
+            if len(batch) < batch_size:
+                return
+            last = batch[-1]
+            after = (str(last.get("timestamp", "")), last["id"])
+
+    def max_rowid(self) -> int:
+        """
+        Posición (rowid) de la última entrada indexada.
+
+        Returns:
+            rowid máximo (0 si el índice está vacío)
+        """
+        with self._read_lock:
+            conn = self._get_reader()
+            row = conn.execute("SELECT MAX(rowid) FROM log_entries").fetchone()
+            return int(row[0] or 0)
+
+    def generation(self) -> int:
+        """
+        Contador de generación del índice: cambia con cada entrada indexada.
+
+        Es una lectura de una fila (index_meta); sirve para validar cachés
+        y ETags sin consultar log_entries.
+
+        Returns:
+            Número de entradas indexadas, incluidas las de archivos reindexados
+        """
+        with self._read_lock:
+            conn = self._get_reader()
+            row = conn.execute(
+                "SELECT value FROM index_meta WHERE key = 'forgotten_count'"
+            ).fetchone()
+            return self._entry_count(conn) + (int(row[0]) if row else 0)
+
+    def entries_since(self, rowid: int, limit: int) -> List[Tuple[int, Dict[str, Any]]]:
+        """
+        Obtiene las entradas indexadas después de una posición, en orden de ingesta.
+
+        Es la base del streaming: el rowid crece con cada entrada indexada y
+        se usa como id de evento SSE.
+
+        Args:
+            rowid: Posición de la última entrada ya entregada
+            limit: Número máximo de entradas
+
+        Returns:
+            Lista de tuplas (rowid, log en formato interno)
+        """
+        with self._read_lock:
+            conn = self._get_reader()
+            cursor = conn.execute(
+                "SELECT rowid, raw FROM log_entries WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                (rowid, limit)
+            )
+            return [(row_id, json.loads(raw)) for row_id, raw in cursor]
+
+    # ========== ESTADÍSTICAS (ROLLUPS) ==========
+
+    def log_stats(
+        self,
+        date_from: datetime,
+        date_to: datetime,
+        bucket_seconds: int = 3600,
+        top: int = 20
+    ) -> Dict[str, Any]:
+        """
+        Conteos de entradas por nivel, agente, expediente y bucket temporal.
+
+        Se calcula sobre los rollups por minuto: el coste depende de la
+        ventana consultada, no del volumen histórico de logs.
+
+        Args:
+            date_from: Inicio de la ventana
+            date_to: Fin de la ventana
+            bucket_seconds: Tamaño de bucket del timeline (múltiplo de 60)
+            top: Máximo de expedientes devueltos (los de más entradas)
+
+        Returns:
+            Dict con total, by_level, by_agent, by_expediente y timeline
+        """
+        window = (int(_to_epoch(date_from) // 60), int(_to_epoch(date_to) // 60))
+        bucket_minutes = max(1, bucket_seconds // 60)
+
+        with self._read_lock:
+            conn = self._get_reader()
+
+            by_level = dict(conn.execute(
+                "SELECT level, SUM(entries) FROM log_rollups "
+                "WHERE minute BETWEEN ? AND ? GROUP BY level",
+                window
+            ).fetchall())
+
+            by_agent = dict(conn.execute(
+                "SELECT agent, SUM(entries) FROM log_rollups "
+                "WHERE minute BETWEEN ? AND ? AND agent != '' GROUP BY agent",
+                window
+            ).fetchall())
+
+            by_expediente = dict(conn.execute(
+                "SELECT expediente_id, SUM(entries) AS n FROM log_rollups "
+                "WHERE minute BETWEEN ? AND ? AND expediente_id != '' "
+                "GROUP BY expediente_id ORDER BY n DESC LIMIT ?",
+                (*window, top)
+            ).fetchall())
+
+            timeline: Dict[int, Dict[str, int]] = {}
+            for bucket, level, entries in conn.execute(
+                "SELECT (minute / ?) * ? AS bucket, level, SUM(entries) FROM log_rollups "
+                "WHERE minute BETWEEN ? AND ? GROUP BY bucket, level ORDER BY bucket",
+                (bucket_minutes, bucket_minutes, *window)
+            ):
+                timeline.setdefault(bucket, {})[level] = entries
+
+        return {
+            "total": sum(by_level.values()),
+            "by_level": by_level,
+            "by_agent": by_agent,
+            "by_expediente": by_expediente,
+            "timeline": [
+                {
+                    "timestamp": datetime.fromtimestamp(bucket * 60, tz=timezone.utc).isoformat(),
+                    "total": sum(levels.values()),
+                    "by_level": levels,
+                }
+                for bucket, levels in timeline.items()
+            ],
+        }
+
+    def run_count(self) -> int:
+        """Número total de ejecuciones (agent_run_id) indexadas"""
+        with self._read_lock:
+            conn = self._get_reader()
+            row = conn.execute(
+                "SELECT value FROM index_meta WHERE key = 'run_count'"
+            ).fetchone()
+            return int(row[0]) if row else 0
+
+    def count_runs_since(self, since: datetime) -> int:
+        """
+        Número de ejecuciones iniciadas desde una fecha.
+
+        Args:
+            since: Fecha de inicio
+
+        Returns:
+            Número de ejecuciones
+        """
+        with self._read_lock:
+            conn = self._get_reader()
+            return conn.execute(
+                "SELECT COUNT(*) FROM log_runs WHERE started >= ?",
+                (_to_epoch(since),)
+            ).fetchone()[0]
+
+    def runs(self, date_from: datetime, date_to: datetime) -> List[Dict[str, Any]]:
+        """
+        Resumen de las ejecuciones iniciadas en una ventana.
+
+        El estado se deriva de los logs de la ejecución: `success` si se
+        registró la finalización, `error` si hubo entradas ERROR/CRITICAL y
+        `in_progress` en otro caso.
+
+        Args:
+            date_from: Inicio de la ventana
+            date_to: Fin de la ventana
+
+        Returns:
+            Lista de dicts con agent_run_id, agent, started, duration y status
+        """
+        with self._read_lock:
+            conn = self._get_reader()
+            cursor = conn.execute(
+                "SELECT agent_run_id, agent, started, finished - started, "
+                "CASE WHEN completed THEN 'success' WHEN errors > 0 THEN 'error' "
+                "ELSE 'in_progress' END "
+                "FROM log_runs WHERE started BETWEEN ? AND ? ORDER BY started",
+                (_to_epoch(date_from), _to_epoch(date_to))
+            )
+            return [
+                {
+                    "agent_run_id": run_id,
+                    "agent": agent,
+                    "started": started,
+                    "duration": duration,
+                    "status": status,
+                }
+                for run_id, agent, started, duration, status in cursor
+            ]
+
+    def pii_stats(
+        self,
+        date_from: datetime,
+        date_to: datetime,
+        bucket_seconds: int = 3600
+    ) -> List[Tuple[int, str, int]]:
+        """
+        PII redactados (marcadores "[<TIPO>-REDACTED]") por bucket y tipo.
+
+        Args:
+            date_from: Inicio de la ventana
+            date_to: Fin de la ventana
+            bucket_seconds: Tamaño de bucket (múltiplo de 60)
+
+        Returns:
+            Lista de tuplas (epoch del bucket, tipo de PII, cantidad)
+        """
+        window = (int(_to_epoch(date_from) // 60), int(_to_epoch(date_to) // 60))
+        bucket_minutes = max(1, bucket_seconds // 60)
+
+        with self._read_lock:
+            conn = self._get_reader()
+            cursor = conn.execute(
+                "SELECT (minute / ?) * ? AS bucket, pii_type, SUM(count) FROM log_pii_rollups "
+                "WHERE minute BETWEEN ? AND ? GROUP BY bucket, pii_type ORDER BY bucket",
+                (bucket_minutes, bucket_minutes, *window)
+            )
+            return [(bucket * 60, pii_type, count) for bucket, pii_type, count in cursor]
+
+
+# ============================================================================
+# Instancias por LOG_DIR
+# ============================================================================
+
+_log_indexes: Dict[Path, LogIndex] = {}
+_log_indexes_lock = Lock()
+
+
+def get_log_index(log_dir: Path | str, db_path: Optional[Path | str] = None) -> LogIndex:
+    """
+    Obtiene el índice asociado a un LOG_DIR (una instancia por directorio).
+
+    Args:
+        log_dir: Directorio base de logs
+        db_path: Ruta del archivo SQLite (opcional, solo en la primera llamada)
+
+    Returns:
+        LogIndex compartido para ese directorio
+    """
+    key = Path(log_dir).resolve()
+    with _log_indexes_lock:
+        index = _log_indexes.get(key)
+        if index is None:
+            index = LogIndex(log_dir, db_path or None)
+            _log_indexes[key] = index
+        return index
+
+
+def reset_log_indexes() -> None:
+    """Cierra y olvida todos los índices (útil para tests)."""
+    with _log_indexes_lock:
+        for index in _log_indexes.values():
+            index.close()
+        _log_indexes.clear()
+
+
+async def run_log_indexer(index: LogIndex, interval_seconds: float) -> None:
+    """
+    Bucle del indexador en background.
+
+    Ejecuta refresh() en un thread cada `interval_seconds` hasta que la
+    tarea se cancela (shutdown de la aplicación).
+
+    Args:
+        index: Índice a mantener
+        interval_seconds: Intervalo entre pasadas
+    """
+    logger.info(f"Indexador de logs iniciado ({index.log_dir} -> {index.db_path})")
+    while True:
+        try:
+            inserted = await asyncio.to_thread(index.refresh)
+            if inserted:
+                logger.debug(f"Indexadas {inserted} entradas de log nuevas")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Error en indexador de logs: {type(e).__name__}: {e}")
+        await asyncio.sleep(interval_seconds)
@@ -0,0 +1,582 @@
+# api/services/log_scan.py
+
+"""
+Escaneo de archivos de log sin índice (modo sin infraestructura).
+
+Alternativa a api.services.log_index cuando LOG_INDEX_ENABLED=false. En
+lugar de leer y filtrar todo LOG_DIR en cada petición:
+
+- Se mantiene en memoria un resumen por archivo (timestamps mínimo y
+  máximo, conteos por nivel/componente/agente/expediente), validado por
+  tamaño y mtime.
+- Los directorios de expediente y los archivos se descartan antes de
+  abrirlos cuando el filtro no puede coincidir con su resumen.
+- Los archivos restantes se parsean en un pool de workers y se mezclan
+  (más reciente primero) en un heap acotado a offset + limit entradas.
+- Los archivos que ya no pueden entrar en la página solo se cuentan; si
+  el resumen basta para el conteo exacto, no se abren.
+
+Layout esperado (AuditLogger): <LOG_DIR>/<expediente_id>/<agent_run_id>.log
+"""
+
+import hashlib
+import heapq
+import itertools
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from threading import Lock
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .log_index import LogFilters, _parse_epoch, _split_csv, _to_epoch
+
+logger = logging.getLogger(__name__)
+
+# (level, component, agent, metadata.agent, expediente_id)
+SummaryKey = Tuple[str, str, Optional[str], Optional[str], Optional[str]]
+
+# Entrada candidata en el heap: (timestamp, id, desempate, log)
+HeapItem = Tuple[str, str, int, Dict[str, Any]]
+
+
+def iter_log_file(log_file: Path) -> Iterator[Dict[str, Any]]:
+    """
+    Lee un archivo de log (JSON lines) entrada a entrada.
+
+    El `id` de cada entrada es "<agent_run_id>-<número de línea>", igual
+    que en el índice de logs.
+
+    Args:
+        log_file: Archivo de log de una ejecución
+
+    Yields:
+        Logs parseados (se ignoran las líneas mal formadas)
+    """
+    try:
+        with open(log_file, "rb") as f:
+            for line_num, raw_line in enumerate(f, 1):
+                line = raw_line.strip()
+                if not line:
+                    continue
+
+                try:
+                    entry = json.loads(line)
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    # Ignorar líneas mal formadas
+                    continue
+                if not isinstance(entry, dict):
+                    continue
+
+                entry["id"] = f"{log_file.stem}-{line_num}"
+                yield entry
+    except OSError:
+        # Ignorar archivos (o el resto del archivo) que no se puedan leer
+        return
+
+
+def _metadata(log: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """metadata de la entrada si es un dict"""
+    metadata = log.get("metadata")
+    return metadata if isinstance(metadata, dict) else None
+
+
+def _sort_key(log: Dict[str, Any]) -> Tuple[str, str]:
+    """Orden de GET /api/v1/logs: (timestamp, id), más reciente primero"""
+    return (str(log.get("timestamp", "")), log["id"])
+
+
+def summary_key(log: Dict[str, Any]) -> SummaryKey:
+    """Clave de conteo de una entrada en el resumen de su archivo"""
+    metadata = _metadata(log)
+    return (
+        str(log.get("level", "")).upper(),
+        log.get("component", "AgentExecutor"),
+        log.get("agent"),
+        metadata.get("agent") if metadata else None,
+        log.get("expediente_id"),
+    )
+
+
+# ============================================================================
+# Filtros
+# ============================================================================
+
+
+class LogMatcher:
+    """
+    Filtros de GET /api/v1/logs compilados una vez por petición.
+
+    Las fechas del filtro se convierten a epoch al construirlo y el
+    timestamp de cada entrada se parsea una sola vez.
+    """
+
+    def __init__(self, filters: LogFilters):
+        """
+        Compila los filtros.
+
+        Args:
+            filters: Filtros de la consulta
+        """
+        self.levels = set(_split_csv(filters.level, upper=True)) if filters.level else None
+        self.components = set(_split_csv(filters.component)) if filters.component else None
+        self.agents = set(_split_csv(filters.agent)) if filters.agent else None
+        self.expediente = filters.expediente_id.lower() if filters.expediente_id else None
+        self.epoch_from = _to_epoch(filters.date_from) if filters.date_from else None
+        self.epoch_to = _to_epoch(filters.date_to) if filters.date_to else None
+        self.search = filters.search.lower() if filters.search else None
+
+    @property
+    def has_dates(self) -> bool:
+        """Indica si hay filtro de fechas"""
+        return self.epoch_from is not None or self.epoch_to is not None
+
+    def match_expediente(self, expediente_id: Optional[str]) -> bool:
+        """Búsqueda parcial case-insensitive por expediente"""
+        if self.expediente is None:
+            return True
+        return bool(expediente_id) and self.expediente in expediente_id.lower()
+
+    def match_key(self, key: SummaryKey) -> bool:
+        """Evalúa los filtros que dependen solo de la clave de resumen"""
+        level, component, agent, metadata_agent, expediente_id = key
+        if self.levels is not None and level not in self.levels:
+            return False
+        if self.components is not None and component not in self.components:
+            return False
+        if self.agents is not None and agent not in self.agents and metadata_agent not in self.agents:
+            return False
+        return self.match_expediente(expediente_id)
+
+    def match_epoch(self, epoch: Optional[float]) -> bool:
+        """Evalúa el rango de fechas (timestamps inválidos no coinciden)"""
+        if epoch is None:
+            return False
+        if self.epoch_from is not None and epoch < self.epoch_from:
+            return False
+        if self.epoch_to is not None and epoch > self.epoch_to:
+            return False
+        return True
+
+    def match_search(self, log: Dict[str, Any]) -> bool:
+        """Búsqueda de texto en mensaje, metadata y error"""
+        return search_text_contains(log, self.search)
+
+    def match(self, log: Dict[str, Any]) -> bool:
+        """
+        Evalúa todos los filtros sobre una entrada.
+
+        Args:
+            log: Log en formato interno
+
+        Returns:
+            True si la entrada cumple los filtros
+        """
+        if not self.match_key(summary_key(log)):
+            return False
+        if self.has_dates and not self.match_epoch(_parse_epoch(str(log.get("timestamp", "")))):
+            return False
+        if self.search is not None and not self.match_search(log):
+            return False
+        return True
+
+    def count_from_summary(self, summary: "FileSummary") -> Optional[int]:
+        """
+        Entradas de un archivo que cumplen los filtros, según su resumen.
+
+        Returns:
+            Conteo exacto, o None si hace falta leer el archivo (búsqueda
+            de texto o rango de fechas que corta el archivo)
+        """
+        keyed = sum(n for key, n in summary.counts.items() if self.match_key(key))
+        if keyed == 0:
+            return 0
+
+        if self.has_dates:
+            if summary.min_epoch is None:
+                return 0
+            if (self.epoch_from is not None and summary.max_epoch < self.epoch_from) or \
+                    (self.epoch_to is not None and summary.min_epoch > self.epoch_to):
+                return 0
+            inside = summary.invalid_timestamps == 0 and self.match_epoch(summary.min_epoch) \
+                and self.match_epoch(summary.max_epoch)
+            if not inside:
+                return None
+
+        if self.search is not None:
+            return None
+        return keyed
+
+
+def search_text_contains(log: Dict[str, Any], search_lower: str) -> bool:
+    """Búsqueda de texto (en minúsculas) en mensaje, metadata y error"""
+    if search_lower in str(log.get("mensaje", "")).lower():
+        return True
+    if log.get("metadata") and search_lower in json.dumps(log["metadata"]).lower():
+        return True
+    return bool(log.get("error")) and search_lower in str(log.get("error")).lower()
+
+
+# ============================================================================
+# Resúmenes por archivo
+# ============================================================================
+
+
+@dataclass
+class FileSummary:
+    """
+    Resumen de un archivo de log.
+
+    Válido mientras no cambien el tamaño ni el mtime del archivo.
+    """
+
+    size: int
+    mtime_ns: int
+    min_timestamp: str = ""
+    max_timestamp: str = ""
+    min_epoch: Optional[float] = None
+    max_epoch: Optional[float] = None
+    invalid_timestamps: int = 0
+    counts: Dict[SummaryKey, int] = field(default_factory=dict)
+
+    def add(self, log: Dict[str, Any], epoch: Optional[float]) -> None:
+        """Incorpora una entrada al resumen"""
+        timestamp = str(log.get("timestamp", ""))
+        if not self.counts:
+            self.min_timestamp = self.max_timestamp = timestamp
+        else:
+            self.min_timestamp = min(self.min_timestamp, timestamp)
+            self.max_timestamp = max(self.max_timestamp, timestamp)
+
+        if epoch is None:
+            self.invalid_timestamps += 1
+        else:
+            self.min_epoch = epoch if self.min_epoch is None else min(self.min_epoch, epoch)
+            self.max_epoch = epoch if self.max_epoch is None else max(self.max_epoch, epoch)
+
+        key = summary_key(log)
+        self.counts[key] = self.counts.get(key, 0) + 1
+
+    @property
+    def entries(self) -> int:
+        """Número de entradas del archivo"""
+        return sum(self.counts.values())
+
+
+@dataclass
+class FileScan:
+    """Resultado de leer un archivo para una consulta"""
+
+    summary: FileSummary
+    matched: int
+    top: List[HeapItem]
+
+
+def _push_bounded(heap: List[HeapItem], item: HeapItem, size: int) -> None:
+    """Mantiene en `heap` las `size` entradas más recientes"""
+    if len(heap) < size:
+        heapq.heappush(heap, item)
+    elif item[:2] > heap[0][:2]:
+        heapq.heapreplace(heap, item)
+
+
+# ============================================================================
+# Escáner
+# ============================================================================
+
+
+class LogScanner:
+    """
+    Consultas de logs leyendo directamente los archivos de LOG_DIR.
+
+    Mismos filtros, orden y paginación que LogIndex.query(), sin base de
+    datos. Pensado para instalaciones pequeñas.
+    """
+
+    def __init__(self, log_dir: Path | str, max_workers: int = 4):
+        """
+        Inicializa el escáner.
+
+        Args:
+            log_dir: Directorio base de logs (LOG_DIR)
+            max_workers: Archivos leídos en paralelo
+        """
+        self.log_dir = Path(log_dir)
+        self.max_workers = max(1, max_workers)
+        self._summaries: Dict[Path, FileSummary] = {}
+        self._lock = Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def close(self) -> None:
+        """Detiene el pool de workers"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="log-scan"
+                )
+            return self._executor
+
+    def _list_files(self, matcher: LogMatcher) -> List[Tuple[Path, os.stat_result]]:
+        """
+        Lista los archivos .log candidatos con su stat.
+
+        Los directorios cuyo nombre (expediente_id) no cumple el filtro de
+        expediente se descartan sin listarlos.
+        """
+        files = []
+        try:
+            expediente_dirs = list(os.scandir(self.log_dir))
+        except OSError:
+            return files
+
+        for expediente_dir in expediente_dirs:
+            if not expediente_dir.is_dir() or not matcher.match_expediente(expediente_dir.name):
+                continue
+            try:
+                entries = list(os.scandir(expediente_dir.path))
+            except OSError:
+                continue
+            for entry in entries:
+                if entry.name.endswith(".log") and entry.is_file():
+                    try:
+                        files.append((Path(entry.path), entry.stat()))
+                    except OSError:
+                        continue
+
+        if matcher.expediente is None:
+            # Listado completo: olvidar resúmenes de archivos borrados
+            listed = {path for path, _ in files}
+            with self._lock:
+                for path in [p for p in self._summaries if p not in listed]:
+                    del self._summaries[path]
+
+        return files
+
+    def _cached_summary(self, path: Path, stat: os.stat_result) -> Optional[FileSummary]:
+        with self._lock:
+            summary = self._summaries.get(path)
+        if summary is None or summary.size != stat.st_size or summary.mtime_ns != stat.st_mtime_ns:
+            return None
+        return summary
+
+    def _scan_file(
+        self,
+        path: Path,
+        stat: os.stat_result,
+        matcher: LogMatcher,
+        keep: int,
+        before: Optional[Tuple[str, str]]
+    ) -> FileScan:
+        """
+        Lee un archivo: actualiza su resumen, cuenta las coincidencias y
+        conserva las `keep` más recientes anteriores al cursor.
+        """
+        summary = FileSummary(size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+        matched = 0
+        top: List[HeapItem] = []
+
+        for log in iter_log_file(path):
+            epoch = _parse_epoch(str(log.get("timestamp", "")))
+            summary.add(log, epoch)
+
+            if not matcher.match_key(summary_key(log)):
+                continue
+            if matcher.has_dates and not matcher.match_epoch(epoch):
+                continue
+            if matcher.search is not None and not matcher.match_search(log):
+                continue
+
+            matched += 1
+            if keep > 0:
+                sort_key = _sort_key(log)
+                if before is None or sort_key < before:
+                    _push_bounded(top, (*sort_key, 0, log), keep)
+
+        with self._lock:
+            self._summaries[path] = summary
+
+        return FileScan(summary=summary, matched=matched, top=top)
+
+    @staticmethod
+    def _merge(
+        heap: List[HeapItem],
+        scan: FileScan,
+        keep: int,
+        tiebreak: Iterator[int]
+    ) -> None:
+        """Incorpora las entradas candidatas de un archivo al heap global"""
+        for timestamp, log_id, _, log in scan.top:
+            _push_bounded(heap, (timestamp, log_id, next(tiebreak), log), keep)
+
+    @staticmethod
+    def _can_contribute(
+        summary: FileSummary,
+        heap: List[HeapItem],
+        keep: int,
+        after: Optional[Tuple[str, str]]
+    ) -> bool:
+        """Indica si un archivo puede aportar entradas a la página"""
+        if keep <= 0:
+            return False
+        if after is not None and summary.min_timestamp > after[0]:
+            return False
+        return len(heap) < keep or summary.max_timestamp >= heap[0][0]
+
+    def query(
+        self,
+        filters: LogFilters,
+        limit: int,
+        offset: int = 0,
+        after: Optional[Tuple[str, str]] = None
+    ) -> Tuple[int, List[Dict[str, Any]]]:
+        """
+        Consulta logs ordenados del más reciente al más antiguo.
+
+        Args:
+            filters: Filtros de la consulta
+            limit: Número máximo de resultados
+            offset: Desplazamiento (paginación por página)
+            after: Cursor (timestamp, id); solo entradas anteriores
+
+        Returns:
+            Tupla (total de coincidencias sin cursor, página de logs)
+        """
+        matcher = LogMatcher(filters)
+        keep = offset + limit
+        executor = self._get_executor()
+        tiebreak = itertools.count()
+
+        heap: List[HeapItem] = []
+        total = 0
+
+        known = []
+        unknown = []
+        for path, stat in self._list_files(matcher):
+            summary = self._cached_summary(path, stat)
+            if summary is None:
+                unknown.append((path, stat))
+                continue
+            count = matcher.count_from_summary(summary)
+            if count == 0:
+                continue
+            known.append((path, stat, summary, count))
+
+        # Archivos nuevos o modificados: hay que leerlos para resumirlos
+        for scan in executor.map(
+            lambda item: self._scan_file(item[0], item[1], matcher, keep, after), unknown
+        ):
+            total += scan.matched
+            self._merge(heap, scan, keep, tiebreak)
+
+        # Archivos con resumen, del más reciente al más antiguo: en cuanto
+        # el heap está lleno, los que terminan antes de su mínimo ya no
+        # pueden entrar en la página y solo se cuentan
+        known.sort(key=lambda item: item[2].max_timestamp, reverse=True)
+        count_only = []
+        position = 0
+        while position < len(known):
+            batch = []
+            while position < len(known) and len(batch) < self.max_workers:
+                item = known[position]
+                position += 1
+                if self._can_contribute(item[2], heap, keep, after):
+                    batch.append(item)
+                elif item[3] is None:
+                    count_only.append(item)
+                else:
+                    total += item[3]
+
+            for scan in executor.map(
+                lambda item: self._scan_file(item[0], item[1], matcher, keep, after), batch
+            ):
+                total += scan.matched
+                self._merge(heap, scan, keep, tiebreak)
+
+        # Conteo de los que el resumen no resuelve (búsqueda, fechas parciales)
+        for scan in executor.map(
+            lambda item: self._scan_file(item[0], item[1], matcher, 0, None), count_only
+        ):
+            total += scan.matched
+
+        page = [item[3] for item in sorted(heap, key=lambda item: item[:2], reverse=True)]
+        return total, page[offset:offset + limit]
+
+    def generation(self) -> str:
+        """
+        Contador de generación de LOG_DIR: cambia si se crea, borra o
+        modifica algún archivo de log.
+
+        Solo hace stat de los archivos (no los lee).
+
+        Returns:
+            Hash de rutas, tamaños y mtimes
+        """
+        digest = hashlib.blake2b(digest_size=8)
+        for path, stat in sorted(self._list_files(LogMatcher(LogFilters())), key=lambda item: item[0]):
+            digest.update(f"{path}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode())
+        return digest.hexdigest()
+
+    def iter_entries(self, filters: LogFilters) -> Iterator[Dict[str, Any]]:
+        """
+        Recorre todas las coincidencias archivo a archivo (sin orden global).
+
+        Usa los resúmenes para no abrir archivos sin coincidencias.
+
+        Args:
+            filters: Filtros de la consulta
+
+        Yields:
+            Logs en formato interno
+        """
+        matcher = LogMatcher(filters)
+        for path, stat in self._list_files(matcher):
+            summary = self._cached_summary(path, stat)
+            if summary is not None and matcher.count_from_summary(summary) == 0:
+                continue
+            for log in iter_log_file(path):
+                if matcher.match(log):
+                    yield log
+
+
+# ============================================================================
+# Instancias por LOG_DIR
+# ============================================================================
+
+_log_scanners: Dict[Path, LogScanner] = {}
+_log_scanners_lock = Lock()
+
+
+def get_log_scanner(log_dir: Path | str, max_workers: int = 4) -> LogScanner:
+    """
+    Obtiene el escáner asociado a un LOG_DIR (una instancia por directorio).
+
+    Args:
+        log_dir: Directorio base de logs
+        max_workers: Archivos leídos en paralelo (solo en la primera llamada)
+
+    Returns:
+        LogScanner compartido para ese directorio
+    """
+    key = Path(log_dir).resolve()
+    with _log_scanners_lock:
+        scanner = _log_scanners.get(key)
+        if scanner is None:
+            scanner = LogScanner(key, max_workers=max_workers)
+            _log_scanners[key] = scanner
+        return scanner
+
+
+def reset_log_scanners() -> None:
+    """Detiene y olvida todos los escáneres (útil para tests)."""
+    with _log_scanners_lock:
+        for scanner in _log_scanners.values():
+            scanner.close()
+        _log_scanners.clear()
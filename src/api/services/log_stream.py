@@ -0,0 +1,300 @@
+# api/services/log_stream.py
+
+"""
+Pub/sub en proceso para el streaming de logs (SSE).
+
+Un único poller por proceso lee las entradas nuevas del índice de logs
+(api.services.log_index) y las reparte a los suscriptores. El número de
+dashboards conectados no multiplica las lecturas de disco: cada entrada
+se lee una vez y el filtrado se hace en memoria por suscriptor.
+
+Cada suscriptor tiene una cola acotada. Si un consumidor es lento, se
+descartan las entradas más antiguas y se acumula un contador que se
+entrega como un único aviso ("dropped") en lugar de crecer sin límite.
+"""
+
+import asyncio
+import logging
+from threading import Lock
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from .log_index import LogIndex
+
+logger = logging.getLogger(__name__)
+
+# Entradas leídas del índice por iteración del poller
+POLL_BATCH_SIZE = 1000
+
+# Máximo de entradas del índice revisadas al reanudar con Last-Event-ID
+RESUME_SCAN_LIMIT = 100_000
+
+LogEvent = Tuple[int, Dict[str, Any]]
+
+
+class LogSubscription:
+    """
+    Suscripción de un cliente al stream de logs.
+
+    Las entradas se entregan como tuplas (rowid, log). El rowid es la
+    posición en el índice y se usa como id de evento SSE.
+    """
+
+    def __init__(
+        self,
+        match: Callable[[Dict[str, Any]], bool],
+        queue_size: int
+    ):
+        """
+        Inicializa la suscripción.
+
+        Args:
+            match: Predicado de filtrado (mismos filtros que GET /api/v1/logs)
+            queue_size: Máximo de entradas pendientes de entregar
+        """
+        self.match = match
+        self.queue: asyncio.Queue[LogEvent] = asyncio.Queue(maxsize=queue_size)
+        self.backlog: List[LogEvent] = []
+        self.dropped = 0
+        self.resume_truncated = False
+
+    def offer(self, event: LogEvent) -> None:
+        """
+        Encola una entrada sin bloquear al poller.
+
+        Si la cola está llena se descarta la entrada más antigua.
+
+        Args:
+            event: Tupla (rowid, log)
+        """
+        if self.queue.full():
+            try:
+                self.queue.get_nowait()
+                self.dropped += 1
+            except asyncio.QueueEmpty:
+                pass
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout: float) -> Optional[LogEvent]:
+        """
+        Espera la siguiente entrada.
+
+        Args:
+            timeout: Segundos máximos de espera
+
+        Returns:
+            Tupla (rowid, log) o None si vence el timeout
+        """
+        # Primero las entradas pendientes de una reconexión (Last-Event-ID)
+        if self.backlog:
+            return self.backlog.pop(0)
+
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def take_dropped(self) -> int:
+        """Devuelve y reinicia el contador de entradas descartadas"""
+        dropped, self.dropped = self.dropped, 0
+        return dropped
+
+
+class LogBroadcaster:
+    """
+    Reparte las entradas nuevas del índice a todos los suscriptores.
+
+    El poller se arranca con el primer suscriptor y se detiene cuando
+    no queda ninguno.
+    """
+
+    def __init__(
+        self,
+        index: LogIndex,
+        poll_interval: float = 1.0,
+        queue_size: int = 1000
+    ):
+        """
+        Inicializa el broadcaster.
+
+        Args:
+            index: Índice de logs del que leer las entradas nuevas
+            poll_interval: Segundos entre lecturas del índice
+            queue_size: Tamaño de la cola de cada suscriptor
+        """
+        self.index = index
+        self.poll_interval = poll_interval
+        self.queue_size = queue_size
+        self._subscribers: Set[LogSubscription] = set()
+        self._task: Optional[asyncio.Task] = None
+        self._last_rowid: Optional[int] = None
+        self._poll_lock = asyncio.Lock()
+
+    @property
+    def subscriber_count(self) -> int:
+        """Número de suscriptores activos"""
+        return len(self._subscribers)
+
+    async def subscribe(
+        self,
+        match: Callable[[Dict[str, Any]], bool],
+        last_event_id: Optional[int] = None
+    ) -> LogSubscription:
+        """
+        Registra un suscriptor.
+
+        Si se indica last_event_id (reconexión con Last-Event-ID) se
+        entregan primero las entradas posteriores a esa posición, con el
+        mismo límite que la cola en vivo (se conservan las más recientes).
+
+        Args:
+            match: Predicado de filtrado
+            last_event_id: rowid del último evento recibido por el cliente
+
+        Returns:
+            Suscripción creada
+        """
+        subscription = LogSubscription(match, self.queue_size)
+
+        if self._last_rowid is None:
+            self._last_rowid = await asyncio.to_thread(self.index.max_rowid)
+
+        # Registrar y tomar la posición del poller sin ceder el event loop:
+        # lo posterior a `position` llega por la cola en vivo
+        position = self._last_rowid
+        self._subscribers.add(subscription)
+        self._ensure_running()
+
+        if last_event_id is not None and last_event_id < position:
+            since = max(last_event_id, position - RESUME_SCAN_LIMIT)
+            subscription.resume_truncated = since > last_event_id
+            backlog = await asyncio.to_thread(self._read_backlog, since, position)
+            matched = [event for event in backlog if subscription.match(event[1])]
+            if len(matched) > self.queue_size:
+                subscription.dropped += len(matched) - self.queue_size
+                matched = matched[-self.queue_size:]
+            subscription.backlog = matched
+
+        return subscription
+
+    def unsubscribe(self, subscription: LogSubscription) -> None:
+        """
+        Elimina un suscriptor. Detiene el poller si no quedan más.
+
+        Args:
+            subscription: Suscripción a eliminar
+        """
+        self._subscribers.discard(subscription)
+        if not self._subscribers and self._task is not None:
+            self._task.cancel()
+            self._task = None
+            self._last_rowid = None
+
+    def _read_backlog(self, since_rowid: int, until_rowid: int) -> List[LogEvent]:
+        """Lee las entradas en (since_rowid, until_rowid] para una reconexión"""
+        events: List[LogEvent] = []
+        while since_rowid < until_rowid:
+            batch = self.index.entries_since(since_rowid, POLL_BATCH_SIZE)
+            if not batch:
+                break
+            for event in batch:
+                if event[0] > until_rowid:
+                    return events
+                events.append(event)
+            since_rowid = batch[-1][0]
+        return events
+
+    def _ensure_running(self) -> None:
+        """Arranca el poller si no está en marcha"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def poll_once(self) -> int:
+        """
+        Lee una vez las entradas nuevas del índice y las reparte.
+
+        Returns:
+            Número de entradas leídas
+        """
+        async with self._poll_lock:
+            return await self._poll()
+
+    async def _poll(self) -> int:
+        """Lectura y reparto (llamar con _poll_lock adquirido)"""
+        if self._last_rowid is None:
+            self._last_rowid = await asyncio.to_thread(self.index.max_rowid)
+
+        # El indexador en background suele ir por delante; si no está
+        # corriendo, se refresca aquí (sin esperar si hay una pasada en curso)
+        await asyncio.to_thread(self.index.refresh_if_stale, self.poll_interval)
+
+        total = 0
+        while True:
+            batch = await asyncio.to_thread(
+                self.index.entries_since, self._last_rowid, POLL_BATCH_SIZE
+            )
+            if not batch:
+                break
+
+            for event in batch:
+                for subscription in list(self._subscribers):
+                    if subscription.match(event[1]):
+                        subscription.offer(event)
+
+            self._last_rowid = batch[-1][0]
+            total += len(batch)
+            if len(batch) < POLL_BATCH_SIZE:
+                break
+
+        return total
+
+    async def _run(self) -> None:
+        """Bucle del poller"""
+        while True:
+            try:
+                await self.poll_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error en streaming de logs: {type(e).__name__}: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+
+# ============================================================================
+# Instancias por índice
+# ============================================================================
+
+_broadcasters: Dict[int, LogBroadcaster] = {}
+_broadcasters_lock = Lock()
+
+
+def get_log_broadcaster(
+    index: LogIndex,
+    poll_interval: float = 1.0,
+    queue_size: int = 1000
+) -> LogBroadcaster:
+    """
+    Obtiene el broadcaster asociado a un índice (uno por proceso).
+
+    Args:
+        index: Índice de logs
+        poll_interval: Segundos entre lecturas (solo en la primera llamada)
+        queue_size: Tamaño de cola por suscriptor (solo en la primera llamada)
+
+    Returns:
+        LogBroadcaster compartido
+    """
+    with _broadcasters_lock:
+        broadcaster = _broadcasters.get(id(index))
+        if broadcaster is None or broadcaster.index is not index:
+            broadcaster = LogBroadcaster(index, poll_interval, queue_size)
+            _broadcasters[id(index)] = broadcaster
+        return broadcaster
+
+
+def reset_log_broadcasters() -> None:
+    """Detiene y olvida todos los broadcasters (útil para tests)."""
+    with _broadcasters_lock:
+        for broadcaster in _broadcasters.values():
+            if broadcaster._task is not None:
+                broadcaster._task.cancel()
+        _broadcasters.clear()
@@ -0,0 +1,79 @@
+# api/services/mcp_metrics.py
+
+"""
+Métricas Prometheus del circuit breaker y del límite de concurrencia
+de los servidores MCP.
+
+Un collector que lee el estado de los ServerGuard en cada scrape de
+/metrics, sin contadores propios que mantener sincronizados.
+"""
+
+from typing import Iterator, Optional
+
+from prometheus_client import REGISTRY
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.registry import Collector
+
+from backoffice.mcp.resilience import CLOSED, HALF_OPEN, OPEN, get_server_guards
+
+# Valor numérico del estado del circuito en agentix_mcp_circuit_state
+CIRCUIT_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class MCPGuardCollector(Collector):
+    """Expone el estado de los guards de los servidores MCP"""
+
+    def collect(self) -> Iterator:
+        state = GaugeMetricFamily(
+            "agentix_mcp_circuit_state",
+            "Estado del circuito por servidor MCP (0=closed, 1=half_open, 2=open)",
+            labels=["server"]
+        )
+        limit = GaugeMetricFamily(
+            "agentix_mcp_concurrency_limit",
+            "Límite de concurrencia adaptativo por servidor MCP",
+            labels=["server"]
+        )
+        in_flight = GaugeMetricFamily(
+            "agentix_mcp_in_flight",
+            "Llamadas en curso por servidor MCP",
+            labels=["server"]
+        )
+        error_rate = GaugeMetricFamily(
+            "agentix_mcp_error_rate",
+            "Tasa de errores en la ventana del circuit breaker",
+            labels=["server"]
+        )
+        opened = CounterMetricFamily(
+            "agentix_mcp_circuit_opened",
+            "Veces que se ha abierto el circuito",
+            labels=["server"]
+        )
+        rejected = CounterMetricFamily(
+            "agentix_mcp_rejected",
+            "Llamadas rechazadas sin llegar al servidor MCP",
+            labels=["server", "reason"]
+        )
+
+        for server_id, guard in sorted(get_server_guards().items()):
+            snapshot = guard.snapshot()
+            state.add_metric([server_id], CIRCUIT_STATE_VALUES[snapshot["state"]])
+            limit.add_metric([server_id], snapshot["limit"])
+            in_flight.add_metric([server_id], snapshot["in_flight"])
+            error_rate.add_metric([server_id], snapshot["error_rate"])
+            opened.add_metric([server_id], snapshot["times_opened"])
+            rejected.add_metric([server_id, "circuit_open"], snapshot["rejected_open"])
+            rejected.add_metric([server_id, "concurrency_limit"], snapshot["rejected_limit"])
+
+        yield from (state, limit, in_flight, error_rate, opened, rejected)
+
+
+_collector: Optional[MCPGuardCollector] = None
+
+
+def register_mcp_metrics() -> None:
+    """Registra el collector en el registry global de Prometheus (una sola vez)"""
+    global _collector
+    if _collector is None:
+        _collector = MCPGuardCollector()
+        REGISTRY.register(_collector)
@@ -7,10 +7,20 @@ Mantiene en memoria el estado de las ejecuciones asíncronas.
 En producción (Paso 5) esto será reemplazado por Redis.
 """
 
+import asyncio
 from datetime import datetime, timezone
-from typing import Dict, Optional, Any
+from typing import Dict, Optional, Any, Tuple
 from threading import Lock
 
+from backoffice.mcp.deadline import Deadline
+
+# Estados en los que la ejecución ya ha terminado
+FINAL_STATUSES = ("completed", "failed", "cancelled")
+
+
+class IdempotencyConflictError(ValueError):
+    """Clave de idempotencia reutilizada con otra petición"""
+
 
 class TaskTracker:
     """
@@ -21,6 +31,11 @@ class TaskTracker:
 
     def __init__(self):
         self._tasks: Dict[str, Dict[str, Any]] = {}
+        # Handles de las ejecuciones en curso (para cancelarlas)
+        self._handles: Dict[str, Tuple[asyncio.Task, Deadline]] = {}
+        # Clave de idempotencia -> (agent_run_id, huella de la petición)
+        # (deduplicación de POST /execute)
+        self._idempotency: Dict[str, Tuple[str, str]] = {}
         self._lock = Lock()
 
     def register(
@@ -38,25 +53,91 @@ class TaskTracker:
             tarea_id: ID de la tarea BPMN
         """
         with self._lock:
-            self._tasks[agent_run_id] = {
-                "agent_run_id": agent_run_id,
-                "expediente_id": expediente_id,
-                "tarea_id": tarea_id,
-                "status": "pending",
-                "started_at": datetime.now(timezone.utc).isoformat(),
-                "completed_at": None,
-                "elapsed_seconds": 0,
-                "success": None,
-                "resultado": None,
-                "error": None
-            }
+            self._new_task(agent_run_id, expediente_id, tarea_id)
+
+    def _new_task(self, agent_run_id: str, expediente_id: str, tarea_id: str) -> None:
+        """Crea la entrada de una tarea pendiente (con lock)"""
+        self._tasks[agent_run_id] = {
+            "agent_run_id": agent_run_id,
+            "expediente_id": expediente_id,
+            "tarea_id": tarea_id,
+            "status": "pending",
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "completed_at": None,
+            "elapsed_seconds": 0,
+            "success": None,
+            "resultado": None,
+            "error": None
+        }
+
+    def register_idempotent(
+        self,
+        idempotency_key: str,
+        fingerprint: str,
+        window_seconds: float,
+        agent_run_id: str,
+        expediente_id: str,
+        tarea_id: str
+    ) -> Tuple[str, bool]:
+        """
+        Registra una nueva tarea salvo que ya exista una con la misma clave.
+
+        Una petición repetida se asocia a la ejecución existente si sigue
+        en curso (pending/running) o si se completó con éxito hace menos de
+        window_seconds. Tras un fallo (también un resultado con
+        success=False, p.ej. un error de JWT o MCP) o una cancelación se
+        registra una ejecución nueva.
+
+        Args:
+            idempotency_key: Clave de idempotencia de la petición
+            fingerprint: Huella del contenido de la petición
+            window_seconds: Ventana de deduplicación tras completarse
+            agent_run_id: ID para la ejecución nueva
+            expediente_id: ID del expediente
+            tarea_id: ID de la tarea BPMN
+
+        Returns:
+            (agent_run_id, creada): el ID de la ejecución nueva y True, o
+            el de la ejecución existente y False
+
+        Raises:
+            IdempotencyConflictError: Si la clave ya se usó con otra petición
+        """
+        with self._lock:
+            existing_id, existing_fingerprint = self._idempotency.get(
+                idempotency_key, (None, None)
+            )
+            existing = self._tasks.get(existing_id) if existing_id else None
+
+            if existing is not None:
+                if existing_fingerprint != fingerprint:
+                    raise IdempotencyConflictError(
+                        f"La clave de idempotencia ya se usó con otra petición "
+                        f"(ejecución {existing_id})"
+                    )
+                if existing["status"] not in FINAL_STATUSES:
+                    return existing_id, False
+                if existing["status"] == "completed" and existing["success"]:
+                    completed = datetime.fromisoformat(existing["completed_at"])
+                    age = (datetime.now(timezone.utc) - completed).total_seconds()
+                    if age <= window_seconds:
+                        return existing_id, False
+
+            self._new_task(agent_run_id, expediente_id, tarea_id)
+            self._idempotency[idempotency_key] = (agent_run_id, fingerprint)
+            return agent_run_id, True
 
     def mark_running(self, agent_run_id: str) -> None:
         """Marca tarea como en ejecución"""
         with self._lock:
-            if agent_run_id in self._tasks:
+            if self._is_open(agent_run_id):
                 self._tasks[agent_run_id]["status"] = "running"
 
+    def _is_open(self, agent_run_id: str) -> bool:
+        """True si la tarea existe y no ha sido cancelada (con lock)"""
+        task = self._tasks.get(agent_run_id)
+        return task is not None and task["status"] != "cancelled"
+
     def mark_completed(self, agent_run_id: str, result: Any) -> None:
         """
         Marca tarea como completada.
@@ -66,7 +147,7 @@ class TaskTracker:
             result: AgentExecutionResult del backoffice
         """
         with self._lock:
-            if agent_run_id in self._tasks:
+            if self._is_open(agent_run_id):
                 task = self._tasks[agent_run_id]
                 task["status"] = "completed"
                 task["completed_at"] = datetime.now(timezone.utc).isoformat()
@@ -92,17 +173,76 @@ class TaskTracker:
             error: Dict con codigo, mensaje, detalle
         """
         with self._lock:
-            if agent_run_id in self._tasks:
-                task = self._tasks[agent_run_id]
-                task["status"] = "failed"
-                task["completed_at"] = datetime.now(timezone.utc).isoformat()
-                task["success"] = False
-                task["error"] = error
+            if self._is_open(agent_run_id):
+                self._finish(agent_run_id, "failed", error)
+
+    def _finish(self, agent_run_id: str, status: str, error: Dict[str, str]) -> None:
+        """Cierra la tarea con un error (con lock)"""
+        task = self._tasks[agent_run_id]
+        task["status"] = status
+        task["completed_at"] = datetime.now(timezone.utc).isoformat()
+        task["success"] = False
+        task["error"] = error
+
+        # Calcular elapsed_seconds
+        started = datetime.fromisoformat(task["started_at"])
+        completed = datetime.fromisoformat(task["completed_at"])
+        task["elapsed_seconds"] = int((completed - started).total_seconds())
+
+    def attach(self, agent_run_id: str, task: asyncio.Task, deadline: Deadline) -> None:
+        """
+        Asocia a la tarea su ejecución en curso, para poder cancelarla.
 
-                # Calcular elapsed_seconds
-                started = datetime.fromisoformat(task["started_at"])
-                completed = datetime.fromisoformat(task["completed_at"])
-                task["elapsed_seconds"] = int((completed - started).total_seconds())
+        Args:
+            agent_run_id: ID de la ejecución
+            task: Tarea asyncio que ejecuta el agente
+            deadline: Plazo de la ejecución (propagado a las llamadas MCP)
+        """
+        with self._lock:
+            self._handles[agent_run_id] = (task, deadline)
+
+    def detach(self, agent_run_id: str) -> None:
+        """Olvida la ejecución en curso de una tarea (ya terminada)"""
+        with self._lock:
+            self._handles.pop(agent_run_id, None)
+
+    def is_cancelled(self, agent_run_id: str) -> bool:
+        """True si la tarea ha sido cancelada"""
+        with self._lock:
+            task = self._tasks.get(agent_run_id)
+            return task is not None and task["status"] == "cancelled"
+
+    def cancel(self, agent_run_id: str, error: Dict[str, str]) -> Optional[str]:
+        """
+        Cancela una tarea pendiente o en ejecución.
+
+        La marca como cancelada y, si está en ejecución, vence su plazo
+        (las llamadas MCP siguientes fallan al momento y las tools de
+        CrewAI abortan el crew) y cancela su tarea asyncio.
+
+        Args:
+            agent_run_id: ID de la ejecución
+            error: Dict con codigo, mensaje, detalle
+
+        Returns:
+            Estado previo de la tarea (si ya era final, no se cancela),
+            o None si no existe
+        """
+        with self._lock:
+            task = self._tasks.get(agent_run_id)
+            if task is None:
+                return None
+            previous = task["status"]
+            if previous in FINAL_STATUSES:
+                return previous
+            self._finish(agent_run_id, "cancelled", error)
+            handle = self._handles.pop(agent_run_id, None)
+
+        if handle is not None:
+            execution, deadline = handle
+            deadline.cancel()
+            execution.get_loop().call_soon_threadsafe(execution.cancel)
+        return previous
 
     def get_status(self, agent_run_id: str) -> Optional[Dict[str, Any]]:
         """
@@ -150,6 +290,12 @@ class TaskTracker:
 
             for run_id in to_delete:
                 del self._tasks[run_id]
+                self._handles.pop(run_id, None)
+
+            self._idempotency = {
+                key: entry for key, entry in self._idempotency.items()
+                if entry[0] in self._tasks
+            }
 
             return len(to_delete)
 
@@ -166,3 +312,9 @@ def get_task_tracker() -> TaskTracker:
         Instancia global del TaskTracker
     """
     return _task_tracker
+
+
+def reset_task_tracker() -> None:
+    """Reinicia el tracker (útil para tests)."""
+    global _task_tracker
+    _task_tracker = TaskTracker()
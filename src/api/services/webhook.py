@@ -19,7 +19,8 @@ async def send_webhook(
     webhook_url: str,
     agent_run_id: str,
     result=None,
-    error: Optional[Dict[str, str]] = None
+    error: Optional[Dict[str, str]] = None,
+    status: str = "failed"
 ) -> bool:
     """
     Envía resultado al webhook del BPMN.
@@ -29,6 +30,7 @@ async def send_webhook(
         agent_run_id: ID de la ejecución
         result: AgentExecutionResult (si éxito)
         error: Dict con error (si fallo)
+        status: Estado enviado junto al error: failed o cancelled
 
     Returns:
         True si envío exitoso, False si falló
@@ -42,7 +44,7 @@ async def send_webhook(
 
     if error:
         # Caso de error
-        payload["status"] = "failed"
+        payload["status"] = status
         payload["success"] = False
         payload["error"] = error
     else:
@@ -6,7 +6,7 @@ Módulo de agentes del backoffice.
 Exporta las clases base y el registro de agentes.
 """
 
-from .base import AgentMock
+from .base import AgentMock, ToolCall
 from .registry import (
     AGENT_REGISTRY,
     get_agent_class,
@@ -39,6 +39,7 @@ __all__ = [
     # Base classes
     "AgentMock",
     "AgentReal",
+    "ToolCall",
     # Registry
     "AGENT_REGISTRY",
     "get_agent_class",
@@ -1,7 +1,7 @@
 # backoffice/agents/analizador_subvencion.py
 
 from typing import Dict, Any
-from .base import AgentMock
+from .base import AgentMock, ToolCall
 import json
 
 
@@ -49,25 +49,23 @@ class AnalizadorSubvencion(AgentMock):
         self.logger.log(f"Criterios evaluados: {criterios_cumplidos}")
         self.logger.log(f"Resultado del análisis: {'APROBADO' if aprobado else 'RECHAZADO'}")
 
-        # 3. Actualizar estado
-        self.logger.log(f"Actualizando campo datos.analisis_aprobado = {aprobado}")
-        self._track_tool_use("actualizar_datos")
-
-        await self.mcp_registry.call_tool("actualizar_datos", {
-            "expediente_id": self.expediente_id,
-            "campo": "datos.analisis_aprobado",
-            "valor": aprobado
-        })
-
-        # 4. Añadir anotación
+        # 3. Actualizar estado y añadir anotación (en orden: ambas escriben
+        # en el historial del expediente)
         mensaje = f"Análisis completado: {'APROBADO' if aprobado else 'RECHAZADO'}"
+        self.logger.log(f"Actualizando campo datos.analisis_aprobado = {aprobado}")
         self.logger.log(f"Añadiendo anotación: {mensaje}")
-        self._track_tool_use("añadir_anotacion")
 
-        await self.mcp_registry.call_tool("añadir_anotacion", {
-            "expediente_id": self.expediente_id,
-            "texto": mensaje
-        })
+        await self._run_tools([
+            ToolCall("datos", "actualizar_datos", {
+                "expediente_id": self.expediente_id,
+                "campo": "datos.analisis_aprobado",
+                "valor": aprobado
+            }, serialize=True),
+            ToolCall("anotacion", "añadir_anotacion", {
+                "expediente_id": self.expediente_id,
+                "texto": mensaje
+            }, serialize=True)
+        ])
 
         return {
             "completado": True,
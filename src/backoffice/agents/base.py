@@ -1,11 +1,23 @@
 # backoffice/agents/base.py
 
+import asyncio
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List, Optional
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional, Tuple
 from ..mcp.registry import MCPClientRegistry
 from ..logging.audit_logger import AuditLogger
 
 
+@dataclass
+class ToolCall:
+    """Llamada a una tool dentro de un grafo de llamadas (ver AgentMock._run_tools)"""
+    id: str  # "anotacion"
+    tool: str  # "añadir_anotacion"
+    arguments: Dict[str, Any]
+    after: Tuple[str, ...] = ()  # IDs de llamadas que deben terminar antes
+    serialize: bool = False  # Escritura ordenada tras las anteriores del mismo expediente
+
+
 class AgentMock(ABC):
     """
     Clase base para agentes mock.
@@ -52,6 +64,70 @@ class AgentMock(ABC):
         """
         pass
 
+    async def _run_tools(self, calls: List[ToolCall]) -> Dict[str, Dict[str, Any]]:
+        """
+        Ejecuta un grafo de llamadas a tools.
+
+        Cada llamada empieza en cuanto terminan las de su `after`; las
+        independientes van en paralelo. Las llamadas con serialize=True
+        sobre un mismo expediente se encadenan además en el orden de la
+        lista: el servidor MCP ya serializa las escrituras concurrentes de
+        un expediente, así que solo hace falta cuando el orden importa
+        (p.ej. escrituras que añaden entradas al historial).
+
+        Args:
+            calls: Llamadas en orden de declaración (`after` solo puede
+                referenciar llamadas anteriores, así no hay ciclos)
+
+        Returns:
+            Resultado de cada llamada por ID
+
+        Raises:
+            ValueError: Si un ID se repite o `after` referencia una llamada
+                inexistente o posterior
+            Exception: El primer error de una llamada (las pendientes se cancelan)
+        """
+        tasks: Dict[str, asyncio.Task] = {}
+        last_serialized: Dict[str, str] = {}
+
+        try:
+            for call in calls:
+                if call.id in tasks:
+                    raise ValueError(f"Llamada '{call.id}' repetida en el grafo")
+                unknown = [dep for dep in call.after if dep not in tasks]
+                if unknown:
+                    raise ValueError(
+                        f"Llamada '{call.id}': after referencia llamadas no declaradas antes: {unknown}"
+                    )
+
+                after = list(call.after)
+                if call.serialize:
+                    expediente_id = call.arguments.get("expediente_id", self.expediente_id)
+                    if expediente_id in last_serialized:
+                        after.append(last_serialized[expediente_id])
+                    last_serialized[expediente_id] = call.id
+
+                self._track_tool_use(call.tool)
+                tasks[call.id] = asyncio.ensure_future(
+                    self._call_tool_after(call, [tasks[dep] for dep in after])
+                )
+
+            await asyncio.gather(*tasks.values())
+
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+
+        return {call_id: task.result() for call_id, task in tasks.items()}
+
+    async def _call_tool_after(self, call: ToolCall, after: List[asyncio.Task]) -> Dict[str, Any]:
+        """Llama a la tool cuando han terminado sus dependencias"""
+        if after:
+            await asyncio.gather(*after)
+        return await self.mcp_registry.call_tool(call.tool, call.arguments)
+
     def _track_tool_use(self, tool_name: str):
         """Registra el uso de una herramienta"""
         if tool_name not in self._tools_used:
@@ -22,6 +22,7 @@ import re
 from abc import ABC
 from typing import Dict, Any, List, Optional
 
+from ..mcp.deadline import Deadline
 from ..mcp.registry import MCPClientRegistry
 from ..logging.audit_logger import AuditLogger
 from ..settings import get_settings
@@ -189,6 +190,15 @@ class AgentReal(ABC):
 
             # Crear agente CrewAI con configuración YAML
             agent_cfg = self.config.crewai_agent
+            agent_options = {}
+
+            # Plazo de la ejecución: CrewAI corre en un hilo que no se puede
+            # cancelar desde fuera; max_execution_time lo detiene al vencer
+            deadline = getattr(self.mcp_registry, "deadline", None)
+            if isinstance(deadline, Deadline):
+                deadline.check(self.config.name)
+                agent_options["max_execution_time"] = max(1, int(deadline.remaining()))
+
             agent = Agent(
                 role=agent_cfg.role,
                 goal=self._format_template(agent_cfg.goal),
@@ -196,7 +206,8 @@ class AgentReal(ABC):
                 llm=self.llm,
                 tools=self.mcp_tools,
                 verbose=agent_cfg.verbose,
-                allow_delegation=agent_cfg.allow_delegation
+                allow_delegation=agent_cfg.allow_delegation,
+                **agent_options
             )
 
             # Crear tarea con descripción formateada
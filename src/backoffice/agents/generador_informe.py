@@ -1,7 +1,7 @@
 # backoffice/agents/generador_informe.py
 
 from typing import Dict, Any
-from .base import AgentMock
+from .base import AgentMock, ToolCall
 import json
 
 
@@ -64,25 +64,23 @@ class GeneradorInforme(AgentMock):
 
         self.logger.log(f"Informe generado con {len(informe['documentos'])} documentos")
 
-        # 4. Guardar informe en datos del expediente
-        self.logger.log("Guardando informe en expediente...")
-        self._track_tool_use("actualizar_datos")
-
-        await self.mcp_registry.call_tool("actualizar_datos", {
-            "expediente_id": self.expediente_id,
-            "campo": "datos.ultimo_informe",
-            "valor": informe
-        })
-
-        # 5. Añadir anotación
+        # 4. Guardar informe en datos del expediente y añadir anotación
+        # (en orden: ambas escriben en el historial del expediente)
         mensaje = f"Informe generado exitosamente con {len(documentos)} documentos analizados"
+        self.logger.log("Guardando informe en expediente...")
         self.logger.log(f"Añadiendo anotación: {mensaje}")
-        self._track_tool_use("añadir_anotacion")
 
-        await self.mcp_registry.call_tool("añadir_anotacion", {
-            "expediente_id": self.expediente_id,
-            "texto": mensaje
-        })
+        await self._run_tools([
+            ToolCall("informe", "actualizar_datos", {
+                "expediente_id": self.expediente_id,
+                "campo": "datos.ultimo_informe",
+                "valor": informe
+            }, serialize=True),
+            ToolCall("anotacion", "añadir_anotacion", {
+                "expediente_id": self.expediente_id,
+                "texto": mensaje
+            }, serialize=True)
+        ])
 
         return {
             "completado": True,
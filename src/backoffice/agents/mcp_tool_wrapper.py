@@ -11,8 +11,9 @@ import json
 from typing import Any, Callable, Dict, List, Optional, Type
 from pydantic import BaseModel, Field
 
+from ..mcp.deadline import Deadline, RunCancelled
 from ..mcp.registry import MCPClientRegistry
-from ..mcp.exceptions import MCPError, MCPConnectionError, MCPAuthError, MCPToolError
+from ..mcp.exceptions import MCPError, MCPConnectionError, MCPAuthError, MCPToolError, MCPDeadlineError
 from ..logging.audit_logger import AuditLogger
 
 # Importación condicional de CrewAI
@@ -32,6 +33,18 @@ except ImportError:
 class ConsultarExpedienteArgs(BaseModel):
     """Argumentos para consultar_expediente."""
     expediente_id: str = Field(description="ID del expediente a consultar")
+    fields: Optional[List[str]] = Field(
+        default=None,
+        description="Campos a devolver (ej: ['estado', 'datos', 'documentos.id'])"
+    )
+    exclude: Optional[List[str]] = Field(
+        default=None,
+        description="Campos a omitir (por defecto el texto de los documentos)"
+    )
+    summary: Optional[bool] = Field(
+        default=None,
+        description="Si es true, solo recuentos e IDs"
+    )
 
 
 class ActualizarDatosArgs(BaseModel):
@@ -82,7 +95,11 @@ class AñadirDocumentoArgs(BaseModel):
     expediente_id: str = Field(description="ID del expediente")
     nombre: str = Field(description="Nombre del documento")
     tipo: str = Field(description="Tipo MIME del documento")
-    contenido: str = Field(description="Contenido del documento (base64)")
+    contenido: str = Field(description="Contenido del documento (texto, o base64 para binarios)")
+    codificacion: Optional[str] = Field(
+        default=None,
+        description="Codificación de contenido: 'texto' (por defecto) o 'base64'"
+    )
 
 
 # Mapping de nombre de herramienta a schema de argumentos
@@ -133,6 +150,13 @@ class MCPTool(BaseTool):
         if not CREWAI_AVAILABLE:
             return json.dumps({"error": "CrewAI no está instalado"})
 
+        # Ejecución cancelada: se aborta el crew en esta tool (ver RunCancelled)
+        deadline = getattr(self.mcp_registry, "deadline", None)
+        if isinstance(deadline, Deadline) and deadline.cancelled:
+            if self.logger:
+                self.logger.warning(f"Ejecución cancelada: se aborta el crew en la tool '{self.name}'")
+            raise RunCancelled(self.name)
+
         # Combinar expediente_id con kwargs
         all_args = {"expediente_id": expediente_id, **kwargs}
 
@@ -160,6 +184,19 @@ class MCPTool(BaseTool):
                 )
             return json.dumps(result)
 
+        except MCPDeadlineError as e:
+            # Plazo de la ejecución agotado: ninguna tool más llegará al
+            # servidor, el agente debe terminar
+            error_response = {
+                "error": e.codigo,
+                "message": f"{e.mensaje}. No llames a más herramientas: termina la tarea.",
+                "type": "deadline",
+                "retriable": False
+            }
+            if self.logger:
+                self.logger.error(f"MCP Deadline '{self.name}': [{e.codigo}] {e.mensaje}")
+            return json.dumps(error_response)
+
         except MCPConnectionError as e:
             # Errores de conexión (timeout, servidor caído, etc.)
             error_response = {
@@ -269,8 +306,10 @@ class MCPToolFactory:
         "consultar_expediente": (
             "Consulta los datos completos de un expediente administrativo. "
             "Requiere el parámetro 'expediente_id' (string) con el ID del expediente. "
-            "Retorna un JSON con todos los datos del expediente incluyendo: "
-            "id, tipo, estado, fechas, documentos adjuntos y metadatos."
+            "Retorna un JSON con los datos del expediente incluyendo: "
+            "id, tipo, estado, fechas, documentos adjuntos (sin su texto) y metadatos. "
+            "Opcional: 'fields' o 'exclude' (listas de campos) y 'summary' (true para "
+            "obtener solo recuentos e IDs)."
         ),
         "actualizar_datos": (
             "Actualiza un campo específico del expediente. "
@@ -1,7 +1,7 @@
 # backoffice/agents/validador_documental.py
 
 from typing import Dict, Any
-from .base import AgentMock
+from .base import AgentMock, ToolCall
 
 
 class ValidadorDocumental(AgentMock):
@@ -48,25 +48,24 @@ class ValidadorDocumental(AgentMock):
             faltantes = set(documentos_requeridos) - set(documentos_presentes)
             self.logger.log(f"Faltan documentos: {faltantes}")
 
-        # 3. Actualizar expediente (llamada real a MCP vía registry)
-        self.logger.log(f"Actualizando campo datos.documentacion_valida = {validacion_ok}")
-        self._track_tool_use("actualizar_datos")
-
-        await self.mcp_registry.call_tool("actualizar_datos", {
-            "expediente_id": self.expediente_id,
-            "campo": "datos.documentacion_valida",
-            "valor": validacion_ok
-        })
-
-        # 4. Añadir anotación (llamada real a MCP vía registry)
+        # 3. Actualizar expediente y añadir anotación (llamadas reales a
+        # MCP vía registry). Ambas escriben en el historial del expediente:
+        # en orden, para que el historial quede siempre igual
         mensaje = "Documentación validada correctamente" if validacion_ok else "Documentación incompleta"
+        self.logger.log(f"Actualizando campo datos.documentacion_valida = {validacion_ok}")
         self.logger.log(f"Añadiendo anotación al historial: {mensaje}")
-        self._track_tool_use("añadir_anotacion")
 
-        await self.mcp_registry.call_tool("añadir_anotacion", {
-            "expediente_id": self.expediente_id,
-            "texto": mensaje
-        })
+        await self._run_tools([
+            ToolCall("datos", "actualizar_datos", {
+                "expediente_id": self.expediente_id,
+                "campo": "datos.documentacion_valida",
+                "valor": validacion_ok
+            }, serialize=True),
+            ToolCall("anotacion", "añadir_anotacion", {
+                "expediente_id": self.expediente_id,
+                "texto": mensaje
+            }, serialize=True)
+        ])
 
         return {
             "completado": True,
@@ -1,7 +1,11 @@
 # backoffice/auth/jwt_validator.py
 
+import hashlib
+import time
 import jwt
+from collections import OrderedDict
 from datetime import datetime, timezone
+from threading import Lock
 from typing import Dict, Any, Optional
 from pydantic import BaseModel
 from typing import List
@@ -29,47 +33,83 @@ class JWTValidationError(Exception):
         super().__init__(f"[{codigo}] {mensaje}")
 
 
-def validate_jwt(
-    token: str,
-    secret: str,
-    algorithm: str,
-    expected_expediente_id: str,
-    required_permissions: List[str] = None,
-    expected_issuer: Optional[str] = None,
-    expected_subject: Optional[str] = None,
-    required_audience: Optional[str] = None
-) -> JWTClaims:
+class VerifiedTokenCache:
     """
-    Valida un token JWT completo con todos los claims obligatorios.
+    LRU de tokens con firma ya verificada y sus claims.
 
-    Args:
-        token: Token JWT a validar
-        secret: Clave secreta para verificar firma
-        algorithm: Algoritmo de firma (ej: HS256)
-        expected_expediente_id: ID del expediente que debe coincidir con exp_id
-        required_permissions: Permisos requeridos (opcional)
-        expected_issuer: Emisor esperado (usa config si no se proporciona)
-        expected_subject: Subject esperado (usa config si no se proporciona)
-        required_audience: Audiencia requerida (usa config si no se proporciona)
+    La clave es un hash del token (junto con la clave y el algoritmo de
+    firma), nunca el token en claro. Cada entrada caduca en el `exp` del
+    propio token y no se prolonga al usarla. Solo se guarda el resultado
+    de la parte cara (firma + construcción de JWTClaims): las
+    comprobaciones de emisor, audiencia, expediente y permisos se
+    repiten en cada validación.
+    """
 
-    Returns:
-        JWTClaims validados
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[bytes, JWTClaims]" = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
 
-    Raises:
-        JWTValidationError: Si el token es inválido o no cumple requisitos
+    @staticmethod
+    def key(token: str, secret: str, algorithm: str) -> bytes:
+        return hashlib.sha256(f"{algorithm}\0{secret}\0{token}".encode("utf-8")).digest()
+
+    def get(self, key: bytes) -> Optional[JWTClaims]:
+        """Claims del token si está en la caché y no ha expirado"""
+        with self._lock:
+            claims = self._entries.get(key)
+            if claims is not None and time.time() < claims.exp:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return claims
+            if claims is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: bytes, claims: JWTClaims) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = claims
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Caché global (se crea en el primer uso con JWT_CACHE_SIZE)
+_token_cache: Optional[VerifiedTokenCache] = None
+
+
+def get_token_cache() -> VerifiedTokenCache:
+    """Obtiene la caché global de tokens verificados"""
+    global _token_cache
+    if _token_cache is None:
+        from backoffice.settings import settings
+        _token_cache = VerifiedTokenCache(settings.JWT_CACHE_SIZE)
+    return _token_cache
+
+
+def _decode_claims(token: str, secret: str, algorithm: str) -> JWTClaims:
     """
-    # Importar configuración
-    from backoffice.settings import settings
+    Verifica la firma y las fechas del token y construye sus claims.
 
-    # Usar configuración si no se proporcionan valores
-    if expected_issuer is None:
-        expected_issuer = settings.JWT_EXPECTED_ISSUER
-    if expected_subject is None:
-        expected_subject = settings.JWT_EXPECTED_SUBJECT
-    if required_audience is None:
-        required_audience = settings.JWT_REQUIRED_AUDIENCE
+    Raises:
+        JWTValidationError: Si el token no es válido
+    """
     try:
-        # 1. Decodificar y verificar firma
+        # Decodificar y verificar firma
         payload = jwt.decode(
             token,
             secret,
@@ -104,9 +144,9 @@ def validate_jwt(
             detalle=str(e)
         )
 
-    # 2. Validar estructura de claims
+    # Validar estructura de claims
     try:
-        claims = JWTClaims(**payload)
+        return JWTClaims(**payload)
     except Exception as e:
         raise JWTValidationError(
             codigo="AUTH_INVALID_TOKEN",
@@ -114,6 +154,58 @@ def validate_jwt(
             detalle=str(e)
         )
 
+
+def validate_jwt(
+    token: str,
+    secret: str,
+    algorithm: str,
+    expected_expediente_id: str,
+    required_permissions: List[str] = None,
+    expected_issuer: Optional[str] = None,
+    expected_subject: Optional[str] = None,
+    required_audience: Optional[str] = None
+) -> JWTClaims:
+    """
+    Valida un token JWT completo con todos los claims obligatorios.
+
+    La verificación de firma se hace una vez por token: las siguientes
+    validaciones del mismo token (hasta su `exp`) usan los claims de
+    VerifiedTokenCache y solo repiten las comprobaciones de claims.
+
+    Args:
+        token: Token JWT a validar
+        secret: Clave secreta para verificar firma
+        algorithm: Algoritmo de firma (ej: HS256)
+        expected_expediente_id: ID del expediente que debe coincidir con exp_id
+        required_permissions: Permisos requeridos (opcional)
+        expected_issuer: Emisor esperado (usa config si no se proporciona)
+        expected_subject: Subject esperado (usa config si no se proporciona)
+        required_audience: Audiencia requerida (usa config si no se proporciona)
+
+    Returns:
+        JWTClaims validados
+
+    Raises:
+        JWTValidationError: Si el token es inválido o no cumple requisitos
+    """
+    # Importar configuración
+    from backoffice.settings import settings
+
+    # Usar configuración si no se proporcionan valores
+    if expected_issuer is None:
+        expected_issuer = settings.JWT_EXPECTED_ISSUER
+    if expected_subject is None:
+        expected_subject = settings.JWT_EXPECTED_SUBJECT
+    if required_audience is None:
+        required_audience = settings.JWT_REQUIRED_AUDIENCE
+    # 1-2. Verificar firma y estructura de claims (una vez por token)
+    cache = get_token_cache()
+    key = cache.key(token, secret, algorithm)
+    claims = cache.get(key)
+    if claims is None:
+        claims = _decode_claims(token, secret, algorithm)
+        cache.put(key, claims)
+
     # 3. Validar emisor (iss)
     if claims.iss != expected_issuer:
         raise JWTValidationError(
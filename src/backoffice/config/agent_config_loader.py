@@ -8,7 +8,7 @@ soportando tanto agentes mock (Paso 1) como agentes reales CrewAI (Paso 6).
 """
 
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
 import yaml
 from pydantic import BaseModel, Field
 import logging
@@ -43,6 +43,19 @@ class CrewAITaskConfig(BaseModel):
     expected_output: str = Field(..., description="Output esperado")
 
 
+class PrefetchCall(BaseModel):
+    """
+    Llamada MCP que el executor adelanta antes de arrancar el agente.
+
+    Los argumentos de tipo str admiten {expediente_id} y {tarea_id}.
+    """
+    tool: str = Field(..., description="Tool MCP a llamar")
+    arguments: Dict[str, Any] = Field(
+        default_factory=dict,
+        description="Argumentos de la llamada"
+    )
+
+
 # =============================================================================
 # Modelo principal de definición de agente
 # =============================================================================
@@ -65,6 +78,10 @@ class AgentDefinition(BaseModel):
         description="Permisos requeridos en el JWT"
     )
     timeout_seconds: int = Field(300, description="Timeout de ejecución")
+    prefetch: List[PrefetchCall] = Field(
+        default_factory=list,
+        description="Llamadas MCP a adelantar antes de arrancar el agente"
+    )
 
     # Campos específicos de CrewAI (Paso 6)
     llm: Optional[LLMConfig] = Field(None, description="Configuración LLM")
@@ -201,6 +218,7 @@ class AgentConfigLoader:
             tools=config.get("tools", []),
             required_permissions=config.get("required_permissions", []),
             timeout_seconds=config.get("timeout_seconds", 300),
+            prefetch=[PrefetchCall(**call) for call in config.get("prefetch", [])],
             llm=llm_config,
             crewai_agent=crewai_agent_config,
             crewai_task=crewai_task_config,
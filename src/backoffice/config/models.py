@@ -1,7 +1,7 @@
 # backoffice/config/models.py
 
-from pydantic import BaseModel, HttpUrl
-from typing import List, Literal
+from pydantic import BaseModel, HttpUrl, model_validator
+from typing import Dict, List, Literal, Optional
 from pathlib import Path
 import yaml
 
@@ -13,16 +13,44 @@ class MCPAuthConfig(BaseModel):
 
 
 class MCPServerConfig(BaseModel):
-    """Configuración de un servidor MCP"""
+    """
+    Configuración de un servidor MCP.
+
+    Tipos de transporte:
+    - http: un POST JSON-RPC por llamada (endpoint por defecto /rpc)
+    - streamable_http: sesión MCP persistente; handshake y token una vez
+      por sesión y las llamadas se multiplexan sobre ella (endpoint por
+      defecto /mcp)
+    - stdio: pool de `pool_size` subprocesos locales (`command`) de larga
+      duración, compartido por todas las ejecuciones (sin salto HTTP)
+    """
     id: str
     name: str
     description: str
-    url: HttpUrl
-    type: Literal["http", "stdio"] = "http"
+    url: Optional[HttpUrl] = None  # Obligatoria salvo en stdio
+    type: Literal["http", "streamable_http", "stdio"] = "http"
     auth: MCPAuthConfig
     timeout: int = 30
     enabled: bool = True  # Permite habilitar/deshabilitar MCPs
     endpoint: str = "/rpc"  # Endpoint para JSON-RPC (configurable)
+    command: Optional[List[str]] = None  # stdio: comando del servidor
+    env: Dict[str, str] = {}  # stdio: variables de entorno adicionales
+    pool_size: int = 2  # stdio: número de procesos
+
+    @model_validator(mode="after")
+    def _check_transport(self) -> "MCPServerConfig":
+        """Campos obligatorios según el transporte y endpoint por defecto de streamable_http"""
+        if self.type == "stdio":
+            if not self.command:
+                raise ValueError(f"MCP '{self.id}': type stdio requiere 'command'")
+            if self.pool_size < 1:
+                raise ValueError(f"MCP '{self.id}': pool_size debe ser >= 1")
+        elif self.url is None:
+            raise ValueError(f"MCP '{self.id}': type {self.type} requiere 'url'")
+
+        if self.type == "streamable_http" and "endpoint" not in self.model_fields_set:
+            self.endpoint = "/mcp"
+        return self
 
 
 class MCPServersConfig(BaseModel):
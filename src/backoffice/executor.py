@@ -1,11 +1,14 @@
 # backoffice/executor.py
 
+import re
+import time
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, List, Optional
 
 from .models import AgentConfig, AgentExecutionResult, AgentError
 from .config.models import MCPServersConfig
+from .mcp.deadline import Deadline
 from .mcp.registry import MCPClientRegistry
 from .mcp.exceptions import MCPConnectionError, MCPToolError, MCPAuthError
 from .logging.audit_logger import AuditLogger
@@ -19,6 +22,10 @@ from .protocols import (
 )
 from .settings import settings
 
+# Placeholders admitidos en los argumentos de prefetch (el resto del texto,
+# llaves incluidas, se deja tal cual)
+_PREFETCH_PLACEHOLDER = re.compile(r"\{(expediente_id|tarea_id)\}")
+
 
 class AgentExecutor:
     """
@@ -67,7 +74,8 @@ class AgentExecutor:
         token: str,
         expediente_id: str,
         tarea_id: str,
-        agent_config: AgentConfig
+        agent_config: AgentConfig,
+        deadline: Optional[Deadline] = None
     ) -> AgentExecutionResult:
         """
         Ejecuta un agente y maneja errores del cliente MCP.
@@ -77,10 +85,15 @@ class AgentExecutor:
             expediente_id: ID del expediente
             tarea_id: ID de la tarea BPMN
             agent_config: Configuración del agente
+            deadline: Plazo de la ejecución. Se propaga a todas las
+                llamadas MCP: cada una usa como timeout el menor entre el
+                del servidor y el tiempo restante, y al agotarse fallan al
+                momento con MCP_DEADLINE_EXCEEDED
 
         Returns:
             Resultado de la ejecución del agente
         """
+        run_started = time.monotonic()
         mcp_registry: Optional[MCPClientRegistry] = None
         logger: Optional[AuditLogger] = None
         agent_run_id = f"RUN-{datetime.now(timezone.utc).strftime('%Y%m%d-%H%M%S-%f')}"
@@ -94,7 +107,10 @@ class AgentExecutor:
                 log_dir=settings.LOG_DIR
             )
 
-            logger.log(f"Iniciando ejecución de agente {agent_config.nombre}")
+            logger.log(
+                f"Iniciando ejecución de agente {agent_config.nombre}",
+                metadata={"agent": agent_config.nombre, "event": "run_started"}
+            )
             logger.log(f"Tarea: {tarea_id}")
 
             # 1. Validar JWT
@@ -130,9 +146,13 @@ class AgentExecutor:
             logger.log(f"Cargando configuración de MCPs desde {self.mcp_config_path}...")
             mcp_config = self.config_loader.load(self.mcp_config_path)
 
-            # 3. Crear registry de clientes MCP
+            # 3. Crear registry de clientes MCP (lanzando las llamadas de
+            # prefetch en paralelo con el discovery y la creación del agente)
             logger.log("Creando registry de clientes MCP...")
-            mcp_registry = await self.registry_factory.create(mcp_config, token)
+            prefetch = self._prefetch_calls(agent_config, expediente_id, tarea_id, logger)
+            mcp_registry = await self.registry_factory.create(
+                mcp_config, token, deadline=deadline, prefetch=prefetch
+            )
 
             # Logear qué MCPs están disponibles
             enabled_mcps = [s.id for s in mcp_config.get_enabled_servers()]
@@ -171,7 +191,11 @@ class AgentExecutor:
             logger.log(f"Ejecutando agente {agent_config.nombre}...")
             resultado = await agent.execute()
 
-            logger.log(f"Agente completado exitosamente")
+            logger.log(
+                "Agente completado exitosamente",
+                metadata={"agent": agent_config.nombre, "event": "run_completed"}
+            )
+            self._log_first_tool_result(mcp_registry, run_started, logger)
 
             return AgentExecutionResult(
                 success=True,
@@ -250,6 +274,70 @@ class AgentExecutor:
             )
 
         finally:
-            # Cerrar registry de clientes MCP
+            # Cerrar registry de clientes MCP (cancela los prefetch no usados)
             if mcp_registry:
                 await mcp_registry.close()
+                if deadline is not None and deadline.cancelled:
+                    # Corta las llamadas síncronas en curso del hilo de CrewAI
+                    mcp_registry.close_sync()
+
+    @staticmethod
+    def _prefetch_calls(
+        agent_config: AgentConfig,
+        expediente_id: str,
+        tarea_id: str,
+        logger: AuditLogger
+    ) -> List[Dict[str, Any]]:
+        """
+        Llamadas de prefetch del agente con los argumentos resueltos.
+
+        Solo se adelantan tools que el agente tiene permitidas. En los
+        argumentos de texto se sustituyen {expediente_id} y {tarea_id};
+        una llamada con argumentos mal formados se omite.
+
+        Returns:
+            Lista de {tool, arguments}
+        """
+        values = {"expediente_id": expediente_id, "tarea_id": tarea_id}
+        calls = []
+        for call in agent_config.prefetch:
+            if call["tool"] not in agent_config.herramientas:
+                logger.warning(f"Prefetch ignorado: '{call['tool']}' no es una tool del agente")
+                continue
+            try:
+                arguments = {
+                    key: _PREFETCH_PLACEHOLDER.sub(lambda m: values[m.group(1)], value)
+                    if isinstance(value, str) else value
+                    for key, value in call.get("arguments", {}).items()
+                }
+            except (AttributeError, TypeError) as e:
+                logger.warning(f"Prefetch ignorado: argumentos de '{call['tool']}' no válidos ({e})")
+                continue
+            calls.append({"tool": call["tool"], "arguments": arguments})
+
+        if calls:
+            logger.log(f"Prefetch: {[call['tool'] for call in calls]}")
+        return calls
+
+    @staticmethod
+    def _log_first_tool_result(
+        mcp_registry: MCPClientRegistry,
+        run_started: float,
+        logger: AuditLogger
+    ) -> None:
+        """Registra el tiempo hasta el primer resultado de tool de la ejecución"""
+        first_result_at = getattr(mcp_registry, "first_result_at", None)
+        if not isinstance(first_result_at, float):
+            return
+
+        seconds = first_result_at - run_started
+        prefetched = mcp_registry.first_result_prefetched
+        logger.log(
+            f"Primer resultado de tool a los {seconds:.3f}s"
+            f"{' (prefetch)' if prefetched else ''}",
+            metadata={
+                "event": "first_tool_result",
+                "seconds": round(seconds, 4),
+                "prefetched": prefetched
+            }
+        )
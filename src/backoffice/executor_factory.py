@@ -8,11 +8,12 @@ mientras permite inyección de dependencias para testing.
 """
 
 from pathlib import Path
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 
 from .executor import AgentExecutor
 from .auth.jwt_validator import validate_jwt, JWTClaims
 from .config.models import MCPServersConfig
+from .mcp.deadline import Deadline
 from .mcp.registry import MCPClientRegistry
 from .logging.audit_logger import AuditLogger
 from .agents.registry import get_agent_class
@@ -85,7 +86,9 @@ class DefaultMCPRegistryFactory:
     async def create(
         self,
         config: MCPServersConfig,
-        token: str
+        token: str,
+        deadline: Optional[Deadline] = None,
+        prefetch: Optional[List[Dict[str, Any]]] = None
     ) -> MCPClientRegistry:
         """
         Crea y inicializa un MCPClientRegistry.
@@ -93,6 +96,8 @@ class DefaultMCPRegistryFactory:
         Args:
             config: Configuración de servidores MCP
             token: Token JWT para autenticación
+            deadline: Plazo de la ejecución (acota cada llamada MCP)
+            prefetch: Llamadas a adelantar durante la inicialización
 
         Returns:
             MCPClientRegistry inicializado
@@ -100,7 +105,12 @@ class DefaultMCPRegistryFactory:
         Raises:
             MCPConnectionError: Si falla la conexión
         """
-        registry = MCPClientRegistry(config=config, token=token)
+        registry = MCPClientRegistry(
+            config=config,
+            token=token,
+            deadline=deadline,
+            prefetch=prefetch
+        )
         await registry.initialize()
         return registry
 
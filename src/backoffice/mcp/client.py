@@ -7,9 +7,11 @@ Permite usar el cliente tanto en contextos asíncronos (AgentExecutor)
 como síncronos (CrewAI tools).
 """
 
+import json
 import httpx
-from typing import Dict, Any, Optional
+from typing import AsyncIterator, Dict, Any, Optional
 from ..config.models import MCPServerConfig
+from .deadline import DEADLINE_HEADER, Deadline
 from .exceptions import MCPConnectionError, MCPToolError, MCPAuthError, MCPError
 
 
@@ -24,17 +26,24 @@ class MCPClient:
     NO implementa reintentos complejos - esa responsabilidad es del BPMN.
     """
 
-    def __init__(self, server_config: MCPServerConfig, token: str):
+    def __init__(
+        self,
+        server_config: MCPServerConfig,
+        token: str,
+        deadline: Optional[Deadline] = None
+    ):
         """
         Inicializa el cliente MCP.
 
         Args:
             server_config: Configuración del servidor MCP
             token: Token JWT completo
+            deadline: Plazo de la ejecución (None: solo el timeout del servidor)
         """
         self.server_config = server_config
         self.server_id = server_config.id
         self.token = token
+        self.deadline = deadline
         self._request_id = 0
 
         # Clientes HTTP (lazy initialization)
@@ -59,6 +68,32 @@ class MCPClient:
         """Timeout en segundos."""
         return float(self.server_config.timeout)
 
+    def _call_timeout(self, context: str) -> float:
+        """
+        Timeout de una llamada: el del servidor, acotado por el plazo de la ejecución.
+
+        Raises:
+            MCPDeadlineError: Si el plazo de la ejecución ya pasó
+        """
+        if self.deadline is None:
+            return self._timeout
+        return self.deadline.timeout_for(self._timeout, context)
+
+    def _request_options(self, context: str) -> Dict[str, Any]:
+        """
+        Timeout y header de plazo para una request HTTP.
+
+        Raises:
+            MCPDeadlineError: Si el plazo de la ejecución ya pasó
+        """
+        if self.deadline is None:
+            return {}
+        timeout = self._call_timeout(context)
+        return {
+            "timeout": timeout,
+            "headers": {DEADLINE_HEADER: str(int(timeout * 1000))}
+        }
+
     def _get_async_client(self) -> httpx.AsyncClient:
         """Obtiene cliente async (lazy init)."""
         if self._async_client is None:
@@ -121,48 +156,66 @@ class MCPClient:
             MCPToolError: Para errores 404/409
             MCPConnectionError: Para errores 5xx
         """
-        status = e.response.status_code
+        self._raise_for_status(e.response.status_code, e.response.text, context)
+
+    def _raise_for_status(self, status: int, detalle: str, context: str) -> None:
+        """
+        Lanza la excepción MCP que corresponde a un código de estado HTTP.
 
+        Args:
+            status: Código de estado (HTTP o el de un error del servidor MCP)
+            detalle: Cuerpo o mensaje del error
+            context: Contexto para el mensaje (ej: nombre de tool)
+
+        Raises:
+            MCPAuthError: Para errores 401/403
+            MCPToolError: Para errores 404/409 y el resto
+            MCPConnectionError: Para errores 502/503/504
+        """
         if status == 401:
             raise MCPAuthError(
                 codigo="AUTH_INVALID_TOKEN",
                 mensaje="Token JWT inválido o expirado",
-                detalle=e.response.text
+                detalle=detalle
             )
 
         elif status == 403:
             raise MCPAuthError(
                 codigo="AUTH_PERMISSION_DENIED",
                 mensaje="Permisos insuficientes para ejecutar tool",
-                detalle=e.response.text
+                detalle=detalle
             )
 
         elif status == 404:
             raise MCPToolError(
                 codigo="MCP_TOOL_NOT_FOUND",
                 mensaje=f"Tool '{context}' no encontrada en servidor MCP",
-                detalle=e.response.text
+                detalle=detalle
             )
 
         elif status == 409:
             raise MCPToolError(
                 codigo="MCP_CONFLICT",
                 mensaje=f"Conflicto de modificación concurrente en {self.server_config.name}",
-                detalle=e.response.text
+                detalle=detalle
             )
 
+        elif status == 504 and self.deadline is not None and self.deadline.expired:
+            # El servidor descartó la llamada por el plazo enviado en el header
+            raise self.deadline.error(context)
+
         elif status in [502, 503, 504]:
             raise MCPConnectionError(
                 codigo="MCP_SERVER_UNAVAILABLE",
                 mensaje=f"Servidor MCP no disponible (HTTP {status})",
-                detalle=e.response.text
+                detalle=detalle
             )
 
         else:
             raise MCPToolError(
                 codigo="MCP_TOOL_ERROR",
                 mensaje=f"Error en '{context}' (HTTP {status})",
-                detalle=e.response.text
+                detalle=detalle
             )
 
     def _handle_connection_error(self, e: Exception, context: str) -> None:
@@ -174,8 +227,12 @@ class MCPClient:
             context: Contexto para el mensaje
 
         Raises:
-            MCPConnectionError: Siempre
+            MCPConnectionError: Siempre (MCPDeadlineError si se agotó el
+                plazo de la ejecución)
         """
+        if isinstance(e, httpx.TimeoutException) and self.deadline is not None and self.deadline.expired:
+            raise self.deadline.error(context)
+
         if isinstance(e, httpx.TimeoutException):
             raise MCPConnectionError(
                 codigo="MCP_TIMEOUT",
@@ -253,7 +310,8 @@ class MCPClient:
                 json=self._build_jsonrpc_request(
                     method="tools/call",
                     params={"name": name, "arguments": arguments}
-                )
+                ),
+                **self._request_options(name)
             )
             response.raise_for_status()
             return self._process_response(response.json(), name)
@@ -281,7 +339,8 @@ class MCPClient:
             client = self._get_async_client()
             response = await client.post(
                 self.server_config.endpoint,
-                json=self._build_jsonrpc_request(method="tools/list")
+                json=self._build_jsonrpc_request(method="tools/list"),
+                **self._request_options("tools/list")
             )
             response.raise_for_status()
             return self._process_response(response.json(), "tools/list")
@@ -315,7 +374,8 @@ class MCPClient:
                 json=self._build_jsonrpc_request(
                     method="resources/read",
                     params={"uri": uri}
-                )
+                ),
+                **self._request_options(uri)
             )
             response.raise_for_status()
             return self._process_response(response.json(), uri)
@@ -329,6 +389,51 @@ class MCPClient:
         except Exception as e:
             self._handle_connection_error(e, uri)
 
+    async def iter_texto_documento(
+        self,
+        expediente_id: str,
+        documento_id: str,
+        chunk_size: Optional[int] = None
+    ) -> AsyncIterator[str]:
+        """
+        Itera el texto markdown de un documento por fragmentos (async).
+
+        Llama a obtener_texto_documento con offset/length hasta que el
+        servidor indica que no quedan más (has_more). Con servidores que
+        no paginan el texto se obtiene un único fragmento.
+
+        Uso:
+            async for fragmento in client.iter_texto_documento(exp_id, doc_id):
+                ...
+
+        Args:
+            expediente_id: ID del expediente
+            documento_id: ID del documento
+            chunk_size: Caracteres por fragmento (None: máximo del servidor)
+
+        Yields:
+            Fragmentos del texto, en orden
+
+        Raises:
+            MCPConnectionError: Error de conexión
+            MCPAuthError: Error de autenticación
+            MCPToolError: Error en la tool (documento inexistente, sin texto...)
+        """
+        offset = 0
+        while True:
+            arguments = {"expediente_id": expediente_id, "documento_id": documento_id, "offset": offset}
+            if chunk_size is not None:
+                arguments["length"] = chunk_size
+
+            result = await self.call_tool("obtener_texto_documento", arguments)
+            data = json.loads(result.get("content", [{}])[0].get("text", "{}"))
+
+            if data.get("texto_markdown"):
+                yield data["texto_markdown"]
+            if not data.get("has_more"):
+                return
+            offset = data["next_offset"]
+
     # ========== INTERFAZ SÍNCRONA ==========
 
     def call_tool_sync(
@@ -360,7 +465,8 @@ class MCPClient:
                 json=self._build_jsonrpc_request(
                     method="tools/call",
                     params={"name": name, "arguments": arguments}
-                )
+                ),
+                **self._request_options(name)
             )
             response.raise_for_status()
             return self._process_response(response.json(), name)
@@ -388,7 +494,8 @@ class MCPClient:
             client = self._get_sync_client()
             response = client.post(
                 self.server_config.endpoint,
-                json=self._build_jsonrpc_request(method="tools/list")
+                json=self._build_jsonrpc_request(method="tools/list"),
+                **self._request_options("tools/list")
             )
             response.raise_for_status()
             return self._process_response(response.json(), "tools/list")
@@ -0,0 +1,106 @@
+# backoffice/mcp/deadline.py
+
+"""
+Plazo (deadline) de una ejecución de agente.
+
+La API crea un Deadline con el timeout del agente y lo pasa al
+AgentExecutor, que lo entrega al MCPClientRegistry y de ahí a cada
+cliente MCP. Así cada llamada MCP usa como timeout el mínimo entre el
+del servidor y el tiempo que le queda a la ejecución, y en cuanto el
+plazo se agota las llamadas fallan al momento con MCP_DEADLINE_EXCEEDED
+en vez de seguir ocupando servidores MCP e hilos.
+
+El tiempo restante viaja al servidor MCP en el header
+DEADLINE_HEADER (milisegundos), para que descarte trabajo que ya nadie
+espera.
+
+Cancelar una ejecución (DELETE /api/v1/agent/runs/{id}) es adelantar su
+plazo a ahora: las llamadas MCP siguientes fallan con RUN_CANCELLED y
+las tools de CrewAI lanzan RunCancelled.
+"""
+
+import time
+from typing import Callable
+
+from .exceptions import MCPDeadlineError
+
+# Header con el tiempo que el cliente sigue esperando la respuesta (ms)
+DEADLINE_HEADER = "X-Request-Timeout-Ms"
+
+
+class RunCancelled(BaseException):
+    """
+    Ejecución cancelada, lanzada en el hilo de CrewAI en la siguiente tool.
+
+    Hereda de BaseException (como asyncio.CancelledError) para que los
+    `except Exception` de CrewAI no la conviertan en un resultado más de
+    la tool y el crew termine.
+    """
+
+
+class Deadline:
+    """
+    Plazo absoluto (reloj monotónico) de una ejecución.
+
+    Args:
+        timeout_seconds: Tiempo máximo de la ejecución desde ahora
+        clock: Reloj monotónico (inyectable en tests)
+    """
+
+    def __init__(self, timeout_seconds: float, clock: Callable[[], float] = time.monotonic):
+        self.timeout_seconds = timeout_seconds
+        self._clock = clock
+        self.expires_at = clock() + timeout_seconds
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        """Cancela la ejecución: el plazo vence ahora."""
+        self.cancelled = True
+        self.expires_at = min(self.expires_at, self._clock())
+
+    def remaining(self) -> float:
+        """Segundos que quedan (0 si el plazo ya pasó)"""
+        return max(0.0, self.expires_at - self._clock())
+
+    @property
+    def expired(self) -> bool:
+        """True si el plazo ya pasó"""
+        return self._clock() >= self.expires_at
+
+    def error(self, context: str) -> MCPDeadlineError:
+        """Excepción de plazo agotado (o de ejecución cancelada) para una operación"""
+        if self.cancelled:
+            return MCPDeadlineError(
+                codigo="RUN_CANCELLED",
+                mensaje=f"Ejecución cancelada (en '{context}')"
+            )
+        return MCPDeadlineError(
+            codigo="MCP_DEADLINE_EXCEEDED",
+            mensaje=f"Plazo de la ejecución agotado en '{context}' (timeout {self.timeout_seconds}s)"
+        )
+
+    def check(self, context: str) -> None:
+        """
+        Comprueba que queda tiempo.
+
+        Raises:
+            MCPDeadlineError: Si el plazo ya pasó
+        """
+        if self.expired:
+            raise self.error(context)
+
+    def timeout_for(self, timeout: float, context: str) -> float:
+        """
+        Timeout de una llamada: el menor entre el suyo y el tiempo restante.
+
+        Args:
+            timeout: Timeout propio de la llamada (el del servidor MCP)
+            context: Operación, para el mensaje de error
+
+        Raises:
+            MCPDeadlineError: Si el plazo ya pasó
+        """
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise self.error(context)
+        return min(timeout, remaining)
@@ -28,6 +28,20 @@ class MCPConnectionError(MCPError):
     pass
 
 
+@dataclass
+class MCPDeadlineError(MCPConnectionError):
+    """
+    Plazo de la ejecución agotado antes o durante una llamada MCP.
+
+    Errores incluidos:
+    - MCP_DEADLINE_EXCEEDED: No queda tiempo del timeout de la ejecución
+    - RUN_CANCELLED: La ejecución se ha cancelado
+
+    No es un fallo del servidor: no cuenta para su circuit breaker.
+    """
+    pass
+
+
 @dataclass
 class MCPToolError(MCPError):
     """
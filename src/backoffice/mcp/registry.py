@@ -9,18 +9,44 @@ Provee una API pública completa para evitar accesos a atributos privados:
 - is_tool_available(): Verifica si una tool existe
 - is_initialized: Estado de inicialización
 - list_tools_sync(): Discovery síncrono de tools
+
+Prefetch: las llamadas declaradas en `prefetch` (ver agents.yaml) se
+lanzan en cuanto el discovery encuentra su servidor, en paralelo con el
+discovery del resto y con la construcción del agente. Su resultado queda
+en la caché de la ejecución y la primera llamada del agente con la misma
+tool y argumentos lo recoge (una sola vez) en vez de ir al servidor.
 """
 
+from concurrent.futures import Future
 from typing import Dict, List, Any, Optional
 from .client import MCPClient
-from .exceptions import MCPError, MCPToolError
+from .session_client import MCPSessionClient
+from .stdio_client import MCPStdioClient
+from .deadline import Deadline
+from .exceptions import MCPConnectionError, MCPDeadlineError, MCPError, MCPToolError
+from .resilience import get_server_guard
 from ..config.models import MCPServersConfig
 import asyncio
+import json
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
 
+def _cache_key(tool_name: str, arguments: Dict[str, Any]) -> str:
+    """Clave de caché de una llamada (los argumentos None son los por defecto)"""
+    args = {key: value for key, value in arguments.items() if value is not None}
+    return f"{tool_name}:{json.dumps(args, sort_keys=True, default=str)}"
+
+# Cliente por transporte (type en mcp_servers.yaml)
+CLIENT_CLASSES = {
+    "http": MCPClient,                       # Un POST JSON-RPC por llamada
+    "streamable_http": MCPSessionClient,     # Sesión MCP persistente
+    "stdio": MCPStdioClient,                 # Pool de procesos locales
+}
+
+
 class MCPClientRegistry:
     """
     Registro de clientes MCP con routing automático.
@@ -28,16 +54,27 @@ class MCPClientRegistry:
     Permite arquitectura plug-and-play: añadir MCPs mediante configuración.
     """
 
-    def __init__(self, config: MCPServersConfig, token: str):
+    def __init__(
+        self,
+        config: MCPServersConfig,
+        token: str,
+        deadline: Optional[Deadline] = None,
+        prefetch: Optional[List[Dict[str, Any]]] = None
+    ):
         """
         Inicializa el registro de clientes MCP.
 
         Args:
             config: Configuración de servidores MCP
             token: Token JWT con audiencias para los MCPs
+            deadline: Plazo de la ejecución; acota el timeout de cada
+                llamada MCP (None: solo el timeout de cada servidor)
+            prefetch: Llamadas ({tool, arguments}) a adelantar durante
+                initialize() para que el agente encuentre su resultado
         """
         self.config = config
         self.token = token
+        self.deadline = deadline
 
         # MCPClient por ID de servidor
         self._clients: Dict[str, MCPClient] = {}
@@ -48,6 +85,16 @@ class MCPClientRegistry:
         # Flag de inicialización
         self._initialized = False
 
+        # Prefetch: llamadas pendientes de descubrir su servidor y
+        # resultados (de un solo uso) por _cache_key
+        self._pending_prefetch: List[Dict[str, Any]] = list(prefetch or [])
+        self._prefetched: Dict[str, Future] = {}
+        self._prefetch_tasks: List[asyncio.Task] = []
+
+        # Instante (time.monotonic) del primer resultado entregado al agente
+        self.first_result_at: Optional[float] = None
+        self.first_result_prefetched = False
+
     async def initialize(self):
         """
         Inicializa clientes MCP para servidores habilitados y descubre tools.
@@ -60,9 +107,11 @@ class MCPClientRegistry:
             enabled_servers = self.config.get_enabled_servers()
 
             for server_config in enabled_servers:
-                client = MCPClient(
+                client_class = CLIENT_CLASSES[server_config.type]
+                client = client_class(
                     server_config=server_config,
-                    token=self.token
+                    token=self.token,
+                    deadline=self.deadline
                 )
                 self._clients[server_config.id] = client
 
@@ -88,11 +137,49 @@ class MCPClientRegistry:
             for tool_name in tool_names:
                 self._tool_routing[tool_name] = server_id
 
+            self._start_prefetch(tool_names)
+
         except Exception as e:
             # No fallar si un MCP no responde en discovery
             # El sistema seguirá funcionando con los MCPs disponibles
             logger.warning(f"No se pudieron descubrir tools de MCP '{server_id}': {e}")
 
+    def _start_prefetch(self, tool_names: List[str]) -> None:
+        """Lanza las llamadas de prefetch de las tools recién descubiertas"""
+        for call in [c for c in self._pending_prefetch if c["tool"] in tool_names]:
+            self._pending_prefetch.remove(call)
+            future: Future = Future()
+            self._prefetched[_cache_key(call["tool"], call["arguments"])] = future
+            self._prefetch_tasks.append(asyncio.ensure_future(
+                self._prefetch(call["tool"], call["arguments"], future)
+            ))
+
+    async def _prefetch(self, tool_name: str, arguments: Dict[str, Any], future: Future) -> None:
+        """Ejecuta una llamada de prefetch y deja el resultado (o el error) en future"""
+        try:
+            client = self._get_client_for_tool(tool_name)
+            result = await self._call_client(client, tool_name, arguments)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            logger.info(f"Prefetch de '{tool_name}' fallido, el agente repetirá la llamada: {e}")
+            future.set_exception(e)
+        else:
+            future.set_result(result)
+
+    def _take_prefetched(self, tool_name: str, arguments: Dict[str, Any]) -> Optional[Future]:
+        """Retira de la caché el prefetch de esta llamada, si lo hay"""
+        if not self._prefetched:
+            return None
+        return self._prefetched.pop(_cache_key(tool_name, arguments), None)
+
+    def _record_result(self, prefetched: bool) -> None:
+        """Anota el primer resultado entregado al agente (time-to-first-tool-result)"""
+        if self.first_result_at is None:
+            self.first_result_at = time.monotonic()
+            self.first_result_prefetched = prefetched
+
     def _get_client_for_tool(self, tool_name: str) -> "MCPClient":
         """
         Obtiene el cliente MCP para una tool específica.
@@ -118,6 +205,27 @@ class MCPClientRegistry:
 
         return self._clients[server_id]
 
+    def _check_deadline(self, tool_name: str) -> None:
+        """
+        Comprueba que a la ejecución le queda tiempo.
+
+        Raises:
+            MCPDeadlineError: Si el plazo de la ejecución ya pasó
+        """
+        if self.deadline is not None:
+            self.deadline.check(tool_name)
+
+    def _max_wait(self, tool_name: str) -> Optional[float]:
+        """
+        Espera máxima por un hueco de concurrencia: lo que queda del plazo.
+
+        Raises:
+            MCPDeadlineError: Si el plazo de la ejecución ya pasó (la
+                llamada no llega a ocupar hueco ni servidor)
+        """
+        self._check_deadline(tool_name)
+        return self.deadline.remaining() if self.deadline is not None else None
+
     async def call_tool(
         self,
         tool_name: str,
@@ -126,6 +234,9 @@ class MCPClientRegistry:
         """
         Ejecuta una tool con routing automático al MCP correcto (async).
 
+        Si la llamada se adelantó por prefetch, devuelve ese resultado
+        sin volver al servidor.
+
         Args:
             tool_name: Nombre de la tool
             arguments: Argumentos de la tool
@@ -135,12 +246,55 @@ class MCPClientRegistry:
 
         Raises:
             MCPToolError: Si la tool no se encuentra
+            MCPConnectionError: MCP_SERVER_UNAVAILABLE si el circuito del
+                servidor está abierto o está saturado (ver resilience.py)
+            MCPDeadlineError: MCP_DEADLINE_EXCEEDED si se agotó el plazo
+                de la ejecución
         """
         if not self._initialized:
             await self.initialize()
 
+        prefetched = self._take_prefetched(tool_name, arguments)
+        if prefetched is not None:
+            try:
+                result = await asyncio.wrap_future(prefetched)
+            except Exception:
+                pass  # Prefetch fallido: la llamada se repite
+            else:
+                self._record_result(prefetched=True)
+                return result
+
         client = self._get_client_for_tool(tool_name)
-        return await client.call_tool(tool_name, arguments)
+        result = await self._call_client(client, tool_name, arguments)
+        self._record_result(prefetched=False)
+        return result
+
+    async def _call_client(
+        self,
+        client: MCPClient,
+        tool_name: str,
+        arguments: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Llama a la tool en el cliente, dentro del guard de su servidor (async)"""
+        # Circuit breaker y límite de concurrencia del servidor
+        guard = get_server_guard(client.server_id)
+        try:
+            await guard.acquire(max_wait=self._max_wait(tool_name))
+        except MCPConnectionError:
+            self._check_deadline(tool_name)
+            raise
+        start = time.monotonic()
+        ok = record = True
+        try:
+            return await client.call_tool(tool_name, arguments)
+        except MCPDeadlineError:
+            record = False
+            raise
+        except MCPConnectionError:
+            ok = False
+            raise
+        finally:
+            guard.release(ok, time.monotonic() - start, record=record)
 
     def call_tool_sync(
         self,
@@ -151,6 +305,7 @@ class MCPClientRegistry:
         Ejecuta una tool con routing automático (sync).
 
         Versión síncrona para uso desde CrewAI y otros contextos no-async.
+        Como call_tool(), recoge el resultado del prefetch si lo hay.
         NOTA: Requiere que initialize() haya sido llamado previamente.
 
         Args:
@@ -162,6 +317,8 @@ class MCPClientRegistry:
 
         Raises:
             MCPToolError: Si la tool no se encuentra
+            MCPDeadlineError: MCP_DEADLINE_EXCEEDED si se agotó el plazo
+                de la ejecución
             RuntimeError: Si el registry no ha sido inicializado
         """
         if not self._initialized:
@@ -170,8 +327,39 @@ class MCPClientRegistry:
                 "Llama a 'await registry.initialize()' antes de usar call_tool_sync()."
             )
 
+        prefetched = self._take_prefetched(tool_name, arguments)
+        if prefetched is not None:
+            max_wait = self._max_wait(tool_name)
+            try:
+                result = prefetched.result(timeout=max_wait)
+            except Exception:
+                pass  # Prefetch fallido: la llamada se repite
+            else:
+                self._record_result(prefetched=True)
+                return result
+
         client = self._get_client_for_tool(tool_name)
-        return client.call_tool_sync(tool_name, arguments)
+
+        guard = get_server_guard(client.server_id)
+        try:
+            guard.acquire_sync(max_wait=self._max_wait(tool_name))
+        except MCPConnectionError:
+            self._check_deadline(tool_name)
+            raise
+        start = time.monotonic()
+        ok = record = True
+        try:
+            result = client.call_tool_sync(tool_name, arguments)
+            self._record_result(prefetched=False)
+            return result
+        except MCPDeadlineError:
+            record = False
+            raise
+        except MCPConnectionError:
+            ok = False
+            raise
+        finally:
+            guard.release(ok, time.monotonic() - start, record=record)
 
     def get_available_tools(self) -> Dict[str, str]:
         """
@@ -342,7 +530,11 @@ class MCPClientRegistry:
         return None
 
     async def close(self):
-        """Cierra todos los clientes HTTP async."""
+        """Cierra todos los clientes HTTP async (y cancela los prefetch en curso)."""
+        for task in self._prefetch_tasks:
+            task.cancel()
+        await asyncio.gather(*self._prefetch_tasks, return_exceptions=True)
+
         tasks = [client.close() for client in self._clients.values()]
         await asyncio.gather(*tasks)
 
@@ -0,0 +1,360 @@
+# backoffice/mcp/resilience.py
+
+"""
+Circuit breaker y límite de concurrencia adaptativo por servidor MCP.
+
+Cuando un servidor MCP se degrada, seguir enviándole todas las llamadas
+(cada una con el timeout completo de mcp_servers.yaml) solo acumula
+requests concurrentes y empeora la degradación. Cada servidor tiene un
+ServerGuard compartido por todas las ejecuciones del proceso:
+
+- Circuit breaker (cerrado → abierto → semiabierto): se abre si, en las
+  últimas llamadas, la tasa de errores de conexión o de llamadas lentas
+  supera el umbral. Abierto, las llamadas fallan al momento con
+  MCP_SERVER_UNAVAILABLE. Pasado un tiempo deja pasar unas llamadas de
+  prueba (semiabierto) y se cierra si van bien.
+- Límite de concurrencia AIMD: crece en 1/límite con cada llamada rápida
+  y se multiplica por un factor < 1 ante un error o una llamada lenta.
+  Las llamadas por encima del límite esperan un tiempo acotado y, si no
+  hay hueco, fallan con MCP_SERVER_UNAVAILABLE.
+
+Solo cuentan como fallo los MCPConnectionError (timeout, conexión, 5xx):
+un 403 o un error de la tool son respuestas normales del servidor.
+
+El estado se expone en /metrics y /health de la API.
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Deque, Dict, Optional, Tuple
+
+from .exceptions import MCPConnectionError
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+@dataclass
+class GuardConfig:
+    """Parámetros del circuit breaker y del límite de concurrencia"""
+    enabled: bool = True
+    window: int = 20  # Llamadas recientes evaluadas
+    min_calls: int = 10  # Mínimo de llamadas en la ventana para abrir
+    error_rate: float = 0.5  # Tasa de errores que abre el circuito
+    slow_call_seconds: float = 10.0  # Una llamada más lenta cuenta como lenta
+    slow_call_rate: float = 0.8  # Tasa de llamadas lentas que abre el circuito
+    open_seconds: float = 30.0  # Tiempo abierto antes de pasar a semiabierto
+    half_open_calls: int = 2  # Llamadas de prueba en semiabierto
+    limit_initial: int = 20
+    limit_min: int = 2
+    limit_max: int = 200
+    limit_latency_seconds: float = 2.0  # Por encima, el límite baja
+    limit_backoff: float = 0.7  # Factor multiplicativo al bajar
+    queue_seconds: float = 5.0  # Espera máxima por hueco de concurrencia
+
+    @classmethod
+    def from_settings(cls) -> "GuardConfig":
+        """Configuración a partir de las variables MCP_BREAKER_* y MCP_LIMIT_*"""
+        from ..settings import get_settings
+        s = get_settings()
+        return cls(
+            enabled=s.MCP_BREAKER_ENABLED,
+            window=s.MCP_BREAKER_WINDOW,
+            min_calls=s.MCP_BREAKER_MIN_CALLS,
+            error_rate=s.MCP_BREAKER_ERROR_RATE,
+            slow_call_seconds=s.MCP_BREAKER_SLOW_CALL_SECONDS,
+            slow_call_rate=s.MCP_BREAKER_SLOW_CALL_RATE,
+            open_seconds=s.MCP_BREAKER_OPEN_SECONDS,
+            half_open_calls=s.MCP_BREAKER_HALF_OPEN_CALLS,
+            limit_initial=s.MCP_LIMIT_INITIAL,
+            limit_min=s.MCP_LIMIT_MIN,
+            limit_max=s.MCP_LIMIT_MAX,
+            limit_latency_seconds=s.MCP_LIMIT_LATENCY_SECONDS,
+            limit_backoff=s.MCP_LIMIT_BACKOFF,
+            queue_seconds=s.MCP_LIMIT_QUEUE_SECONDS
+        )
+
+
+class ServerGuard:
+    """
+    Circuit breaker + límite AIMD de un servidor MCP.
+
+    Thread-safe: lo usan tanto la interfaz async del registry como la
+    síncrona (CrewAI tools en otros hilos).
+
+    Uso:
+        await guard.acquire()            # o guard.acquire_sync()
+        start = time.monotonic()
+        ok = True
+        try:
+            ...llamada...
+        except MCPConnectionError:
+            ok = False
+            raise
+        finally:
+            guard.release(ok, time.monotonic() - start)
+
+    Args:
+        server_id: ID del servidor MCP
+        config: Parámetros (por defecto, los de settings)
+        clock: Reloj monotónico (inyectable en tests)
+    """
+
+    def __init__(
+        self,
+        server_id: str,
+        config: Optional[GuardConfig] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.server_id = server_id
+        self.config = config or GuardConfig.from_settings()
+        self._clock = clock
+        self._lock = threading.Lock()
+
+        # Circuit breaker
+        self.state = CLOSED
+        self._outcomes: Deque[Tuple[bool, bool]] = deque(maxlen=self.config.window)  # (error, lenta)
+        self._opened_at = 0.0
+        self._probes = 0  # Llamadas de prueba en curso o completadas (semiabierto)
+
+        # Límite de concurrencia
+        self.limit = float(self.config.limit_initial)
+        self.in_flight = 0
+        self._waiters: Deque[Callable[[], None]] = deque()
+
+        # Estadísticas
+        self.rejected_open = 0
+        self.rejected_limit = 0
+        self.times_opened = 0
+
+    # ========== ESTADO ==========
+
+    def _current_state(self) -> str:
+        """Estado teniendo en cuenta el paso de abierto a semiabierto (con lock)"""
+        if self.state == OPEN and self._clock() - self._opened_at >= self.config.open_seconds:
+            self.state = HALF_OPEN
+            self._probes = 0
+        return self.state
+
+    def snapshot(self) -> Dict[str, float]:
+        """Estado para /metrics y /health"""
+        with self._lock:
+            state = self._current_state()
+            errors = sum(1 for error, _ in self._outcomes if error)
+            return {
+                "state": state,
+                "limit": int(self.limit),
+                "in_flight": self.in_flight,
+                "error_rate": errors / len(self._outcomes) if self._outcomes else 0.0,
+                "times_opened": self.times_opened,
+                "rejected_open": self.rejected_open,
+                "rejected_limit": self.rejected_limit
+            }
+
+    def _open(self) -> None:
+        self.state = OPEN
+        self._opened_at = self._clock()
+        self._outcomes.clear()
+        self.times_opened += 1
+
+    def _unavailable(self, mensaje: str) -> MCPConnectionError:
+        return MCPConnectionError(
+            codigo="MCP_SERVER_UNAVAILABLE",
+            mensaje=mensaje,
+            detalle=f"server_id={self.server_id}"
+        )
+
+    # ========== ADQUIRIR / LIBERAR ==========
+
+    def _try_acquire(self) -> bool:
+        """
+        Reserva un hueco si el circuito y el límite lo permiten (con lock).
+
+        Raises:
+            MCPConnectionError: Si el circuito está abierto (MCP_SERVER_UNAVAILABLE)
+        """
+        state = self._current_state()
+        if state == OPEN or (state == HALF_OPEN and self._probes >= self.config.half_open_calls):
+            self.rejected_open += 1
+            raise self._unavailable(
+                f"Servidor MCP '{self.server_id}' no disponible (circuito abierto)"
+            )
+        if self.in_flight >= int(self.limit):
+            return False
+        if state == HALF_OPEN:
+            self._probes += 1
+        self.in_flight += 1
+        return True
+
+    def _reject_limit(self) -> MCPConnectionError:
+        with self._lock:
+            self.rejected_limit += 1
+        return self._unavailable(
+            f"Servidor MCP '{self.server_id}' saturado: "
+            f"{self.in_flight} llamadas en curso (límite {int(self.limit)})"
+        )
+
+    def _queue_seconds(self, max_wait: Optional[float]) -> float:
+        if max_wait is None:
+            return self.config.queue_seconds
+        return min(self.config.queue_seconds, max_wait)
+
+    async def acquire(self, max_wait: Optional[float] = None) -> None:
+        """
+        Espera un hueco de concurrencia (como mucho queue_seconds).
+
+        Args:
+            max_wait: Espera máxima adicional (p.ej. lo que queda del plazo
+                de la ejecución)
+
+        Raises:
+            MCPConnectionError: MCP_SERVER_UNAVAILABLE si el circuito está
+                abierto o no hay hueco a tiempo
+        """
+        if not self.config.enabled:
+            return
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self._queue_seconds(max_wait)
+        while True:
+            with self._lock:
+                if self._try_acquire():
+                    return
+                waiter = loop.create_future()
+
+                def wake(waiter=waiter):
+                    loop.call_soon_threadsafe(lambda: waiter.done() or waiter.set_result(None))
+
+                self._waiters.append(wake)
+
+            remaining = deadline - loop.time()
+            try:
+                if remaining <= 0:
+                    raise asyncio.TimeoutError
+                await asyncio.wait_for(waiter, timeout=remaining)
+            except asyncio.TimeoutError:
+                self._discard_waiter(wake)
+                raise self._reject_limit()
+            except BaseException:
+                # Espera cancelada: no debe quedarse en cola quitándole
+                # el turno a la siguiente
+                self._discard_waiter(wake)
+                raise
+
+    def acquire_sync(self, max_wait: Optional[float] = None) -> None:
+        """Versión síncrona de acquire()"""
+        if not self.config.enabled:
+            return
+        deadline = time.monotonic() + self._queue_seconds(max_wait)
+        while True:
+            with self._lock:
+                if self._try_acquire():
+                    return
+                event = threading.Event()
+                self._waiters.append(event.set)
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not event.wait(timeout=remaining):
+                self._discard_waiter(event.set)
+                raise self._reject_limit()
+
+    def _discard_waiter(self, wake: Callable[[], None]) -> None:
+        """Quita una espera vencida o cancelada (si ya la habían despertado, pasa el turno)"""
+        with self._lock:
+            try:
+                self._waiters.remove(wake)
+                waiters = []
+            except ValueError:
+                waiters = self._pop_waiters()
+        for other in waiters:
+            other()
+
+    def release(self, ok: bool, latency: float, record: bool = True) -> None:
+        """
+        Libera el hueco y registra el resultado de la llamada.
+
+        Args:
+            ok: False si la llamada falló por conexión/timeout/5xx
+            latency: Duración de la llamada en segundos
+            record: False para liberar sin registrar el resultado (llamadas
+                cortadas por el plazo de la ejecución, no por el servidor)
+        """
+        if not self.config.enabled:
+            return
+        config = self.config
+        slow = latency > config.slow_call_seconds
+
+        with self._lock:
+            self.in_flight = max(0, self.in_flight - 1)
+            state = self._current_state()
+
+            if not record:
+                # Si era una llamada de prueba, otra puede ocupar su lugar
+                if state == HALF_OPEN:
+                    self._probes = max(0, self._probes - 1)
+
+            else:
+                # Límite AIMD
+                if not ok or latency > config.limit_latency_seconds:
+                    self.limit = max(float(config.limit_min), self.limit * config.limit_backoff)
+                else:
+                    self.limit = min(float(config.limit_max), self.limit + 1.0 / self.limit)
+
+                # Circuit breaker
+                if state == HALF_OPEN:
+                    if not ok or slow:
+                        self._open()
+                    elif self._probes >= config.half_open_calls and self.in_flight == 0:
+                        self.state = CLOSED
+                        self._outcomes.clear()
+                elif state == CLOSED:
+                    self._outcomes.append((not ok, slow))
+                    calls = len(self._outcomes)
+                    if calls >= config.min_calls:
+                        errors = sum(1 for error, _ in self._outcomes if error)
+                        slow_calls = sum(1 for _, is_slow in self._outcomes if is_slow)
+                        if errors / calls >= config.error_rate or slow_calls / calls >= config.slow_call_rate:
+                            self._open()
+
+            waiters = self._pop_waiters()
+
+        for wake in waiters:
+            wake()
+
+    def _pop_waiters(self) -> "list[Callable[[], None]]":
+        """
+        Esperas a despertar (con lock): tantas como huecos libres, o todas
+        si el circuito está abierto (fallan al momento en vez de agotar su espera).
+        """
+        wake_count = len(self._waiters) if self.state == OPEN else int(self.limit) - self.in_flight
+        return [self._waiters.popleft() for _ in range(min(max(wake_count, 0), len(self._waiters)))]
+
+
+# Guards por ID de servidor, compartidos por todas las ejecuciones
+_guards: Dict[str, ServerGuard] = {}
+_guards_lock = threading.Lock()
+
+
+def get_server_guard(server_id: str) -> ServerGuard:
+    """Obtiene el guard de un servidor MCP (lo crea si no existe)"""
+    with _guards_lock:
+        guard = _guards.get(server_id)
+        if guard is None:
+            guard = ServerGuard(server_id)
+            _guards[server_id] = guard
+        return guard
+
+
+def get_server_guards() -> Dict[str, ServerGuard]:
+    """Guards existentes (servidores que ya han recibido llamadas)"""
+    with _guards_lock:
+        return dict(_guards)
+
+
+def reset_server_guards() -> None:
+    """Descarta el estado de todos los servidores. Útil para tests"""
+    with _guards_lock:
+        _guards.clear()
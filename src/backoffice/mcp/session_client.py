@@ -0,0 +1,279 @@
+# backoffice/mcp/session_client.py
+
+"""
+Cliente MCP con sesión persistente (transporte streamable HTTP).
+
+A diferencia de MCPClient, que hace un POST JSON-RPC completo por
+llamada, este cliente abre una sesión MCP (handshake `initialize` y token
+una sola vez) y multiplexa sobre ella todas las llamadas del run, también
+las concurrentes. Se selecciona con `type: streamable_http` en
+mcp_servers.yaml.
+
+Las sesiones viven en un event loop propio en un hilo de fondo, compartido
+por todos los clientes de sesión del proceso. Así la misma sesión sirve a
+la interfaz async (AgentExecutor) y a la síncrona (CrewAI tools, que se
+ejecutan en otros hilos).
+"""
+
+import asyncio
+import concurrent.futures
+import logging
+import re
+import threading
+from datetime import timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+import httpx
+from mcp import ClientSession
+from mcp.client.streamable_http import streamable_http_client
+from mcp.shared.exceptions import McpError
+
+from ..config.models import MCPServerConfig
+from .client import MCPClient
+from .deadline import DEADLINE_HEADER, Deadline
+from .exceptions import MCPError, MCPToolError
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Tiempo máximo sin eventos en el stream SSE de la sesión
+SSE_READ_TIMEOUT = 300.0
+
+# Errores que el servidor MCP devuelve como texto de la tool ("ERROR 403: ...")
+_TOOL_ERROR_PATTERN = re.compile(r"^ERROR (\d{3}): ")
+
+
+_session_loop: Optional[asyncio.AbstractEventLoop] = None
+_session_loop_lock = threading.Lock()
+
+
+def get_session_loop() -> asyncio.AbstractEventLoop:
+    """Obtiene el event loop de las sesiones MCP (lo arranca en un hilo si no existe)"""
+    global _session_loop
+    with _session_loop_lock:
+        if _session_loop is None or _session_loop.is_closed():
+            loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=loop.run_forever,
+                name="mcp-sessions",
+                daemon=True
+            ).start()
+            _session_loop = loop
+        return _session_loop
+
+
+def _leaf_exception(e: BaseException) -> BaseException:
+    """Primera excepción real dentro de un ExceptionGroup (task groups de anyio)"""
+    while isinstance(e, BaseExceptionGroup) and e.exceptions:
+        e = e.exceptions[0]
+    return e
+
+
+class MCPSessionClient(MCPClient):
+    """
+    Cliente MCP sobre una sesión streamable HTTP persistente.
+
+    Misma interfaz que MCPClient (call_tool, list_tools, read_resource y
+    sus versiones síncronas) y mismas excepciones. La sesión se abre en
+    la primera llamada y se vuelve a abrir si el servidor la cierra.
+    """
+
+    def __init__(
+        self,
+        server_config: MCPServerConfig,
+        token: str,
+        deadline: Optional[Deadline] = None
+    ):
+        """
+        Inicializa el cliente de sesión.
+
+        Args:
+            server_config: Configuración del servidor MCP (type: streamable_http)
+            token: Token JWT completo
+            deadline: Plazo de la ejecución (None: solo el timeout del servidor)
+        """
+        super().__init__(server_config, token, deadline)
+
+        # Estado de la sesión (solo se toca desde el loop de sesiones)
+        self._session: Optional[ClientSession] = None
+        self._session_task: Optional[asyncio.Task] = None
+        self._session_lock: Optional[asyncio.Lock] = None
+        self._closing: Optional[asyncio.Event] = None
+
+    @property
+    def _session_url(self) -> str:
+        """URL del endpoint MCP de sesiones."""
+        return self._base_url.rstrip("/") + self.server_config.endpoint
+
+    # ========== SESIÓN (en el loop de sesiones) ==========
+
+    async def _add_deadline_header(self, request: httpx.Request) -> None:
+        """Envía en cada request HTTP de la sesión el tiempo que le queda a la ejecución."""
+        if self.deadline is not None:
+            timeout = min(self._timeout, self.deadline.remaining())
+            request.headers[DEADLINE_HEADER] = str(int(timeout * 1000))
+
+    async def _run_session(self, ready: asyncio.Future) -> None:
+        """Mantiene abierta la sesión hasta close() o hasta que el servidor la cierre."""
+        http_client = httpx.AsyncClient(
+            headers={"Authorization": f"Bearer {self.token}"},
+            timeout=httpx.Timeout(self._timeout, read=SSE_READ_TIMEOUT),
+            follow_redirects=True,
+            event_hooks={"request": [self._add_deadline_header]}
+        )
+        try:
+            async with http_client:
+                async with streamable_http_client(self._session_url, http_client=http_client) as (read, write, _):
+                    async with ClientSession(
+                        read,
+                        write,
+                        read_timeout_seconds=timedelta(seconds=self._timeout)
+                    ) as session:
+                        await session.initialize()
+                        logger.info(f"Sesión MCP abierta con '{self.server_id}'")
+                        ready.set_result(session)
+                        await self._closing.wait()
+        except BaseException as e:
+            if not ready.done():
+                ready.set_exception(_leaf_exception(e))
+            elif not isinstance(e, asyncio.CancelledError):
+                logger.warning(f"Sesión MCP con '{self.server_id}' cerrada: {_leaf_exception(e)}")
+        finally:
+            self._session = None
+
+    async def _get_session(self, context: str) -> ClientSession:
+        """Sesión abierta (la abre si no existe o si se cerró)."""
+        if self._session_lock is None:
+            self._session_lock = asyncio.Lock()
+
+        async with self._session_lock:
+            if self._session is None or self._session_task is None or self._session_task.done():
+                ready = asyncio.get_running_loop().create_future()
+                self._closing = asyncio.Event()
+                self._session_task = asyncio.create_task(self._run_session(ready))
+                self._session = await asyncio.wait_for(ready, timeout=self._call_timeout(context))
+            return self._session
+
+    async def _request(
+        self,
+        operation: Callable[[ClientSession], Awaitable[T]],
+        context: str
+    ) -> T:
+        """
+        Ejecuta una operación sobre la sesión traduciendo los errores.
+
+        Raises:
+            MCPConnectionError: Error de conexión o timeout
+            MCPAuthError: Token rechazado por el servidor
+            MCPToolError: Error devuelto por el servidor MCP
+        """
+        try:
+            session = await self._get_session(context)
+            return await asyncio.wait_for(operation(session), timeout=self._call_timeout(context))
+
+        except MCPError:
+            raise
+
+        except McpError as e:
+            raise MCPToolError(
+                codigo="MCP_TOOL_ERROR",
+                mensaje=f"Error en '{context}': {e.error.message}",
+                detalle=str(e.error)
+            )
+
+        except BaseException as e:
+            error = _leaf_exception(e)
+            if not isinstance(error, Exception):  # Cancelación, KeyboardInterrupt...
+                raise
+            if isinstance(error, httpx.HTTPStatusError):
+                # Respuesta en streaming: el cuerpo puede no estar leído
+                try:
+                    detalle = error.response.text
+                except httpx.ResponseNotRead:
+                    detalle = str(error)
+                self._raise_for_status(error.response.status_code, detalle, context)
+            if isinstance(error, asyncio.TimeoutError):
+                error = httpx.TimeoutException(str(error) or "timeout")
+            self._handle_connection_error(error, context)
+
+    def _submit(self, coro: Awaitable[T]) -> "concurrent.futures.Future[T]":
+        """Programa una corrutina en el loop de sesiones."""
+        return asyncio.run_coroutine_threadsafe(coro, get_session_loop())
+
+    def _tool_result(self, data: Dict[str, Any], name: str) -> Dict[str, Any]:
+        """
+        Comprueba el resultado de tools/call ({"content": [...], "isError": ...}).
+
+        Raises:
+            MCPAuthError / MCPToolError: Si la tool devolvió un error
+        """
+        text = next((item.get("text", "") for item in data.get("content", []) if item.get("type") == "text"), "")
+
+        match = _TOOL_ERROR_PATTERN.match(text)
+        if match:
+            self._raise_for_status(int(match.group(1)), text, name)
+        if data.get("isError"):
+            raise MCPToolError(
+                codigo="MCP_TOOL_ERROR",
+                mensaje=f"Error en '{name}': {text}",
+                detalle=text
+            )
+        return data
+
+    async def _call_tool(self, name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        result = await self._request(lambda session: session.call_tool(name, arguments), name)
+        return self._tool_result(result.model_dump(mode="json", by_alias=True, exclude_none=True), name)
+
+    async def _list_tools(self) -> Dict[str, Any]:
+        result = await self._request(lambda session: session.list_tools(), "tools/list")
+        return result.model_dump(mode="json", by_alias=True, exclude_none=True)
+
+    async def _read_resource(self, uri: str) -> Dict[str, Any]:
+        result = await self._request(lambda session: session.read_resource(uri), uri)
+        return result.model_dump(mode="json", by_alias=True, exclude_none=True)
+
+    async def _shutdown(self) -> None:
+        """Cierra la sesión (termina la sesión en el servidor)."""
+        if self._session_task is not None and not self._session_task.done():
+            self._closing.set()
+            try:
+                await asyncio.wait_for(self._session_task, timeout=self._timeout)
+            except Exception as e:
+                logger.warning(f"Error cerrando sesión MCP con '{self.server_id}': {e}")
+        self._session_task = None
+        self._session = None
+
+    # ========== INTERFAZ ASÍNCRONA ==========
+
+    async def call_tool(self, name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """Ejecuta una tool sobre la sesión (async). Ver MCPClient.call_tool"""
+        return await asyncio.wrap_future(self._submit(self._call_tool(name, arguments)))
+
+    async def list_tools(self) -> Dict[str, Any]:
+        """Lista tools disponibles sobre la sesión (async). Ver MCPClient.list_tools"""
+        return await asyncio.wrap_future(self._submit(self._list_tools()))
+
+    async def read_resource(self, uri: str) -> Dict[str, Any]:
+        """Lee un resource sobre la sesión (async). Ver MCPClient.read_resource"""
+        return await asyncio.wrap_future(self._submit(self._read_resource(uri)))
+
+    # ========== INTERFAZ SÍNCRONA ==========
+
+    def call_tool_sync(self, name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """Ejecuta una tool sobre la sesión (sync). Ver MCPClient.call_tool_sync"""
+        return self._submit(self._call_tool(name, arguments)).result()
+
+    def list_tools_sync(self) -> Dict[str, Any]:
+        """Lista tools disponibles sobre la sesión (sync). Ver MCPClient.list_tools_sync"""
+        return self._submit(self._list_tools()).result()
+
+    # ========== GESTIÓN DE RECURSOS ==========
+
+    async def close(self):
+        """Cierra la sesión MCP."""
+        await asyncio.wrap_future(self._submit(self._shutdown()))
+
+    def close_sync(self):
+        """Cierra la sesión MCP (sync)."""
+        self._submit(self._shutdown()).result()
@@ -0,0 +1,364 @@
+# backoffice/mcp/stdio_client.py
+
+"""
+Cliente MCP stdio con pool de procesos persistentes.
+
+Para instalaciones en un solo nodo: el back office arranca `pool_size`
+procesos del servidor MCP (`command` en mcp_servers.yaml, `type: stdio`)
+y les habla por sus pipes, sin salto HTTP.
+
+- Los procesos viven mientras viva el back office y se comparten entre
+  todas las ejecuciones. Cada request lleva el token de su ejecución en
+  `params._meta.token`.
+- Cada proceso atiende varias requests a la vez: los IDs JSON-RPC se
+  multiplexan sobre sus pipes (un mensaje JSON por línea).
+- Cada llamada va al proceso con menos requests en curso.
+- Si un proceso muere, sus requests en curso fallan con
+  MCP_SERVER_UNAVAILABLE (no se reintentan: pueden haberse ejecutado) y
+  se arranca otro en la siguiente llamada.
+
+Los pools viven en el loop de sesiones MCP (ver session_client), así que
+sirven igual a la interfaz async y a la síncrona.
+"""
+
+import asyncio
+import itertools
+import json
+import logging
+import os
+import sys
+from typing import Any, Dict, List, Optional
+
+from mcp.types import LATEST_PROTOCOL_VERSION
+
+from ..config.models import MCPServerConfig
+from .exceptions import MCPConnectionError, MCPError
+from .session_client import MCPSessionClient, get_session_loop
+
+logger = logging.getLogger(__name__)
+
+# Longitud máxima de una línea (mensaje JSON-RPC) en los pipes
+STDIO_LINE_LIMIT = 64 * 1024 * 1024
+
+# Tiempo de espera al parar un proceso antes de matarlo
+STDIO_STOP_TIMEOUT = 5.0
+
+
+class StdioWorker:
+    """
+    Un proceso del servidor MCP con JSON-RPC multiplexado sobre sus pipes.
+
+    Args:
+        command: Comando del servidor MCP stdio
+        env: Entorno del proceso
+        name: Nombre para los logs
+    """
+
+    def __init__(self, command: List[str], env: Dict[str, str], name: str):
+        self.command = command
+        self.env = env
+        self.name = name
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.requests = 0  # Requests atendidas (estadística de reparto)
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._ids = itertools.count(1)
+        self._reader: Optional[asyncio.Task] = None
+
+    @property
+    def alive(self) -> bool:
+        """True si el proceso está en marcha y se leen sus respuestas"""
+        return (
+            self.process is not None
+            and self.process.returncode is None
+            and self._reader is not None
+            and not self._reader.done()
+        )
+
+    @property
+    def in_flight(self) -> int:
+        """Requests enviadas pendientes de respuesta"""
+        return len(self._pending)
+
+    async def start(self, timeout: float) -> None:
+        """
+        Arranca el proceso y hace el handshake MCP (initialize).
+
+        Si el handshake falla, expira o se cancela, el proceso se para.
+
+        Raises:
+            MCPConnectionError: Si el proceso no arranca o no responde a tiempo
+        """
+        try:
+            self.process = await asyncio.create_subprocess_exec(
+                *self.command,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                env=self.env,
+                limit=STDIO_LINE_LIMIT
+            )
+        except OSError as e:
+            raise MCPConnectionError(
+                codigo="MCP_CONNECTION_ERROR",
+                mensaje=f"No se puede arrancar el servidor MCP stdio '{self.name}'",
+                detalle=f"{self.command}: {e}"
+            )
+
+        self._reader = asyncio.create_task(self._read_loop())
+        try:
+            response = await asyncio.wait_for(
+                self.request("initialize", {
+                    "protocolVersion": LATEST_PROTOCOL_VERSION,
+                    "capabilities": {},
+                    "clientInfo": {"name": "agentix-backoffice", "version": "1.0.0"}
+                }),
+                timeout=timeout
+            )
+            if "error" in response:
+                raise MCPConnectionError(
+                    codigo="MCP_CONNECTION_ERROR",
+                    mensaje=f"Handshake MCP fallido con '{self.name}'",
+                    detalle=str(response["error"])
+                )
+            await self._send({"jsonrpc": "2.0", "method": "notifications/initialized"})
+        except asyncio.TimeoutError:
+            await self.stop()
+            raise MCPConnectionError(
+                codigo="MCP_CONNECTION_ERROR",
+                mensaje=f"Timeout en el handshake MCP con '{self.name}'",
+                detalle=f"Sin respuesta a initialize en {timeout}s"
+            )
+        except BaseException:
+            # Fallo o cancelación a mitad del handshake: no dejar el proceso
+            # ni su tarea de lectura huérfanos
+            await self.stop()
+            raise
+        logger.info(f"Proceso MCP stdio '{self.name}' arrancado (pid {self.process.pid})")
+
+    async def request(self, method: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Envía una request y espera su respuesta.
+
+        Returns:
+            Mensaje JSON-RPC de respuesta (con "result" o "error")
+
+        Raises:
+            MCPConnectionError: Si el proceso muere antes de responder
+        """
+        request_id = next(self._ids)
+        self.requests += 1
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        try:
+            await self._send({"jsonrpc": "2.0", "id": request_id, "method": method, "params": params})
+            return await future
+        finally:
+            self._pending.pop(request_id, None)
+
+    async def _send(self, message: Dict[str, Any]) -> None:
+        if not self.alive:
+            raise self._unavailable("proceso no disponible")
+        try:
+            self.process.stdin.write(json.dumps(message, ensure_ascii=False).encode("utf-8") + b"\n")
+            await self.process.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError) as e:
+            raise self._unavailable(str(e))
+
+    async def _read_loop(self) -> None:
+        """Lee respuestas y las entrega a la request con el mismo ID."""
+        error = "proceso terminado"
+        try:
+            while True:
+                line = await self.process.stdout.readline()
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    logger.warning(f"Línea no JSON de '{self.name}': {line[:200]!r}")
+                    continue
+                # Solo interesan respuestas; se ignoran notificaciones del servidor
+                future = self._pending.get(message.get("id")) if isinstance(message, dict) else None
+                if future is not None and not future.done():
+                    future.set_result(message)
+        except Exception as e:
+            error = str(e)
+        finally:
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(self._unavailable(error))
+
+    def _unavailable(self, detalle: str) -> MCPConnectionError:
+        return MCPConnectionError(
+            codigo="MCP_SERVER_UNAVAILABLE",
+            mensaje=f"Proceso MCP stdio '{self.name}' no disponible",
+            detalle=detalle
+        )
+
+    async def stop(self) -> None:
+        """Cierra stdin (el servidor termina solo) y, si no acaba, lo mata."""
+        if self.process is not None and self.process.returncode is None:
+            try:
+                self.process.stdin.close()
+                await asyncio.wait_for(self.process.wait(), timeout=STDIO_STOP_TIMEOUT)
+            except Exception:
+                self.process.kill()
+                await self.process.wait()
+        if self._reader is not None:
+            await asyncio.gather(self._reader, return_exceptions=True)
+
+
+class StdioWorkerPool:
+    """
+    Pool de procesos del servidor MCP stdio de un servidor configurado.
+
+    Args:
+        server_config: Configuración del servidor MCP (type: stdio)
+    """
+
+    def __init__(self, server_config: MCPServerConfig):
+        self.server_config = server_config
+        self.workers: List[Optional[StdioWorker]] = [None] * server_config.pool_size
+        self.restarts = 0
+        self._lock = asyncio.Lock()
+
+    def _env(self) -> Dict[str, str]:
+        """Entorno de los procesos: el del back office con sus mismos imports y JWT_SECRET."""
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(path for path in sys.path if path)
+        if "JWT_SECRET" not in env:
+            from ..settings import get_settings
+            env["JWT_SECRET"] = get_settings().JWT_SECRET
+        env.update(self.server_config.env)
+        return env
+
+    async def _start_worker(self, index: int) -> None:
+        previous = self.workers[index]
+        if previous is not None:
+            self.restarts += 1
+            logger.warning(
+                f"Proceso MCP stdio '{previous.name}' caído "
+                f"(código {previous.process.returncode if previous.process else None}); se reinicia"
+            )
+            await previous.stop()
+            self.workers[index] = None
+
+        worker = StdioWorker(
+            self.server_config.command,
+            self._env(),
+            f"{self.server_config.id}-{index}"
+        )
+        await worker.start(timeout=float(self.server_config.timeout))
+        self.workers[index] = worker
+
+    async def acquire(self) -> StdioWorker:
+        """
+        Proceso con menos requests en curso (arranca o reinicia los que falten).
+
+        Raises:
+            MCPConnectionError: Si no hay ningún proceso disponible
+        """
+        if any(worker is None or not worker.alive for worker in self.workers):
+            async with self._lock:
+                missing = [
+                    i for i, worker in enumerate(self.workers)
+                    if worker is None or not worker.alive
+                ]
+                results = await asyncio.gather(
+                    *(self._start_worker(i) for i in missing),
+                    return_exceptions=True
+                )
+                errors = [r for r in results if isinstance(r, BaseException)]
+                if errors and not any(worker is not None and worker.alive for worker in self.workers):
+                    error = errors[0]
+                    if isinstance(error, MCPError):
+                        raise error
+                    raise MCPConnectionError(
+                        codigo="MCP_CONNECTION_ERROR",
+                        mensaje=f"No se puede arrancar el servidor MCP stdio '{self.server_config.id}'",
+                        detalle=str(error)
+                    )
+
+        alive = [worker for worker in self.workers if worker is not None and worker.alive]
+        return min(alive, key=lambda worker: worker.in_flight)
+
+    async def request(self, method: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Envía una request al proceso menos cargado. Ver StdioWorker.request"""
+        worker = await self.acquire()
+        return await worker.request(method, params)
+
+    async def close(self) -> None:
+        """Para todos los procesos del pool."""
+        async with self._lock:
+            await asyncio.gather(*(w.stop() for w in self.workers if w is not None))
+            self.workers = [None] * len(self.workers)
+
+
+# Pools por ID de servidor (solo se usan desde el loop de sesiones)
+_pools: Dict[str, StdioWorkerPool] = {}
+
+
+def get_stdio_pool(server_config: MCPServerConfig) -> StdioWorkerPool:
+    """Obtiene el pool de procesos de un servidor stdio (lo crea si no existe)"""
+    pool = _pools.get(server_config.id)
+    if pool is None:
+        pool = StdioWorkerPool(server_config)
+        _pools[server_config.id] = pool
+    return pool
+
+
+async def _close_pools() -> None:
+    pools = list(_pools.values())
+    _pools.clear()
+    await asyncio.gather(*(pool.close() for pool in pools))
+
+
+async def close_stdio_pools() -> None:
+    """Para los procesos de todos los pools stdio (shutdown de la API)"""
+    if _pools:
+        await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(_close_pools(), get_session_loop()))
+
+
+class MCPStdioClient(MCPSessionClient):
+    """
+    Cliente MCP sobre el pool de procesos stdio de un servidor.
+
+    Misma interfaz y excepciones que MCPClient. El cliente es por
+    ejecución (lleva su token); los procesos son compartidos.
+    """
+
+    async def _pool_request(self, method: str, params: Dict[str, Any], context: str) -> Dict[str, Any]:
+        """
+        Envía una request con el token de la ejecución y retorna su 'result'.
+
+        Raises:
+            MCPConnectionError: Proceso no disponible o timeout
+            MCPDeadlineError: Plazo de la ejecución agotado
+            MCPToolError: Error JSON-RPC del servidor
+        """
+        params = {**params, "_meta": {"token": self.token}}
+        try:
+            response = await asyncio.wait_for(
+                get_stdio_pool(self.server_config).request(method, params),
+                timeout=self._call_timeout(context)
+            )
+        except asyncio.TimeoutError:
+            if self.deadline is not None and self.deadline.expired:
+                raise self.deadline.error(context)
+            raise MCPConnectionError(
+                codigo="MCP_TIMEOUT",
+                mensaje=f"Timeout en '{context}' en MCP '{self.server_id}' (>{self.server_config.timeout}s)"
+            )
+        return self._process_response(response, context)
+
+    async def _call_tool(self, name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        result = await self._pool_request("tools/call", {"name": name, "arguments": arguments}, name)
+        return self._tool_result(result, name)
+
+    async def _list_tools(self) -> Dict[str, Any]:
+        return await self._pool_request("tools/list", {}, "tools/list")
+
+    async def _read_resource(self, uri: str) -> Dict[str, Any]:
+        return await self._pool_request("resources/read", {"uri": uri}, uri)
+
+    async def _shutdown(self) -> None:
+        """Los procesos son compartidos: cerrar el cliente no los para."""
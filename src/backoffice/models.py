@@ -1,6 +1,6 @@
 # backoffice/models.py
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import List, Dict, Any, Optional
 
 
@@ -12,6 +12,7 @@ class AgentConfig:
     modelo: str  # "claude-3-5-sonnet-20241022"
     herramientas: List[str]  # ["consultar_expediente", "actualizar_datos", ...]
     additional_goal: Optional[str] = None  # "Priorizar validación del NIF" (opcional, se añade al goal)
+    prefetch: List[Dict[str, Any]] = field(default_factory=list)  # [{"tool": ..., "arguments": {...}}] (agents.yaml)
 
 
 @dataclass
@@ -9,7 +9,7 @@ del AgentExecutor, permitiendo inyectar mocks para testing unitario.
 Siguiendo el principio de Inversión de Dependencias (SOLID).
 """
 
-from typing import Protocol, List, Dict, Any
+from typing import Protocol, List, Dict, Any, Optional
 from pathlib import Path
 
 
@@ -81,7 +81,9 @@ class MCPRegistryFactoryProtocol(Protocol):
     async def create(
         self,
         config: 'MCPServersConfig',
-        token: str
+        token: str,
+        deadline: Optional['Deadline'] = None,
+        prefetch: Optional[List[Dict[str, Any]]] = None
     ) -> 'MCPClientRegistry':
         """
         Crea y inicializa un MCPClientRegistry.
@@ -89,6 +91,8 @@ class MCPRegistryFactoryProtocol(Protocol):
         Args:
             config: Configuración de servidores MCP
             token: Token JWT para autenticación
+            deadline: Plazo de la ejecución (acota cada llamada MCP)
+            prefetch: Llamadas a adelantar durante la inicialización
 
         Returns:
             MCPClientRegistry inicializado
@@ -155,5 +159,6 @@ class AgentRegistryProtocol(Protocol):
 if False:  # TYPE_CHECKING equivalente sin usar typing.TYPE_CHECKING
     from backoffice.auth.jwt_validator import JWTClaims
     from backoffice.config.models import MCPServersConfig
+    from backoffice.mcp.deadline import Deadline
     from backoffice.mcp.registry import MCPClientRegistry
     from backoffice.logging.audit_logger import AuditLogger
@@ -17,12 +17,37 @@ class Settings(BaseSettings):
     JWT_EXPECTED_SUBJECT: str = "Automático"
     JWT_REQUIRED_AUDIENCE: str = "agentix-mcp-expedientes"
 
+    # JWT - Caché de tokens ya verificados (0 la deshabilita)
+    JWT_CACHE_SIZE: int = 1024
+
     # MCP Configuration
     MCP_CONFIG_PATH: str = str(Path(__file__).parent / "config" / "mcp_servers.yaml")
 
+    # MCP - Circuit breaker por servidor (ver backoffice/mcp/resilience.py)
+    MCP_BREAKER_ENABLED: bool = True
+    MCP_BREAKER_WINDOW: int = 20  # Llamadas recientes evaluadas
+    MCP_BREAKER_MIN_CALLS: int = 10
+    MCP_BREAKER_ERROR_RATE: float = 0.5
+    MCP_BREAKER_SLOW_CALL_SECONDS: float = 10.0
+    MCP_BREAKER_SLOW_CALL_RATE: float = 0.8
+    MCP_BREAKER_OPEN_SECONDS: float = 30.0
+    MCP_BREAKER_HALF_OPEN_CALLS: int = 2
+
+    # MCP - Límite de concurrencia adaptativo (AIMD) por servidor
+    MCP_LIMIT_INITIAL: int = 20
+    MCP_LIMIT_MIN: int = 2
+    MCP_LIMIT_MAX: int = 200
+    MCP_LIMIT_LATENCY_SECONDS: float = 2.0  # Llamadas más lentas reducen el límite
+    MCP_LIMIT_BACKOFF: float = 0.7
+    MCP_LIMIT_QUEUE_SECONDS: float = 5.0  # Espera máxima por hueco
+
     # Agents Configuration (Paso 6)
     AGENTS_CONFIG_PATH: str = str(Path(__file__).parent / "config" / "agents.yaml")
 
+    # Ventana (segundos) en la que un POST /execute repetido (misma clave de
+    # idempotencia) devuelve la ejecución ya completada (0 solo deduplica en curso)
+    AGENT_IDEMPOTENCY_WINDOW_SECONDS: float = 600.0
+
     # Anthropic API (Paso 6 - Agentes IA)
     ANTHROPIC_API_KEY: str = ""
 
@@ -30,6 +55,22 @@ class Settings(BaseSettings):
     LOG_LEVEL: str = "INFO"
     LOG_DIR: str = "logs/agent_runs"
 
+    # Índice de logs (SQLite FTS5) para GET /api/v1/logs
+    LOG_INDEX_ENABLED: bool = True
+    LOG_INDEX_PATH: str = ""  # Vacío: <LOG_DIR>/.log_index.sqlite3
+    LOG_INDEX_REFRESH_SECONDS: float = 2.0
+
+    # Escaneo de archivos sin índice (LOG_INDEX_ENABLED=false)
+    LOG_SCAN_WORKERS: int = 4  # Archivos leídos en paralelo
+
+    # Caché de respuestas de GET /api/v1/logs (0 la deshabilita)
+    LOG_CACHE_SIZE: int = 128
+
+    # Streaming de logs (SSE) en /api/v1/logs/stream
+    LOG_STREAM_POLL_SECONDS: float = 1.0
+    LOG_STREAM_QUEUE_SIZE: int = 1000  # Entradas pendientes por cliente
+    LOG_STREAM_PING_SECONDS: float = 15.0
+
     # API Configuration (Paso 2)
     API_HOST: str = "0.0.0.0"
     API_PORT: int = 8080
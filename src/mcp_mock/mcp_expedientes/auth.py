@@ -5,13 +5,21 @@ Valida tokens JWT con claims completos y verifica permisos
 según la arquitectura de propagación de permisos de aGEntiX.
 """
 
+import hashlib
 import os
+import time
 import jwt
+from collections import OrderedDict
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from threading import Lock
+from typing import Optional, List, Dict, Any, Tuple
 from .models import JWTClaims
 
 
+# Tokens verificados que se recuerdan (0 desactiva la caché)
+TOKEN_CACHE_SIZE = int(os.environ.get("MCP_TOKEN_CACHE_SIZE", "1024"))
+
+
 class AuthError(Exception):
     """Error de autenticación o autorización"""
     def __init__(self, message: str, status_code: int = 401):
@@ -42,6 +50,63 @@ def validate_audience(token_payload: dict, server_id: str = "agentix-mcp-expedie
         return False
 
 
+class VerifiedTokenCache:
+    """
+    LRU de tokens con firma ya verificada.
+
+    Un mismo token se valida al recibir la request y de nuevo en cada
+    tools/call o resources/read. La clave es un hash del token y del
+    secreto (nunca el token en claro); cada entrada caduca en el `exp`
+    del token y no se prolonga al usarla. Las comprobaciones de
+    audiencia, expediente y permisos se repiten siempre.
+    """
+
+    def __init__(self, max_entries: int = TOKEN_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[bytes, Tuple[Dict[str, Any], JWTClaims]]" = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(token: str, secret: str) -> bytes:
+        return hashlib.sha256(f"{secret}\0{token}".encode("utf-8")).digest()
+
+    def get(self, key: bytes) -> Optional[Tuple[Dict[str, Any], JWTClaims]]:
+        """Payload y claims del token si está en la caché y no ha expirado"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.time() < entry[1].exp:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: bytes, payload: Dict[str, Any], claims: JWTClaims) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (payload, claims)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+token_cache = VerifiedTokenCache()
+
+
 def get_jwt_secret() -> str:
     """
     Obtiene la clave secreta para validar JWT desde variable de entorno.
@@ -58,6 +123,44 @@ def get_jwt_secret() -> str:
     return secret
 
 
+def _decode_token(token: str, secret: str) -> Tuple[Dict[str, Any], JWTClaims]:
+    """
+    Verifica firma y fechas del token y construye sus claims.
+
+    Raises:
+        AuthError: Si el token no es válido (401)
+    """
+    try:
+        payload = jwt.decode(
+            token,
+            secret,
+            algorithms=["HS256"],
+            options={
+                "verify_signature": True,
+                "verify_exp": True,
+                "verify_nbf": True,
+                "verify_iat": True,
+                "verify_aud": False  # Validación manual con validate_audience()
+            }
+        )
+
+        # Validar estructura con Pydantic
+        claims = JWTClaims(**payload)
+
+    except jwt.ExpiredSignatureError:
+        raise AuthError("Token expirado", 401)
+    except jwt.InvalidSignatureError:
+        raise AuthError("Firma inválida", 401)
+    except jwt.ImmatureSignatureError:
+        raise AuthError("Token aún no válido (nbf)", 401)
+    except jwt.InvalidTokenError as e:
+        raise AuthError(f"Token inválido: {str(e)}", 401)
+    except Exception as e:
+        raise AuthError(f"Error al validar token: {str(e)}", 401)
+
+    return payload, claims
+
+
 async def validate_jwt(
     token: Optional[str],
     resource_uri: Optional[str] = None,
@@ -78,6 +181,9 @@ async def validate_jwt(
     7. Expediente autorizado (si aplica)
     8. Permisos suficientes (si aplica)
 
+    Los pasos 2-4 se hacen una vez por token; mientras no expire, las
+    siguientes validaciones parten de los claims de token_cache.
+
     Args:
         token: Token JWT a validar
         resource_uri: URI del recurso solicitado (opcional)
@@ -95,35 +201,15 @@ async def validate_jwt(
     if not token:
         raise AuthError("Token JWT no proporcionado", 401)
 
-    try:
-        # 2. Decodificar y validar firma
-        secret = get_jwt_secret()
-        payload = jwt.decode(
-            token,
-            secret,
-            algorithms=["HS256"],
-            options={
-                "verify_signature": True,
-                "verify_exp": True,
-                "verify_nbf": True,
-                "verify_iat": True,
-                "verify_aud": False  # Validación manual con validate_audience()
-            }
-        )
-
-        # Validar estructura con Pydantic
-        claims = JWTClaims(**payload)
-
-    except jwt.ExpiredSignatureError:
-        raise AuthError("Token expirado", 401)
-    except jwt.InvalidSignatureError:
-        raise AuthError("Firma inválida", 401)
-    except jwt.ImmatureSignatureError:
-        raise AuthError("Token aún no válido (nbf)", 401)
-    except jwt.InvalidTokenError as e:
-        raise AuthError(f"Token inválido: {str(e)}", 401)
-    except Exception as e:
-        raise AuthError(f"Error al validar token: {str(e)}", 401)
+    # 2-3. Firma y estructura: solo la primera vez que se ve el token
+    secret = get_jwt_secret()
+    key = token_cache.key(token, secret)
+    cached = token_cache.get(key)
+    if cached is not None:
+        payload, claims = cached
+    else:
+        payload, claims = _decode_token(token, secret)
+        token_cache.put(key, payload, claims)
 
     # 4. Validar audiencia
     if not validate_audience(payload, server_id):
@@ -185,8 +271,8 @@ def extract_exp_id_from_uri(uri: str) -> Optional[str]:
     if not uri.startswith("expediente://"):
         return None
 
-    # Remover el esquema
-    path = uri.replace("expediente://", "")
+    # Remover el esquema y la query (proyección de campos)
+    path = uri.replace("expediente://", "").split("?", 1)[0]
 
     # Tomar la primera parte (ID del expediente)
     parts = path.split("/")
@@ -0,0 +1,224 @@
+"""
+Almacén de contenidos de documentos direccionado por contenido.
+
+El texto markdown de los documentos y el contenido que llega en
+añadir_documento se guardan fuera del expediente, en un archivo por
+SHA-256 (BLOBS_DIR/ab/cdef...). El expediente solo guarda el hash
+(`hash_sha256` del contenido y `texto_sha256` del texto), así que leer
+sus datos no obliga a leer ni parsear el cuerpo de los documentos.
+
+- Dos documentos idénticos (en el mismo o en distintos expedientes)
+  ocupan un único blob.
+- Los blobs no cambian nunca: se escriben una vez (temporal + rename) y
+  se leen con mmap solo cuando se pide el texto.
+
+Mover a blobs los textos de los expedientes existentes:
+    python -m mcp_mock.mcp_expedientes.blobs
+"""
+
+import argparse
+import hashlib
+import mmap
+import os
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from threading import Lock
+from typing import Any, Dict, Optional
+from .models import Documento, Expediente
+from .auth import AuthError
+from .storage import DATA_DIR, _replace_file, get_storage
+
+
+# Directorio de blobs
+BLOBS_DIR = Path(os.environ.get("MCP_BLOBS_DIR", str(DATA_DIR.parent / "blobs")))
+
+# Textos decodificados que se mantienen en memoria (lecturas por rangos
+# sucesivas del mismo documento)
+BLOB_TEXT_CACHE_SIZE = int(os.environ.get("MCP_BLOB_TEXT_CACHE_SIZE", "16"))
+
+
+@dataclass
+class BlobStats:
+    """Contadores de escritura de blobs (tests y benchmarks)"""
+    writes: int = 0
+    dedup_hits: int = 0
+    bytes_written: int = 0
+
+    def reset(self) -> None:
+        self.writes = 0
+        self.dedup_hits = 0
+        self.bytes_written = 0
+
+
+blob_stats = BlobStats()
+
+
+def sha256_hex(data: bytes) -> str:
+    """SHA-256 en hexadecimal"""
+    return hashlib.sha256(data).hexdigest()
+
+
+class BlobStore:
+    """
+    Blobs inmutables en disco, identificados por su SHA-256.
+
+    Args:
+        root: Directorio raíz de los blobs
+        text_cache_size: Textos decodificados en memoria (0 desactiva)
+    """
+
+    def __init__(self, root: Path = BLOBS_DIR, text_cache_size: int = BLOB_TEXT_CACHE_SIZE):
+        self.root = Path(root)
+        self.text_cache_size = text_cache_size
+        self._texts: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = Lock()
+
+    def path(self, digest: str) -> Path:
+        """Ruta del blob (dos niveles para no tener millones de archivos en un directorio)"""
+        return self.root / digest[:2] / digest[2:]
+
+    def exists(self, digest: str) -> bool:
+        return self.path(digest).exists()
+
+    def put(self, data: bytes) -> str:
+        """
+        Guarda un contenido (si no existe ya) y retorna su SHA-256.
+
+        Raises:
+            AuthError: Si hay error al escribir (500)
+        """
+        digest = sha256_hex(data)
+        path = self.path(digest)
+        if path.exists():
+            blob_stats.dedup_hits += 1
+            return digest
+
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            _replace_file(path, data)
+        except Exception as e:
+            raise AuthError(f"Error al guardar contenido {digest}: {str(e)}", 500)
+
+        blob_stats.writes += 1
+        blob_stats.bytes_written += len(data)
+        return digest
+
+    def read_text(self, digest: str) -> str:
+        """
+        Lee un blob como texto UTF-8 (mmap, sin copia intermedia en bytes).
+
+        Raises:
+            AuthError: Si el blob no existe (500: el expediente lo referencia)
+        """
+        with self._lock:
+            text = self._texts.get(digest)
+            if text is not None:
+                self._texts.move_to_end(digest)
+                return text
+
+        try:
+            with open(self.path(digest), "rb") as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    text = ""
+                else:
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                        text = str(data, "utf-8")
+        except FileNotFoundError:
+            raise AuthError(f"Contenido {digest} no encontrado en el almacén de blobs", 500)
+
+        if self.text_cache_size > 0:
+            with self._lock:
+                self._texts[digest] = text
+                while len(self._texts) > self.text_cache_size:
+                    self._texts.popitem(last=False)
+        return text
+
+
+# Almacén global
+_blob_store: Optional[BlobStore] = None
+
+
+def get_blob_store() -> BlobStore:
+    """Obtiene el almacén global de blobs"""
+    global _blob_store
+    if _blob_store is None:
+        _blob_store = BlobStore()
+    return _blob_store
+
+
+def set_blob_store(store: Optional[BlobStore]) -> None:
+    """Reemplaza el almacén global (None: se recrea en el siguiente uso). Útil para tests"""
+    global _blob_store
+    _blob_store = store
+
+
+def texto_documento(documento: Documento) -> Optional[str]:
+    """
+    Texto markdown de un documento, esté en línea o en el almacén de blobs.
+
+    Args:
+        documento: Documento del expediente
+
+    Returns:
+        Texto markdown o None si el documento no tiene
+    """
+    if documento.texto_markdown is not None:
+        return documento.texto_markdown
+    if documento.texto_sha256:
+        return get_blob_store().read_text(documento.texto_sha256)
+    return None
+
+
+def documento_json(documento: Documento) -> Dict[str, Any]:
+    """Documento serializado con su texto markdown (leído del blob si hace falta)"""
+    data = documento.model_dump(mode="json")
+    if data["texto_markdown"] is None and documento.texto_sha256:
+        data["texto_markdown"] = texto_documento(documento)
+    return data
+
+
+def externalize_textos(expediente: Expediente) -> int:
+    """
+    Mueve al almacén de blobs los textos markdown en línea del expediente.
+
+    Args:
+        expediente: Expediente a modificar (copia obtenida con for_update=True)
+
+    Returns:
+        Número de textos movidos
+    """
+    store = get_blob_store()
+    moved = 0
+    for documento in expediente.documentos:
+        if documento.texto_markdown is not None:
+            documento.texto_sha256 = store.put(documento.texto_markdown.encode("utf-8"))
+            documento.texto_markdown = None
+            moved += 1
+    return moved
+
+
+def main() -> int:
+    """Mueve a blobs los textos de todos los expedientes del almacenamiento configurado"""
+    parser = argparse.ArgumentParser(
+        description="Mueve los textos de los documentos a blobs direccionados por contenido"
+    )
+    parser.parse_args()
+
+    storage = get_storage()
+    migrated = 0
+    for exp_id in storage.iter_ids():
+        expediente = storage.load(exp_id, for_update=True)
+        if externalize_textos(expediente):
+            storage.save(expediente)
+            migrated += 1
+
+    print(
+        f"{migrated} expedientes migrados; {blob_stats.writes} blobs escritos "
+        f"({blob_stats.bytes_written} bytes), {blob_stats.dedup_hits} duplicados"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -29,12 +29,16 @@ class Documento(BaseModel):
         fecha: Fecha de incorporación al expediente
         tipo: Tipo de documento (SOLICITUD, IDENTIFICACION, BANCARIO, etc.)
         ruta: Ruta física del documento
-        hash_sha256: Hash para verificar integridad
+        hash_sha256: Hash para verificar integridad (SHA-256 del contenido;
+            en los documentos nuevos, clave del contenido en el almacén de blobs)
         tamano_bytes: Tamaño en bytes
         validado: Estado de validación
         metadatos_extraidos: Metadatos extraídos del documento según su tipo
             (NIF, fechas, importes, referencias catastrales, etc.)
         texto_markdown: Transcripción del contenido del documento en markdown
+            (None si está en el almacén de blobs, ver texto_sha256)
+        texto_sha256: SHA-256 del texto markdown en el almacén de blobs
+            (ver blobs.texto_documento)
     """
     id: str
     nombre: str
@@ -46,6 +50,7 @@ class Documento(BaseModel):
     validado: Optional[bool] = None
     metadatos_extraidos: Optional[Dict[str, Any]] = None
     texto_markdown: Optional[str] = None
+    texto_sha256: Optional[str] = None
 
 
 class EntradaHistorial(BaseModel):
@@ -123,6 +128,7 @@ class Expediente(BaseModel):
     documentos: List[Documento]
     historial: List[EntradaHistorial]
     metadatos: Metadatos
+    version: int = 0  # Se incrementa en cada escritura (control optimista)
 
     class Config:
         json_encoders = {
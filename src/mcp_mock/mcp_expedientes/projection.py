@@ -0,0 +1,200 @@
+"""
+Proyección de campos de expedientes.
+
+Permite devolver solo una parte del expediente (fields/exclude) o un
+resumen con recuentos e IDs, de modo que consultar_expediente y el
+resource expediente://{id} no tengan que serializar (ni el agente
+recibir) el texto completo de todos los documentos.
+
+Las rutas de campos usan puntos: "estado", "datos.solicitante",
+"documentos.texto_markdown". En listas (documentos, historial...) la
+ruta se aplica a cada elemento.
+"""
+
+import typing
+from typing import Any, Dict, Iterable, List, Optional, Type, Union
+
+from pydantic import BaseModel
+
+from .auth import AuthError
+from .blobs import texto_documento
+from .models import Expediente
+
+
+# Campos excluidos si no se indica ni `fields` ni `exclude`
+DEFAULT_EXCLUDE = ("documentos.texto_markdown",)
+
+PROJECTION_SCHEMA = {
+    "fields": {
+        "type": "array",
+        "items": {"type": "string"},
+        "description": "Campos a devolver, con rutas separadas por puntos "
+                       "(ej: [\"estado\", \"datos\", \"documentos.id\"]). Por defecto, todos"
+    },
+    "exclude": {
+        "type": "array",
+        "items": {"type": "string"},
+        "description": "Campos a omitir (por defecto [\"documentos.texto_markdown\"]; "
+                       "[] para el expediente completo)"
+    },
+    "summary": {
+        "type": "boolean",
+        "description": "Si es true, retorna solo un resumen con recuentos e IDs"
+    }
+}
+
+
+def parse_paths(value: Union[str, Iterable[str], None]) -> Optional[List[str]]:
+    """
+    Normaliza una lista de rutas de campos.
+
+    Args:
+        value: Lista de rutas o string separado por comas (None: sin indicar)
+
+    Returns:
+        Lista de rutas sin vacíos, o None si no se indicó
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = value.split(",")
+    return [path.strip() for path in value if path and path.strip()]
+
+
+def _list_item_model(annotation: Any) -> Optional[Type[BaseModel]]:
+    """Modelo de los elementos si la anotación es List[Modelo]"""
+    if typing.get_origin(annotation) in (list, List):
+        (item,) = typing.get_args(annotation) or (None,)
+        if isinstance(item, type) and issubclass(item, BaseModel):
+            return item
+    return None
+
+
+def _field_model(annotation: Any) -> Optional[Type[BaseModel]]:
+    """Modelo anidado si la anotación es un Modelo (u Optional[Modelo])"""
+    candidates = typing.get_args(annotation) or (annotation,)
+    for candidate in candidates:
+        if isinstance(candidate, type) and issubclass(candidate, BaseModel):
+            return candidate
+    return None
+
+
+def _pydantic_spec(
+    paths: List[str],
+    model: Optional[Type[BaseModel]]
+) -> Dict[Any, Any]:
+    """
+    Convierte rutas con puntos al formato include/exclude de pydantic.
+
+    Las listas de modelos llevan el nivel "__all__" para que la ruta se
+    aplique a todos sus elementos. Dentro de campos dict (datos,
+    metadatos_extraidos) las rutas se usan tal cual, sin validar.
+
+    Raises:
+        AuthError: Si una ruta no corresponde a un campo del modelo (400)
+    """
+    tree: Dict[str, Any] = {}
+    for path in paths:
+        node = tree
+        parts = path.split(".")
+        for i, part in enumerate(parts):
+            if node is True:
+                break
+            if i == len(parts) - 1:
+                node[part] = True
+            else:
+                node = node.setdefault(part, {})
+
+    def convert(subtree: Dict[str, Any], current: Optional[Type[BaseModel]], prefix: str) -> Dict[Any, Any]:
+        spec: Dict[Any, Any] = {}
+        for name, child in subtree.items():
+            item_model = field_model = None
+            if current is not None:
+                if name not in current.model_fields:
+                    raise AuthError(f"Campo no válido: {prefix}{name}", 400)
+                annotation = current.model_fields[name].annotation
+                item_model = _list_item_model(annotation)
+                field_model = None if item_model else _field_model(annotation)
+
+            if child is True:
+                spec[name] = True
+            elif item_model is not None:
+                spec[name] = {"__all__": convert(child, item_model, f"{prefix}{name}.")}
+            else:
+                spec[name] = convert(child, field_model, f"{prefix}{name}.")
+        return spec
+
+    return convert(tree, model, "")
+
+
+def project_expediente(
+    expediente: Expediente,
+    fields: Union[str, Iterable[str], None] = None,
+    exclude: Union[str, Iterable[str], None] = None,
+    summary: bool = False
+) -> Dict[str, Any]:
+    """
+    Serializa un expediente aplicando la proyección indicada.
+
+    Args:
+        expediente: Expediente a serializar
+        fields: Campos a incluir (None: todos)
+        exclude: Campos a omitir (None: DEFAULT_EXCLUDE si tampoco se
+            indica `fields`)
+        summary: Si True, ignora fields/exclude y retorna summarize_expediente()
+
+    Returns:
+        Diccionario listo para json.dumps
+
+    Raises:
+        AuthError: Si algún campo no es válido (400)
+    """
+    if summary:
+        return summarize_expediente(expediente)
+
+    fields = parse_paths(fields)
+    exclude = parse_paths(exclude)
+    if exclude is None:
+        exclude = [] if fields is not None else list(DEFAULT_EXCLUDE)
+
+    data = expediente.model_dump(
+        mode="json",
+        include=_pydantic_spec(fields, Expediente) if fields else None,
+        exclude=_pydantic_spec(exclude, Expediente) if exclude else None
+    )
+
+    # Textos pedidos que están en el almacén de blobs: se leen solo ahora
+    for doc_data, documento in zip(data.get("documentos", ()), expediente.documentos):
+        if doc_data.get("texto_markdown", "") is None and documento.texto_sha256:
+            doc_data["texto_markdown"] = texto_documento(documento)
+
+    return data
+
+
+def summarize_expediente(expediente: Expediente) -> Dict[str, Any]:
+    """
+    Resumen del expediente: estado, recuentos e IDs.
+
+    Args:
+        expediente: Expediente a resumir
+
+    Returns:
+        Diccionario con los datos básicos y los IDs de documentos e historial
+    """
+    return {
+        "id": expediente.id,
+        "tipo": expediente.tipo,
+        "estado": expediente.estado,
+        "fecha_inicio": expediente.fecha_inicio.isoformat(),
+        "version": expediente.version,
+        "tarea_actual": expediente.metadatos.tarea_actual.id,
+        "campos_datos": sorted(expediente.datos),
+        "documentos": {
+            "total": len(expediente.documentos),
+            "ids": [doc.id for doc in expediente.documentos]
+        },
+        "historial": {
+            "total": len(expediente.historial),
+            "ids": [entry.id for entry in expediente.historial]
+        }
+    }
@@ -5,25 +5,131 @@ Los Resources exponen información que el agente puede leer pasivamente.
 Son operaciones idempotentes sin efectos secundarios.
 """
 
+import asyncio
+import base64
+import binascii
 import json
 import os
-from pathlib import Path
-from typing import List, Optional
+import weakref
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qs
 from mcp import types
 from .models import Expediente
 from .auth import AuthError
+from .blobs import documento_json, externalize_textos
+from .projection import project_expediente
+from .storage import ExpedienteStorage, get_storage
 
 
-# Directorio de datos
-DATA_DIR = Path(__file__).parent / "data" / "expedientes"
+# Expedientes por página en resources/list (cada uno aporta 3 resources)
+RESOURCES_PAGE_SIZE = int(os.environ.get("MCP_RESOURCES_PAGE_SIZE", "100"))
 
+# Locks por expediente (se liberan solos cuando nadie los usa)
+_expediente_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
 
-def load_expediente(exp_id: str) -> Expediente:
+
+def expediente_lock(exp_id: str) -> asyncio.Lock:
+    """
+    Lock asyncio que serializa las mutaciones de un expediente en este
+    proceso. Entre procesos, el almacenamiento comprueba la versión al
+    escribir de forma atómica (ver storage.ExpedienteStorage.save).
+
+    Uso:
+        async with expediente_lock(exp_id):
+            ...
+
+    Args:
+        exp_id: ID del expediente
+
+    Returns:
+        Lock del expediente
+    """
+    lock = _expediente_locks.get(exp_id)
+    if lock is None:
+        lock = asyncio.Lock()
+        _expediente_locks[exp_id] = lock
+    return lock
+
+
+@dataclass
+class WriteSession:
+    """Expedientes modificados pendientes de escribir"""
+    pending: Dict[str, Expediente] = field(default_factory=dict)
+
+
+# Sesiones de escritura activas (anidadas: batch JSON-RPC > tool call)
+_write_sessions: ContextVar[Tuple[WriteSession, ...]] = ContextVar(
+    "expediente_write_sessions", default=()
+)
+
+
+@contextmanager
+def coalesced_writes() -> Iterator[WriteSession]:
+    """
+    Agrupa las escrituras de expedientes en una por expediente.
+
+    Dentro del bloque, save_expediente() no escribe: el expediente
+    queda pendiente y las siguientes lecturas del mismo contexto lo ven.
+    Al salir sin error, los pendientes pasan a la sesión exterior (si la
+    hay) o se escriben al almacenamiento. Si hay una excepción se
+    descartan, de modo que una tool call fallida no deja escrituras a
+    medias.
+
+    Uso:
+        with coalesced_writes():
+            await call_tool(...)
+
+    Yields:
+        Sesión de escritura
+    """
+    session = WriteSession()
+    token = _write_sessions.set(_write_sessions.get() + (session,))
+    try:
+        yield session
+    finally:
+        _write_sessions.reset(token)
+
+    parents = _write_sessions.get()
+    if parents:
+        parents[-1].pending.update(session.pending)
+    else:
+        storage = get_storage()
+        for expediente in session.pending.values():
+            _store(storage, expediente)
+
+
+def _store(storage: ExpedienteStorage, expediente: Expediente) -> None:
+    """Escribe un expediente, con los textos de sus documentos en el almacén de blobs"""
+    externalize_textos(expediente)
+    storage.save(expediente)
+
+
+def _pending_expediente(exp_id: str) -> Optional[Tuple[WriteSession, Expediente]]:
+    """Expediente pendiente de escribir en las sesiones activas (la más interna primero)"""
+    for session in reversed(_write_sessions.get()):
+        expediente = session.pending.get(exp_id)
+        if expediente is not None:
+            return session, expediente
+    return None
+
+
+def load_expediente(exp_id: str, for_update: bool = False) -> Expediente:
     """
-    Carga un expediente desde el almacenamiento JSON.
+    Carga un expediente desde el almacenamiento configurado.
+
+    Las lecturas repetidas se sirven desde la caché en memoria mientras
+    el expediente no cambie en el almacenamiento. Dentro de
+    coalesced_writes() se ven las modificaciones pendientes de escribir.
 
     Args:
         exp_id: ID del expediente a cargar
+        for_update: Si True, retorna una copia privada que se puede
+            modificar y pasar a save_expediente(). Si False, retorna la
+            instancia compartida de la caché, que NO debe modificarse.
 
     Returns:
         Expediente cargado
@@ -31,45 +137,49 @@ def load_expediente(exp_id: str) -> Expediente:
     Raises:
         AuthError: Si el expediente no existe (404)
     """
-    exp_file = DATA_DIR / f"{exp_id}.json"
+    pending = _pending_expediente(exp_id)
+    if pending is not None:
+        session, expediente = pending
+        if not for_update or session is _write_sessions.get()[-1]:
+            return expediente
+        # Pendiente en una sesión exterior: copia, por si esta falla
+        return Expediente.model_validate_json(expediente.model_dump_json())
 
-    if not exp_file.exists():
-        raise AuthError(f"Expediente {exp_id} no encontrado", 404)
-
-    try:
-        with open(exp_file, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            return Expediente(**data)
-    except Exception as e:
-        raise AuthError(f"Error al cargar expediente: {str(e)}", 500)
+    return get_storage().load(exp_id, for_update=for_update)
 
 
 def save_expediente(expediente: Expediente) -> None:
     """
-    Guarda un expediente en el almacenamiento JSON.
+    Guarda un expediente en el almacenamiento configurado.
+
+    Dentro de coalesced_writes() solo se marca como pendiente; la
+    escritura se hace una vez al cerrar la sesión. Los textos markdown
+    en línea se mueven antes al almacén de blobs (ver blobs.py).
 
     Args:
-        expediente: Expediente a guardar
+        expediente: Expediente a guardar (obtenido con for_update=True)
 
     Raises:
-        AuthError: Si hay error al guardar (500)
+        AuthError: Si hay conflicto de versión (409), error al guardar (500)
+            o si se intenta guardar la instancia compartida de la caché
     """
-    exp_file = DATA_DIR / f"{expediente.id}.json"
+    storage = get_storage()
+    if storage.is_shared(expediente):
+        # La instancia compartida se ha modificado: descartarla para que
+        # el resto de lectores no vea el cambio sin persistir
+        storage.cache.invalidate(expediente.id)
+        raise AuthError(
+            f"Error al guardar expediente: {expediente.id} se modificó sin "
+            "load_expediente(..., for_update=True)",
+            500
+        )
 
-    try:
-        # Asegurar que el directorio existe
-        DATA_DIR.mkdir(parents=True, exist_ok=True)
-
-        # Serializar y guardar
-        with open(exp_file, "w", encoding="utf-8") as f:
-            json.dump(
-                expediente.model_dump(mode="json"),
-                f,
-                ensure_ascii=False,
-                indent=2
-            )
-    except Exception as e:
-        raise AuthError(f"Error al guardar expediente: {str(e)}", 500)
+    sessions = _write_sessions.get()
+    if sessions:
+        sessions[-1].pending[expediente.id] = expediente
+        return
+
+    _store(storage, expediente)
 
 
 def list_expedientes() -> List[str]:
@@ -77,69 +187,141 @@ def list_expedientes() -> List[str]:
     Lista todos los IDs de expedientes disponibles.
 
     Returns:
-        Lista de IDs de expedientes
+        Lista de IDs de expedientes (ordenados)
     """
-    if not DATA_DIR.exists():
-        return []
+    return get_storage().list_ids()
 
+
+def expediente_resources(exp_id: str) -> List[types.Resource]:
+    """
+    Resources de un expediente: el expediente, sus documentos y su historial.
+
+    Args:
+        exp_id: ID del expediente
+
+    Returns:
+        Lista de resources MCP del expediente
+    """
     return [
-        f.stem for f in DATA_DIR.glob("*.json")
+        # Resource principal del expediente
+        types.Resource(
+            uri=f"expediente://{exp_id}",
+            name=f"Expediente {exp_id}",
+            description=f"Información del expediente {exp_id} (admite ?fields=, ?exclude= y ?summary=true)",
+            mimeType="application/json"
+        ),
+        # Resource de documentos
+        types.Resource(
+            uri=f"expediente://{exp_id}/documentos",
+            name=f"Documentos de {exp_id}",
+            description=f"Lista de documentos del expediente {exp_id}",
+            mimeType="application/json"
+        ),
+        # Resource de historial
+        types.Resource(
+            uri=f"expediente://{exp_id}/historial",
+            name=f"Historial de {exp_id}",
+            description=f"Historial de acciones del expediente {exp_id}",
+            mimeType="application/json"
+        )
     ]
 
 
 async def list_resources() -> List[types.Resource]:
     """
-    Lista todos los resources disponibles.
+    Lista todos los resources disponibles (sin paginar).
 
-    Esta función lista resources para todos los expedientes disponibles.
-    En un sistema real, esto podría filtrarse por permisos del usuario.
+    Para resources/list usar list_resources_page(), cuyo coste no
+    depende del número de expedientes.
 
     Returns:
         Lista de resources MCP
     """
-    resources = []
+    return [
+        resource
+        for exp_id in list_expedientes()
+        for resource in expediente_resources(exp_id)
+    ]
 
-    # Listar todos los expedientes
-    expedientes = list_expedientes()
 
-    for exp_id in expedientes:
-        # Resource principal del expediente
-        resources.append(
-            types.Resource(
-                uri=f"expediente://{exp_id}",
-                name=f"Expediente {exp_id}",
-                description=f"Información completa del expediente {exp_id}",
-                mimeType="application/json"
-            )
-        )
+def encode_cursor(exp_id: str) -> str:
+    """Cursor opaco de paginación a partir del último expediente de la página"""
+    return base64.urlsafe_b64encode(exp_id.encode("utf-8")).decode("ascii")
 
-        # Resource de documentos
-        resources.append(
-            types.Resource(
-                uri=f"expediente://{exp_id}/documentos",
-                name=f"Documentos de {exp_id}",
-                description=f"Lista de documentos del expediente {exp_id}",
-                mimeType="application/json"
-            )
-        )
 
-        # Resource de historial
-        resources.append(
-            types.Resource(
-                uri=f"expediente://{exp_id}/historial",
-                name=f"Historial de {exp_id}",
-                description=f"Historial de acciones del expediente {exp_id}",
-                mimeType="application/json"
-            )
+def decode_cursor(cursor: str) -> str:
+    """
+    Último expediente de la página anterior a partir del cursor.
+
+    Raises:
+        AuthError: Si el cursor no es válido (400)
+    """
+    try:
+        exp_id = base64.b64decode(cursor.encode("ascii"), altchars=b"-_", validate=True).decode("utf-8")
+    except (ValueError, binascii.Error, UnicodeError):
+        exp_id = ""
+    if not exp_id:
+        raise AuthError(f"Cursor no válido: {cursor}", 400)
+    return exp_id
+
+
+async def list_resources_page(
+    cursor: Optional[str] = None,
+    prefix: str = "",
+    exp_id: Optional[str] = None,
+    page_size: int = RESOURCES_PAGE_SIZE
+) -> types.ListResourcesResult:
+    """
+    Lista una página de resources (paginación por cursor del protocolo MCP).
+
+    Los IDs se leen del almacenamiento bajo demanda y en orden, a partir
+    del cursor: el coste de cada página no depende del número total de
+    expedientes.
+
+    Args:
+        cursor: Cursor `nextCursor` de la página anterior (None: primera página)
+        prefix: Solo expedientes cuyo ID empieza por este prefijo
+        exp_id: Expediente autorizado por el token. Si se indica, solo se
+            lista ese expediente sin recorrer el almacenamiento.
+        page_size: Expedientes por página
+
+    Returns:
+        Resultado con los resources de la página y `nextCursor` si hay más
+
+    Raises:
+        AuthError: Si el cursor no es válido (400)
+    """
+    storage = get_storage()
+
+    if exp_id is not None:
+        # El token solo autoriza un expediente: una única página con él
+        listed = (
+            [exp_id]
+            if cursor is None and exp_id.startswith(prefix) and storage.exists(exp_id)
+            else []
         )
+        next_cursor = None
+    else:
+        after = decode_cursor(cursor) if cursor else None
+        listed = list(islice(storage.iter_ids(after=after, prefix=prefix), page_size + 1))
+        next_cursor = encode_cursor(listed[page_size - 1]) if len(listed) > page_size else None
+        listed = listed[:page_size]
 
-    return resources
+    return types.ListResourcesResult(
+        resources=[resource for listed_id in listed for resource in expediente_resources(listed_id)],
+        nextCursor=next_cursor
+    )
 
 
 async def get_resource(uri: str) -> str:
     """
     Obtiene el contenido de un resource específico.
 
+    El resource del expediente completo admite proyección en la query:
+    `expediente://{id}?fields=estado,datos`, `?exclude=historial` o
+    `?summary=true` (ver projection.project_expediente). Sin query se
+    omite el texto de los documentos.
+
     Args:
         uri: URI del resource a obtener
 
@@ -154,6 +336,8 @@ async def get_resource(uri: str) -> str:
 
     # Parsear la URI
     path = uri.replace("expediente://", "")
+    path, _, query = path.partition("?")
+    params = parse_qs(query, keep_blank_values=True)
     parts = path.split("/")
 
     if len(parts) == 0:
@@ -168,7 +352,12 @@ async def get_resource(uri: str) -> str:
     if len(parts) == 1:
         # expediente://{id} - Expediente completo
         return json.dumps(
-            expediente.model_dump(mode="json"),
+            project_expediente(
+                expediente,
+                fields=params["fields"][-1] if "fields" in params else None,
+                exclude=params["exclude"][-1] if "exclude" in params else None,
+                summary=params.get("summary", ["false"])[-1].lower() in ("1", "true")
+            ),
             ensure_ascii=False,
             indent=2
         )
@@ -179,7 +368,7 @@ async def get_resource(uri: str) -> str:
         if sub_resource == "documentos":
             # expediente://{id}/documentos - Lista de documentos
             return json.dumps(
-                [doc.model_dump(mode="json") for doc in expediente.documentos],
+                [documento_json(doc) for doc in expediente.documentos],
                 ensure_ascii=False,
                 indent=2
             )
@@ -209,7 +398,7 @@ async def get_resource(uri: str) -> str:
             raise AuthError(f"Documento {doc_id} no encontrado", 404)
 
         return json.dumps(
-            documento.model_dump(mode="json"),
+            documento_json(documento),
             ensure_ascii=False,
             indent=2
         )
@@ -8,13 +8,16 @@ independiente de cómo se comunique el servidor.
 
 import os
 import logging
-from typing import Optional
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Iterator, Optional
 from mcp.server import Server
+from mcp.server.lowlevel.server import request_ctx
 from mcp import types
 
 # Importar handlers
 from .auth import validate_jwt, AuthError
-from .resources import list_resources, get_resource
+from .resources import list_resources_page, get_resource
 from .tools import list_tools, call_tool
 
 # Configurar logging
@@ -25,24 +28,81 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+# Token JWT de la petición en curso. Cada request HTTP (y cada tarea que
+# lance) ve su propio valor, así que peticiones concurrentes de distintas
+# ejecuciones no se pisan el token.
+_request_token: ContextVar[Optional[str]] = ContextVar("mcp_request_token", default=None)
+
+
 class MCPContext:
     """
-    Contexto compartido para el servidor MCP.
-    Almacena información sobre la petición actual, incluyendo el token JWT.
+    Contexto del servidor MCP.
+
+    Guarda la configuración compartida (server_id) y da acceso al token JWT
+    de la petición actual, que vive en una ContextVar (un valor por request)
+    y no en el objeto, que es único para todo el proceso.
     """
     def __init__(self):
-        self.token: Optional[str] = None
         self.server_id: str = "agentix-mcp-expedientes"
 
-    def set_token(self, token: str):
-        """Establece el token JWT para la petición actual"""
-        self.token = token
+    @property
+    def token(self) -> Optional[str]:
+        """Token de la petición actual (solo lectura, ver set_token)"""
+        return _request_token.get()
+
+    def set_token(self, token: Optional[str]) -> Token:
+        """
+        Establece el token JWT para la petición (contexto) actual.
+
+        Returns:
+            Token de la ContextVar para restaurar el valor anterior con reset_token()
+        """
+        return _request_token.set(token)
+
+    def reset_token(self, previous: Token) -> None:
+        """Restaura el token que había antes de set_token()"""
+        _request_token.reset(previous)
+
+    @contextmanager
+    def request_scope(self, token: Optional[str]) -> Iterator[None]:
+        """Usa `token` como token de la petición dentro del bloque"""
+        previous = self.set_token(token)
+        try:
+            yield
+        finally:
+            self.reset_token(previous)
 
     def get_token(self) -> Optional[str]:
-        """Obtiene el token JWT de la petición actual"""
-        # Prioridad: contexto > variable de entorno
-        if self.token:
-            return self.token
+        """
+        Obtiene el token JWT de la petición actual.
+
+        Prioridad:
+        1. Token de la petición (set_token)
+        2. `_meta.token` del mensaje MCP (procesos stdio compartidos por
+           varias ejecuciones, cada una con su token)
+        3. Header Authorization del mensaje MCP en transportes HTTP
+        4. Variable de entorno MCP_JWT_TOKEN
+        """
+        token = _request_token.get()
+        if token:
+            return token
+
+        try:
+            request_context = request_ctx.get()
+        except LookupError:
+            request_context = None
+
+        if request_context is not None:
+            meta_token = getattr(request_context.meta, "token", None)
+            if isinstance(meta_token, str) and meta_token:
+                return meta_token
+
+            headers = getattr(request_context.request, "headers", None)
+            if headers is not None:
+                auth_header = headers.get("authorization", "")
+                if auth_header.startswith("Bearer "):
+                    return auth_header[7:]
+
         return os.environ.get("MCP_JWT_TOKEN")
 
 
@@ -65,22 +125,28 @@ def create_server(name: str = "gex-expedientes-mock") -> tuple[Server, MCPContex
     logger.info(f"Creando servidor MCP: {name}")
 
     @app.list_resources()
-    async def handle_list_resources() -> list[types.Resource]:
+    async def handle_list_resources(
+        request: types.ListResourcesRequest
+    ) -> types.ListResourcesResult:
         """
-        Handler para listar resources disponibles.
+        Handler para listar resources disponibles (paginado con nextCursor).
 
-        Valida el token JWT antes de listar los resources.
+        Valida el token JWT antes de listar los resources. Solo se lista
+        el expediente autorizado por el token.
         """
         logger.info("Petición: list_resources")
 
         try:
             token = context.get_token()
-            await validate_jwt(token, server_id=context.server_id)
+            claims = await validate_jwt(token, server_id=context.server_id)
 
-            resources = await list_resources()
-            logger.info(f"Resources listados: {len(resources)}")
+            result = await list_resources_page(
+                cursor=request.params.cursor if request.params else None,
+                exp_id=claims.exp_id
+            )
+            logger.info(f"Resources listados: {len(result.resources)}")
 
-            return resources
+            return result
 
         except AuthError as e:
             logger.error(f"Error de autenticación en list_resources: {e.message}")
@@ -90,12 +156,13 @@ def create_server(name: str = "gex-expedientes-mock") -> tuple[Server, MCPContex
             raise
 
     @app.read_resource()
-    async def handle_read_resource(uri: str) -> str:
+    async def handle_read_resource(uri) -> str:
         """
         Handler para leer un resource específico.
 
         Valida el token JWT y verifica permisos antes de leer.
         """
+        uri = str(uri)  # El SDK MCP la entrega como AnyUrl
         logger.info(f"Petición: read_resource - URI: {uri}")
 
         try:
@@ -143,7 +210,10 @@ def create_server(name: str = "gex-expedientes-mock") -> tuple[Server, MCPContex
             logger.error(f"Error inesperado en list_tools: {str(e)}")
             raise
 
-    @app.call_tool()
+    # Sin validate_input del SDK: jsonschema.validate revalida el schema
+    # completo en cada llamada (~2.7 ms por tool call en /mcp). call_tool
+    # valida los argumentos con validadores ya compilados (error 400)
+    @app.call_tool(validate_input=False)
     async def handle_call_tool(
         name: str,
         arguments: dict
@@ -209,6 +279,7 @@ def get_server_info() -> dict:
         },
         "transport": {
             "stdio": True,
-            "http_sse": True
+            "http_sse": True,
+            "streamable_http": True
         }
     }
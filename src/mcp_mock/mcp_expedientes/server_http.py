@@ -63,17 +63,23 @@ Testing manual con curl:
 import os
 import logging
 import json
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
 from starlette.applications import Starlette
 from starlette.routing import Route
 from starlette.requests import Request
-from starlette.responses import JSONResponse, Response
+from starlette.responses import JSONResponse, Response, StreamingResponse
 from starlette.exceptions import HTTPException
 from starlette.middleware.cors import CORSMiddleware
 from mcp.server.sse import SseServerTransport
+from mcp.server.streamable_http_manager import StreamableHTTPSessionManager
+from starlette.types import Receive, Scope, Send
 from .server import create_server, get_server_info
 from .auth import validate_jwt, AuthError
-from .tools import list_tools, call_tool
-from .resources import list_resources, get_resource
+from .models import JWTClaims
+from .tools import TEXTO_CHUNK_MAX, call_tool, find_documento_con_texto, list_tools
+from .resources import coalesced_writes, list_resources_page, get_resource
 
 # Configurar logging
 logging.basicConfig(
@@ -92,6 +98,47 @@ logger.info("=" * 60)
 logger.info(f"Servidor: {info['name']} v{info['version']}")
 logger.info(f"Protocolo MCP: {info['protocol_version']}")
 
+# Header con el tiempo (ms) que el cliente sigue esperando la respuesta.
+# El back office envía el plazo restante de la ejecución del agente: el
+# trabajo que llega o espera más allá de ese plazo se descarta (504)
+DEADLINE_HEADER = "X-Request-Timeout-Ms"
+
+
+def request_deadline(request: Request) -> Optional[float]:
+    """
+    Instante (time.monotonic) a partir del cual el cliente ya no espera.
+
+    Args:
+        request: Petición HTTP
+
+    Returns:
+        None si la request no trae el header de plazo (o no es numérico)
+    """
+    value = request.headers.get(DEADLINE_HEADER)
+    if value is None:
+        return None
+    try:
+        return time.monotonic() + float(value) / 1000
+    except ValueError:
+        return None
+
+
+def deadline_expired(deadline: Optional[float]) -> bool:
+    """True si el plazo de la request ya pasó."""
+    return deadline is not None and time.monotonic() >= deadline
+
+
+def deadline_response(body: Any) -> Tuple[int, Dict[str, Any]]:
+    """Respuesta JSON-RPC (504) para una request cuyo plazo ya pasó."""
+    return 504, {
+        "jsonrpc": "2.0",
+        "id": body.get("id") if isinstance(body, dict) else None,
+        "error": {
+            "code": -32000,
+            "message": "Plazo de la request agotado: el cliente ya no espera la respuesta"
+        }
+    }
+
 
 async def handle_sse(request: Request) -> Response:
     """
@@ -151,7 +198,9 @@ async def handle_sse(request: Request) -> Response:
             }
         )
 
-    # 3. Almacenar token en contexto (solo si es válido)
+    # 3. Almacenar token en el contexto de esta conexión (solo si es válido).
+    # Es una ContextVar: los handlers que lanza app_core.run la heredan y
+    # otras conexiones SSE concurrentes no la ven
     context.set_token(token)
 
     # 4. Procesar request MCP (solo si token es válido)
@@ -171,91 +220,28 @@ async def handle_sse(request: Request) -> Response:
     return Response()
 
 
-async def handle_rpc(request: Request) -> JSONResponse:
+async def execute_rpc(body: Any, token: str, claims: JWTClaims) -> Tuple[int, Dict[str, Any]]:
     """
-    Endpoint HTTP simple para JSON-RPC (sin SSE).
-
-    Este endpoint permite comunicación request-response directa,
-    sin necesidad de establecer una conexión SSE.
-
-    Métodos soportados:
-    - tools/list: Lista las tools disponibles
-    - tools/call: Ejecuta una tool
-    - resources/list: Lista los resources disponibles
-    - resources/read: Lee un resource
+    Ejecuta una request JSON-RPC ya autenticada.
 
     Args:
-        request: Petición HTTP con body JSON-RPC
+        body: Request JSON-RPC parseada
+        token: Token JWT (ya validado) para los permisos por tool/resource
+        claims: Claims del token validado
 
     Returns:
-        Respuesta JSON-RPC
+        Tupla (status HTTP, respuesta JSON-RPC)
     """
-    # 1. Extraer y validar token JWT
-    auth_header = request.headers.get("Authorization", "")
-
-    if not auth_header.startswith("Bearer "):
-        logger.warning("Request /rpc sin token JWT")
-        return JSONResponse(
-            status_code=401,
-            content={
-                "jsonrpc": "2.0",
-                "id": None,
-                "error": {
-                    "code": -32001,
-                    "message": "Se requiere token JWT en header Authorization: Bearer <token>"
-                }
-            }
-        )
-
-    token = auth_header[7:]
-
-    try:
-        await validate_jwt(token, server_id=context.server_id)
-        logger.info(f"✅ Token JWT válido en /rpc (primeros 20 chars): {token[:20]}...")
-    except AuthError as e:
-        logger.warning(f"❌ Token JWT inválido en /rpc: {e.message}")
-        return JSONResponse(
-            status_code=e.status_code,
-            content={
-                "jsonrpc": "2.0",
-                "id": None,
-                "error": {
-                    "code": -32001,
-                    "message": e.message
-                }
-            }
-        )
-
-    # 2. Parsear body JSON-RPC
-    try:
-        body = await request.json()
-    except Exception as e:
-        logger.error(f"Error parseando JSON: {e}")
-        return JSONResponse(
-            status_code=400,
-            content={
-                "jsonrpc": "2.0",
-                "id": None,
-                "error": {
-                    "code": -32700,
-                    "message": "Parse error: JSON inválido"
-                }
-            }
-        )
-
     # Validar estructura JSON-RPC
     if not isinstance(body, dict):
-        return JSONResponse(
-            status_code=400,
-            content={
-                "jsonrpc": "2.0",
-                "id": None,
-                "error": {
-                    "code": -32600,
-                    "message": "Invalid Request: se esperaba objeto JSON"
-                }
+        return 400, {
+            "jsonrpc": "2.0",
+            "id": None,
+            "error": {
+                "code": -32600,
+                "message": "Invalid Request: se esperaba objeto JSON"
             }
-        )
+        }
 
     request_id = body.get("id")
     method = body.get("method")
@@ -263,10 +249,7 @@ async def handle_rpc(request: Request) -> JSONResponse:
 
     logger.info(f"📥 RPC Request: method={method}, id={request_id}")
 
-    # 3. Almacenar token en contexto para las operaciones
-    context.set_token(token)
-
-    # 4. Ejecutar método
+    # Ejecutar método
     try:
         if method == "tools/list":
             tools = await list_tools()
@@ -286,17 +269,14 @@ async def handle_rpc(request: Request) -> JSONResponse:
             tool_args = params.get("arguments", {})
 
             if not tool_name:
-                return JSONResponse(
-                    status_code=400,
-                    content={
-                        "jsonrpc": "2.0",
-                        "id": request_id,
-                        "error": {
-                            "code": -32602,
-                            "message": "Invalid params: falta 'name' de la tool"
-                        }
+                return 400, {
+                    "jsonrpc": "2.0",
+                    "id": request_id,
+                    "error": {
+                        "code": -32602,
+                        "message": "Invalid params: falta 'name' de la tool"
                     }
-                )
+                }
 
             # Validar permisos para la tool específica
             await validate_jwt(
@@ -315,7 +295,12 @@ async def handle_rpc(request: Request) -> JSONResponse:
             }
 
         elif method == "resources/list":
-            resources = await list_resources()
+            # Paginado con nextCursor; solo el expediente del token
+            page = await list_resources_page(
+                cursor=params.get("cursor"),
+                prefix=params.get("prefix", ""),
+                exp_id=claims.exp_id
+            )
             result = {
                 "resources": [
                     {
@@ -324,25 +309,24 @@ async def handle_rpc(request: Request) -> JSONResponse:
                         "description": r.description,
                         "mimeType": r.mimeType
                     }
-                    for r in resources
+                    for r in page.resources
                 ]
             }
+            if page.nextCursor:
+                result["nextCursor"] = page.nextCursor
 
         elif method == "resources/read":
             uri = params.get("uri")
 
             if not uri:
-                return JSONResponse(
-                    status_code=400,
-                    content={
-                        "jsonrpc": "2.0",
-                        "id": request_id,
-                        "error": {
-                            "code": -32602,
-                            "message": "Invalid params: falta 'uri' del resource"
-                        }
+                return 400, {
+                    "jsonrpc": "2.0",
+                    "id": request_id,
+                    "error": {
+                        "code": -32602,
+                        "message": "Invalid params: falta 'uri' del resource"
                     }
-                )
+                }
 
             # Validar permisos para el resource
             await validate_jwt(
@@ -364,33 +348,100 @@ async def handle_rpc(request: Request) -> JSONResponse:
 
         else:
             logger.warning(f"Método no soportado: {method}")
-            return JSONResponse(
-                status_code=400,
-                content={
-                    "jsonrpc": "2.0",
-                    "id": request_id,
-                    "error": {
-                        "code": -32601,
-                        "message": f"Method not found: {method}"
-                    }
+            return 400, {
+                "jsonrpc": "2.0",
+                "id": request_id,
+                "error": {
+                    "code": -32601,
+                    "message": f"Method not found: {method}"
                 }
-            )
+            }
 
         logger.info(f"📤 RPC Response: method={method}, success=true")
 
-        return JSONResponse({
+        return 200, {
             "jsonrpc": "2.0",
             "id": request_id,
             "result": result
-        })
+        }
 
     except AuthError as e:
         logger.warning(f"❌ Error de autorización en {method}: {e.message}")
+        return e.status_code, {
+            "jsonrpc": "2.0",
+            "id": request_id,
+            "error": {
+                "code": -32001,
+                "message": e.message
+            }
+        }
+
+    except Exception as e:
+        logger.error(f"❌ Error interno en {method}: {str(e)}")
+        return 500, {
+            "jsonrpc": "2.0",
+            "id": request_id,
+            "error": {
+                "code": -32603,
+                "message": f"Internal error: {str(e)}"
+            }
+        }
+
+
+async def handle_rpc(request: Request) -> JSONResponse:
+    """
+    Endpoint HTTP simple para JSON-RPC (sin SSE).
+
+    Este endpoint permite comunicación request-response directa,
+    sin necesidad de establecer una conexión SSE.
+
+    Métodos soportados:
+    - tools/list: Lista las tools disponibles
+    - tools/call: Ejecuta una tool
+    - resources/list: Lista los resources disponibles (params opcionales
+      `cursor` y `prefix`; responde `nextCursor` si hay más páginas)
+    - resources/read: Lee un resource
+
+    Acepta también un batch (array de requests): se responde con un
+    array y cada expediente modificado se escribe una sola vez.
+
+    Args:
+        request: Petición HTTP con body JSON-RPC
+
+    Returns:
+        Respuesta JSON-RPC (o array de respuestas)
+    """
+    deadline = request_deadline(request)
+
+    # 1. Extraer y validar token JWT
+    auth_header = request.headers.get("Authorization", "")
+
+    if not auth_header.startswith("Bearer "):
+        logger.warning("Request /rpc sin token JWT")
+        return JSONResponse(
+            status_code=401,
+            content={
+                "jsonrpc": "2.0",
+                "id": None,
+                "error": {
+                    "code": -32001,
+                    "message": "Se requiere token JWT en header Authorization: Bearer <token>"
+                }
+            }
+        )
+
+    token = auth_header[7:]
+
+    try:
+        claims = await validate_jwt(token, server_id=context.server_id)
+        logger.info(f"✅ Token JWT válido en /rpc (primeros 20 chars): {token[:20]}...")
+    except AuthError as e:
+        logger.warning(f"❌ Token JWT inválido en /rpc: {e.message}")
         return JSONResponse(
             status_code=e.status_code,
             content={
                 "jsonrpc": "2.0",
-                "id": request_id,
+                "id": None,
                 "error": {
                     "code": -32001,
                     "message": e.message
@@ -398,20 +449,200 @@ async def handle_rpc(request: Request) -> JSONResponse:
             }
         )
 
+    # 2. Parsear body JSON-RPC
+    try:
+        body = await request.json()
     except Exception as e:
-        logger.error(f"❌ Error interno en {method}: {str(e)}")
+        logger.error(f"Error parseando JSON: {e}")
         return JSONResponse(
-            status_code=500,
+            status_code=400,
             content={
                 "jsonrpc": "2.0",
-                "id": request_id,
+                "id": None,
                 "error": {
-                    "code": -32603,
-                    "message": f"Internal error: {str(e)}"
+                    "code": -32700,
+                    "message": "Parse error: JSON inválido"
                 }
             }
         )
 
+    # 3. El token viaja explícito a execute_rpc (no se guarda en el
+    # contexto compartido: hay requests concurrentes de otras ejecuciones)
+
+    # 4. Batch JSON-RPC: las escrituras de todas las requests se agrupan
+    # en una por expediente al final del batch
+    if isinstance(body, list):
+        if not body:
+            return JSONResponse(
+                status_code=400,
+                content={
+                    "jsonrpc": "2.0",
+                    "id": None,
+                    "error": {
+                        "code": -32600,
+                        "message": "Invalid Request: batch vacío"
+                    }
+                }
+            )
+
+        logger.info(f"📥 RPC Batch: {len(body)} requests")
+        try:
+            with coalesced_writes():
+                responses = [
+                    deadline_response(item)[1] if deadline_expired(deadline)
+                    else (await execute_rpc(item, token, claims))[1]
+                    for item in body
+                ]
+        except AuthError as e:
+            logger.error(f"❌ Error al guardar el batch: {e.message}")
+            return JSONResponse(
+                status_code=e.status_code,
+                content={
+                    "jsonrpc": "2.0",
+                    "id": None,
+                    "error": {
+                        "code": -32603,
+                        "message": e.message
+                    }
+                }
+            )
+
+        return JSONResponse(responses)
+
+    # 5. Trabajo que el cliente ya no espera: no se ejecuta
+    if deadline_expired(deadline):
+        logger.warning(f"⏱️ Request /rpc descartada: plazo agotado ({DEADLINE_HEADER})")
+        status_code, content = deadline_response(body)
+    else:
+        status_code, content = await execute_rpc(body, token, claims)
+    return JSONResponse(status_code=status_code, content=content)
+
+
+async def handle_texto_stream(request: Request) -> Response:
+    """
+    Texto de un documento como stream SSE, por fragmentos.
+
+    Variante de obtener_texto_documento para documentos muy grandes: el
+    texto se envía en eventos `chunk` ({"offset", "texto_markdown"}) de
+    hasta `chunk_size` caracteres, seguidos de un evento `end`
+    ({"total_length"}). Nunca se construye un JSON con el texto completo.
+
+    GET /documentos/{expediente_id}/{documento_id}/texto?offset=0&chunk_size=16384
+
+    Args:
+        request: Petición HTTP (token JWT en header Authorization)
+
+    Returns:
+        Respuesta text/event-stream o error JSON (401/403/404/422/400)
+    """
+    expediente_id = request.path_params["expediente_id"]
+    documento_id = request.path_params["documento_id"]
+    auth_header = request.headers.get("Authorization", "")
+
+    try:
+        if not auth_header.startswith("Bearer "):
+            raise AuthError("Se requiere token JWT en header Authorization: Bearer <token>", 401)
+
+        await validate_jwt(
+            auth_header[7:],
+            tool_name="obtener_texto_documento",
+            tool_args={"expediente_id": expediente_id},
+            server_id=context.server_id
+        )
+
+        try:
+            offset = int(request.query_params.get("offset", "0"))
+            chunk_size = int(request.query_params.get("chunk_size", str(TEXTO_CHUNK_MAX)))
+        except ValueError:
+            raise AuthError("offset y chunk_size deben ser enteros", 400)
+        if chunk_size <= 0:
+            raise AuthError(f"chunk_size debe ser positivo: {chunk_size}", 400)
+        chunk_size = min(chunk_size, TEXTO_CHUNK_MAX)
+
+        _, texto = find_documento_con_texto(expediente_id, documento_id)
+        if offset < 0 or offset > len(texto):
+            raise AuthError(f"offset fuera de rango: {offset} (longitud total {len(texto)})", 400)
+
+    except AuthError as e:
+        logger.warning(f"❌ Stream de texto rechazado: {e.message}")
+        return JSONResponse(
+            status_code=e.status_code,
+            content={"error": "TEXT_STREAM_ERROR", "message": e.message}
+        )
+
+    async def events() -> AsyncIterator[str]:
+        for start in range(offset, len(texto), chunk_size):
+            chunk = {"offset": start, "texto_markdown": texto[start:start + chunk_size]}
+            yield f"event: chunk\ndata: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+        yield f"event: end\ndata: {json.dumps({'total_length': len(texto)})}\n\n"
+
+    logger.info(f"📤 Stream de texto: {expediente_id}/{documento_id} ({len(texto)} caracteres)")
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+# Sesiones MCP streamable HTTP (se crea en cada arranque de la app, ver lifespan)
+session_manager: Optional[StreamableHTTPSessionManager] = None
+
+
+class StreamableHTTPEndpoint:
+    """
+    Endpoint MCP streamable HTTP (/mcp) con sesiones persistentes.
+
+    El cliente hace el handshake (initialize) una vez y reutiliza la sesión
+    (header mcp-session-id) para todas sus llamadas, que se multiplexan
+    sobre ella. El token JWT se valida en cada request HTTP, como en /rpc
+    (con la caché de tokens verificados es una búsqueda en memoria); los
+    handlers lo leen del header de la request que trae cada mensaje MCP.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        request = Request(scope, receive)
+        deadline = request_deadline(request)
+        auth_header = request.headers.get("Authorization", "")
+
+        if not auth_header.startswith("Bearer "):
+            logger.warning("Request /mcp sin token JWT")
+            response = JSONResponse(
+                status_code=401,
+                content={
+                    "error": "AUTH_INVALID_TOKEN",
+                    "message": "Se requiere token JWT en header Authorization: Bearer <token>"
+                }
+            )
+            await response(scope, receive, send)
+            return
+
+        try:
+            await validate_jwt(auth_header[7:], server_id=context.server_id)
+        except AuthError as e:
+            logger.warning(f"❌ Token JWT inválido en /mcp: {e.message}")
+            response = JSONResponse(
+                status_code=e.status_code,
+                content={
+                    "error": "AUTH_INVALID_TOKEN" if e.status_code == 401 else "AUTH_PERMISSION_DENIED",
+                    "message": e.message
+                }
+            )
+            await response(scope, receive, send)
+            return
+
+        if request.method == "POST" and deadline_expired(deadline):
+            logger.warning(f"⏱️ Request /mcp descartada: plazo agotado ({DEADLINE_HEADER})")
+            status_code, content = deadline_response(None)
+            response = JSONResponse(status_code=status_code, content=content)
+            await response(scope, receive, send)
+            return
+
+        if session_manager is None:
+            response = JSONResponse(
+                status_code=503,
+                content={"error": "MCP_SERVER_UNAVAILABLE", "message": "Sesiones MCP no iniciadas"}
+            )
+            await response(scope, receive, send)
+            return
+
+        await session_manager.handle_request(scope, receive, send)
+
 
 async def health_check(request: Request) -> JSONResponse:
     """
@@ -458,12 +689,46 @@ async def http_exception_handler(request: Request, exc: HTTPException) -> JSONRe
     )
 
 
+@asynccontextmanager
+async def lifespan(app: Starlette) -> AsyncIterator[None]:
+    """Arranque y parada del servidor (incluye el gestor de sesiones MCP)"""
+    global session_manager
+
+    logger.info("Servidor HTTP/SSE iniciado")
+    logger.info("Endpoints disponibles:")
+    logger.info("  GET  /health  - Health check")
+    logger.info("  GET  /info    - Información del servidor")
+    logger.info("  POST /sse     - Endpoint MCP SSE (requiere token JWT)")
+    logger.info("  POST /rpc     - Endpoint MCP HTTP simple (requiere token JWT)")
+    logger.info("  POST /mcp     - Endpoint MCP streamable HTTP con sesiones (requiere token JWT)")
+    logger.info("  GET  /documentos/{exp}/{doc}/texto - Texto de documento por SSE (requiere token JWT)")
+    logger.info(f"CORS habilitado para: {cors_origins}")
+
+    # StreamableHTTPSessionManager.run() solo puede llamarse una vez por
+    # instancia: se crea uno nuevo en cada arranque. Las respuestas a los
+    # POST van en JSON (sin abrir un stream SSE por llamada)
+    session_manager = StreamableHTTPSessionManager(app=app_core, json_response=True)
+    try:
+        async with session_manager.run():
+            yield
+    finally:
+        session_manager = None
+        logger.info("Servidor HTTP/SSE detenido")
+
+
 # Crear aplicación Starlette
 app = Starlette(
     debug=True,
+    lifespan=lifespan,
     routes=[
         Route("/sse", endpoint=handle_sse, methods=["GET", "POST"]),
+        Route("/mcp", endpoint=StreamableHTTPEndpoint(), methods=["GET", "POST", "DELETE"]),
         Route("/rpc", endpoint=handle_rpc, methods=["POST"]),
+        Route(
+            "/documentos/{expediente_id}/{documento_id}/texto",
+            endpoint=handle_texto_stream,
+            methods=["GET"]
+        ),
         Route("/health", endpoint=health_check, methods=["GET"]),
         Route("/info", endpoint=server_info_endpoint, methods=["GET"])
     ],
@@ -483,28 +748,11 @@ app.add_middleware(
     CORSMiddleware,
     allow_origins=cors_origins,
     allow_credentials=True,
-    allow_methods=["GET", "POST", "OPTIONS"],
-    allow_headers=["Authorization", "Content-Type"],
+    allow_methods=["GET", "POST", "DELETE", "OPTIONS"],
+    allow_headers=["Authorization", "Content-Type", "mcp-session-id", "mcp-protocol-version", DEADLINE_HEADER],
+    expose_headers=["mcp-session-id"],
 )
 
 
-@app.on_event("startup")
-async def startup():
-    """Handler de inicio del servidor"""
-    logger.info("Servidor HTTP/SSE iniciado")
-    logger.info("Endpoints disponibles:")
-    logger.info("  GET  /health  - Health check")
-    logger.info("  GET  /info    - Información del servidor")
-    logger.info("  POST /sse     - Endpoint MCP SSE (requiere token JWT)")
-    logger.info("  POST /rpc     - Endpoint MCP HTTP simple (requiere token JWT)")
-    logger.info(f"CORS habilitado para: {cors_origins}")
-
-
-@app.on_event("shutdown")
-async def shutdown():
-    """Handler de cierre del servidor"""
-    logger.info("Servidor HTTP/SSE detenido")
-
-
 # Punto de entrada para uvicorn
 # uvicorn server_http:app --reload --host 0.0.0.0 --port 8000
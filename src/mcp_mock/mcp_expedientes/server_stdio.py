@@ -10,6 +10,10 @@ Uso:
     export JWT_SECRET="test-secret-key"
     python server_stdio.py
 
+Un mismo proceso puede atender a varias ejecuciones (pool de procesos
+del back office, `type: stdio` en mcp_servers.yaml): cada request lleva
+su token en `params._meta.token`, que tiene prioridad sobre MCP_JWT_TOKEN.
+
 Configuración para Claude Desktop:
     {
       "mcpServers": {
@@ -48,7 +52,8 @@ async def main():
     Ejecuta el servidor MCP con transporte stdio.
 
     Lee peticiones JSON-RPC desde stdin y escribe respuestas a stdout.
-    El token JWT se obtiene de la variable de entorno MCP_JWT_TOKEN.
+    El token JWT se obtiene de `_meta.token` de cada request o, si no
+    viene, de la variable de entorno MCP_JWT_TOKEN.
     """
     logger.info("=" * 60)
     logger.info("MCP Mock de Expedientes - Transporte stdio")
@@ -0,0 +1,845 @@
+"""
+Almacenamiento de expedientes del MCP mock.
+
+Define la interfaz ExpedienteStorage y dos implementaciones:
+- JsonFileStorage: un archivo JSON por expediente en DATA_DIR (por defecto)
+- SqliteStorage: una base de datos SQLite con documentos, historial y
+  textos en tablas propias (pruebas de carga con muchos expedientes)
+
+El backend se elige con MCP_EXPEDIENTES_STORAGE ("json" o "sqlite").
+
+Importar los JSON de DATA_DIR a SQLite:
+    python -m mcp_mock.mcp_expedientes.storage --db expedientes.db
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import tempfile
+from abc import ABC, abstractmethod
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from threading import Lock, local
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
+from .models import Expediente
+from .auth import AuthError
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin bloqueo de archivos entre procesos
+    fcntl = None
+
+
+# Directorio de datos
+DATA_DIR = Path(__file__).parent / "data" / "expedientes"
+
+# Backend de almacenamiento: "json" (un archivo por expediente) o "sqlite"
+STORAGE_BACKEND = os.environ.get("MCP_EXPEDIENTES_STORAGE", "json").lower()
+
+# Base de datos del backend SQLite
+SQLITE_PATH = Path(os.environ.get("MCP_EXPEDIENTES_DB", str(DATA_DIR.parent / "expedientes.db")))
+
+# Máximo de expedientes parseados en memoria (0 deshabilita la caché)
+EXPEDIENTE_CACHE_SIZE = int(os.environ.get("MCP_EXPEDIENTE_CACHE_SIZE", "128"))
+
+# Guardar los JSON sin indentación (menos bytes escritos por mutación)
+COMPACT_JSON = os.environ.get("MCP_EXPEDIENTES_COMPACT_JSON", "false").lower() in ("1", "true", "yes")
+
+
+@dataclass
+class CachedExpediente:
+    """Expediente parseado junto con la revisión del almacenamiento de la que procede"""
+    revision: Tuple[Any, ...]
+    expediente: Expediente
+    raw: Optional[bytes] = None  # JSON del expediente (se genera al pedir una copia)
+
+    def copy(self) -> Expediente:
+        """Copia privada para modificar (re-parsear el JSON es más barato que deepcopy)"""
+        if self.raw is None:
+            self.raw = self.expediente.model_dump_json().encode("utf-8")
+        return Expediente.model_validate_json(self.raw)
+
+
+class ExpedienteCache:
+    """
+    Caché LRU de expedientes parseados.
+
+    Cada entrada se valida contra la revisión actual en el almacenamiento
+    (mtime y tamaño del archivo JSON, versión en SQLite), de modo que una
+    modificación externa (p.ej. restaurar un backup) se detecta en la
+    siguiente lectura.
+
+    El Expediente cacheado es compartido y de solo lectura; quien vaya a
+    modificarlo debe pedir una copia (load_expediente(..., for_update=True)).
+    """
+
+    def __init__(self, max_entries: int = 128):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, CachedExpediente]" = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, exp_id: str, revision: Tuple[Any, ...]) -> Optional[CachedExpediente]:
+        """Entrada vigente para la revisión actual (o None)"""
+        with self._lock:
+            entry = self._entries.get(exp_id)
+            if entry is None or entry.revision != revision:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(exp_id)
+            self.hits += 1
+            return entry
+
+    def put(
+        self,
+        exp_id: str,
+        revision: Tuple[Any, ...],
+        expediente: Expediente,
+        raw: Optional[bytes] = None
+    ) -> CachedExpediente:
+        """Guarda un expediente parseado, descartando el menos usado si está llena"""
+        entry = CachedExpediente(revision=revision, expediente=expediente, raw=raw)
+        if self.max_entries <= 0:
+            return entry
+        with self._lock:
+            self._entries[exp_id] = entry
+            self._entries.move_to_end(exp_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def is_shared(self, expediente: Expediente) -> bool:
+        """Indica si `expediente` es la instancia compartida de la caché"""
+        with self._lock:
+            entry = self._entries.get(expediente.id)
+            return entry is not None and entry.expediente is expediente
+
+    def invalidate(self, exp_id: str) -> None:
+        """Descarta la entrada de un expediente"""
+        with self._lock:
+            self._entries.pop(exp_id, None)
+
+    def clear(self) -> None:
+        """Vacía la caché (útil para tests)."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+@dataclass
+class WriteStats:
+    """Escrituras de expedientes al almacenamiento (para medir amplificación)"""
+    writes: int = 0
+    bytes_written: int = 0
+
+    def reset(self) -> None:
+        self.writes = 0
+        self.bytes_written = 0
+
+
+write_stats = WriteStats()
+
+
+def version_conflict(exp_id: str, loaded: int, current: int) -> AuthError:
+    """Error 409 de control de concurrencia optimista"""
+    return AuthError(
+        f"Conflicto de versión en expediente {exp_id}: "
+        f"cargado en versión {loaded}, actual {current}",
+        409
+    )
+
+
+class ExpedienteStorage(ABC):
+    """
+    Interfaz de almacenamiento de expedientes.
+
+    load() retorna la instancia compartida de la caché (solo lectura) o,
+    con for_update=True, una copia privada que se puede pasar a save().
+
+    save() aplica control de concurrencia optimista: `expediente.version`
+    es la versión con la que se cargó. Si en el almacenamiento hay otra
+    (alguien escribió entre medias) lanza AuthError 409; si no, guarda
+    con la versión incrementada.
+    """
+
+    def __init__(self, cache_size: int = EXPEDIENTE_CACHE_SIZE):
+        self.cache = ExpedienteCache(cache_size)
+
+    @abstractmethod
+    def load(self, exp_id: str, for_update: bool = False) -> Expediente:
+        """
+        Carga un expediente.
+
+        Raises:
+            AuthError: Si el expediente no existe (404) o hay error al cargar (500)
+        """
+
+    @abstractmethod
+    def save(self, expediente: Expediente) -> None:
+        """
+        Guarda un expediente incrementando su versión.
+
+        Raises:
+            AuthError: Si hay conflicto de versión (409) o error al guardar (500)
+        """
+
+    @abstractmethod
+    def iter_ids(self, after: Optional[str] = None, prefix: str = "") -> Iterator[str]:
+        """
+        IDs de expedientes en orden, generados bajo demanda.
+
+        Args:
+            after: Último ID ya visto; se empieza por el siguiente (None: desde el principio)
+            prefix: Solo IDs que empiezan por este prefijo
+        """
+
+    @abstractmethod
+    def exists(self, exp_id: str) -> bool:
+        """Indica si el expediente existe"""
+
+    def list_ids(self) -> List[str]:
+        """IDs de todos los expedientes (ordenados)"""
+        return list(self.iter_ids())
+
+    def is_shared(self, expediente: Expediente) -> bool:
+        """Indica si `expediente` es la instancia compartida de la caché"""
+        return self.cache.is_shared(expediente)
+
+    def close(self) -> None:
+        """Libera los recursos del almacenamiento"""
+
+
+class JsonFileStorage(ExpedienteStorage):
+    """
+    Un archivo JSON por expediente en `data_dir`.
+
+    Las escrituras son atómicas (archivo temporal + rename) y se hacen
+    bajo un bloqueo de archivo para que la comprobación de versión sea
+    atómica entre procesos.
+    """
+
+    def __init__(
+        self,
+        data_dir: Path = DATA_DIR,
+        compact: bool = COMPACT_JSON,
+        cache_size: int = EXPEDIENTE_CACHE_SIZE
+    ):
+        super().__init__(cache_size)
+        self.data_dir = Path(data_dir)
+        self.compact = compact
+        # Índice ordenado de IDs (lista inmutable: se sustituye, no se modifica)
+        self._index: Optional[List[str]] = None
+        self._index_mtime_ns: Optional[int] = None
+        self._index_lock = Lock()
+
+    def _path(self, exp_id: str) -> Path:
+        return self.data_dir / f"{exp_id}.json"
+
+    def load(self, exp_id: str, for_update: bool = False) -> Expediente:
+        exp_file = self._path(exp_id)
+
+        try:
+            stat = exp_file.stat()
+        except FileNotFoundError:
+            raise AuthError(f"Expediente {exp_id} no encontrado", 404)
+        except OSError as e:
+            raise AuthError(f"Error al cargar expediente: {str(e)}", 500)
+
+        revision = (stat.st_mtime_ns, stat.st_size)
+        entry = self.cache.get(exp_id, revision)
+        if entry is None:
+            try:
+                raw = exp_file.read_bytes()
+                entry = self.cache.put(exp_id, revision, Expediente.model_validate_json(raw), raw)
+            except Exception as e:
+                raise AuthError(f"Error al cargar expediente: {str(e)}", 500)
+
+        return entry.copy() if for_update else entry.expediente
+
+    def serialize(self, expediente: Expediente) -> bytes:
+        """JSON del expediente (compacto o indentado)"""
+        if self.compact:
+            return expediente.model_dump_json().encode("utf-8")
+        return json.dumps(
+            expediente.model_dump(mode="json"),
+            ensure_ascii=False,
+            indent=2
+        ).encode("utf-8")
+
+    def save(self, expediente: Expediente) -> None:
+        exp_file = self._path(expediente.id)
+
+        try:
+            # Asegurar que el directorio existe
+            self.data_dir.mkdir(parents=True, exist_ok=True)
+
+            with self._file_lock(expediente.id):
+                dir_mtime_ns = self.data_dir.stat().st_mtime_ns
+                current = self._disk_version(expediente.id)
+                if current is not None and current != expediente.version:
+                    raise version_conflict(expediente.id, expediente.version, current)
+
+                expediente.version += 1
+                try:
+                    raw = self.serialize(expediente)
+                    _replace_file(exp_file, raw)
+                except BaseException:
+                    expediente.version -= 1
+                    raise
+
+                write_stats.writes += 1
+                write_stats.bytes_written += len(raw)
+                self._index_written(expediente.id, dir_mtime_ns)
+
+                # La caché pasa a la versión recién escrita (instancia propia,
+                # independiente de la que sigue en manos del llamante)
+                stat = exp_file.stat()
+                self.cache.put(
+                    expediente.id,
+                    (stat.st_mtime_ns, stat.st_size),
+                    Expediente.model_validate_json(raw),
+                    raw
+                )
+        except AuthError:
+            raise
+        except Exception as e:
+            self.cache.invalidate(expediente.id)
+            raise AuthError(f"Error al guardar expediente: {str(e)}", 500)
+
+    def iter_ids(self, after: Optional[str] = None, prefix: str = "") -> Iterator[str]:
+        ids = self._sorted_ids()
+        start = bisect_left(ids, prefix)
+        if after is not None:
+            start = max(start, bisect_right(ids, after))
+
+        for i in range(start, len(ids)):
+            if not ids[i].startswith(prefix):
+                return
+            yield ids[i]
+
+    def exists(self, exp_id: str) -> bool:
+        return self._path(exp_id).exists()
+
+    def _sorted_ids(self) -> List[str]:
+        """
+        IDs ordenados desde el índice en memoria.
+
+        El índice se reconstruye recorriendo el directorio solo cuando su
+        mtime cambia por algo distinto de una escritura de este proceso
+        (p.ej. restaurar backups o añadir archivos a mano).
+        """
+        try:
+            mtime_ns = self.data_dir.stat().st_mtime_ns
+        except FileNotFoundError:
+            return []
+
+        with self._index_lock:
+            if self._index is None or self._index_mtime_ns != mtime_ns:
+                self._index = sorted(
+                    entry.name[:-len(".json")]
+                    for entry in os.scandir(self.data_dir)
+                    if entry.name.endswith(".json") and not entry.name.startswith(".")
+                )
+                self._index_mtime_ns = mtime_ns
+            return self._index
+
+    def _index_written(self, exp_id: str, dir_mtime_ns: int) -> None:
+        """
+        Actualiza el índice tras una escritura propia sin recorrer el directorio.
+
+        Solo si el índice estaba al día antes de escribir (`dir_mtime_ns`
+        es el mtime del directorio antes del rename); si no, se
+        reconstruirá en la siguiente consulta.
+        """
+        with self._index_lock:
+            if self._index is None or self._index_mtime_ns != dir_mtime_ns:
+                return
+            i = bisect_left(self._index, exp_id)
+            if i == len(self._index) or self._index[i] != exp_id:
+                self._index = self._index[:i] + [exp_id] + self._index[i:]
+            self._index_mtime_ns = self.data_dir.stat().st_mtime_ns
+
+    @contextmanager
+    def _file_lock(self, exp_id: str) -> Iterator[None]:
+        """Bloqueo exclusivo entre procesos (flock sobre data_dir/.{id}.lock)"""
+        if fcntl is None:
+            yield
+            return
+
+        with open(self.data_dir / f".{exp_id}.lock", "a+b") as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def _disk_version(self, exp_id: str) -> Optional[int]:
+        """
+        Versión del expediente en disco (None si no existe).
+
+        Se compara el contenido completo con la caché en lugar de mtime y
+        tamaño: otro proceso puede haber escrito un archivo del mismo
+        tamaño dentro de la resolución del mtime.
+        """
+        exp_file = self._path(exp_id)
+        try:
+            stat = exp_file.stat()
+            raw = exp_file.read_bytes()
+        except FileNotFoundError:
+            return None
+
+        revision = (stat.st_mtime_ns, stat.st_size)
+        entry = self.cache.get(exp_id, revision)
+        if entry is not None and entry.raw == raw:
+            return entry.expediente.version
+
+        expediente = Expediente.model_validate_json(raw)
+        self.cache.put(exp_id, revision, expediente, raw)
+        return expediente.version
+
+
+def _replace_file(path: Path, raw: bytes) -> None:
+    """Escribe `raw` en un temporal del mismo directorio y lo renombra sobre `path`"""
+    fd, tmp_path = tempfile.mkstemp(
+        dir=path.parent, prefix=f".{path.stem}.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(raw)
+            f.flush()
+            os.fsync(f.fileno())
+        # Conservar permisos del archivo existente (mkstemp crea con 0600)
+        mode = path.stat().st_mode if path.exists() else 0o644
+        os.chmod(tmp_path, mode & 0o777)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS expedientes (
+    id TEXT PRIMARY KEY,
+    tipo TEXT NOT NULL,
+    estado TEXT NOT NULL,
+    fecha_inicio TEXT NOT NULL,
+    datos TEXT NOT NULL,
+    metadatos TEXT NOT NULL,
+    version INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS documentos (
+    expediente_id TEXT NOT NULL,
+    posicion INTEGER NOT NULL,
+    id TEXT NOT NULL,
+    nombre TEXT NOT NULL,
+    fecha TEXT NOT NULL,
+    tipo TEXT NOT NULL,
+    ruta TEXT NOT NULL,
+    hash_sha256 TEXT NOT NULL,
+    tamano_bytes INTEGER NOT NULL,
+    validado INTEGER,
+    metadatos_extraidos TEXT,
+    texto_sha256 TEXT,
+    PRIMARY KEY (expediente_id, posicion)
+);
+
+CREATE TABLE IF NOT EXISTS historial (
+    expediente_id TEXT NOT NULL,
+    posicion INTEGER NOT NULL,
+    id TEXT NOT NULL,
+    fecha TEXT NOT NULL,
+    usuario TEXT NOT NULL,
+    tipo TEXT NOT NULL,
+    accion TEXT NOT NULL,
+    detalles TEXT NOT NULL,
+    PRIMARY KEY (expediente_id, posicion)
+);
+
+-- Textos markdown de los documentos (lo más voluminoso, aparte para que
+-- las lecturas y escrituras del resto no los arrastren)
+CREATE TABLE IF NOT EXISTS textos (
+    expediente_id TEXT NOT NULL,
+    documento_id TEXT NOT NULL,
+    contenido BLOB NOT NULL,
+    PRIMARY KEY (expediente_id, documento_id)
+);
+"""
+
+DOCUMENTO_COLUMNS = (
+    "id", "nombre", "fecha", "tipo", "ruta", "hash_sha256",
+    "tamano_bytes", "validado", "metadatos_extraidos", "texto_sha256"
+)
+
+HISTORIAL_COLUMNS = ("id", "fecha", "usuario", "tipo", "accion", "detalles")
+
+# IDs leídos por consulta en SqliteStorage.iter_ids()
+ITER_IDS_BATCH = 500
+
+
+class SqliteStorage(ExpedienteStorage):
+    """
+    Expedientes en una base de datos SQLite.
+
+    El expediente, sus documentos, su historial y los textos markdown
+    van en tablas separadas. Cada hilo usa su propia conexión (modo WAL:
+    lectores concurrentes con un escritor). La comprobación de versión y
+    la escritura se hacen en una transacción BEGIN IMMEDIATE, atómica
+    también entre procesos.
+    """
+
+    def __init__(self, db_path: Path = SQLITE_PATH, cache_size: int = EXPEDIENTE_CACHE_SIZE):
+        super().__init__(cache_size)
+        self.db_path = Path(db_path)
+        self._local = local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = Lock()
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = self._conn()
+        conn.executescript(SQLITE_SCHEMA)
+        # Bases de datos creadas antes de los blobs de texto
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(documentos)")}
+        if "texto_sha256" not in columns:
+            conn.execute("ALTER TABLE documentos ADD COLUMN texto_sha256 TEXT")
+
+    def _conn(self) -> sqlite3.Connection:
+        """Conexión del hilo actual"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # isolation_level=None: las transacciones se abren explícitamente
+            conn = sqlite3.connect(
+                self.db_path, timeout=30, isolation_level=None, check_same_thread=False
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    @contextmanager
+    def _transaction(self, mode: str = "DEFERRED") -> Iterator[sqlite3.Connection]:
+        conn = self._conn()
+        conn.execute(f"BEGIN {mode}")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def load(self, exp_id: str, for_update: bool = False) -> Expediente:
+        try:
+            # Una sola transacción de lectura: instantánea consistente
+            # aunque otro proceso esté escribiendo
+            with self._transaction() as conn:
+                row = conn.execute(
+                    "SELECT version FROM expedientes WHERE id = ?", (exp_id,)
+                ).fetchone()
+                if row is None:
+                    raise AuthError(f"Expediente {exp_id} no encontrado", 404)
+
+                revision = (row[0],)
+                entry = self.cache.get(exp_id, revision)
+                if entry is None:
+                    entry = self.cache.put(exp_id, revision, self._read(conn, exp_id))
+        except AuthError:
+            raise
+        except Exception as e:
+            raise AuthError(f"Error al cargar expediente: {str(e)}", 500)
+
+        return entry.copy() if for_update else entry.expediente
+
+    def _read(self, conn: sqlite3.Connection, exp_id: str) -> Expediente:
+        """Reconstruye un expediente a partir de sus tablas"""
+        tipo, estado, fecha_inicio, datos, metadatos, version = conn.execute(
+            "SELECT tipo, estado, fecha_inicio, datos, metadatos, version "
+            "FROM expedientes WHERE id = ?",
+            (exp_id,)
+        ).fetchone()
+
+        documentos = []
+        for row in conn.execute(
+            f"SELECT {', '.join('d.' + c for c in DOCUMENTO_COLUMNS)}, t.contenido "
+            "FROM documentos d LEFT JOIN textos t "
+            "ON t.expediente_id = d.expediente_id AND t.documento_id = d.id "
+            "WHERE d.expediente_id = ? ORDER BY d.posicion",
+            (exp_id,)
+        ):
+            documento = dict(zip(DOCUMENTO_COLUMNS, row))
+            if documento["validado"] is not None:
+                documento["validado"] = bool(documento["validado"])
+            if documento["metadatos_extraidos"] is not None:
+                documento["metadatos_extraidos"] = json.loads(documento["metadatos_extraidos"])
+            if row[-1] is not None:
+                documento["texto_markdown"] = row[-1].decode("utf-8")
+            documentos.append(documento)
+
+        historial = [
+            dict(zip(HISTORIAL_COLUMNS, row))
+            for row in conn.execute(
+                f"SELECT {', '.join(HISTORIAL_COLUMNS)} FROM historial "
+                "WHERE expediente_id = ? ORDER BY posicion",
+                (exp_id,)
+            )
+        ]
+
+        return Expediente.model_validate({
+            "id": exp_id,
+            "tipo": tipo,
+            "estado": estado,
+            "fecha_inicio": fecha_inicio,
+            "datos": json.loads(datos),
+            "documentos": documentos,
+            "historial": historial,
+            "metadatos": json.loads(metadatos),
+            "version": version
+        })
+
+    def save(self, expediente: Expediente) -> None:
+        try:
+            with self._transaction("IMMEDIATE") as conn:
+                row = conn.execute(
+                    "SELECT version FROM expedientes WHERE id = ?", (expediente.id,)
+                ).fetchone()
+                if row is not None and row[0] != expediente.version:
+                    raise version_conflict(expediente.id, expediente.version, row[0])
+
+                expediente.version += 1
+                try:
+                    written = self._write(conn, expediente)
+                except BaseException:
+                    expediente.version -= 1
+                    raise
+        except AuthError:
+            raise
+        except Exception as e:
+            raise AuthError(f"Error al guardar expediente: {str(e)}", 500)
+        finally:
+            # La siguiente lectura reconstruye desde la base de datos
+            self.cache.invalidate(expediente.id)
+
+        write_stats.writes += 1
+        write_stats.bytes_written += written
+
+    def _write(self, conn: sqlite3.Connection, expediente: Expediente) -> int:
+        """
+        Escribe un expediente en sus tablas (dentro de una transacción).
+
+        Documentos e historial se reescriben; los textos solo si han
+        cambiado, que es lo que domina el tamaño del expediente.
+
+        Returns:
+            Bytes de datos enviados a la base de datos
+        """
+        data = expediente.model_dump(mode="json")
+        exp_id = expediente.id
+
+        datos = json.dumps(data["datos"], ensure_ascii=False)
+        metadatos = json.dumps(data["metadatos"], ensure_ascii=False)
+        conn.execute(
+            "INSERT INTO expedientes (id, tipo, estado, fecha_inicio, datos, metadatos, version) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET tipo = excluded.tipo, estado = excluded.estado, "
+            "fecha_inicio = excluded.fecha_inicio, datos = excluded.datos, "
+            "metadatos = excluded.metadatos, version = excluded.version",
+            (exp_id, data["tipo"], data["estado"], data["fecha_inicio"], datos, metadatos, data["version"])
+        )
+        written = len(datos) + len(metadatos)
+
+        documentos = []
+        textos = []
+        for posicion, doc in enumerate(data["documentos"]):
+            metadatos_extraidos = doc["metadatos_extraidos"]
+            documentos.append((
+                exp_id, posicion, doc["id"], doc["nombre"], doc["fecha"], doc["tipo"],
+                doc["ruta"], doc["hash_sha256"], doc["tamano_bytes"], doc["validado"],
+                None if metadatos_extraidos is None else json.dumps(metadatos_extraidos, ensure_ascii=False),
+                doc["texto_sha256"]
+            ))
+            if doc["texto_markdown"] is not None:
+                textos.append((exp_id, doc["id"], doc["texto_markdown"].encode("utf-8")))
+
+        conn.execute("DELETE FROM documentos WHERE expediente_id = ?", (exp_id,))
+        conn.executemany(
+            f"INSERT INTO documentos (expediente_id, posicion, {', '.join(DOCUMENTO_COLUMNS)}) "
+            f"VALUES ({', '.join('?' * (len(DOCUMENTO_COLUMNS) + 2))})",
+            documentos
+        )
+        written += sum(len(str(value)) for row in documentos for value in row[2:])
+
+        # Textos: solo se escriben los nuevos o modificados
+        conn.execute(
+            "DELETE FROM textos WHERE expediente_id = ? "
+            "AND documento_id NOT IN (SELECT value FROM json_each(?))",
+            (exp_id, json.dumps([doc_id for _, doc_id, _ in textos]))
+        )
+        for exp, doc_id, contenido in textos:
+            cursor = conn.execute(
+                "INSERT INTO textos (expediente_id, documento_id, contenido) VALUES (?, ?, ?) "
+                "ON CONFLICT(expediente_id, documento_id) DO UPDATE "
+                "SET contenido = excluded.contenido WHERE contenido != excluded.contenido",
+                (exp, doc_id, contenido)
+            )
+            if cursor.rowcount:
+                written += len(contenido)
+
+        historial = [
+            (exp_id, posicion, *(entry[c] for c in HISTORIAL_COLUMNS))
+            for posicion, entry in enumerate(data["historial"])
+        ]
+        conn.execute("DELETE FROM historial WHERE expediente_id = ?", (exp_id,))
+        conn.executemany(
+            f"INSERT INTO historial (expediente_id, posicion, {', '.join(HISTORIAL_COLUMNS)}) "
+            f"VALUES ({', '.join('?' * (len(HISTORIAL_COLUMNS) + 2))})",
+            historial
+        )
+        written += sum(len(str(value)) for row in historial for value in row[2:])
+
+        return written
+
+    def import_expedientes(self, expedientes: Iterable[Expediente], batch_size: int = 1000) -> int:
+        """
+        Importa expedientes conservando su versión (sin control de concurrencia).
+
+        Args:
+            expedientes: Expedientes a importar (se sobrescriben si existen)
+            batch_size: Expedientes por transacción
+
+        Returns:
+            Número de expedientes importados
+        """
+        count = 0
+        pending: List[Expediente] = []
+
+        def flush() -> None:
+            with self._transaction("IMMEDIATE") as conn:
+                for expediente in pending:
+                    self._write(conn, expediente)
+            pending.clear()
+
+        for expediente in expedientes:
+            pending.append(expediente)
+            count += 1
+            if len(pending) >= batch_size:
+                flush()
+        if pending:
+            flush()
+
+        self.cache.clear()
+        return count
+
+    def iter_ids(self, after: Optional[str] = None, prefix: str = "") -> Iterator[str]:
+        # Por bloques, siguiendo el índice de la clave primaria: el coste
+        # de cada bloque no depende del número total de expedientes
+        last = after if after is not None else ""
+        while True:
+            rows = self._conn().execute(
+                "SELECT id FROM expedientes WHERE id >= ? AND id > ? ORDER BY id LIMIT ?",
+                (prefix, last, ITER_IDS_BATCH)
+            ).fetchall()
+            for (exp_id,) in rows:
+                if not exp_id.startswith(prefix):
+                    return
+                yield exp_id
+            if len(rows) < ITER_IDS_BATCH:
+                return
+            last = rows[-1][0]
+
+    def exists(self, exp_id: str) -> bool:
+        row = self._conn().execute(
+            "SELECT 1 FROM expedientes WHERE id = ?", (exp_id,)
+        ).fetchone()
+        return row is not None
+
+    def close(self) -> None:
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = local()
+
+
+def create_storage(backend: str = STORAGE_BACKEND) -> ExpedienteStorage:
+    """
+    Crea el almacenamiento configurado.
+
+    Args:
+        backend: "json" o "sqlite"
+
+    Returns:
+        Almacenamiento de expedientes
+
+    Raises:
+        ValueError: Si el backend no existe
+    """
+    if backend == "json":
+        return JsonFileStorage(DATA_DIR)
+    if backend == "sqlite":
+        return SqliteStorage(SQLITE_PATH)
+    raise ValueError(f"Backend de almacenamiento desconocido: {backend} (json, sqlite)")
+
+
+# Almacenamiento global (se crea en el primer uso)
+_storage: Optional[ExpedienteStorage] = None
+_storage_lock = Lock()
+
+
+def get_storage() -> ExpedienteStorage:
+    """Obtiene el almacenamiento global de expedientes"""
+    global _storage
+    if _storage is None:
+        with _storage_lock:
+            if _storage is None:
+                _storage = create_storage()
+    return _storage
+
+
+def set_storage(storage: Optional[ExpedienteStorage]) -> None:
+    """
+    Reemplaza el almacenamiento global (None: se recrea en el siguiente uso).
+
+    Útil para tests y benchmarks.
+    """
+    global _storage
+    with _storage_lock:
+        if _storage is not None and _storage is not storage:
+            _storage.close()
+        _storage = storage
+
+
+def main() -> int:
+    """Importa los expedientes JSON a una base de datos SQLite"""
+    parser = argparse.ArgumentParser(
+        description="Importa los expedientes JSON del mock a SQLite"
+    )
+    parser.add_argument("--data-dir", type=Path, default=DATA_DIR, help="Directorio con los JSON")
+    parser.add_argument("--db", type=Path, default=SQLITE_PATH, help="Base de datos SQLite destino")
+    args = parser.parse_args()
+
+    source = JsonFileStorage(args.data_dir, cache_size=0)
+    target = SqliteStorage(args.db, cache_size=0)
+    count = target.import_expedientes(
+        source.load(exp_id) for exp_id in sorted(source.list_ids())
+    )
+    target.close()
+
+    print(f"{count} expedientes importados en {args.db}")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
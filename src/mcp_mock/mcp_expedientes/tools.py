@@ -5,16 +5,46 @@ Las Tools exponen acciones que el agente puede ejecutar.
 Pueden tener efectos secundarios (escribir, modificar).
 """
 
+import base64
+import binascii
 import json
+import os
 import uuid
 from datetime import datetime
-from typing import List, Any, Dict
+from contextlib import nullcontext
+from typing import List, Any, Dict, Optional, Tuple
+from jsonschema import exceptions as jsonschema_exceptions, validators as jsonschema_validators
 from mcp import types
-from .models import Documento, EntradaHistorial
-from .resources import load_expediente, save_expediente
+from .models import Documento, EntradaHistorial, Expediente
+from .resources import coalesced_writes, expediente_lock, load_expediente, save_expediente
+from .projection import PROJECTION_SCHEMA, project_expediente
+from .blobs import documento_json, get_blob_store, texto_documento
 from .auth import AuthError
 
 
+# Tools que modifican el expediente (se serializan por expediente)
+WRITE_TOOLS = frozenset({
+    "añadir_documento",
+    "actualizar_datos",
+    "añadir_anotacion",
+    "actualizar_metadatos_documento",
+    "crear_documento_desde_markdown",
+})
+
+# Máximo de caracteres de texto por llamada a obtener_texto_documento
+TEXTO_CHUNK_MAX = int(os.environ.get("MCP_TEXTO_CHUNK_MAX", "100000"))
+
+# Validadores de inputSchema por tool, compilados una sola vez
+# (jsonschema.validate revalida el schema completo en cada llamada)
+_argument_validators: Dict[str, Any] = {}
+
+EXPECTED_VERSION_SCHEMA = {
+    "type": "integer",
+    "description": "Versión del expediente sobre la que se hace el cambio (opcional). "
+                   "Si el expediente ha cambiado, la tool falla con 409"
+}
+
+
 def generate_id(prefix: str) -> str:
     """
     Genera un ID único con un prefijo.
@@ -31,6 +61,25 @@ def generate_id(prefix: str) -> str:
     return f"{prefix}-{timestamp % 1000000:06d}"
 
 
+def check_expected_version(expediente: Expediente, expected_version: Optional[int]) -> None:
+    """
+    Verifica la versión esperada por el cliente (control optimista).
+
+    Args:
+        expediente: Expediente cargado para modificar
+        expected_version: Versión esperada o None para no comprobar
+
+    Raises:
+        AuthError: Si la versión no coincide (409)
+    """
+    if expected_version is not None and expediente.version != expected_version:
+        raise AuthError(
+            f"Conflicto de versión en expediente {expediente.id}: "
+            f"esperada {expected_version}, actual {expediente.version}",
+            409
+        )
+
+
 def add_historial_entry(
     expediente_id: str,
     tipo: str,
@@ -48,7 +97,7 @@ def add_historial_entry(
         detalles: Detalles de la acción
         usuario: Usuario que realizó la acción (default: Automático)
     """
-    expediente = load_expediente(expediente_id)
+    expediente = load_expediente(expediente_id, for_update=True)
 
     entrada = EntradaHistorial(
         id=generate_id("HIST"),
@@ -75,14 +124,17 @@ async def list_tools() -> List[types.Tool]:
 
         types.Tool(
             name="consultar_expediente",
-            description="Obtiene toda la información de un expediente",
+            description="Obtiene la información de un expediente. Por defecto omite el "
+                        "texto de los documentos (usar obtener_texto_documento); admite "
+                        "selección de campos y un modo resumen",
             inputSchema={
                 "type": "object",
                 "properties": {
                     "expediente_id": {
                         "type": "string",
                         "description": "ID del expediente a consultar (ej: EXP-2024-001)"
-                    }
+                    },
+                    **PROJECTION_SCHEMA
                 },
                 "required": ["expediente_id"]
             }
@@ -124,7 +176,9 @@ async def list_tools() -> List[types.Tool]:
 
         types.Tool(
             name="obtener_texto_documento",
-            description="Obtiene el texto markdown del contenido de un documento",
+            description="Obtiene el texto markdown del contenido de un documento. "
+                        "Los textos largos se leen por fragmentos: si has_more es true, "
+                        "llamar de nuevo con offset=next_offset",
             inputSchema={
                 "type": "object",
                 "properties": {
@@ -135,6 +189,14 @@ async def list_tools() -> List[types.Tool]:
                     "documento_id": {
                         "type": "string",
                         "description": "ID del documento (ej: DOC-001)"
+                    },
+                    "offset": {
+                        "type": "integer",
+                        "description": "Primer carácter a devolver (por defecto 0)"
+                    },
+                    "length": {
+                        "type": "integer",
+                        "description": f"Número máximo de caracteres (por defecto y como máximo {TEXTO_CHUNK_MAX})"
                     }
                 },
                 "required": ["expediente_id", "documento_id"]
@@ -182,12 +244,19 @@ async def list_tools() -> List[types.Tool]:
                     },
                     "contenido": {
                         "type": "string",
-                        "description": "Contenido del documento (puede ser base64 para binarios)"
+                        "description": "Contenido del documento (texto, o base64 para binarios)"
+                    },
+                    "codificacion": {
+                        "type": "string",
+                        "enum": ["texto", "base64"],
+                        "description": "Codificación de contenido: texto (UTF-8, por defecto) o base64",
+                        "default": "texto"
                     },
                     "ruta": {
                         "type": "string",
                         "description": "Ruta donde se guardará el documento (opcional)"
-                    }
+                    },
+                    "expected_version": EXPECTED_VERSION_SCHEMA
                 },
                 "required": ["expediente_id", "nombre", "tipo", "contenido"]
             }
@@ -209,7 +278,8 @@ async def list_tools() -> List[types.Tool]:
                     },
                     "valor": {
                         "description": "Nuevo valor para el campo (puede ser string, number, boolean, etc.)"
-                    }
+                    },
+                    "expected_version": EXPECTED_VERSION_SCHEMA
                 },
                 "required": ["expediente_id", "campo", "valor"]
             }
@@ -228,7 +298,8 @@ async def list_tools() -> List[types.Tool]:
                     "texto": {
                         "type": "string",
                         "description": "Texto de la anotación"
-                    }
+                    },
+                    "expected_version": EXPECTED_VERSION_SCHEMA
                 },
                 "required": ["expediente_id", "texto"]
             }
@@ -255,7 +326,8 @@ async def list_tools() -> List[types.Tool]:
                     "reemplazar": {
                         "type": "boolean",
                         "description": "Si true, reemplaza todos los metadatos. Si false, los mezcla (default: false)"
-                    }
+                    },
+                    "expected_version": EXPECTED_VERSION_SCHEMA
                 },
                 "required": ["expediente_id", "documento_id", "metadatos"]
             }
@@ -286,7 +358,8 @@ async def list_tools() -> List[types.Tool]:
                     "metadatos": {
                         "type": "object",
                         "description": "Metadatos del documento (opcional)"
-                    }
+                    },
+                    "expected_version": EXPECTED_VERSION_SCHEMA
                 },
                 "required": ["expediente_id", "nombre", "tipo", "texto_markdown"]
             }
@@ -294,10 +367,40 @@ async def list_tools() -> List[types.Tool]:
     ]
 
 
+async def validate_arguments(name: str, arguments: dict) -> None:
+    """
+    Valida los argumentos de una tool contra su inputSchema.
+
+    Args:
+        name: Nombre de la tool
+        arguments: Argumentos recibidos
+
+    Raises:
+        AuthError: Si los argumentos no cumplen el schema (400)
+    """
+    if not _argument_validators:
+        for tool in await list_tools():
+            validator_cls = jsonschema_validators.validator_for(tool.inputSchema)
+            _argument_validators[tool.name] = validator_cls(tool.inputSchema)
+
+    validator = _argument_validators.get(name)
+    if validator is None:
+        # Tool desconocida: call_tool responde 404
+        return
+
+    error = jsonschema_exceptions.best_match(validator.iter_errors(arguments))
+    if error is not None:
+        raise AuthError(f"Argumentos no válidos para '{name}': {error.message}", 400)
+
+
 async def call_tool(name: str, arguments: dict) -> List[types.TextContent]:
     """
     Ejecuta una tool con los argumentos proporcionados.
 
+    Las modificaciones de expedientes se agrupan en una escritura por
+    expediente al terminar la tool (ver coalesced_writes) y las tools de
+    escritura sobre un mismo expediente se serializan (expediente_lock).
+
     Args:
         name: Nombre de la tool a ejecutar
         arguments: Argumentos para la tool
@@ -306,41 +409,53 @@ async def call_tool(name: str, arguments: dict) -> List[types.TextContent]:
         Lista de contenido de texto con el resultado
 
     Raises:
-        AuthError: Si hay error al ejecutar la tool
+        AuthError: Si los argumentos no son válidos (400) o hay error al ejecutar la tool
     """
+    await validate_arguments(name, arguments)
+
+    # Las tools de escritura de un mismo expediente se ejecutan de una en una
+    lock = (
+        expediente_lock(arguments.get("expediente_id", ""))
+        if name in WRITE_TOOLS else nullcontext()
+    )
+
     try:
-        if name == "consultar_expediente":
-            return await tool_consultar_expediente(**arguments)
+        # Las escrituras de la tool se hacen una sola vez al terminar
+        # (y ninguna si la tool falla)
+        async with lock:
+            with coalesced_writes():
+                if name == "consultar_expediente":
+                    return await tool_consultar_expediente(**arguments)
 
-        elif name == "listar_documentos":
-            return await tool_listar_documentos(**arguments)
+                elif name == "listar_documentos":
+                    return await tool_listar_documentos(**arguments)
 
-        elif name == "obtener_documento":
-            return await tool_obtener_documento(**arguments)
+                elif name == "obtener_documento":
+                    return await tool_obtener_documento(**arguments)
 
-        elif name == "añadir_documento":
-            return await tool_añadir_documento(**arguments)
+                elif name == "añadir_documento":
+                    return await tool_añadir_documento(**arguments)
 
-        elif name == "actualizar_datos":
-            return await tool_actualizar_datos(**arguments)
+                elif name == "actualizar_datos":
+                    return await tool_actualizar_datos(**arguments)
 
-        elif name == "añadir_anotacion":
-            return await tool_añadir_anotacion(**arguments)
+                elif name == "añadir_anotacion":
+                    return await tool_añadir_anotacion(**arguments)
 
-        elif name == "obtener_texto_documento":
-            return await tool_obtener_texto_documento(**arguments)
+                elif name == "obtener_texto_documento":
+                    return await tool_obtener_texto_documento(**arguments)
 
-        elif name == "obtener_metadatos_documento":
-            return await tool_obtener_metadatos_documento(**arguments)
+                elif name == "obtener_metadatos_documento":
+                    return await tool_obtener_metadatos_documento(**arguments)
 
-        elif name == "actualizar_metadatos_documento":
-            return await tool_actualizar_metadatos_documento(**arguments)
+                elif name == "actualizar_metadatos_documento":
+                    return await tool_actualizar_metadatos_documento(**arguments)
 
-        elif name == "crear_documento_desde_markdown":
-            return await tool_crear_documento_desde_markdown(**arguments)
+                elif name == "crear_documento_desde_markdown":
+                    return await tool_crear_documento_desde_markdown(**arguments)
 
-        else:
-            raise AuthError(f"Tool desconocida: {name}", 404)
+                else:
+                    raise AuthError(f"Tool desconocida: {name}", 404)
 
     except AuthError:
         raise
@@ -350,7 +465,12 @@ async def call_tool(name: str, arguments: dict) -> List[types.TextContent]:
 
 # ========== IMPLEMENTACIÓN DE TOOLS DE LECTURA ==========
 
-async def tool_consultar_expediente(expediente_id: str) -> List[types.TextContent]:
+async def tool_consultar_expediente(
+    expediente_id: str,
+    fields: Optional[List[str]] = None,
+    exclude: Optional[List[str]] = None,
+    summary: bool = False
+) -> List[types.TextContent]:
     """Implementación de consultar_expediente"""
     expediente = load_expediente(expediente_id)
 
@@ -358,7 +478,7 @@ async def tool_consultar_expediente(expediente_id: str) -> List[types.TextConten
         types.TextContent(
             type="text",
             text=json.dumps(
-                expediente.model_dump(mode="json"),
+                project_expediente(expediente, fields=fields, exclude=exclude, summary=summary),
                 ensure_ascii=False,
                 indent=2
             )
@@ -374,7 +494,7 @@ async def tool_listar_documentos(expediente_id: str) -> List[types.TextContent]:
         types.TextContent(
             type="text",
             text=json.dumps(
-                [doc.model_dump(mode="json") for doc in expediente.documentos],
+                [documento_json(doc) for doc in expediente.documentos],
                 ensure_ascii=False,
                 indent=2
             )
@@ -405,7 +525,7 @@ async def tool_obtener_documento(
         types.TextContent(
             type="text",
             text=json.dumps(
-                documento.model_dump(mode="json"),
+                documento_json(documento),
                 ensure_ascii=False,
                 indent=2
             )
@@ -420,10 +540,13 @@ async def tool_añadir_documento(
     nombre: str,
     tipo: str,
     contenido: str,
-    ruta: str = None
+    ruta: str = None,
+    codificacion: str = "texto",
+    expected_version: Optional[int] = None
 ) -> List[types.TextContent]:
     """Implementación de añadir_documento"""
-    expediente = load_expediente(expediente_id)
+    expediente = load_expediente(expediente_id, for_update=True)
+    check_expected_version(expediente, expected_version)
 
     # Generar ID para el documento
     doc_id = generate_id("DOC")
@@ -432,6 +555,19 @@ async def tool_añadir_documento(
     if not ruta:
         ruta = f"data/documentos/{expediente_id}/{nombre}"
 
+    # Guardar el contenido en el almacén de blobs; su SHA-256 identifica
+    # el documento. La codificación es explícita: un texto como "Hola" es
+    # también base64 válido y adivinarla corrompería el contenido
+    if codificacion == "base64":
+        try:
+            datos_contenido = base64.b64decode(contenido, validate=True)
+        except (ValueError, binascii.Error):
+            raise AuthError("contenido no es base64 válido (codificacion=base64)", 400)
+    elif codificacion == "texto":
+        datos_contenido = contenido.encode('utf-8')
+    else:
+        raise AuthError(f"codificacion no válida: '{codificacion}' (texto | base64)", 400)
+
     # Crear documento
     documento = Documento(
         id=doc_id,
@@ -439,8 +575,8 @@ async def tool_añadir_documento(
         fecha=datetime.now(),
         tipo=tipo,
         ruta=ruta,
-        hash_sha256="",  # En un sistema real, se calcularía el hash del contenido
-        tamano_bytes=len(contenido.encode('utf-8')),
+        hash_sha256=get_blob_store().put(datos_contenido),
+        tamano_bytes=len(datos_contenido),
         validado=None
     )
 
@@ -478,10 +614,12 @@ async def tool_añadir_documento(
 async def tool_actualizar_datos(
     expediente_id: str,
     campo: str,
-    valor: Any
+    valor: Any,
+    expected_version: Optional[int] = None
 ) -> List[types.TextContent]:
     """Implementación de actualizar_datos"""
-    expediente = load_expediente(expediente_id)
+    expediente = load_expediente(expediente_id, for_update=True)
+    check_expected_version(expediente, expected_version)
 
     # Obtener valor anterior
     valor_anterior = get_nested_value(expediente.model_dump(), campo)
@@ -521,10 +659,12 @@ async def tool_actualizar_datos(
 
 async def tool_añadir_anotacion(
     expediente_id: str,
-    texto: str
+    texto: str,
+    expected_version: Optional[int] = None
 ) -> List[types.TextContent]:
     """Implementación de añadir_anotacion"""
-    expediente = load_expediente(expediente_id)
+    expediente = load_expediente(expediente_id, for_update=True)
+    check_expected_version(expediente, expected_version)
 
     # Añadir anotación al historial
     entrada = EntradaHistorial(
@@ -623,22 +763,19 @@ def set_nested_value(obj: Any, path: str, value: Any) -> None:
 
 # ========== TOOLS DE DOCUMENTOS (NUEVAS) ==========
 
-async def tool_obtener_texto_documento(
-    expediente_id: str,
-    documento_id: str
-) -> List[types.TextContent]:
+def find_documento_con_texto(expediente_id: str, documento_id: str) -> Tuple[Documento, str]:
     """
-    Obtiene el texto markdown del contenido de un documento.
+    Busca un documento con texto markdown y lee su texto.
 
     Args:
         expediente_id: ID del expediente
         documento_id: ID del documento
 
     Returns:
-        Texto markdown del documento
+        Documento (instancia compartida, no modificar) y su texto markdown
 
     Raises:
-        AuthError: Si el documento no existe o no tiene texto_markdown
+        AuthError: Si el documento no existe (404) o no tiene texto_markdown (422)
     """
     expediente = load_expediente(expediente_id)
 
@@ -654,18 +791,85 @@ async def tool_obtener_texto_documento(
             404
         )
 
-    if not documento.texto_markdown:
+    texto = texto_documento(documento)
+    if not texto:
         raise AuthError(
             f"Documento {documento_id} no tiene texto markdown disponible",
             422
         )
 
+    return documento, texto
+
+
+def text_range(texto: str, offset: int = 0, length: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Fragmento de un texto con los metadatos para pedir el siguiente.
+
+    Args:
+        texto: Texto completo
+        offset: Primer carácter del fragmento
+        length: Número máximo de caracteres (limitado a TEXTO_CHUNK_MAX)
+
+    Returns:
+        Diccionario con texto_markdown, offset, total_length, has_more y next_offset
+
+    Raises:
+        AuthError: Si offset o length no son válidos (400)
+    """
+    total = len(texto)
+    if offset < 0 or offset > total:
+        raise AuthError(f"offset fuera de rango: {offset} (longitud total {total})", 400)
+    if length is not None and length <= 0:
+        raise AuthError(f"length debe ser positivo: {length}", 400)
+
+    length = min(length or TEXTO_CHUNK_MAX, TEXTO_CHUNK_MAX)
+    fragmento = texto[offset:offset + length]
+    end = offset + len(fragmento)
+
+    return {
+        "texto_markdown": fragmento,
+        "offset": offset,
+        "total_length": total,
+        "has_more": end < total,
+        "next_offset": end if end < total else None
+    }
+
+
+async def tool_obtener_texto_documento(
+    expediente_id: str,
+    documento_id: str,
+    offset: int = 0,
+    length: Optional[int] = None
+) -> List[types.TextContent]:
+    """
+    Obtiene el texto markdown del contenido de un documento.
+
+    Sin offset/length retorna el texto completo si no supera
+    TEXTO_CHUNK_MAX caracteres; los textos más largos se leen por
+    fragmentos siguiendo next_offset (o por SSE, ver
+    server_http.handle_texto_stream).
+
+    Args:
+        expediente_id: ID del expediente
+        documento_id: ID del documento
+        offset: Primer carácter a devolver
+        length: Número máximo de caracteres
+
+    Returns:
+        Texto markdown del documento (o el fragmento pedido) con su longitud total
+
+    Raises:
+        AuthError: Si el documento no existe, no tiene texto_markdown o
+            el rango no es válido
+    """
+    documento, texto = find_documento_con_texto(expediente_id, documento_id)
+
     result = {
         "success": True,
         "documento_id": documento.id,
         "nombre": documento.nombre,
         "tipo": documento.tipo,
-        "texto_markdown": documento.texto_markdown
+        **text_range(texto, offset, length)
     }
 
     return [
@@ -733,7 +937,8 @@ async def tool_actualizar_metadatos_documento(
     expediente_id: str,
     documento_id: str,
     metadatos: Dict[str, Any],
-    reemplazar: bool = False
+    reemplazar: bool = False,
+    expected_version: Optional[int] = None
 ) -> List[types.TextContent]:
     """
     Actualiza los metadatos extraídos de un documento.
@@ -743,14 +948,16 @@ async def tool_actualizar_metadatos_documento(
         documento_id: ID del documento
         metadatos: Nuevos metadatos a establecer
         reemplazar: Si True, reemplaza todos los metadatos. Si False, los mezcla.
+        expected_version: Versión esperada del expediente (opcional)
 
     Returns:
         Resultado de la operación con metadatos anteriores y nuevos
 
     Raises:
-        AuthError: Si el documento no existe
+        AuthError: Si el documento no existe o la versión no coincide (409)
     """
-    expediente = load_expediente(expediente_id)
+    expediente = load_expediente(expediente_id, for_update=True)
+    check_expected_version(expediente, expected_version)
 
     # Buscar documento
     documento = None
@@ -814,7 +1021,8 @@ async def tool_crear_documento_desde_markdown(
     nombre: str,
     tipo: str,
     texto_markdown: str,
-    metadatos: Dict[str, Any] = None
+    metadatos: Dict[str, Any] = None,
+    expected_version: Optional[int] = None
 ) -> List[types.TextContent]:
     """
     Crea un nuevo documento a partir de contenido markdown.
@@ -825,14 +1033,16 @@ async def tool_crear_documento_desde_markdown(
         tipo: Tipo de documento (INFORME, RESOLUCION, etc.)
         texto_markdown: Contenido en formato markdown
         metadatos: Metadatos opcionales del documento
+        expected_version: Versión esperada del expediente (opcional)
 
     Returns:
         Resultado con el ID del documento creado
 
     Raises:
-        AuthError: Si hay error al crear el documento
+        AuthError: Si hay error al crear el documento o la versión no coincide (409)
     """
-    expediente = load_expediente(expediente_id)
+    expediente = load_expediente(expediente_id, for_update=True)
+    check_expected_version(expediente, expected_version)
 
     # Generar ID para el documento
     doc_id = generate_id("DOC")
@@ -840,8 +1050,10 @@ async def tool_crear_documento_desde_markdown(
     # Generar ruta
     ruta = f"data/documentos/{expediente_id}/{nombre}"
 
-    # Calcular tamaño
-    tamano_bytes = len(texto_markdown.encode('utf-8'))
+    # El contenido es el propio markdown: se guarda como blob y su
+    # SHA-256 es a la vez el hash del documento y la clave del texto
+    contenido = texto_markdown.encode('utf-8')
+    hash_sha256 = get_blob_store().put(contenido)
 
     # Crear documento
     documento = Documento(
@@ -850,11 +1062,11 @@ async def tool_crear_documento_desde_markdown(
         fecha=datetime.now(),
         tipo=tipo,
         ruta=ruta,
-        hash_sha256="",  # En un sistema real, se calcularía el hash
-        tamano_bytes=tamano_bytes,
+        hash_sha256=hash_sha256,
+        tamano_bytes=len(contenido),
         validado=None,
         metadatos_extraidos=metadatos,
-        texto_markdown=texto_markdown
+        texto_sha256=hash_sha256
     )
 
     # Añadir a la lista de documentos
@@ -880,6 +1092,7 @@ async def tool_crear_documento_desde_markdown(
         "nombre": nombre,
         "tipo": tipo,
         "ruta": ruta,
+        "hash_sha256": hash_sha256,
         "mensaje": f"Documento {doc_id} creado correctamente"
     }
 
@@ -11,3 +11,15 @@ Si se necesitan fixtures específicas de API, definirlas aquí.
 
 # ELIMINADO: os.chdir() - antipatrón que modifica estado global
 # ELIMINADO: sys.path manipulation - ya está en conftest.py global
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def reset_task_tracker():
+    """Tracker de ejecuciones limpio en cada test (deduplica POST /execute repetidos)"""
+    from api.services.task_tracker import reset_task_tracker
+
+    reset_task_tracker()
+    yield
+    reset_task_tracker()
@@ -6,19 +6,27 @@ Tests para endpoints de ejecución de agentes.
 Incluye tests para:
 - POST /api/v1/agent/execute (request simplificado)
 - GET /api/v1/agent/status/{agent_run_id}
+- DELETE /api/v1/agent/runs/{agent_run_id}
 - GET /api/v1/agent/agents
 """
 
+import asyncio
 import pytest
 from fastapi.testclient import TestClient
 from unittest.mock import Mock, AsyncMock, patch
 
 from api.main import app
+from backoffice.auth.jwt_generator import generate_jwt
 from backoffice.config import reset_agent_loader
 
 client = TestClient(app)
 
 
+def _auth_headers(expediente_id: str) -> dict:
+    """Header Authorization con un JWT válido para el expediente"""
+    return {"Authorization": f"Bearer {generate_jwt(expediente_id=expediente_id).token}"}
+
+
 # =============================================================================
 # Tests para GET /api/v1/agent/agents
 # =============================================================================
@@ -226,6 +234,154 @@ class TestExecuteAgentSimplified:
         assert data["callback_url"] is None
 
 
+    @patch('api.routers.agent.create_default_executor')
+    def test_repeated_execute_returns_same_run(self, mock_executor):
+        """Un reintento idéntico se asocia a la ejecución existente sin lanzar otra"""
+        from backoffice.auth.jwt_generator import generate_jwt
+        from backoffice.models import AgentExecutionResult
+        mock_instance = Mock()
+        mock_instance.execute = AsyncMock(return_value=AgentExecutionResult(
+            success=True,
+            agent_run_id="RUN-TEST",
+            resultado={"message": "Test completed"},
+            log_auditoria=[],
+            herramientas_usadas=[]
+        ))
+        mock_executor.return_value = mock_instance
+
+        def post(token, expediente_id="EXP-2024-001", headers=None):
+            return client.post(
+                "/api/v1/agent/execute",
+                json={
+                    "agent": "ValidadorDocumental",
+                    "context": {"expediente_id": expediente_id, "tarea_id": "TAREA-001"}
+                },
+                headers={"Authorization": f"Bearer {token}", **(headers or {})}
+            )
+
+        token = generate_jwt(expediente_id="EXP-2024-001").token
+        first = post(token).json()
+        repeated = post(token).json()
+
+        assert first["deduplicated"] is False
+        assert repeated["deduplicated"] is True
+        assert repeated["agent_run_id"] == first["agent_run_id"]
+        assert mock_instance.execute.await_count == 1
+
+        # Otro expediente u otro token (otro jti) son ejecuciones distintas
+        other_token = generate_jwt(expediente_id="EXP-2024-001").token
+        assert post(token, expediente_id="EXP-2024-002").json()["deduplicated"] is False
+        assert post(other_token).json()["deduplicated"] is False
+
+        # Con Idempotency-Key manda la clave explícita (también con un JWT renovado)
+        keyed = post(token, headers={"Idempotency-Key": "bpmn-42"}).json()
+        assert keyed["deduplicated"] is False
+        assert post(other_token, headers={"Idempotency-Key": "bpmn-42"}).json()["agent_run_id"] == keyed["agent_run_id"]
+
+    @patch('api.routers.agent.create_default_executor')
+    def test_idempotency_key_is_scoped_and_bound_to_payload(self, mock_executor):
+        """La clave del header no cruza expedientes ni admite otra petición"""
+        from backoffice.models import AgentExecutionResult
+        mock_instance = Mock()
+        mock_instance.execute = AsyncMock(return_value=AgentExecutionResult(
+            success=True,
+            agent_run_id="RUN-TEST",
+            resultado={"message": "Test completed"},
+            log_auditoria=[],
+            herramientas_usadas=[]
+        ))
+        mock_executor.return_value = mock_instance
+
+        def post(expediente_id, tarea_id="TAREA-001", token=None):
+            token = token or generate_jwt(expediente_id=expediente_id).token
+            return client.post(
+                "/api/v1/agent/execute",
+                json={
+                    "agent": "ValidadorDocumental",
+                    "context": {"expediente_id": expediente_id, "tarea_id": tarea_id}
+                },
+                headers={"Authorization": f"Bearer {token}", "Idempotency-Key": "bpmn-7"}
+            )
+
+        first = post("EXP-2024-001")
+        assert first.json()["deduplicated"] is False
+
+        # Misma clave desde otro expediente: ejecución propia, no la ajena
+        other = post("EXP-2024-002").json()
+        assert other["deduplicated"] is False
+        assert other["agent_run_id"] != first.json()["agent_run_id"]
+
+        # Misma clave y expediente con otra petición
+        conflict = post("EXP-2024-001", tarea_id="TAREA-002")
+        assert conflict.status_code == 422
+
+        # Un token sin firma válida no se deduplica
+        forged = post("EXP-2024-001", token="token-inventado").json()
+        assert forged["deduplicated"] is False
+        assert forged["agent_run_id"] != first.json()["agent_run_id"]
+
+
+    @patch('api.routers.agent.create_default_executor')
+    def test_failed_startup_does_not_capture_idempotency_key(self, mock_executor):
+        """Si el executor no se puede crear, un reintento lanza una ejecución nueva"""
+        from backoffice.models import AgentExecutionResult
+        mock_instance = Mock()
+        mock_instance.execute = AsyncMock(return_value=AgentExecutionResult(
+            success=True,
+            agent_run_id="RUN-TEST",
+            resultado={"message": "Test completed"},
+            log_auditoria=[],
+            herramientas_usadas=[]
+        ))
+        mock_executor.side_effect = [RuntimeError("MCP config ilegible"), mock_instance]
+
+        failing_client = TestClient(app, raise_server_exceptions=False)
+        request = {
+            "json": {
+                "agent": "ValidadorDocumental",
+                "context": {"expediente_id": "EXP-2024-001", "tarea_id": "TAREA-001"}
+            },
+            "headers": {
+                "Authorization": f"Bearer {generate_jwt(expediente_id='EXP-2024-001').token}",
+                "Idempotency-Key": "bpmn-arranque"
+            }
+        }
+
+        assert failing_client.post("/api/v1/agent/execute", **request).status_code == 500
+
+        retry = client.post("/api/v1/agent/execute", **request)
+        assert retry.status_code == 202
+        assert retry.json()["deduplicated"] is False
+        mock_instance.execute.assert_awaited_once()
+
+    def test_dedup_window(self):
+        """Se deduplica contra ejecuciones en curso o completadas dentro de la ventana"""
+        from api.services.task_tracker import get_task_tracker
+
+        tracker = get_task_tracker()
+        assert tracker.register_idempotent("k", "f", 600, "RUN-1", "EXP", "T") == ("RUN-1", True)
+        assert tracker.register_idempotent("k", "f", 600, "RUN-2", "EXP", "T") == ("RUN-1", False)
+
+        tracker.mark_completed("RUN-1", Mock(success=True, resultado={}, error=None))
+        assert tracker.register_idempotent("k", "f", 600, "RUN-2", "EXP", "T") == ("RUN-1", False)
+        assert tracker.register_idempotent("k", "f", 0, "RUN-2", "EXP", "T") == ("RUN-2", True)
+
+        # Tras un fallo el reintento lanza una ejecución nueva
+        tracker.mark_failed("RUN-2", {"codigo": "X", "mensaje": "Error", "detalle": ""})
+        assert tracker.register_idempotent("k", "f", 600, "RUN-3", "EXP", "T") == ("RUN-3", True)
+
+    def test_retry_after_unsuccessful_completion_starts_new_run(self):
+        """Una ejecución completada con success=False no deduplica el reintento"""
+        from api.services.task_tracker import get_task_tracker
+
+        tracker = get_task_tracker()
+        tracker.register_idempotent("k", "f", 600, "RUN-1", "EXP", "T")
+        error = Mock(codigo="AUTH_INVALID_TOKEN", mensaje="Token JWT inválido", detalle="")
+        tracker.mark_completed("RUN-1", Mock(success=False, resultado={}, error=error))
+
+        assert tracker.register_idempotent("k", "f", 600, "RUN-2", "EXP", "T") == ("RUN-2", True)
+
+
 # =============================================================================
 # Tests para GET /api/v1/agent/status/{agent_run_id}
 # =============================================================================
@@ -282,6 +438,167 @@ class TestGetAgentStatus:
         assert status_data["tarea_id"] == "TAREA-001"
 
 
+    @pytest.mark.asyncio
+    async def test_deadline_exceeded_marks_run_as_timeout(self):
+        """Una ejecución cortada por el plazo queda como TIMEOUT y el executor recibe el Deadline"""
+        from api.routers.agent import execute_and_callback
+        from api.services.task_tracker import get_task_tracker
+        from backoffice.mcp.deadline import Deadline
+        from backoffice.models import AgentConfig, AgentError, AgentExecutionResult
+
+        mock_instance = Mock()
+        mock_instance.execute = AsyncMock(return_value=AgentExecutionResult(
+            success=False,
+            agent_run_id="RUN-TEST",
+            resultado={},
+            log_auditoria=[],
+            herramientas_usadas=[],
+            error=AgentError(codigo="MCP_DEADLINE_EXCEEDED", mensaje="Plazo agotado")
+        ))
+        get_task_tracker().register("RUN-DEADLINE", "EXP-2024-001", "TAREA-001")
+
+        await execute_and_callback(
+            executor=mock_instance,
+            token="test-token",
+            expediente_id="EXP-2024-001",
+            tarea_id="TAREA-001",
+            agent_config=AgentConfig(
+                nombre="ValidadorDocumental",
+                system_prompt="Test",
+                modelo="test",
+                herramientas=[]
+            ),
+            agent_run_id="RUN-DEADLINE",
+            callback_url=None,
+            timeout_seconds=30
+        )
+
+        assert isinstance(mock_instance.execute.call_args.kwargs["deadline"], Deadline)
+        status = get_task_tracker().get_status("RUN-DEADLINE")
+        assert status["status"] == "failed"
+        assert status["error"]["codigo"] == "TIMEOUT"
+
+
+# =============================================================================
+# Tests para DELETE /api/v1/agent/runs/{agent_run_id}
+# =============================================================================
+
+class TestCancelAgentRun:
+    """Tests para cancelación de ejecuciones"""
+
+    def test_cancel_without_token_returns_401(self):
+        """Sin token JWT no se cancela nada"""
+        response = client.delete("/api/v1/agent/runs/RUN-CUALQUIERA")
+
+        assert response.status_code == 401
+
+    def test_cancel_not_found_returns_404(self):
+        """Cancelar un agent_run_id inexistente devuelve 404"""
+        response = client.delete(
+            "/api/v1/agent/runs/RUN-NO-EXISTE",
+            headers=_auth_headers("EXP-2024-001")
+        )
+
+        assert response.status_code == 404
+
+    def test_cancel_finished_run_returns_409(self):
+        """Una ejecución ya terminada no se puede cancelar"""
+        from api.services.task_tracker import get_task_tracker
+
+        tracker = get_task_tracker()
+        tracker.register("RUN-TERMINADA", "EXP-2024-001", "TAREA-001")
+        tracker.mark_failed("RUN-TERMINADA", {"codigo": "X", "mensaje": "Error", "detalle": ""})
+
+        response = client.delete(
+            "/api/v1/agent/runs/RUN-TERMINADA",
+            headers=_auth_headers("EXP-2024-001")
+        )
+
+        assert response.status_code == 409
+        assert tracker.get_status("RUN-TERMINADA")["status"] == "failed"
+
+    def test_cancel_with_invalid_token_returns_401(self):
+        """Un token que no es un JWT válido no cancela la ejecución"""
+        from api.services.task_tracker import get_task_tracker
+
+        tracker = get_task_tracker()
+        tracker.register("RUN-AJENA", "EXP-2024-001", "TAREA-001")
+
+        response = client.delete(
+            "/api/v1/agent/runs/RUN-AJENA",
+            headers={"Authorization": "Bearer token-inventado"}
+        )
+
+        assert response.status_code == 401
+        assert tracker.get_status("RUN-AJENA")["status"] == "pending"
+
+    def test_cancel_with_token_of_other_expediente_returns_403(self):
+        """Un JWT de otro expediente no puede cancelar la ejecución"""
+        from api.services.task_tracker import get_task_tracker
+
+        tracker = get_task_tracker()
+        tracker.register("RUN-AJENA", "EXP-2024-001", "TAREA-001")
+
+        response = client.delete(
+            "/api/v1/agent/runs/RUN-AJENA",
+            headers=_auth_headers("EXP-2024-002")
+        )
+
+        assert response.status_code == 403
+        assert tracker.get_status("RUN-AJENA")["status"] == "pending"
+
+    @pytest.mark.asyncio
+    async def test_cancel_running_run(self):
+        """Cancelar una ejecución en curso corta el executor, vence su plazo y envía el callback"""
+        from api.routers.agent import cancel_agent_run, execute_and_callback
+        from api.services.task_tracker import get_task_tracker
+        from backoffice.models import AgentConfig
+
+        started = asyncio.Event()
+        deadlines = []
+
+        async def slow_execute(*args, deadline=None):
+            deadlines.append(deadline)
+            started.set()
+            await asyncio.sleep(60)
+
+        mock_instance = Mock()
+        mock_instance.execute = slow_execute
+        get_task_tracker().register("RUN-CANCELAR", "EXP-2024-001", "TAREA-001")
+
+        with patch("api.routers.agent.send_webhook", new_callable=AsyncMock) as mock_webhook:
+            run = asyncio.create_task(execute_and_callback(
+                executor=mock_instance,
+                token="test-token",
+                expediente_id="EXP-2024-001",
+                tarea_id="TAREA-001",
+                agent_config=AgentConfig(
+                    nombre="ValidadorDocumental",
+                    system_prompt="Test",
+                    modelo="test",
+                    herramientas=[]
+                ),
+                agent_run_id="RUN-CANCELAR",
+                callback_url="https://bpmn.example.com/callback",
+                timeout_seconds=300
+            ))
+            await asyncio.wait_for(started.wait(), timeout=1)
+
+            response = await cancel_agent_run(
+                "RUN-CANCELAR",
+                authorization=_auth_headers("EXP-2024-001")["Authorization"]
+            )
+            assert response.status == "cancelled"
+
+            await asyncio.wait_for(run, timeout=1)
+
+        status = get_task_tracker().get_status("RUN-CANCELAR")
+        assert status["status"] == "cancelled"
+        assert status["error"]["codigo"] == "RUN_CANCELLED"
+        assert deadlines[0].cancelled and deadlines[0].expired
+        assert mock_webhook.call_args.kwargs["status"] == "cancelled"
+
+
 # =============================================================================
 # Tests de Validación de callback_url (SSRF Prevention)
 # =============================================================================
@@ -363,7 +680,7 @@ class TestAgentConfigIntegration:
         # Capturar los argumentos pasados a execute
         captured_config = {}
 
-        async def capture_execute(token, expediente_id, tarea_id, agent_config):
+        async def capture_execute(token, expediente_id, tarea_id, agent_config, deadline=None):
             captured_config['nombre'] = agent_config.nombre
             captured_config['system_prompt'] = agent_config.system_prompt
             captured_config['modelo'] = agent_config.modelo
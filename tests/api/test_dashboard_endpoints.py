@@ -0,0 +1,149 @@
+# tests/api/test_dashboard_endpoints.py
+
+"""
+Tests para endpoints del dashboard.
+
+Incluye tests para:
+- GET /api/v1/dashboard/metrics
+- GET /api/v1/dashboard/execution-history
+- GET /api/v1/dashboard/pii-history
+"""
+
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+
+from api.main import app
+from api.routers import logs as logs_router
+from api.services.log_index import reset_log_indexes
+
+client = TestClient(app)
+
+ADMIN_HEADERS = {"Authorization": f"Bearer {logs_router.settings.API_ADMIN_TOKEN}"}
+
+
+def write_run(log_dir, expediente_id, run_id, agent, started, entries):
+    """Escribe el log de una ejecución: (segundos desde started, level, mensaje, event)"""
+    exp_dir = log_dir / expediente_id
+    exp_dir.mkdir(parents=True, exist_ok=True)
+    with open(exp_dir / f"{run_id}.log", "a", encoding="utf-8") as f:
+        for seconds, level, mensaje, event in entries:
+            metadata = {"agent": agent}
+            if event:
+                metadata["event"] = event
+            f.write(json.dumps({
+                "timestamp": (started + timedelta(seconds=seconds)).isoformat(),
+                "level": level,
+                "agent_run_id": run_id,
+                "expediente_id": expediente_id,
+                "mensaje": mensaje,
+                "metadata": metadata,
+            }, ensure_ascii=False) + "\n")
+
+
+@pytest.fixture
+def log_dir(tmp_path, monkeypatch):
+    """LOG_DIR temporal con tres ejecuciones recientes"""
+    reset_log_indexes()
+    monkeypatch.setattr(logs_router.settings, "LOG_DIR", str(tmp_path))
+    monkeypatch.setattr(logs_router.settings, "LOG_INDEX_PATH", "")
+    monkeypatch.setattr(logs_router.settings, "LOG_INDEX_REFRESH_SECONDS", 0.0)
+
+    now = datetime.now(timezone.utc)
+    write_run(tmp_path, "EXP-2024-001", "RUN-001", "ValidadorDocumental", now - timedelta(hours=2), [
+        (0, "INFO", "Ejecutando agente ValidadorDocumental", "run_started"),
+        (1, "INFO", "Documento con DNI [DNI-REDACTED] y [EMAIL-REDACTED]", None),
+        (4, "INFO", "Agente completado exitosamente", "run_completed"),
+    ])
+    write_run(tmp_path, "EXP-2024-002", "RUN-002", "GeneradorInforme", now - timedelta(hours=1), [
+        (0, "INFO", "Ejecutando agente GeneradorInforme", "run_started"),
+        (2, "ERROR", "Error de conexión MCP", None),
+    ])
+    write_run(tmp_path, "EXP-2024-003", "RUN-003", "ValidadorDocumental", now - timedelta(minutes=5), [
+        (0, "INFO", "Ejecutando agente ValidadorDocumental", "run_started"),
+        (1, "INFO", "Teléfonos [TELEFONO_MOVIL-REDACTED] y [TELEFONO_FIJO-REDACTED]", None),
+    ])
+
+    yield tmp_path
+
+    reset_log_indexes()
+
+
+class TestDashboardMetrics:
+    """Tests para GET /api/v1/dashboard/metrics"""
+
+    def test_requires_admin_token(self, log_dir):
+        """Sin token retorna 401/422"""
+        response = client.get("/api/v1/dashboard/metrics")
+        assert response.status_code in (401, 422)
+
+    def test_metrics_from_runs(self, log_dir):
+        """Ejecuciones y estados derivados de los logs de auditoría"""
+        response = client.get("/api/v1/dashboard/metrics", headers=ADMIN_HEADERS)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total_executions"] == 3
+        assert data["executions_month"] == 3
+        assert data["executions_by_status"] == {"success": 1, "error": 1, "in_progress": 1}
+        assert data["success_rate"] == 50.0
+        assert data["avg_execution_time"] == 4.0
+        assert data["executions_by_agent"]["ValidadorDocumental"] == 2
+        assert data["executions_by_agent"]["GeneradorInforme"] == 1
+        assert data["performance"]["latency_p50"] == 4000.0
+
+    def test_metrics_pii_redacted(self, log_dir):
+        """Cuenta los marcadores de PII redactados por tipo"""
+        data = client.get("/api/v1/dashboard/metrics", headers=ADMIN_HEADERS).json()
+
+        assert data["pii_redacted"]["DNI"] == 1
+        assert data["pii_redacted"]["email"] == 1
+        assert data["pii_redacted"]["telefono_movil"] == 1
+        assert data["pii_redacted"]["telefono_fijo"] == 1
+        assert data["pii_redacted_total"] == 4
+
+    def test_metrics_filter_by_agent(self, log_dir):
+        """agent_type limita las métricas de la ventana"""
+        response = client.get(
+            "/api/v1/dashboard/metrics",
+            params={"agent_type": "GeneradorInforme"},
+            headers=ADMIN_HEADERS,
+        )
+        data = response.json()
+        assert data["executions_by_status"] == {"success": 0, "error": 1, "in_progress": 0}
+
+    def test_metrics_without_index(self, log_dir, monkeypatch):
+        """Sin índice de logs las métricas no están disponibles"""
+        monkeypatch.setattr(logs_router.settings, "LOG_INDEX_ENABLED", False)
+        response = client.get("/api/v1/dashboard/metrics", headers=ADMIN_HEADERS)
+        assert response.status_code == 503
+
+
+class TestDashboardHistory:
+    """Tests para los históricos horarios"""
+
+    def test_execution_history(self, log_dir):
+        """Una ejecución por hora, con su estado"""
+        response = client.get(
+            "/api/v1/dashboard/execution-history",
+            params={"hours": 24},
+            headers=ADMIN_HEADERS,
+        )
+
+        assert response.status_code == 200
+        points = response.json()
+        assert sum(p["total"] for p in points) == 3
+        assert sum(p["success"] for p in points) == 1
+        assert sum(p["error"] for p in points) == 1
+        assert points == sorted(points, key=lambda p: p["timestamp"])
+
+    def test_pii_history(self, log_dir):
+        """Teléfonos móviles y fijos se agrupan en `telefono`"""
+        response = client.get("/api/v1/dashboard/pii-history", headers=ADMIN_HEADERS)
+
+        points = response.json()
+        assert sum(p["DNI"] for p in points) == 1
+        assert sum(p["telefono"] for p in points) == 2
+        assert sum(p["other"] for p in points) == 0
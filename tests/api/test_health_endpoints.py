@@ -57,3 +57,21 @@ def test_openapi_docs_accessible():
     assert "openapi" in data
     assert data["info"]["title"] == "aGEntiX API"
     assert "paths" in data
+
+
+def test_health_and_metrics_expose_mcp_circuit_state():
+    """Test: /health y /metrics muestran el circuit breaker de cada servidor MCP"""
+    from backoffice.mcp.resilience import get_server_guard
+
+    guard = get_server_guard("expedientes")
+    guard._open()
+
+    response = client.get("/health")
+    data = response.json()
+    assert data["status"] == "degraded"
+    assert data["dependencies"]["mcp_expedientes"] == "open"
+    assert data["mcp_servers"]["expedientes"]["state"] == "open"
+
+    content = client.get("/metrics").text
+    assert 'agentix_mcp_circuit_state{server="expedientes"} 2.0' in content
+    assert 'agentix_mcp_concurrency_limit{server="expedientes"}' in content
@@ -0,0 +1,179 @@
+# tests/api/test_log_scan.py
+
+"""
+Tests para el escaneo de logs sin índice (api.services.log_scan).
+
+Incluye tests para:
+- Equivalencia de resultados con LogIndex (filtros, orden, paginación)
+- Poda de archivos por resumen y terminación temprana
+- Invalidación de resúmenes al modificarse un archivo
+"""
+
+import json
+import random
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from api.services import log_scan
+from api.services.log_index import LogFilters, LogIndex
+from api.services.log_scan import LogScanner
+
+BASE_TIME = datetime(2024, 1, 15, 10, 0, 0, tzinfo=timezone.utc)
+
+LEVELS = ["INFO", "WARNING", "ERROR"]
+AGENTS = ["ValidadorDocumental", "GeneradorInforme", None]
+
+
+def write_log_lines(log_dir, expediente_id, run_id, entries):
+    """Añade entradas JSON lines al log de una ejecución"""
+    exp_dir = log_dir / expediente_id
+    exp_dir.mkdir(parents=True, exist_ok=True)
+    with open(exp_dir / f"{run_id}.log", "a", encoding="utf-8") as f:
+        for entry in entries:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+
+def make_run(expediente_id, run_id, start_minute, count, rng):
+    """Entradas consecutivas (una por minuto) de una ejecución"""
+    entries = []
+    for i in range(count):
+        entry = {
+            "timestamp": (BASE_TIME + timedelta(minutes=start_minute + i)).isoformat(),
+            "level": rng.choice(LEVELS),
+            "agent_run_id": run_id,
+            "expediente_id": expediente_id,
+            "mensaje": rng.choice(["Consultando expediente", "Documento sin firma", "Fin"]),
+        }
+        agent = rng.choice(AGENTS)
+        if agent:
+            entry["metadata"] = {"agent": agent}
+        entries.append(entry)
+    return entries
+
+
+@pytest.fixture
+def log_dir(tmp_path):
+    """LOG_DIR con 20 ejecuciones en 5 expedientes, sin solapes temporales"""
+    rng = random.Random(42)
+    for run in range(20):
+        expediente_id = f"EXP-2024-{run % 5:03d}"
+        write_log_lines(
+            tmp_path, expediente_id, f"RUN-{run:03d}",
+            make_run(expediente_id, f"RUN-{run:03d}", run * 10, 10, rng),
+        )
+    return tmp_path
+
+
+@pytest.fixture
+def scanner(log_dir):
+    log_scanner = LogScanner(log_dir, max_workers=2)
+    yield log_scanner
+    log_scanner.close()
+
+
+@pytest.fixture
+def opened_files(monkeypatch):
+    """Registra los archivos abiertos por el escáner"""
+    opened = []
+    original = log_scan.iter_log_file
+
+    def tracking_iter_log_file(path):
+        opened.append(path.stem)
+        return original(path)
+
+    monkeypatch.setattr(log_scan, "iter_log_file", tracking_iter_log_file)
+    return opened
+
+
+FILTER_CASES = [
+    LogFilters(),
+    LogFilters(level="ERROR"),
+    LogFilters(level="info,warning", agent="GeneradorInforme"),
+    LogFilters(expediente_id="exp-2024-003"),
+    LogFilters(date_from=BASE_TIME + timedelta(minutes=35), date_to=BASE_TIME + timedelta(minutes=102)),
+    LogFilters(search="firma", level="ERROR"),
+    LogFilters(component="AgentExecutor", date_to=BASE_TIME + timedelta(minutes=50)),
+]
+
+
+class TestLogScanner:
+    """Tests del escáner de archivos"""
+
+    @pytest.mark.parametrize("filters", FILTER_CASES)
+    def test_matches_index(self, log_dir, scanner, filters):
+        """Mismo total y mismas páginas que el índice, en frío y con resúmenes"""
+        index = LogIndex(log_dir)
+        index.refresh()
+        try:
+            expected_total = index.count(filters)
+            for offset in (0, 7, 40):
+                expected = [log["id"] for log in index.query(filters, limit=7, offset=offset)]
+                for _ in range(2):
+                    total, page = scanner.query(filters, limit=7, offset=offset)
+                    assert total == expected_total
+                    assert [log["id"] for log in page] == expected
+        finally:
+            index.close()
+
+    def test_cursor_pages(self, log_dir, scanner):
+        """Recorrer por cursor devuelve todas las entradas sin repetir"""
+        seen = []
+        after = None
+        while True:
+            _, page = scanner.query(LogFilters(), limit=15, after=after)
+            if not page:
+                break
+            seen.extend(log["id"] for log in page)
+            after = (page[-1]["timestamp"], page[-1]["id"])
+        assert len(seen) == len(set(seen)) == 200
+
+    def test_first_page_stops_early(self, scanner, opened_files):
+        """Con resúmenes, la primera página solo abre los archivos más recientes"""
+        scanner.query(LogFilters(), limit=5)
+        opened_files.clear()
+
+        total, page = scanner.query(LogFilters(), limit=5)
+
+        assert total == 200
+        assert [log["agent_run_id"] for log in page] == ["RUN-019"] * 5
+        assert len(opened_files) <= scanner.max_workers
+
+    def test_prunes_by_summary(self, scanner, opened_files):
+        """Fechas y expediente descartan archivos y directorios sin abrirlos"""
+        scanner.query(LogFilters(), limit=5)
+        opened_files.clear()
+
+        filters = LogFilters(
+            expediente_id="EXP-2024-001",
+            date_from=BASE_TIME + timedelta(minutes=110),
+            date_to=BASE_TIME + timedelta(minutes=135),
+        )
+        total, page = scanner.query(filters, limit=50)
+
+        # RUN-011 (110-119) completo; RUN-016 (160-169) fuera de rango
+        assert total == 10
+        assert {log["agent_run_id"] for log in page} == {"RUN-011"}
+        assert opened_files == ["RUN-011"]
+
+    def test_summary_invalidated_on_append(self, log_dir, scanner):
+        """Las líneas añadidas a un archivo ya resumido se tienen en cuenta"""
+        scanner.query(LogFilters(), limit=5)
+
+        write_log_lines(log_dir, "EXP-2024-000", "RUN-000", [{
+            "timestamp": (BASE_TIME + timedelta(days=1)).isoformat(),
+            "level": "CRITICAL",
+            "agent_run_id": "RUN-000",
+            "expediente_id": "EXP-2024-000",
+            "mensaje": "Nueva entrada",
+        }])
+
+        total, page = scanner.query(LogFilters(level="CRITICAL"), limit=5)
+        assert total == 1
+        assert page[0]["id"] == "RUN-000-11"
+
+    def test_iter_entries(self, scanner):
+        """La exportación recorre todas las coincidencias"""
+        filters = LogFilters(level="ERROR")
+        total, _ = scanner.query(filters, limit=1)
+        assert len(list(scanner.iter_entries(filters))) == total
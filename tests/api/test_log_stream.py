@@ -0,0 +1,210 @@
+# tests/api/test_log_stream.py
+
+"""
+Tests para el streaming de logs (SSE).
+
+Incluye tests para:
+- LogBroadcaster (pub/sub en proceso sobre el índice de logs)
+- Generador de eventos SSE de GET /api/v1/logs/stream
+"""
+
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+
+from api.main import app
+from api.routers import logs as logs_router
+from api.services.log_index import LogIndex
+from api.services.log_stream import LogBroadcaster, reset_log_broadcasters
+
+client = TestClient(app)
+
+BASE_TIME = datetime(2024, 1, 15, 10, 0, 0, tzinfo=timezone.utc)
+
+
+def write_log_lines(log_dir, expediente_id, run_id, entries):
+    """Añade entradas JSON lines al log de una ejecución"""
+    exp_dir = log_dir / expediente_id
+    exp_dir.mkdir(parents=True, exist_ok=True)
+    with open(exp_dir / f"{run_id}.log", "a", encoding="utf-8") as f:
+        for entry in entries:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+
+def make_entry(minute, mensaje, level="INFO"):
+    """Construye una entrada de log con el formato de AuditLogger"""
+    return {
+        "timestamp": (BASE_TIME + timedelta(minutes=minute)).isoformat(),
+        "level": level,
+        "agent_run_id": "RUN-001",
+        "expediente_id": "EXP-2024-001",
+        "mensaje": mensaje,
+    }
+
+
+class FakeRequest:
+    """Request mínima: se desconecta tras `max_checks` comprobaciones"""
+
+    def __init__(self, max_checks):
+        self.checks = 0
+        self.max_checks = max_checks
+
+    async def is_disconnected(self):
+        self.checks += 1
+        return self.checks > self.max_checks
+
+
+@pytest.fixture
+def index(tmp_path):
+    """Índice sobre un LOG_DIR temporal con dos entradas"""
+    write_log_lines(tmp_path, "EXP-2024-001", "RUN-001", [
+        make_entry(0, "Primera"),
+        make_entry(1, "Segunda", level="ERROR"),
+    ])
+    log_index = LogIndex(tmp_path)
+    log_index.refresh()
+    yield log_index
+    log_index.close()
+    reset_log_broadcasters()
+
+
+def parse_events(chunks):
+    """Extrae (id, data) de los mensajes SSE"""
+    events = []
+    for chunk in chunks:
+        event_id, data = None, None
+        for line in chunk.strip().split("\n"):
+            if line.startswith("id: "):
+                event_id = int(line[4:])
+            elif line.startswith("data: "):
+                data = json.loads(line[6:])
+        if data is not None:
+            events.append((event_id, data))
+    return events
+
+
+class TestLogBroadcaster:
+    """Tests del pub/sub de logs"""
+
+    @pytest.mark.asyncio
+    async def test_fans_out_new_entries_with_filters(self, index):
+        """Las entradas nuevas llegan a cada suscriptor según sus filtros"""
+        broadcaster = LogBroadcaster(index, poll_interval=60)
+        all_logs = await broadcaster.subscribe(lambda log: True)
+        errors = await broadcaster.subscribe(lambda log: log["level"] == "ERROR")
+
+        write_log_lines(index.log_dir, "EXP-2024-001", "RUN-001", [
+            make_entry(2, "Tercera"),
+            make_entry(3, "Cuarta", level="ERROR"),
+        ])
+        index.refresh()
+        assert await broadcaster.poll_once() == 2
+
+        assert all_logs.queue.qsize() == 2
+        assert errors.queue.qsize() == 1
+        rowid, log = await errors.get(timeout=0.1)
+        assert log["mensaje"] == "Cuarta"
+
+        broadcaster.unsubscribe(all_logs)
+        broadcaster.unsubscribe(errors)
+        assert broadcaster.subscriber_count == 0
+
+    @pytest.mark.asyncio
+    async def test_single_read_for_many_subscribers(self, index, monkeypatch):
+        """El índice se lee una vez por lote, no una vez por suscriptor"""
+        broadcaster = LogBroadcaster(index, poll_interval=60)
+        subscriptions = [await broadcaster.subscribe(lambda log: True) for _ in range(50)]
+
+        calls = []
+        original = index.entries_since
+
+        def counting_entries_since(rowid, limit):
+            calls.append(rowid)
+            return original(rowid, limit)
+
+        monkeypatch.setattr(index, "entries_since", counting_entries_since)
+
+        write_log_lines(index.log_dir, "EXP-2024-001", "RUN-001", [make_entry(2, "Nueva")])
+        index.refresh()
+        await broadcaster.poll_once()
+
+        assert len(calls) == 1
+        assert all(s.queue.qsize() == 1 for s in subscriptions)
+
+        for subscription in subscriptions:
+            broadcaster.unsubscribe(subscription)
+
+    @pytest.mark.asyncio
+    async def test_slow_consumer_drops_oldest(self, index):
+        """Con la cola llena se descartan las más antiguas y se cuentan"""
+        broadcaster = LogBroadcaster(index, poll_interval=60, queue_size=2)
+        subscription = await broadcaster.subscribe(lambda log: True)
+
+        write_log_lines(index.log_dir, "EXP-2024-001", "RUN-001", [
+            make_entry(10 + i, f"Entrada {i}") for i in range(5)
+        ])
+        index.refresh()
+        await broadcaster.poll_once()
+
+        assert subscription.queue.qsize() == 2
+        assert subscription.take_dropped() == 3
+        _, log = await subscription.get(timeout=0.1)
+        assert log["mensaje"] == "Entrada 3"
+
+        broadcaster.unsubscribe(subscription)
+
+    @pytest.mark.asyncio
+    async def test_resume_from_last_event_id(self, index):
+        """Con Last-Event-ID se entregan las entradas posteriores"""
+        broadcaster = LogBroadcaster(index, poll_interval=60)
+        first_rowid = index.entries_since(0, 1)[0][0]
+
+        subscription = await broadcaster.subscribe(lambda log: True, last_event_id=first_rowid)
+
+        _, log = await subscription.get(timeout=0.1)
+        assert log["mensaje"] == "Segunda"
+        assert await subscription.get(timeout=0.01) is None
+
+        broadcaster.unsubscribe(subscription)
+
+
+class TestLogEventStream:
+    """Tests del generador SSE"""
+
+    @pytest.mark.asyncio
+    async def test_emits_log_ping_and_dropped(self, index):
+        """El stream emite logs con id, avisos de descarte y pings"""
+        broadcaster = LogBroadcaster(index, poll_interval=60, queue_size=1)
+        subscription = await broadcaster.subscribe(lambda log: True, last_event_id=0)
+
+        chunks = []
+        async for chunk in logs_router.log_event_stream(
+            FakeRequest(max_checks=2), broadcaster, subscription, ping_seconds=0.01
+        ):
+            chunks.append(chunk)
+
+        assert chunks[0].startswith("retry:")
+        events = parse_events(chunks[1:])
+        assert events[0][1] == {"type": "dropped", "count": 1,
+                                "message": "1 logs descartados (cliente lento)"}
+        assert events[1][0] is not None
+        assert events[1][1]["type"] == "log"
+        assert events[1][1]["data"]["message"] == "Segunda"
+        assert events[2][1] == {"type": "ping"}
+        assert broadcaster.subscriber_count == 0
+
+
+class TestStreamEndpoint:
+    """Tests de autenticación del endpoint"""
+
+    def test_requires_admin_token(self):
+        """Sin token (header ni query) retorna 401"""
+        response = client.get("/api/v1/logs/stream")
+        assert response.status_code == 401
+
+    def test_rejects_invalid_query_token(self):
+        """Un token inválido en query retorna 401"""
+        response = client.get("/api/v1/logs/stream", params={"token": "invalido"})
+        assert response.status_code == 401
@@ -0,0 +1,540 @@
+# tests/api/test_logs_endpoints.py
+
+"""
+Tests para endpoints de logs.
+
+Incluye tests para:
+- GET /api/v1/logs (filtros y paginación)
+- Índice incremental de logs (api.services.log_index)
+"""
+
+import csv
+import gzip
+import io
+import json
+import os
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+
+from api.main import app
+from api.routers import logs as logs_router
+from api.services.log_index import LogFilters, LogIndex, reset_log_indexes
+from api.services.log_scan import reset_log_scanners
+
+client = TestClient(app)
+
+ADMIN_HEADERS = {"Authorization": f"Bearer {logs_router.settings.API_ADMIN_TOKEN}"}
+
+BASE_TIME = datetime(2024, 1, 15, 10, 0, 0, tzinfo=timezone.utc)
+
+
+def write_log_lines(log_dir, expediente_id, run_id, entries):
+    """Añade entradas JSON lines al log de una ejecución"""
+    exp_dir = log_dir / expediente_id
+    exp_dir.mkdir(parents=True, exist_ok=True)
+    with open(exp_dir / f"{run_id}.log", "a", encoding="utf-8") as f:
+        for entry in entries:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+
+def make_entry(minute, mensaje, level="INFO", expediente_id="EXP-2024-001",
+               run_id="RUN-001", metadata=None):
+    """Construye una entrada de log con el formato de AuditLogger"""
+    entry = {
+        "timestamp": (BASE_TIME + timedelta(minutes=minute)).isoformat(),
+        "level": level,
+        "agent_run_id": run_id,
+        "expediente_id": expediente_id,
+        "mensaje": mensaje,
+    }
+    if metadata:
+        entry["metadata"] = metadata
+    return entry
+
+
+@pytest.fixture
+def log_dir(tmp_path, monkeypatch):
+    """LOG_DIR temporal con índice limpio"""
+    reset_log_indexes()
+    reset_log_scanners()
+    logs_router.logs_cache.clear()
+    monkeypatch.setattr(logs_router.settings, "LOG_DIR", str(tmp_path))
+    monkeypatch.setattr(logs_router.settings, "LOG_INDEX_PATH", "")
+    monkeypatch.setattr(logs_router.settings, "LOG_INDEX_REFRESH_SECONDS", 0.0)
+
+    write_log_lines(tmp_path, "EXP-2024-001", "RUN-001", [
+        make_entry(0, "Iniciando ejecución"),
+        make_entry(1, "Consultando expediente", metadata={"agent": "ValidadorDocumental"}),
+        make_entry(2, "Documento sin firma", level="WARNING"),
+    ])
+    write_log_lines(tmp_path, "EXP-2024-002", "RUN-002", [
+        make_entry(3, "Error de conexión MCP", level="ERROR",
+                   expediente_id="EXP-2024-002", run_id="RUN-002",
+                   metadata={"agent": "GeneradorInforme", "tool": "consultar_expediente"}),
+        make_entry(4, "Ejecución finalizada", expediente_id="EXP-2024-002", run_id="RUN-002"),
+    ])
+
+    yield tmp_path
+
+    reset_log_indexes()
+    reset_log_scanners()
+
+
+# =============================================================================
+# Tests para GET /api/v1/logs
+# =============================================================================
+
+class TestGetLogs:
+    """Tests para el endpoint de consulta de logs"""
+
+    def test_requires_admin_token(self, log_dir):
+        """GET /logs sin token retorna 422/401"""
+        response = client.get("/api/v1/logs")
+        assert response.status_code in (401, 422)
+
+    def test_returns_logs_sorted_desc(self, log_dir):
+        """GET /logs retorna todos los logs del más reciente al más antiguo"""
+        response = client.get("/api/v1/logs", headers=ADMIN_HEADERS)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total"] == 5
+        messages = [log["message"] for log in data["logs"]]
+        assert messages[0] == "Ejecución finalizada"
+        assert messages[-1] == "Iniciando ejecución"
+
+    def test_ids_match_file_and_line(self, log_dir):
+        """Los IDs se forman con el nombre del archivo y el número de línea"""
+        response = client.get("/api/v1/logs", headers=ADMIN_HEADERS)
+
+        ids = {log["id"] for log in response.json()["logs"]}
+        assert ids == {"RUN-001-1", "RUN-001-2", "RUN-001-3", "RUN-002-1", "RUN-002-2"}
+
+    def test_filters(self, log_dir):
+        """Filtros de nivel, agente, expediente parcial y búsqueda"""
+        cases = [
+            ({"level": "error,warning"}, 2),
+            ({"agent": "GeneradorInforme"}, 1),
+            ({"expediente_id": "exp-2024-00"}, 5),
+            ({"expediente_id": "002"}, 2),
+            ({"expediente_id": "999"}, 0),
+            ({"search": "consultar_expediente"}, 1),
+            ({"search": "MCP"}, 1),
+            ({"search": "ón"}, 3),
+            ({"component": "AgentExecutor"}, 5),
+            ({"date_from": (BASE_TIME + timedelta(minutes=2)).isoformat(),
+              "date_to": (BASE_TIME + timedelta(minutes=3)).isoformat()}, 2),
+        ]
+
+        for params, expected in cases:
+            response = client.get("/api/v1/logs", params=params, headers=ADMIN_HEADERS)
+            assert response.status_code == 200, params
+            assert response.json()["total"] == expected, params
+
+    def test_pagination(self, log_dir):
+        """page/page_size dividen el resultado y has_more indica si hay más"""
+        first = client.get("/api/v1/logs", params={"page": 1, "page_size": 2},
+                           headers=ADMIN_HEADERS).json()
+        last = client.get("/api/v1/logs", params={"page": 3, "page_size": 2},
+                          headers=ADMIN_HEADERS).json()
+
+        assert len(first["logs"]) == 2
+        assert first["has_more"] is True
+        assert len(last["logs"]) == 1
+        assert last["has_more"] is False
+
+    def test_cursor_pagination(self, log_dir):
+        """after=<next_cursor> recorre todos los logs sin repetir ni saltar"""
+        seen = []
+        after = None
+        while True:
+            params = {"page_size": 2}
+            if after:
+                params["after"] = after
+            data = client.get("/api/v1/logs", params=params, headers=ADMIN_HEADERS).json()
+            seen.extend(log["id"] for log in data["logs"])
+            after = data["next_cursor"]
+            assert (after is not None) == data["has_more"]
+            if not after:
+                break
+
+        full = client.get("/api/v1/logs", params={"page_size": 10}, headers=ADMIN_HEADERS).json()
+        assert seen == [log["id"] for log in full["logs"]]
+
+    def test_cursor_is_stable_with_new_logs(self, log_dir):
+        """Los logs nuevos no desplazan la página siguiente"""
+        first = client.get("/api/v1/logs", params={"page_size": 2},
+                           headers=ADMIN_HEADERS).json()
+        expected = client.get("/api/v1/logs", params={"page": 2, "page_size": 2},
+                              headers=ADMIN_HEADERS).json()
+
+        write_log_lines(log_dir, "EXP-2024-001", "RUN-001", [
+            make_entry(20, "Nueva entrada"),
+        ])
+
+        second = client.get("/api/v1/logs",
+                            params={"page_size": 2, "after": first["next_cursor"]},
+                            headers=ADMIN_HEADERS).json()
+        assert [log["id"] for log in second["logs"]] == [log["id"] for log in expected["logs"]]
+
+    def test_cursor_without_index(self, log_dir, monkeypatch):
+        """La paginación por cursor también funciona con re-escaneo"""
+        monkeypatch.setattr(logs_router.settings, "LOG_INDEX_ENABLED", False)
+        first = client.get("/api/v1/logs", params={"page_size": 3},
+                           headers=ADMIN_HEADERS).json()
+        second = client.get("/api/v1/logs",
+                            params={"page_size": 3, "after": first["next_cursor"]},
+                            headers=ADMIN_HEADERS).json()
+
+        assert [log["id"] for log in second["logs"]] == ["RUN-001-2", "RUN-001-1"]
+        assert second["next_cursor"] is None
+
+    def test_invalid_cursor_returns_400(self, log_dir):
+        """Un cursor mal formado retorna 400"""
+        response = client.get("/api/v1/logs", params={"after": "sin-coma"},
+                              headers=ADMIN_HEADERS)
+        assert response.status_code == 400
+
+    def test_picks_up_new_lines(self, log_dir):
+        """Las líneas añadidas tras la primera consulta aparecen en la siguiente"""
+        client.get("/api/v1/logs", headers=ADMIN_HEADERS)
+
+        write_log_lines(log_dir, "EXP-2024-001", "RUN-001", [
+            make_entry(10, "Nueva entrada"),
+        ])
+
+        data = client.get("/api/v1/logs", headers=ADMIN_HEADERS).json()
+        assert data["total"] == 6
+        assert data["logs"][0]["message"] == "Nueva entrada"
+        assert data["logs"][0]["id"] == "RUN-001-4"
+
+    def test_without_index_matches_full_scan(self, log_dir, monkeypatch):
+        """Con LOG_INDEX_ENABLED=False se obtiene el mismo resultado por re-escaneo"""
+        params = {"level": "INFO", "page_size": 10}
+        indexed = client.get("/api/v1/logs", params=params, headers=ADMIN_HEADERS).json()
+
+        monkeypatch.setattr(logs_router.settings, "LOG_INDEX_ENABLED", False)
+        scanned = client.get("/api/v1/logs", params=params, headers=ADMIN_HEADERS).json()
+
+        assert indexed["total"] == scanned["total"]
+        assert [log["id"] for log in indexed["logs"]] == [log["id"] for log in scanned["logs"]]
+
+
+class TestLogsCaching:
+    """Tests de ETag/If-None-Match y caché de respuestas"""
+
+    def test_not_modified_without_new_logs(self, log_dir):
+        """Con el ETag vigente se responde 304 sin cuerpo"""
+        first = client.get("/api/v1/logs", headers=ADMIN_HEADERS)
+        etag = first.headers["ETag"]
+
+        second = client.get("/api/v1/logs", headers={**ADMIN_HEADERS, "If-None-Match": etag})
+
+        assert second.status_code == 304
+        assert second.content == b""
+        assert second.headers["ETag"] == etag
+
+    def test_new_logs_change_etag(self, log_dir):
+        """Una escritura nueva invalida el ETag y la caché"""
+        first = client.get("/api/v1/logs", headers=ADMIN_HEADERS)
+        etag = first.headers["ETag"]
+
+        write_log_lines(log_dir, "EXP-2024-001", "RUN-001", [make_entry(10, "Nueva entrada")])
+        second = client.get("/api/v1/logs", headers={**ADMIN_HEADERS, "If-None-Match": etag})
+
+        assert second.status_code == 200
+        assert second.headers["ETag"] != etag
+        assert second.json()["total"] == 6
+
+    def test_repeated_query_served_from_cache(self, log_dir, monkeypatch):
+        """La misma consulta sin escrituras no vuelve a consultar el índice"""
+        params = {"level": "INFO", "page_size": 2}
+        first = client.get("/api/v1/logs", params=params, headers=ADMIN_HEADERS).json()
+
+        index = logs_router.get_index()
+        monkeypatch.setattr(index, "query", lambda *args, **kwargs: pytest.fail("consulta no cacheada"))
+        second = client.get("/api/v1/logs", params=params, headers=ADMIN_HEADERS).json()
+
+        assert second == first
+
+    def test_not_modified_without_index(self, log_dir, monkeypatch):
+        """Sin índice el ETag se deriva de tamaños y mtimes de los archivos"""
+        monkeypatch.setattr(logs_router.settings, "LOG_INDEX_ENABLED", False)
+        etag = client.get("/api/v1/logs", headers=ADMIN_HEADERS).headers["ETag"]
+
+        response = client.get("/api/v1/logs", headers={**ADMIN_HEADERS, "If-None-Match": etag})
+        assert response.status_code == 304
+
+        write_log_lines(log_dir, "EXP-2024-002", "RUN-002", [
+            make_entry(10, "Nueva entrada", expediente_id="EXP-2024-002", run_id="RUN-002"),
+        ])
+        response = client.get("/api/v1/logs", headers={**ADMIN_HEADERS, "If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.json()["total"] == 6
+
+
+# =============================================================================
+# Tests para LogIndex
+# =============================================================================
+
+class TestLogIndex:
+    """Tests del índice incremental"""
+
+    def test_refresh_is_incremental(self, log_dir):
+        """Una segunda pasada sin cambios no indexa nada"""
+        index = LogIndex(log_dir)
+
+        assert index.refresh() == 5
+        assert index.refresh() == 0
+
+        write_log_lines(log_dir, "EXP-2024-002", "RUN-002", [
+            make_entry(5, "Otra", expediente_id="EXP-2024-002", run_id="RUN-002"),
+        ])
+        assert index.refresh() == 1
+        assert index.count(LogFilters()) == 6
+        index.close()
+
+    def test_partial_line_waits_for_newline(self, log_dir):
+        """Una línea sin salto final se indexa cuando se completa"""
+        index = LogIndex(log_dir)
+        index.refresh()
+
+        log_file = log_dir / "EXP-2024-001" / "RUN-001.log"
+        line = json.dumps(make_entry(6, "Línea parcial"), ensure_ascii=False)
+        with open(log_file, "a", encoding="utf-8") as f:
+            f.write(line[:20])
+
+        assert index.refresh() == 0
+
+        with open(log_file, "a", encoding="utf-8") as f:
+            f.write(line[20:] + "\n")
+
+        assert index.refresh() == 1
+        latest = index.query(LogFilters(), limit=1)[0]
+        assert latest["mensaje"] == "Línea parcial"
+        assert latest["id"] == "RUN-001-4"
+        index.close()
+
+    def test_skips_malformed_lines(self, log_dir):
+        """Las líneas que no son JSON se ignoran pero cuentan para el ID"""
+        index = LogIndex(log_dir)
+        log_file = log_dir / "EXP-2024-001" / "RUN-001.log"
+        with open(log_file, "a", encoding="utf-8") as f:
+            f.write("no es json\n")
+            f.write(json.dumps(make_entry(7, "Tras línea rota")) + "\n")
+
+        index.refresh()
+
+        latest = index.query(LogFilters(), limit=1)[0]
+        assert latest["id"] == "RUN-001-5"
+        index.close()
+
+    def test_truncated_file_is_reindexed(self, log_dir):
+        """Un archivo truncado y reescrito sustituye a sus entradas antiguas"""
+        index = LogIndex(log_dir)
+        index.refresh()
+        generation = index.generation()
+
+        log_file = log_dir / "EXP-2024-001" / "RUN-001.log"
+        log_file.write_text("")
+        write_log_lines(log_dir, "EXP-2024-001", "RUN-001", [
+            make_entry(9, "Reescrito", level="ERROR"),
+        ])
+
+        assert index.refresh() == 1
+        assert index.count(LogFilters()) == 3
+        assert index.count(LogFilters(search="Consultando")) == 0
+        assert index.count(LogFilters(expediente_id="EXP-2024-001")) == 1
+        latest = index.query(LogFilters(expediente_id="EXP-2024-001"), limit=1)[0]
+        assert latest["mensaje"] == "Reescrito"
+        assert latest["id"] == "RUN-001-1"
+        assert index.generation() > generation
+        index.close()
+
+    def test_replaced_file_with_larger_size_is_reindexed(self, log_dir):
+        """Un archivo sustituido por otro igual o mayor no se lee desde el offset viejo"""
+        index = LogIndex(log_dir)
+        index.refresh()
+
+        exp_dir = log_dir / "EXP-2024-001"
+        replacement = exp_dir / "RUN-001.log.tmp"
+        with open(replacement, "w", encoding="utf-8") as f:
+            for minute in range(10, 14):
+                entry = make_entry(minute, f"Nueva {minute}", level="ERROR")
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        os.replace(replacement, exp_dir / "RUN-001.log")
+
+        assert index.refresh() == 4
+        assert index.count(LogFilters()) == 6
+        assert index.count(LogFilters(level="WARNING")) == 0
+        assert index.count(LogFilters(search="Nueva")) == 4
+        index.close()
+
+    def test_rewritten_file_keeps_stats_consistent(self, log_dir):
+        """Los rollups de estadísticas descuentan las entradas reemplazadas"""
+        index = LogIndex(log_dir)
+        index.refresh()
+
+        log_file = log_dir / "EXP-2024-001" / "RUN-001.log"
+        entries = [make_entry(m, "Reescrito") for m in range(3)]
+        with open(log_file, "w", encoding="utf-8") as f:
+            for entry in entries:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+        index.refresh()
+        index.close()
+
+        response = client.get("/api/v1/logs/stats", params=STATS_WINDOW, headers=ADMIN_HEADERS)
+
+        data = response.json()
+        assert data["total"] == 5
+        assert data["by_level"] == {"INFO": 4, "ERROR": 1}
+        assert data["by_agent"] == {"GeneradorInforme": 1}
+
+        index = LogIndex(log_dir)
+        runs = index.runs(BASE_TIME - timedelta(hours=1), BASE_TIME + timedelta(hours=1))
+        assert [(r["agent_run_id"], r["agent"]) for r in runs] == [
+            ("RUN-001", None), ("RUN-002", "GeneradorInforme"),
+        ]
+        assert index.run_count() == 2
+        index.close()
+
+
+# =============================================================================
+# Tests para GET /api/v1/logs/export
+# =============================================================================
+
+class TestExportLogs:
+    """Tests del endpoint de exportación"""
+
+    def test_export_ndjson(self, log_dir):
+        """NDJSON: una entrada por línea, del más reciente al más antiguo"""
+        response = client.get("/api/v1/logs/export", headers=ADMIN_HEADERS)
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        assert "attachment" in response.headers["content-disposition"]
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert len(lines) == 5
+        assert lines[0]["message"] == "Ejecución finalizada"
+
+    def test_export_csv_with_filters(self, log_dir):
+        """CSV: cabecera + filas filtradas"""
+        response = client.get("/api/v1/logs/export",
+                              params={"format": "csv", "level": "ERROR,WARNING"},
+                              headers=ADMIN_HEADERS)
+
+        assert response.status_code == 200
+        rows = list(csv.DictReader(io.StringIO(response.text)))
+        assert len(rows) == 2
+        assert rows[0]["level"] == "ERROR"
+        assert rows[0]["agent"] == "GeneradorInforme"
+        assert json.loads(rows[0]["context"])["tool"] == "consultar_expediente"
+
+    def test_export_gzip(self, log_dir):
+        """gzip=true comprime al vuelo"""
+        response = client.get("/api/v1/logs/export", params={"gzip": "true"},
+                              headers=ADMIN_HEADERS)
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/gzip"
+        assert response.headers["content-disposition"].endswith('.ndjson.gz"')
+        lines = gzip.decompress(response.content).decode("utf-8").splitlines()
+        assert len(lines) == 5
+
+    def test_export_without_index(self, log_dir, monkeypatch):
+        """Sin índice se exporta archivo a archivo"""
+        monkeypatch.setattr(logs_router.settings, "LOG_INDEX_ENABLED", False)
+        response = client.get("/api/v1/logs/export", params={"expediente_id": "002"},
+                              headers=ADMIN_HEADERS)
+
+        ids = {json.loads(line)["id"] for line in response.text.splitlines()}
+        assert ids == {"RUN-002-1", "RUN-002-2"}
+
+    def test_export_iterates_in_batches(self, log_dir, monkeypatch):
+        """El índice se recorre en lotes por cursor, no en una única consulta"""
+        monkeypatch.setattr(logs_router, "EXPORT_BATCH_SIZE", 2)
+        response = client.get("/api/v1/logs/export", headers=ADMIN_HEADERS)
+
+        ids = [json.loads(line)["id"] for line in response.text.splitlines()]
+        assert len(ids) == 5
+        assert len(set(ids)) == 5
+
+    def test_export_requires_admin_token(self, log_dir):
+        """Sin token no se exporta"""
+        response = client.get("/api/v1/logs/export")
+        assert response.status_code in (401, 422)
+
+
+# =============================================================================
+# Tests para GET /api/v1/logs/stats
+# =============================================================================
+
+STATS_WINDOW = {
+    "date_from": "2024-01-15T00:00:00Z",
+    "date_to": "2024-01-16T00:00:00Z",
+}
+
+
+class TestLogStats:
+    """Tests para el endpoint de estadísticas de logs"""
+
+    def test_stats_counts(self, log_dir):
+        """Conteos por nivel, agente y expediente en la ventana"""
+        response = client.get("/api/v1/logs/stats", params=STATS_WINDOW, headers=ADMIN_HEADERS)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total"] == 5
+        assert data["by_level"] == {"INFO": 3, "WARNING": 1, "ERROR": 1}
+        assert data["by_agent"] == {"ValidadorDocumental": 1, "GeneradorInforme": 1}
+        assert data["by_expediente"] == {"EXP-2024-001": 3, "EXP-2024-002": 2}
+
+    def test_stats_timeline_buckets(self, log_dir):
+        """El timeline agrupa por la granularidad pedida"""
+        response = client.get(
+            "/api/v1/logs/stats",
+            params={**STATS_WINDOW, "bucket": "minute"},
+            headers=ADMIN_HEADERS,
+        )
+        timeline = response.json()["timeline"]
+        assert len(timeline) == 5
+        assert timeline[3]["by_level"] == {"ERROR": 1}
+
+        response = client.get(
+            "/api/v1/logs/stats",
+            params={**STATS_WINDOW, "bucket": "hour"},
+            headers=ADMIN_HEADERS,
+        )
+        timeline = response.json()["timeline"]
+        assert len(timeline) == 1
+        assert timeline[0]["timestamp"].startswith("2024-01-15T10:00:00")
+        assert timeline[0]["total"] == 5
+
+    def test_stats_updates_incrementally(self, log_dir):
+        """Las entradas nuevas se suman a los rollups al refrescar"""
+        write_log_lines(log_dir, "EXP-2024-001", "RUN-001", [
+            make_entry(5, "Nueva entrada", level="ERROR"),
+        ])
+        response = client.get("/api/v1/logs/stats", params=STATS_WINDOW, headers=ADMIN_HEADERS)
+
+        data = response.json()
+        assert data["total"] == 6
+        assert data["by_level"]["ERROR"] == 2
+
+    def test_stats_window_excludes_entries(self, log_dir):
+        """Fuera de la ventana no se cuentan entradas"""
+        response = client.get(
+            "/api/v1/logs/stats",
+            params={"date_from": "2024-01-16T00:00:00Z", "date_to": "2024-01-17T00:00:00Z"},
+            headers=ADMIN_HEADERS,
+        )
+        assert response.json()["total"] == 0
+
+    def test_stats_without_index(self, log_dir, monkeypatch):
+        """Sin índice de logs el endpoint no está disponible"""
+        monkeypatch.setattr(logs_router.settings, "LOG_INDEX_ENABLED", False)
+        response = client.get("/api/v1/logs/stats", headers=ADMIN_HEADERS)
+        assert response.status_code == 503
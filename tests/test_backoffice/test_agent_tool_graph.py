@@ -0,0 +1,122 @@
+# backoffice/tests/test_agent_tool_graph.py
+
+"""
+Tests del grafo de llamadas a tools de los agentes mock (AgentMock._run_tools).
+"""
+
+import asyncio
+import json
+import pytest
+from unittest.mock import Mock
+
+from backoffice.agents import (
+    AnalizadorSubvencion, GeneradorInforme, ToolCall, ValidadorDocumental
+)
+from backoffice.mcp.exceptions import MCPToolError
+
+EXPEDIENTE = {"content": [{"type": "text", "text": json.dumps({
+    "documentos": [{"tipo": "SOLICITUD"}, {"tipo": "IDENTIFICACION"}, {"tipo": "BANCARIO"}]
+})}]}
+
+
+class FakeRegistry:
+    """Registry que tarda `latency` por llamada (o la de `latencies`) y anota inicio y fin"""
+
+    def __init__(self, latency: float = 0.05, fail: str = "", latencies=None):
+        self.latency = latency
+        self.latencies = latencies or {}
+        self.fail = fail
+        self.events = []
+
+    async def call_tool(self, tool_name, arguments):
+        self.events.append(("start", tool_name))
+        await asyncio.sleep(self.latencies.get(tool_name, self.latency))
+        if tool_name == self.fail:
+            raise MCPToolError(codigo="MCP_TOOL_ERROR", mensaje="Error")
+        self.events.append(("end", tool_name))
+        return EXPEDIENTE if tool_name == "consultar_expediente" else {"ok": tool_name}
+
+
+def _agent(registry: FakeRegistry, agent_class=ValidadorDocumental):
+    return agent_class(
+        expediente_id="EXP-2024-001",
+        tarea_id="TAREA-001",
+        run_id="RUN-TEST",
+        mcp_registry=registry,
+        logger=Mock()
+    )
+
+
+@pytest.mark.asyncio
+async def test_independent_calls_run_concurrently():
+    """Las llamadas sin dependencias se solapan y se devuelven por ID"""
+    registry = FakeRegistry()
+    agent = _agent(registry)
+
+    results = await agent._run_tools([
+        ToolCall("a", "actualizar_datos", {"expediente_id": "EXP-2024-001"}),
+        ToolCall("b", "añadir_anotacion", {"expediente_id": "EXP-2024-001"}),
+    ])
+
+    assert results == {"a": {"ok": "actualizar_datos"}, "b": {"ok": "añadir_anotacion"}}
+    assert [event for event, _ in registry.events] == ["start", "start", "end", "end"]
+    assert agent.get_tools_used() == ["actualizar_datos", "añadir_anotacion"]
+
+
+@pytest.mark.asyncio
+async def test_after_and_serialize_order_calls():
+    """after y serialize (mismo expediente) encadenan las llamadas"""
+    registry = FakeRegistry(latency=0.01)
+    agent = _agent(registry)
+
+    await agent._run_tools([
+        ToolCall("leer", "consultar_expediente", {"expediente_id": "EXP-2024-001"}),
+        ToolCall("w1", "actualizar_datos", {"expediente_id": "EXP-2024-001"}, after=("leer",), serialize=True),
+        ToolCall("w2", "añadir_anotacion", {"expediente_id": "EXP-2024-001"}, serialize=True),
+    ])
+
+    assert registry.events == [
+        ("start", "consultar_expediente"), ("end", "consultar_expediente"),
+        ("start", "actualizar_datos"), ("end", "actualizar_datos"),
+        ("start", "añadir_anotacion"), ("end", "añadir_anotacion"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_failure_cancels_pending_calls():
+    """El primer error se propaga tal cual y las llamadas pendientes se cancelan"""
+    registry = FakeRegistry(latency=0.01, fail="actualizar_datos")
+    agent = _agent(registry)
+
+    with pytest.raises(MCPToolError):
+        await agent._run_tools([
+            ToolCall("w1", "actualizar_datos", {}),
+            ToolCall("w2", "añadir_anotacion", {}, after=("w1",)),
+        ])
+    await asyncio.sleep(0.02)
+
+    assert ("start", "añadir_anotacion") not in registry.events
+
+
+@pytest.mark.asyncio
+async def test_after_must_reference_previous_calls():
+    """after solo puede referenciar llamadas declaradas antes (sin ciclos)"""
+    agent = _agent(FakeRegistry())
+
+    with pytest.raises(ValueError):
+        await agent._run_tools([ToolCall("a", "actualizar_datos", {}, after=("b",))])
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("agent_class", [ValidadorDocumental, AnalizadorSubvencion, GeneradorInforme])
+async def test_agent_writes_are_ordered(agent_class):
+    """Los agentes escriben datos y anotación en orden: el historial no depende de latencias"""
+    # Si fueran en paralelo, la anotación (más rápida) terminaría antes
+    registry = FakeRegistry(latencies={"actualizar_datos": 0.05, "añadir_anotacion": 0.01})
+    await _agent(registry, agent_class).execute()
+
+    writes = [event for event in registry.events if event[1] != "consultar_expediente"]
+    assert writes == [
+        ("start", "actualizar_datos"), ("end", "actualizar_datos"),
+        ("start", "añadir_anotacion"), ("end", "añadir_anotacion"),
+    ]
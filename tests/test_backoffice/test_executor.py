@@ -784,3 +784,59 @@ async def test_registry_factory_receives_token(executor, mock_registry_factory,
     # Verificar que create fue llamado con el token
     call_args = mock_registry_factory.create.call_args
     assert call_args[0][1] == "test-jwt-token"  # Segundo argumento es el token
+
+
+@pytest.mark.asyncio
+async def test_registry_factory_receives_prefetch(executor, mock_registry_factory, agent_config):
+    """Test: Las llamadas de prefetch llegan al registry con los argumentos resueltos"""
+    agent_config.prefetch = [
+        {"tool": "consultar_expediente", "arguments": {"expediente_id": "{expediente_id}"}},
+        {"tool": "generar_documento", "arguments": {}}  # No es tool del agente
+    ]
+
+    result = await executor.execute(
+        token="test-jwt-token",
+        expediente_id="EXP-2024-001",
+        tarea_id="TAREA-001",
+        agent_config=agent_config
+    )
+
+    assert result.success is True
+    assert mock_registry_factory.create.call_args.kwargs["prefetch"] == [
+        {"tool": "consultar_expediente", "arguments": {"expediente_id": "EXP-2024-001"}}
+    ]
+
+
+@pytest.mark.asyncio
+async def test_prefetch_keeps_literal_braces(executor, mock_registry_factory, agent_config):
+    """Test: Solo se sustituyen {expediente_id} y {tarea_id}; otras llaves se respetan"""
+    agent_config.prefetch = [
+        {
+            "tool": "consultar_expediente",
+            "arguments": {
+                "expediente_id": "{expediente_id}",
+                "fields": "datos.{solicitante}",
+                "nota": "{tarea_id} {",
+            }
+        },
+        {"tool": "consultar_expediente", "arguments": ["no", "es", "un", "dict"]},
+    ]
+
+    result = await executor.execute(
+        token="test-jwt-token",
+        expediente_id="EXP-2024-001",
+        tarea_id="TAREA-001",
+        agent_config=agent_config
+    )
+
+    assert result.success is True
+    assert mock_registry_factory.create.call_args.kwargs["prefetch"] == [
+        {
+            "tool": "consultar_expediente",
+            "arguments": {
+                "expediente_id": "EXP-2024-001",
+                "fields": "datos.{solicitante}",
+                "nota": "TAREA-001 {",
+            }
+        }
+    ]
@@ -355,3 +355,45 @@ def test_validate_jwt_no_required_permissions(jwt_secret, jwt_algorithm, valid_c
 
     assert result.exp_id == "EXP-2024-001"
     assert result.permisos == []
+
+
+def test_validate_jwt_cached_token_rechecks_claims(jwt_secret, jwt_algorithm, valid_claims, monkeypatch):
+    """Test: Un token en caché no se vuelve a decodificar, pero sus claims se comprueban"""
+    from backoffice.auth import jwt_validator
+
+    token = jwt.encode(valid_claims, jwt_secret, algorithm=jwt_algorithm)
+    validate_jwt(token, jwt_secret, jwt_algorithm, expected_expediente_id="EXP-2024-001")
+
+    def no_decode(*args, **kwargs):
+        raise AssertionError("jwt.decode no debería llamarse con el token en caché")
+
+    monkeypatch.setattr(jwt_validator.jwt, "decode", no_decode)
+
+    claims = validate_jwt(token, jwt_secret, jwt_algorithm, expected_expediente_id="EXP-2024-001")
+    assert claims.jti == "test-jti-123"
+
+    with pytest.raises(JWTValidationError) as exc_info:
+        validate_jwt(token, jwt_secret, jwt_algorithm, expected_expediente_id="EXP-2024-002")
+    assert exc_info.value.codigo == "AUTH_EXPEDIENTE_MISMATCH"
+
+    # Otro secreto: otra entrada (nunca se reutiliza una verificación ajena)
+    monkeypatch.undo()
+    with pytest.raises(JWTValidationError) as exc_info:
+        validate_jwt(token, "otro-secreto", jwt_algorithm, expected_expediente_id="EXP-2024-001")
+    assert exc_info.value.codigo == "AUTH_INVALID_TOKEN"
+
+
+def test_verified_token_cache_expiry_and_bound(valid_claims):
+    """Test: Las entradas caducan en el exp del token y la caché está acotada"""
+    from backoffice.auth.jwt_validator import VerifiedTokenCache
+
+    cache = VerifiedTokenCache(max_entries=2)
+    expired = JWTClaims(**{**valid_claims, "exp": int(datetime.now(timezone.utc).timestamp()) - 1})
+    cache.put(b"expirado", expired)
+    assert cache.get(b"expirado") is None
+
+    for key in (b"a", b"b", b"c"):
+        cache.put(key, JWTClaims(**valid_claims))
+    assert len(cache) == 2
+    assert cache.get(b"a") is None
+    assert cache.get(b"c") is not None
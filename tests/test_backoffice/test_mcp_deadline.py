@@ -0,0 +1,150 @@
+# backoffice/tests/test_mcp_deadline.py
+
+"""
+Tests de la propagación del plazo de la ejecución a las llamadas MCP.
+"""
+
+import httpx
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from backoffice.config.models import MCPServerConfig, MCPAuthConfig, MCPServersConfig
+from backoffice.mcp import resilience
+from backoffice.mcp.client import MCPClient
+from backoffice.mcp.deadline import DEADLINE_HEADER, Deadline
+from backoffice.mcp.exceptions import MCPDeadlineError
+from backoffice.mcp.registry import MCPClientRegistry
+from backoffice.mcp.resilience import CLOSED, GuardConfig, ServerGuard
+
+
+class FakeClock:
+    """Reloj manual"""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def server_config():
+    """Servidor MCP con timeout de 30s"""
+    return MCPServerConfig(
+        id="test-mcp",
+        name="Test MCP",
+        description="Test server",
+        url="http://localhost:8000",
+        type="http",
+        auth=MCPAuthConfig(type="jwt", audience="test-audience"),
+        timeout=30,
+        enabled=True
+    )
+
+
+def test_deadline_remaining_and_timeout():
+    """El timeout de cada llamada es el menor entre el del servidor y lo que queda"""
+    clock = FakeClock()
+    deadline = Deadline(10, clock=clock)
+
+    assert deadline.timeout_for(30, "tool") == 10
+    clock.now += 8
+    assert deadline.timeout_for(30, "tool") == pytest.approx(2)
+    assert deadline.timeout_for(1, "tool") == 1
+
+    clock.now += 2
+    assert deadline.expired
+    with pytest.raises(MCPDeadlineError) as exc_info:
+        deadline.timeout_for(30, "tool")
+    assert exc_info.value.codigo == "MCP_DEADLINE_EXCEEDED"
+
+
+def test_deadline_cancel():
+    """Cancelar vence el plazo al momento y las llamadas fallan con RUN_CANCELLED"""
+    clock = FakeClock()
+    deadline = Deadline(10, clock=clock)
+
+    deadline.cancel()
+
+    assert deadline.cancelled and deadline.expired
+    assert deadline.remaining() == 0
+    with pytest.raises(MCPDeadlineError) as exc_info:
+        deadline.check("tool")
+    assert exc_info.value.codigo == "RUN_CANCELLED"
+
+
+@pytest.mark.asyncio
+async def test_client_sends_remaining_budget(server_config):
+    """Cada request lleva el timeout acotado y el plazo restante en el header"""
+    clock = FakeClock()
+    client = MCPClient(server_config, "token", deadline=Deadline(5, clock=clock))
+
+    response = MagicMock()
+    response.json = MagicMock(return_value={"jsonrpc": "2.0", "id": 1, "result": {"ok": True}})
+    http_client = MagicMock()
+    http_client.post = AsyncMock(return_value=response)
+    client._get_async_client = MagicMock(return_value=http_client)
+
+    clock.now += 3
+    assert await client.call_tool("consultar_expediente", {}) == {"ok": True}
+
+    kwargs = http_client.post.call_args.kwargs
+    assert kwargs["timeout"] == pytest.approx(2)
+    assert kwargs["headers"] == {DEADLINE_HEADER: "2000"}
+
+
+@pytest.mark.asyncio
+async def test_client_timeout_at_deadline(server_config):
+    """Un timeout causado por el plazo se traduce a MCP_DEADLINE_EXCEEDED"""
+    clock = FakeClock()
+    client = MCPClient(server_config, "token", deadline=Deadline(5, clock=clock))
+
+    async def post(*args, **kwargs):
+        clock.now += kwargs["timeout"]
+        raise httpx.ReadTimeout("timeout")
+
+    http_client = MagicMock()
+    http_client.post = post
+    client._get_async_client = MagicMock(return_value=http_client)
+
+    with pytest.raises(MCPDeadlineError) as exc_info:
+        await client.call_tool("consultar_expediente", {})
+    assert exc_info.value.codigo == "MCP_DEADLINE_EXCEEDED"
+
+    # Sin tiempo restante ni siquiera se envía la request
+    http_client.post = AsyncMock()
+    with pytest.raises(MCPDeadlineError):
+        await client.call_tool("consultar_expediente", {})
+    http_client.post.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_registry_stops_calls_after_deadline():
+    """Con el plazo agotado el registry no ocupa hueco ni llama al servidor"""
+    guard = ServerGuard("test-mcp", GuardConfig(min_calls=1))
+    resilience._guards["test-mcp"] = guard
+
+    clock = FakeClock()
+    client = MagicMock()
+    client.server_id = "test-mcp"
+    client.call_tool = AsyncMock(side_effect=MCPDeadlineError(
+        codigo="MCP_DEADLINE_EXCEEDED", mensaje="Plazo agotado"
+    ))
+
+    registry = MCPClientRegistry(MCPServersConfig(mcp_servers=[]), "token", deadline=Deadline(5, clock=clock))
+    registry._clients = {"test-mcp": client}
+    registry._tool_routing = {"consultar_expediente": "test-mcp"}
+    registry._initialized = True
+
+    # Cortada por el plazo durante la llamada: no cuenta como fallo del servidor
+    with pytest.raises(MCPDeadlineError):
+        await registry.call_tool("consultar_expediente", {})
+    assert guard.snapshot()["state"] == CLOSED
+    assert guard.in_flight == 0
+
+    clock.now += 5
+    with pytest.raises(MCPDeadlineError):
+        await registry.call_tool("consultar_expediente", {})
+    with pytest.raises(MCPDeadlineError):
+        registry.call_tool_sync("consultar_expediente", {})
+    assert client.call_tool.await_count == 1
@@ -1,4 +1,5 @@
 # backoffice/tests/test_mcp_integration.py
+import json
 import pytest
 from unittest.mock import AsyncMock, patch, MagicMock
 import httpx
@@ -667,3 +668,80 @@ async def test_mcp_registry_list_tools_sync_server_not_found(mock_server_config,
         assert exc_info.value.codigo == "MCP_SERVER_NOT_FOUND"
 
     await registry.close()
+
+
+@pytest.mark.asyncio
+async def test_mcp_client_iter_texto_documento(mock_server_config, test_token):
+    """Test: iter_texto_documento pide fragmentos siguiendo next_offset"""
+    client = MCPClient(mock_server_config, test_token)
+    texto = "abcdefghij" * 5
+
+    async def async_post(*args, **kwargs):
+        arguments = kwargs["json"]["params"]["arguments"]
+        offset, length = arguments["offset"], arguments["length"]
+        end = min(offset + length, len(texto))
+        chunk = {
+            "texto_markdown": texto[offset:end],
+            "offset": offset,
+            "total_length": len(texto),
+            "has_more": end < len(texto),
+            "next_offset": end if end < len(texto) else None
+        }
+        return create_mock_response({
+            "jsonrpc": "2.0",
+            "id": 1,
+            "result": {"content": [{"type": "text", "text": json.dumps(chunk)}]}
+        })
+
+    mock_client = MagicMock()
+    mock_client.post = MagicMock(side_effect=async_post)
+
+    with patch.object(client, '_get_async_client', return_value=mock_client):
+        chunks = [c async for c in client.iter_texto_documento("EXP-2024-001", "DOC-001", chunk_size=20)]
+
+    assert chunks == [texto[0:20], texto[20:40], texto[40:50]]
+    assert mock_client.post.call_count == 3
+
+
+@pytest.mark.asyncio
+async def test_mcp_registry_streamable_http_client(mock_server_config, test_token):
+    """Test: type: streamable_http usa MCPSessionClient con endpoint /mcp por defecto"""
+    from backoffice.mcp.session_client import MCPSessionClient
+
+    session_config = MCPServerConfig(
+        id="session-mcp",
+        name="Session MCP",
+        description="Test server",
+        url="http://localhost:8000",
+        type="streamable_http",
+        auth=MCPAuthConfig(type="jwt", audience="test-audience")
+    )
+    assert session_config.endpoint == "/mcp"
+
+    config = MCPServersConfig(mcp_servers=[mock_server_config, session_config])
+    registry = MCPClientRegistry(config, test_token)
+
+    with patch.object(MCPClient, "list_tools", AsyncMock(return_value={"tools": []})), \
+         patch.object(MCPSessionClient, "list_tools", AsyncMock(return_value={"tools": []})):
+        await registry.initialize()
+
+    assert type(registry._clients["test-mcp"]) is MCPClient
+    assert isinstance(registry._clients["session-mcp"], MCPSessionClient)
+    assert registry._clients["session-mcp"]._session_url == "http://localhost:8000/mcp"
+
+
+def test_mcp_server_config_transport_fields():
+    """Test: url obligatoria salvo en stdio, que requiere command"""
+    auth = MCPAuthConfig(type="jwt", audience="test-audience")
+
+    with pytest.raises(ValueError, match="requiere 'url'"):
+        MCPServerConfig(id="a", name="A", description="", type="http", auth=auth)
+
+    with pytest.raises(ValueError, match="requiere 'command'"):
+        MCPServerConfig(id="b", name="B", description="", type="stdio", auth=auth)
+
+    config = MCPServerConfig(
+        id="c", name="C", description="", type="stdio", auth=auth,
+        command=["python", "-m", "mcp_mock.mcp_expedientes.server_stdio"], pool_size=4
+    )
+    assert config.url is None and config.pool_size == 4
@@ -0,0 +1,121 @@
+# backoffice/tests/test_mcp_prefetch.py
+
+"""
+Tests del prefetch de llamadas MCP durante la inicialización del registry.
+"""
+
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from backoffice.config.models import MCPServersConfig
+from backoffice.mcp.exceptions import MCPConnectionError
+from backoffice.mcp.registry import MCPClientRegistry
+
+EXPEDIENTE = {"content": [{"type": "text", "text": "{\"id\": \"EXP-2024-001\"}"}]}
+PREFETCH = [{"tool": "consultar_expediente", "arguments": {"expediente_id": "EXP-2024-001"}}]
+
+
+def _registry(client, prefetch=PREFETCH) -> MCPClientRegistry:
+    """Registry con un único cliente ya creado (initialize solo hace discovery)"""
+    registry = MCPClientRegistry(MCPServersConfig(mcp_servers=[]), "token", prefetch=prefetch)
+    registry._clients = {"test-mcp": client}
+    return registry
+
+
+def _client(**call_tool) -> MagicMock:
+    client = MagicMock()
+    client.server_id = "test-mcp"
+    client.list_tools = AsyncMock(return_value={"tools": [{"name": "consultar_expediente"}]})
+    client.call_tool = AsyncMock(**call_tool)
+    client.close = AsyncMock()
+    return client
+
+
+async def _initialize(registry: MCPClientRegistry) -> None:
+    await asyncio.gather(*[
+        registry._discover_tools(server_id) for server_id in registry._clients
+    ])
+    registry._initialized = True
+    await asyncio.sleep(0)  # Deja arrancar las tareas de prefetch
+
+
+@pytest.mark.asyncio
+async def test_prefetch_result_is_used_once():
+    """La primera llamada del agente recoge el prefetch; las siguientes van al servidor"""
+    client = _client(return_value=EXPEDIENTE)
+    registry = _registry(client)
+    await _initialize(registry)
+
+    assert client.call_tool.await_count == 1  # Lanzado tras el discovery
+
+    assert await registry.call_tool("consultar_expediente", {"expediente_id": "EXP-2024-001"}) == EXPEDIENTE
+    assert client.call_tool.await_count == 1
+    assert registry.first_result_prefetched is True
+    assert registry.first_result_at is not None
+
+    await registry.call_tool("consultar_expediente", {"expediente_id": "EXP-2024-001"})
+    assert client.call_tool.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_prefetch_only_matches_same_arguments():
+    """Otros argumentos no usan el prefetch (None cuenta como no enviado)"""
+    client = _client(return_value=EXPEDIENTE)
+    registry = _registry(client)
+    await _initialize(registry)
+
+    await registry.call_tool("consultar_expediente", {"expediente_id": "EXP-2024-002"})
+    assert client.call_tool.await_count == 2
+
+    await registry.call_tool("consultar_expediente", {"expediente_id": "EXP-2024-001", "fields": None})
+    assert client.call_tool.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_prefetch_is_retried():
+    """Si el prefetch falla, la llamada del agente se repite contra el servidor"""
+    client = _client(side_effect=[MCPConnectionError(codigo="MCP_TIMEOUT", mensaje="Timeout"), EXPEDIENTE])
+    registry = _registry(client)
+    await _initialize(registry)
+
+    assert await registry.call_tool("consultar_expediente", {"expediente_id": "EXP-2024-001"}) == EXPEDIENTE
+    assert client.call_tool.await_count == 2
+    assert registry.first_result_prefetched is False
+
+
+@pytest.mark.asyncio
+async def test_sync_call_waits_for_prefetch():
+    """call_tool_sync (hilo de CrewAI) espera al prefetch en curso"""
+    release = asyncio.Event()
+
+    async def slow_call(tool_name, arguments):
+        await release.wait()
+        return EXPEDIENTE
+
+    client = _client(side_effect=slow_call)
+    client.call_tool_sync = MagicMock()
+    registry = _registry(client)
+    await _initialize(registry)
+
+    call = asyncio.get_running_loop().run_in_executor(
+        None, registry.call_tool_sync, "consultar_expediente", {"expediente_id": "EXP-2024-001"}
+    )
+    await asyncio.sleep(0.05)
+    release.set()
+
+    assert await asyncio.wait_for(call, timeout=2) == EXPEDIENTE
+    client.call_tool_sync.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_close_cancels_pending_prefetch():
+    """Cerrar el registry cancela los prefetch que el agente no llegó a usar"""
+    async def hang(tool_name, arguments):
+        await asyncio.sleep(60)
+
+    registry = _registry(_client(side_effect=hang))
+    await _initialize(registry)
+
+    await asyncio.wait_for(registry.close(), timeout=1)
+    assert all(task.cancelled() for task in registry._prefetch_tasks)
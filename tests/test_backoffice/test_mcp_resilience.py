@@ -0,0 +1,257 @@
+# backoffice/tests/test_mcp_resilience.py
+
+"""
+Tests del circuit breaker y del límite de concurrencia por servidor MCP.
+"""
+
+import asyncio
+import threading
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from backoffice.mcp import resilience
+from backoffice.mcp.exceptions import MCPConnectionError, MCPToolError
+from backoffice.mcp.registry import MCPClientRegistry
+from backoffice.mcp.resilience import (
+    CLOSED, HALF_OPEN, OPEN, GuardConfig, ServerGuard, get_server_guard
+)
+from backoffice.config.models import MCPServersConfig
+
+
+class FakeClock:
+    """Reloj manual para controlar el paso de abierto a semiabierto"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _guard(clock=None, **overrides) -> ServerGuard:
+    config = GuardConfig(
+        window=10,
+        min_calls=4,
+        error_rate=0.5,
+        slow_call_seconds=1.0,
+        open_seconds=30.0,
+        half_open_calls=2,
+        limit_initial=4,
+        limit_min=1,
+        limit_max=8,
+        limit_latency_seconds=0.5,
+        queue_seconds=0.05
+    )
+    for key, value in overrides.items():
+        setattr(config, key, value)
+    return ServerGuard("test-mcp", config, clock=clock or FakeClock())
+
+
+async def _call(guard: ServerGuard, ok: bool = True, latency: float = 0.01):
+    await guard.acquire()
+    guard.release(ok, latency)
+
+
+@pytest.mark.asyncio
+async def test_circuit_opens_on_errors_and_fails_fast():
+    """Con la tasa de errores por encima del umbral el circuito se abre"""
+    guard = _guard()
+
+    for ok in (True, False, True, False):
+        await _call(guard, ok=ok)
+
+    assert guard.snapshot()["state"] == OPEN
+    assert guard.snapshot()["times_opened"] == 1
+
+    with pytest.raises(MCPConnectionError) as exc_info:
+        await guard.acquire()
+    assert exc_info.value.codigo == "MCP_SERVER_UNAVAILABLE"
+    assert guard.snapshot()["rejected_open"] == 1
+
+
+@pytest.mark.asyncio
+async def test_circuit_opens_on_slow_calls():
+    """Una mayoría de llamadas lentas también abre el circuito"""
+    guard = _guard(slow_call_rate=0.75)
+
+    for _ in range(3):
+        await _call(guard, latency=2.0)
+    assert guard.snapshot()["state"] == CLOSED
+
+    await _call(guard, latency=2.0)
+    assert guard.snapshot()["state"] == OPEN
+
+
+@pytest.mark.asyncio
+async def test_half_open_closes_after_successful_probes():
+    """Pasado open_seconds deja pasar llamadas de prueba y se cierra si van bien"""
+    clock = FakeClock()
+    guard = _guard(clock, limit_min=2)
+    for _ in range(4):
+        await _call(guard, ok=False)
+    assert guard.snapshot()["state"] == OPEN
+
+    clock.now = 31.0
+    assert guard.snapshot()["state"] == HALF_OPEN
+
+    # Solo half_open_calls llamadas de prueba a la vez
+    await guard.acquire()
+    await guard.acquire()
+    with pytest.raises(MCPConnectionError):
+        await guard.acquire()
+
+    guard.release(True, 0.01)
+    assert guard.snapshot()["state"] == HALF_OPEN
+    guard.release(True, 0.01)
+    assert guard.snapshot()["state"] == CLOSED
+
+
+@pytest.mark.asyncio
+async def test_half_open_reopens_on_failed_probe():
+    """Un fallo en semiabierto vuelve a abrir el circuito"""
+    clock = FakeClock()
+    guard = _guard(clock)
+    for _ in range(4):
+        await _call(guard, ok=False)
+
+    clock.now = 31.0
+    await _call(guard, ok=False)
+
+    assert guard.snapshot()["state"] == OPEN
+    assert guard.snapshot()["times_opened"] == 2
+
+
+@pytest.mark.asyncio
+async def test_aimd_limit():
+    """El límite sube con llamadas rápidas y baja multiplicativamente con lentas o fallidas"""
+    guard = _guard(min_calls=100)
+
+    for _ in range(8):
+        await _call(guard)
+    assert guard.limit > 5.0
+
+    before = guard.limit
+    await _call(guard, latency=0.6)
+    assert guard.limit == pytest.approx(before * 0.7)
+
+    for _ in range(20):
+        await _call(guard, ok=False)
+    assert guard.limit == 1.0
+
+
+@pytest.mark.asyncio
+async def test_limit_queues_and_rejects():
+    """Por encima del límite se espera un hueco; si no llega, MCP_SERVER_UNAVAILABLE"""
+    guard = _guard(limit_initial=1, limit_max=1, queue_seconds=0.5)
+
+    await guard.acquire()
+    waiter = asyncio.create_task(guard.acquire())
+    await asyncio.sleep(0.01)
+    assert not waiter.done()
+
+    guard.release(True, 0.01)
+    await asyncio.wait_for(waiter, timeout=1)
+    assert guard.in_flight == 1
+
+    guard.config.queue_seconds = 0.02
+    with pytest.raises(MCPConnectionError) as exc_info:
+        await guard.acquire()
+    assert exc_info.value.codigo == "MCP_SERVER_UNAVAILABLE"
+    assert guard.snapshot()["rejected_limit"] == 1
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_take_the_next_slot():
+    """Una espera cancelada sale de la cola: el hueco liberado es para la siguiente"""
+    guard = _guard(limit_initial=2, limit_max=2, queue_seconds=1.0)
+    await guard.acquire()
+    await guard.acquire()
+
+    waiter_b = asyncio.create_task(guard.acquire())
+    await asyncio.sleep(0.01)
+    waiter_b.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter_b
+
+    waiter_c = asyncio.create_task(guard.acquire())
+    await asyncio.sleep(0.01)
+    guard.release(True, 0.01)
+
+    await asyncio.wait_for(waiter_c, timeout=0.5)
+    assert guard.in_flight == 2
+
+
+def test_limit_sync_interface():
+    """acquire_sync espera el hueco liberado desde otro hilo"""
+    guard = _guard(limit_initial=1, queue_seconds=2.0)
+    guard.acquire_sync()
+
+    timer = threading.Timer(0.05, guard.release, args=(True, 0.01))
+    timer.start()
+    guard.acquire_sync()
+    timer.join()
+
+    assert guard.in_flight == 1
+
+
+def test_disabled_guard_is_noop():
+    """Con MCP_BREAKER_ENABLED=false no se limita ni se abre nada"""
+    guard = _guard(enabled=False, limit_initial=1)
+
+    for _ in range(10):
+        guard.acquire_sync()
+        guard.release(False, 0.01)
+
+    assert guard.snapshot()["state"] == CLOSED
+    assert guard.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_registry_opens_circuit_on_connection_errors():
+    """El registry registra los fallos de conexión y deja de llamar al servidor"""
+    resilience._guards["test-mcp"] = _guard()
+
+    client = MagicMock()
+    client.server_id = "test-mcp"
+    client.call_tool = AsyncMock(side_effect=MCPConnectionError(
+        codigo="MCP_TIMEOUT", mensaje="Timeout"
+    ))
+
+    registry = MCPClientRegistry(MCPServersConfig(mcp_servers=[]), "token")
+    registry._clients = {"test-mcp": client}
+    registry._tool_routing = {"consultar_expediente": "test-mcp"}
+    registry._initialized = True
+
+    for _ in range(4):
+        with pytest.raises(MCPConnectionError) as exc_info:
+            await registry.call_tool("consultar_expediente", {})
+        assert exc_info.value.codigo == "MCP_TIMEOUT"
+
+    with pytest.raises(MCPConnectionError) as exc_info:
+        await registry.call_tool("consultar_expediente", {})
+    assert exc_info.value.codigo == "MCP_SERVER_UNAVAILABLE"
+    assert client.call_tool.await_count == 4
+    assert get_server_guard("test-mcp").snapshot()["state"] == OPEN
+
+
+@pytest.mark.asyncio
+async def test_registry_tool_errors_do_not_open_circuit():
+    """Un error de la tool es una respuesta normal del servidor"""
+    resilience._guards["test-mcp"] = _guard()
+
+    client = MagicMock()
+    client.server_id = "test-mcp"
+    client.call_tool = AsyncMock(side_effect=MCPToolError(
+        codigo="MCP_TOOL_ERROR", mensaje="Error"
+    ))
+
+    registry = MCPClientRegistry(MCPServersConfig(mcp_servers=[]), "token")
+    registry._clients = {"test-mcp": client}
+    registry._tool_routing = {"consultar_expediente": "test-mcp"}
+    registry._initialized = True
+
+    for _ in range(6):
+        with pytest.raises(MCPToolError):
+            await registry.call_tool("consultar_expediente", {})
+
+    assert get_server_guard("test-mcp").snapshot()["state"] == CLOSED
@@ -86,12 +86,14 @@ def test_registry_factory_protocol_structure():
     # Verificar que es async
     assert inspect.iscoroutinefunction(method)
 
-    # Verificar firma: debe tener 2 parámetros (self, config, token)
+    # Verificar firma: (self, config, token, deadline=None, prefetch=None)
     sig = inspect.signature(method)
     params = list(sig.parameters.keys())
-    assert len(params) == 3  # self + config + token
+    assert len(params) == 5  # self + config + token + deadline + prefetch
     assert 'config' in params
     assert 'token' in params
+    assert sig.parameters['deadline'].default is None
+    assert sig.parameters['prefetch'].default is None
 
 
 def test_logger_factory_protocol_structure():
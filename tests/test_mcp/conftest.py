@@ -44,6 +44,17 @@ def exp_id_certificado(test_constants):
     return test_constants["default_exp_ids"][2]
 
 
+@pytest.fixture(autouse=True)
+def blob_store(tmp_path):
+    """Almacén de blobs temporal: los textos que se escriben en un test no quedan en data/"""
+    from mcp_mock.mcp_expedientes.blobs import BlobStore, set_blob_store
+
+    store = BlobStore(tmp_path / "blobs")
+    set_blob_store(store)
+    yield store
+    set_blob_store(None)
+
+
 @pytest.fixture
 def restore_expediente_data():
     """
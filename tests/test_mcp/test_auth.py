@@ -219,3 +219,53 @@ async def test_validacion_resource_uri_no_autorizado():
 
     assert exc_info.value.status_code == 403
     assert "no autorizado" in exc_info.value.message.lower()
+
+
+@pytest.mark.asyncio
+async def test_token_cache_skips_signature_check(monkeypatch):
+    """
+    Test adicional: Caché de tokens verificados
+
+    Given: Un token ya validado
+    When: Se valida de nuevo para otra tool y otro expediente
+    Then: No se vuelve a verificar la firma, pero sí los permisos y el expediente
+    """
+    from mcp_mock.mcp_expedientes import auth
+
+    token = token_consulta("EXP-2024-001")
+    await validate_jwt(token)
+
+    def no_decode(*args, **kwargs):
+        raise AssertionError("jwt.decode no debería llamarse con el token en caché")
+
+    monkeypatch.setattr(auth.jwt, "decode", no_decode)
+
+    claims = await validate_jwt(token, tool_name="consultar_expediente")
+    assert claims.exp_id == "EXP-2024-001"
+
+    with pytest.raises(AuthError) as exc_info:
+        await validate_jwt(token, tool_name="añadir_anotacion")
+    assert exc_info.value.status_code == 403
+
+    with pytest.raises(AuthError) as exc_info:
+        await validate_jwt(token, resource_uri="expediente://EXP-2024-002")
+    assert exc_info.value.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_token_cache_entry_expires_with_token(monkeypatch):
+    """
+    Test adicional: Las entradas de la caché caducan con el token
+
+    Given: Un token en caché
+    When: Se alcanza su exp
+    Then: La caché no lo sirve y la validación falla como token expirado
+    """
+    from mcp_mock.mcp_expedientes import auth
+
+    token = token_consulta("EXP-2024-001")
+    claims = await validate_jwt(token)
+
+    monkeypatch.setattr(auth.time, "time", lambda: claims.exp)
+    key = auth.token_cache.key(token, auth.get_jwt_secret())
+    assert auth.token_cache.get(key) is None
@@ -0,0 +1,144 @@
+"""
+Tests del almacén de blobs de documentos.
+
+Casos de prueba:
+- Deduplicación por SHA-256
+- Los textos salen del expediente al guardarlo y se leen bajo demanda
+- hash_sha256 en crear_documento_desde_markdown y añadir_documento
+- SQLite conserva la referencia al texto (y migra bases antiguas)
+"""
+
+import base64
+import hashlib
+import json
+import sqlite3
+import pytest
+
+from mcp_mock.mcp_expedientes.blobs import blob_stats, texto_documento
+from mcp_mock.mcp_expedientes.resources import load_expediente, save_expediente
+from mcp_mock.mcp_expedientes.storage import DATA_DIR, SqliteStorage
+from mcp_mock.mcp_expedientes.tools import call_tool
+
+
+@pytest.fixture(autouse=True)
+def clean_stats():
+    blob_stats.reset()
+    yield
+
+
+def test_put_deduplicates(blob_store):
+    """El mismo contenido se escribe una sola vez"""
+    first = blob_store.put("# Informe".encode("utf-8"))
+    second = blob_store.put("# Informe".encode("utf-8"))
+
+    assert first == second == hashlib.sha256(b"# Informe").hexdigest()
+    assert blob_stats.writes == 1
+    assert blob_stats.dedup_hits == 1
+    assert blob_store.read_text(first) == "# Informe"
+
+
+@pytest.mark.usefixtures("restore_expediente_data")
+def test_save_moves_texts_to_blobs(exp_id_subvenciones, blob_store):
+    """Al guardar, el JSON del expediente solo guarda el hash de cada texto"""
+    textos = {doc.id: doc.texto_markdown for doc in load_expediente(exp_id_subvenciones).documentos}
+    size_before = (DATA_DIR / f"{exp_id_subvenciones}.json").stat().st_size
+
+    save_expediente(load_expediente(exp_id_subvenciones, for_update=True))
+
+    raw = json.loads((DATA_DIR / f"{exp_id_subvenciones}.json").read_text(encoding="utf-8"))
+    assert all(doc["texto_markdown"] is None and doc["texto_sha256"] for doc in raw["documentos"])
+    assert (DATA_DIR / f"{exp_id_subvenciones}.json").stat().st_size < size_before
+
+    for documento in load_expediente(exp_id_subvenciones).documentos:
+        assert texto_documento(documento) == textos[documento.id]
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("restore_expediente_data")
+async def test_tools_read_texts_from_blobs(exp_id_subvenciones):
+    """Las tools de lectura devuelven el texto aunque esté en el almacén de blobs"""
+    texto = next(
+        doc for doc in load_expediente(exp_id_subvenciones).documentos if doc.id == "DOC-002"
+    ).texto_markdown
+    save_expediente(load_expediente(exp_id_subvenciones, for_update=True))
+
+    result = await call_tool(
+        "obtener_texto_documento",
+        {"expediente_id": exp_id_subvenciones, "documento_id": "DOC-002"}
+    )
+    assert json.loads(result[0].text)["texto_markdown"] == texto
+
+    result = await call_tool(
+        "consultar_expediente",
+        {"expediente_id": exp_id_subvenciones, "fields": ["documentos.id", "documentos.texto_markdown"]}
+    )
+    documentos = json.loads(result[0].text)["documentos"]
+    assert next(doc for doc in documentos if doc["id"] == "DOC-002")["texto_markdown"] == texto
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("restore_expediente_data")
+async def test_new_documents_get_sha256(exp_id_subvenciones, blob_store):
+    """Los documentos nuevos llevan el SHA-256 de su contenido y se deduplican"""
+    texto = "# Informe\n\nMismo contenido en dos documentos."
+    respuestas = [
+        json.loads((await call_tool(
+            "crear_documento_desde_markdown",
+            {"expediente_id": exp_id_subvenciones, "nombre": f"informe_{i}.md",
+             "tipo": "INFORME", "texto_markdown": texto}
+        ))[0].text)
+        for i in range(2)
+    ]
+    binario = b"%PDF-1.4 contenido"
+    await call_tool(
+        "añadir_documento",
+        {"expediente_id": exp_id_subvenciones, "nombre": "adjunto.pdf", "tipo": "OTRO",
+         "contenido": base64.b64encode(binario).decode("ascii"), "codificacion": "base64"}
+    )
+
+    expected = hashlib.sha256(texto.encode("utf-8")).hexdigest()
+    assert [r["hash_sha256"] for r in respuestas] == [expected, expected]
+    assert blob_stats.dedup_hits == 1
+
+    adjunto = load_expediente(exp_id_subvenciones).documentos[-1]
+    assert adjunto.hash_sha256 == hashlib.sha256(binario).hexdigest()
+    assert adjunto.tamano_bytes == len(binario)
+    assert blob_store.path(adjunto.hash_sha256).read_bytes() == binario
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("restore_expediente_data")
+async def test_plain_text_is_not_decoded_as_base64(exp_id_subvenciones, blob_store):
+    """Un texto que también es base64 válido ("Hola") se guarda tal cual"""
+    await call_tool(
+        "añadir_documento",
+        {"expediente_id": exp_id_subvenciones, "nombre": "nota.txt", "tipo": "OTRO",
+         "contenido": "Hola"}
+    )
+
+    documento = load_expediente(exp_id_subvenciones).documentos[-1]
+    assert documento.hash_sha256 == hashlib.sha256(b"Hola").hexdigest()
+    assert documento.tamano_bytes == len(b"Hola")
+    assert blob_store.path(documento.hash_sha256).read_bytes() == b"Hola"
+
+
+def test_sqlite_keeps_text_reference(tmp_path, exp_id_subvenciones):
+    """SQLite guarda texto_sha256 y añade la columna a bases de datos antiguas"""
+    db_path = tmp_path / "expedientes.db"
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(
+            "CREATE TABLE documentos (expediente_id TEXT NOT NULL, posicion INTEGER NOT NULL, "
+            "id TEXT NOT NULL, nombre TEXT NOT NULL, fecha TEXT NOT NULL, tipo TEXT NOT NULL, "
+            "ruta TEXT NOT NULL, hash_sha256 TEXT NOT NULL, tamano_bytes INTEGER NOT NULL, "
+            "validado INTEGER, metadatos_extraidos TEXT, PRIMARY KEY (expediente_id, posicion))"
+        )
+    conn.close()
+
+    backend = SqliteStorage(db_path)
+    expediente = load_expediente(exp_id_subvenciones, for_update=True)
+    expediente.documentos[0].texto_markdown = None
+    expediente.documentos[0].texto_sha256 = "ab" * 32
+    backend.import_expedientes([expediente])
+
+    assert backend.load(exp_id_subvenciones).documentos[0].texto_sha256 == "ab" * 32
+    backend.close()
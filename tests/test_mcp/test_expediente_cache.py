@@ -0,0 +1,111 @@
+"""
+Tests de la caché de expedientes del MCP mock.
+
+Casos de prueba:
+- Lecturas repetidas servidas desde memoria
+- Invalidación por cambio del archivo (mtime/tamaño)
+- Copia al escribir: las tools no alteran la instancia compartida
+- Límite LRU
+"""
+
+import json
+import pytest
+
+from mcp_mock.mcp_expedientes.auth import AuthError
+from mcp_mock.mcp_expedientes.resources import load_expediente, save_expediente
+from mcp_mock.mcp_expedientes.storage import DATA_DIR, ExpedienteCache, get_storage
+from mcp_mock.mcp_expedientes.tools import call_tool
+
+
+@pytest.fixture(autouse=True)
+def expediente_cache():
+    """Caché del almacenamiento; cada test empieza con ella vacía"""
+    cache = get_storage().cache
+    cache.clear()
+    yield cache
+    cache.clear()
+
+
+def test_repeated_reads_use_cache(exp_id_subvenciones, expediente_cache):
+    """La segunda lectura retorna la instancia cacheada sin releer el archivo"""
+    first = load_expediente(exp_id_subvenciones)
+    second = load_expediente(exp_id_subvenciones)
+
+    assert second is first
+    assert expediente_cache.hits == 1
+    assert expediente_cache.misses == 1
+
+
+@pytest.mark.usefixtures("restore_expediente_data")
+def test_external_change_invalidates(exp_id_subvenciones):
+    """Si el archivo cambia fuera del mock, se vuelve a cargar"""
+    load_expediente(exp_id_subvenciones)
+
+    exp_file = DATA_DIR / f"{exp_id_subvenciones}.json"
+    data = json.loads(exp_file.read_text(encoding="utf-8"))
+    data["estado"] = "MODIFICADO_EXTERNAMENTE"
+    exp_file.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+
+    assert load_expediente(exp_id_subvenciones).estado == "MODIFICADO_EXTERNAMENTE"
+
+
+def test_for_update_returns_private_copy(exp_id_subvenciones):
+    """La copia para escritura no comparte estado con la caché"""
+    shared = load_expediente(exp_id_subvenciones)
+    copy = load_expediente(exp_id_subvenciones, for_update=True)
+
+    copy.documentos.clear()
+    copy.datos["nuevo_campo"] = "valor"
+
+    assert copy is not shared
+    assert len(shared.documentos) > 0
+    assert "nuevo_campo" not in shared.datos
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("restore_expediente_data")
+async def test_write_tool_does_not_touch_shared_instance(exp_id_subvenciones):
+    """Una tool de escritura no altera la instancia que tiene un lector"""
+    before = load_expediente(exp_id_subvenciones)
+    historial_antes = len(before.historial)
+
+    await call_tool(
+        "añadir_anotacion",
+        {"expediente_id": exp_id_subvenciones, "texto": "Anotación de prueba"}
+    )
+
+    assert len(before.historial) == historial_antes
+    after = load_expediente(exp_id_subvenciones)
+    assert after is not before
+    assert len(after.historial) == historial_antes + 1
+
+
+@pytest.mark.usefixtures("restore_expediente_data")
+def test_save_rejects_shared_instance(exp_id_subvenciones):
+    """Guardar la instancia compartida falla y la descarta de la caché"""
+    shared = load_expediente(exp_id_subvenciones)
+    shared.estado = "CORRUPTO"
+
+    with pytest.raises(AuthError) as exc_info:
+        save_expediente(shared)
+
+    assert exc_info.value.status_code == 500
+    assert load_expediente(exp_id_subvenciones).estado != "CORRUPTO"
+
+
+def test_lru_bound(test_expedientes, monkeypatch):
+    """La caché no supera su tamaño máximo"""
+    storage = get_storage()
+    monkeypatch.setattr(storage, "cache", ExpedienteCache(max_entries=2))
+
+    for exp_id in test_expedientes:
+        load_expediente(exp_id)
+
+    assert len(storage.cache) == 2
+
+
+def test_missing_expediente_returns_404():
+    """Un expediente inexistente sigue retornando 404"""
+    with pytest.raises(AuthError) as exc_info:
+        load_expediente("EXP-9999-999")
+    assert exc_info.value.status_code == 404
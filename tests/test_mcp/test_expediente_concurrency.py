@@ -0,0 +1,197 @@
+"""
+Tests de concurrencia en la escritura de expedientes del MCP mock.
+
+Casos de prueba:
+- Versión incrementada en cada escritura
+- expected_version en tools de escritura (409 si no coincide)
+- Copias obsoletas rechazadas al guardar (sin pérdida de actualizaciones)
+- Tools concurrentes sobre el mismo expediente
+- Escrituras desde varios procesos
+"""
+
+import asyncio
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from starlette.testclient import TestClient
+
+from mcp_mock.mcp_expedientes.auth import AuthError
+from mcp_mock.mcp_expedientes.resources import (
+    coalesced_writes,
+    load_expediente,
+    save_expediente,
+)
+from mcp_mock.mcp_expedientes.server_http import app
+from mcp_mock.mcp_expedientes.storage import DATA_DIR, get_storage
+from mcp_mock.mcp_expedientes.tools import call_tool
+from fixtures.tokens import token_gestion
+
+SRC_DIR = Path(__file__).parent.parent.parent / "src"
+
+
+@pytest.fixture(autouse=True)
+def clean_cache():
+    """Cada test empieza con la caché vacía"""
+    get_storage().cache.clear()
+    yield
+    get_storage().cache.clear()
+
+
+@pytest.mark.usefixtures("restore_expediente_data")
+def test_version_increments_on_save(exp_id_subvenciones):
+    """Cada escritura incrementa la versión del expediente"""
+    version = load_expediente(exp_id_subvenciones).version
+
+    expediente = load_expediente(exp_id_subvenciones, for_update=True)
+    save_expediente(expediente)
+
+    assert expediente.version == version + 1
+    assert load_expediente(exp_id_subvenciones).version == version + 1
+
+
+@pytest.mark.usefixtures("restore_expediente_data")
+def test_stale_copy_is_rejected(exp_id_subvenciones):
+    """Guardar una copia cargada antes de otra escritura falla con 409"""
+    first = load_expediente(exp_id_subvenciones, for_update=True)
+    second = load_expediente(exp_id_subvenciones, for_update=True)
+
+    first.estado = "PRIMERO"
+    save_expediente(first)
+
+    second.estado = "SEGUNDO"
+    with pytest.raises(AuthError) as exc_info:
+        save_expediente(second)
+
+    assert exc_info.value.status_code == 409
+    assert load_expediente(exp_id_subvenciones).estado == "PRIMERO"
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("restore_expediente_data")
+async def test_expected_version_mismatch(exp_id_subvenciones):
+    """Una tool con expected_version obsoleta falla con 409 y no escribe"""
+    version = load_expediente(exp_id_subvenciones).version
+    historial_antes = len(load_expediente(exp_id_subvenciones).historial)
+
+    await call_tool(
+        "añadir_anotacion",
+        {"expediente_id": exp_id_subvenciones, "texto": "Con versión", "expected_version": version}
+    )
+
+    with pytest.raises(AuthError) as exc_info:
+        await call_tool(
+            "añadir_anotacion",
+            {"expediente_id": exp_id_subvenciones, "texto": "Obsoleta", "expected_version": version}
+        )
+
+    assert exc_info.value.status_code == 409
+    assert len(load_expediente(exp_id_subvenciones).historial) == historial_antes + 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("restore_expediente_data")
+async def test_concurrent_tools_do_not_lose_updates(exp_id_subvenciones):
+    """Tools concurrentes sobre el mismo expediente aplican todos los cambios"""
+    historial_antes = len(load_expediente(exp_id_subvenciones).historial)
+
+    await asyncio.gather(*[
+        call_tool(
+            "actualizar_datos",
+            {"expediente_id": exp_id_subvenciones, "campo": f"datos.campo_{i}", "valor": i}
+        )
+        for i in range(20)
+    ])
+
+    expediente = load_expediente(exp_id_subvenciones)
+    assert all(expediente.datos[f"campo_{i}"] == i for i in range(20))
+    assert len(expediente.historial) == historial_antes + 20
+
+
+@pytest.mark.usefixtures("restore_expediente_data")
+def test_session_conflict_on_external_write(exp_id_subvenciones):
+    """Si el archivo cambia durante una sesión, la escritura final falla con 409"""
+    exp_file = DATA_DIR / f"{exp_id_subvenciones}.json"
+
+    with pytest.raises(AuthError) as exc_info:
+        with coalesced_writes():
+            expediente = load_expediente(exp_id_subvenciones, for_update=True)
+            expediente.estado = "SESION"
+            save_expediente(expediente)
+
+            # Otro proceso escribe entre medias
+            data = json.loads(exp_file.read_text(encoding="utf-8"))
+            data["version"] = data.get("version", 0) + 1
+            data["estado"] = "EXTERNO"
+            exp_file.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+
+    assert exc_info.value.status_code == 409
+    assert load_expediente(exp_id_subvenciones).estado == "EXTERNO"
+
+
+@pytest.mark.usefixtures("restore_expediente_data")
+def test_rpc_conflict_returns_409(exp_id_subvenciones):
+    """El endpoint /rpc responde HTTP 409 (MCP_CONFLICT en el cliente)"""
+    version = load_expediente(exp_id_subvenciones).version
+
+    with TestClient(app) as client:
+        response = client.post(
+            "/rpc",
+            headers={"Authorization": f"Bearer {token_gestion(exp_id_subvenciones)}"},
+            json={
+                "jsonrpc": "2.0",
+                "id": 1,
+                "method": "tools/call",
+                "params": {
+                    "name": "añadir_anotacion",
+                    "arguments": {
+                        "expediente_id": exp_id_subvenciones,
+                        "texto": "Obsoleta",
+                        "expected_version": version + 5
+                    }
+                }
+            }
+        )
+
+    assert response.status_code == 409
+    assert "Conflicto de versión" in response.json()["error"]["message"]
+
+
+WORKER_SCRIPT = """
+import sys
+from mcp_mock.mcp_expedientes.auth import AuthError
+from mcp_mock.mcp_expedientes.resources import load_expediente, save_expediente
+
+exp_id, worker, count = sys.argv[1], sys.argv[2], int(sys.argv[3])
+for i in range(count):
+    while True:
+        expediente = load_expediente(exp_id, for_update=True)
+        expediente.datos[f"w{worker}_{i}"] = i
+        try:
+            save_expediente(expediente)
+            break
+        except AuthError as e:
+            if e.status_code != 409:
+                raise
+"""
+
+
+@pytest.mark.usefixtures("restore_expediente_data")
+def test_multiprocess_writes_do_not_lose_updates(exp_id_subvenciones, blob_store):
+    """Varios procesos escribiendo el mismo expediente: ningún cambio se pierde"""
+    env = {**os.environ, "MCP_BLOBS_DIR": str(blob_store.root)}
+    workers = [
+        subprocess.Popen(
+            [sys.executable, "-c", WORKER_SCRIPT, exp_id_subvenciones, str(w), "10"],
+            cwd=SRC_DIR,
+            env=env
+        )
+        for w in range(3)
+    ]
+    assert all(p.wait(timeout=60) == 0 for p in workers)
+
+    datos = load_expediente(exp_id_subvenciones).datos
+    assert all(datos[f"w{w}_{i}"] == i for w in range(3) for i in range(10))
@@ -0,0 +1,181 @@
+"""
+Tests de la escritura de expedientes del MCP mock.
+
+Casos de prueba:
+- Escritura atómica (archivo temporal + rename, sin restos)
+- Agrupación de escrituras dentro de una tool call
+- Batch JSON-RPC con una escritura por expediente
+- Descarte de cambios si la tool o la sesión fallan
+- Modo JSON compacto
+"""
+
+import json
+import pytest
+from starlette.testclient import TestClient
+
+from mcp_mock.mcp_expedientes import storage
+from mcp_mock.mcp_expedientes.auth import AuthError
+from mcp_mock.mcp_expedientes.resources import (
+    coalesced_writes,
+    load_expediente,
+    save_expediente,
+)
+from mcp_mock.mcp_expedientes.server_http import app
+from mcp_mock.mcp_expedientes.storage import DATA_DIR, get_storage, write_stats
+from mcp_mock.mcp_expedientes.tools import call_tool
+from fixtures.tokens import token_gestion
+
+
+@pytest.fixture(autouse=True)
+def clean_state():
+    """Cada test empieza con la caché y los contadores vacíos"""
+    get_storage().cache.clear()
+    write_stats.reset()
+    yield
+    get_storage().cache.clear()
+
+
+def _anotacion(exp_id: str, texto: str, request_id: int) -> dict:
+    return {
+        "jsonrpc": "2.0",
+        "id": request_id,
+        "method": "tools/call",
+        "params": {
+            "name": "añadir_anotacion",
+            "arguments": {"expediente_id": exp_id, "texto": texto}
+        }
+    }
+
+
+@pytest.mark.usefixtures("restore_expediente_data")
+def test_atomic_write_leaves_no_temp_files(exp_id_subvenciones):
+    """El guardado reemplaza el archivo y no deja temporales"""
+    expediente = load_expediente(exp_id_subvenciones, for_update=True)
+    expediente.estado = "GUARDADO_ATOMICO"
+
+    save_expediente(expediente)
+
+    assert list(DATA_DIR.glob("*.tmp")) == []
+    data = json.loads((DATA_DIR / f"{exp_id_subvenciones}.json").read_text(encoding="utf-8"))
+    assert data["estado"] == "GUARDADO_ATOMICO"
+    assert write_stats.writes == 1
+
+
+@pytest.mark.usefixtures("restore_expediente_data")
+def test_failed_write_keeps_previous_file(exp_id_subvenciones, monkeypatch):
+    """Si el rename falla, el archivo anterior queda intacto"""
+    exp_file = DATA_DIR / f"{exp_id_subvenciones}.json"
+    original = exp_file.read_bytes()
+
+    def failing_replace(src, dst):
+        raise OSError("disco lleno")
+
+    monkeypatch.setattr(storage.os, "replace", failing_replace)
+
+    expediente = load_expediente(exp_id_subvenciones, for_update=True)
+    expediente.estado = "NO_DEBE_GUARDARSE"
+
+    with pytest.raises(AuthError) as exc_info:
+        save_expediente(expediente)
+
+    assert exc_info.value.status_code == 500
+    assert exp_file.read_bytes() == original
+    assert list(DATA_DIR.glob("*.tmp")) == []
+
+
+@pytest.mark.usefixtures("restore_expediente_data")
+def test_session_coalesces_saves(exp_id_subvenciones):
+    """Varios guardados del mismo expediente en una sesión: una escritura"""
+    with coalesced_writes():
+        for i in range(3):
+            expediente = load_expediente(exp_id_subvenciones, for_update=True)
+            expediente.datos[f"campo_{i}"] = i
+            save_expediente(expediente)
+        assert write_stats.writes == 0
+
+    assert write_stats.writes == 1
+    datos = load_expediente(exp_id_subvenciones).datos
+    assert [datos[f"campo_{i}"] for i in range(3)] == [0, 1, 2]
+
+
+@pytest.mark.usefixtures("restore_expediente_data")
+def test_session_discards_on_error(exp_id_subvenciones):
+    """Una excepción dentro de la sesión descarta los cambios pendientes"""
+    estado_antes = load_expediente(exp_id_subvenciones).estado
+
+    with pytest.raises(RuntimeError):
+        with coalesced_writes():
+            expediente = load_expediente(exp_id_subvenciones, for_update=True)
+            expediente.estado = "DESCARTADO"
+            save_expediente(expediente)
+            raise RuntimeError("fallo en la tool")
+
+    assert write_stats.writes == 0
+    assert load_expediente(exp_id_subvenciones).estado == estado_antes
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("restore_expediente_data")
+async def test_failed_tool_in_outer_session_keeps_previous_changes(exp_id_subvenciones):
+    """Un fallo en una tool anidada no afecta a los cambios de la sesión exterior"""
+    with coalesced_writes():
+        await call_tool(
+            "añadir_anotacion",
+            {"expediente_id": exp_id_subvenciones, "texto": "Primera"}
+        )
+        with pytest.raises(AuthError):
+            await call_tool(
+                "actualizar_datos",
+                {"expediente_id": exp_id_subvenciones, "campo": "no.existe", "valor": 1}
+            )
+
+    assert write_stats.writes == 1
+    historial = load_expediente(exp_id_subvenciones).historial
+    assert historial[-1].detalles == "Primera"
+
+
+@pytest.mark.usefixtures("restore_expediente_data")
+def test_rpc_batch_writes_once(exp_id_subvenciones):
+    """Un batch JSON-RPC con varias mutaciones escribe el expediente una vez"""
+    historial_antes = len(load_expediente(exp_id_subvenciones).historial)
+    batch = [_anotacion(exp_id_subvenciones, f"Nota {i}", i) for i in range(5)]
+
+    with TestClient(app) as client:
+        response = client.post(
+            "/rpc",
+            headers={"Authorization": f"Bearer {token_gestion(exp_id_subvenciones)}"},
+            json=batch
+        )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert [item["id"] for item in data] == list(range(5))
+    assert all("result" in item for item in data)
+    assert write_stats.writes == 1
+    assert len(load_expediente(exp_id_subvenciones).historial) == historial_antes + 5
+
+
+def test_rpc_empty_batch_is_invalid(exp_id_subvenciones):
+    """Un batch vacío es una request inválida"""
+    with TestClient(app) as client:
+        response = client.post(
+            "/rpc",
+            headers={"Authorization": f"Bearer {token_gestion(exp_id_subvenciones)}"},
+            json=[]
+        )
+
+    assert response.status_code == 400
+    assert response.json()["error"]["code"] == -32600
+
+
+@pytest.mark.usefixtures("restore_expediente_data")
+def test_compact_json(exp_id_subvenciones, monkeypatch):
+    """En modo compacto el archivo se escribe sin indentación"""
+    monkeypatch.setattr(get_storage(), "compact", True)
+
+    expediente = load_expediente(exp_id_subvenciones, for_update=True)
+    save_expediente(expediente)
+
+    raw = (DATA_DIR / f"{exp_id_subvenciones}.json").read_text(encoding="utf-8")
+    assert "\n" not in raw
+    assert load_expediente(exp_id_subvenciones).id == exp_id_subvenciones
@@ -0,0 +1,113 @@
+"""
+Tests de la proyección de campos de expedientes.
+
+Casos de prueba:
+- consultar_expediente omite el texto de los documentos por defecto
+- fields / exclude en la tool
+- Modo resumen (recuentos e IDs)
+- Proyección en el resource expediente://{id}?...
+- Campos no válidos (400)
+"""
+
+import json
+import pytest
+from starlette.testclient import TestClient
+
+from mcp_mock.mcp_expedientes.auth import AuthError
+from mcp_mock.mcp_expedientes.resources import get_resource, load_expediente
+from mcp_mock.mcp_expedientes.server_http import app
+from mcp_mock.mcp_expedientes.tools import call_tool
+from fixtures.tokens import token_consulta
+
+
+async def _consultar(exp_id: str, **arguments) -> dict:
+    result = await call_tool("consultar_expediente", {"expediente_id": exp_id, **arguments})
+    return json.loads(result[0].text)
+
+
+@pytest.mark.asyncio
+async def test_default_excludes_document_text(exp_id_subvenciones):
+    """Por defecto no se devuelve texto_markdown; exclude=[] lo incluye"""
+    data = await _consultar(exp_id_subvenciones)
+    completo = await _consultar(exp_id_subvenciones, exclude=[])
+
+    assert data["documentos"]
+    assert all("texto_markdown" not in doc for doc in data["documentos"])
+    assert all("nombre" in doc for doc in data["documentos"])
+    assert any(doc["texto_markdown"] for doc in completo["documentos"])
+    assert len(json.dumps(data)) < len(json.dumps(completo))
+
+
+@pytest.mark.asyncio
+async def test_fields_and_exclude(exp_id_subvenciones):
+    """fields selecciona campos (también dentro de listas y dicts) y exclude los omite"""
+    data = await _consultar(exp_id_subvenciones, fields=["estado", "documentos.id", "datos.solicitante"])
+    expediente = load_expediente(exp_id_subvenciones)
+
+    assert set(data) == {"estado", "documentos", "datos"}
+    assert data["documentos"] == [{"id": doc.id} for doc in expediente.documentos]
+    assert set(data["datos"]) == {"solicitante"}
+
+    data = await _consultar(exp_id_subvenciones, exclude=["historial", "metadatos"])
+    assert "historial" not in data and "metadatos" not in data
+    assert "texto_markdown" in data["documentos"][0]
+
+
+@pytest.mark.asyncio
+async def test_summary(exp_id_subvenciones):
+    """summary retorna solo recuentos e IDs"""
+    data = await _consultar(exp_id_subvenciones, summary=True)
+    expediente = load_expediente(exp_id_subvenciones)
+
+    assert data["id"] == exp_id_subvenciones
+    assert data["documentos"] == {
+        "total": len(expediente.documentos),
+        "ids": [doc.id for doc in expediente.documentos]
+    }
+    assert data["historial"]["total"] == len(expediente.historial)
+    assert "datos" not in data
+
+
+@pytest.mark.asyncio
+async def test_invalid_field(exp_id_subvenciones):
+    """Un campo inexistente del modelo es un error 400"""
+    with pytest.raises(AuthError) as exc_info:
+        await _consultar(exp_id_subvenciones, fields=["documentos.no_existe"])
+
+    assert exc_info.value.status_code == 400
+    assert "documentos.no_existe" in exc_info.value.message
+
+
+@pytest.mark.asyncio
+async def test_resource_projection(exp_id_subvenciones):
+    """El resource del expediente admite la proyección en la query"""
+    data = json.loads(await get_resource(f"expediente://{exp_id_subvenciones}?fields=id,estado"))
+    assert data == {
+        "id": exp_id_subvenciones,
+        "estado": load_expediente(exp_id_subvenciones).estado
+    }
+
+    data = json.loads(await get_resource(f"expediente://{exp_id_subvenciones}?summary=true"))
+    assert "ids" in data["documentos"]
+
+    data = json.loads(await get_resource(f"expediente://{exp_id_subvenciones}"))
+    assert all("texto_markdown" not in doc for doc in data["documentos"])
+
+
+def test_rpc_resource_projection_checks_expediente(exp_id_subvenciones):
+    """La query de la URI no interfiere con la autorización por expediente"""
+    with TestClient(app) as client:
+        response = client.post(
+            "/rpc",
+            headers={"Authorization": f"Bearer {token_consulta(exp_id_subvenciones)}"},
+            json={
+                "jsonrpc": "2.0",
+                "id": 1,
+                "method": "resources/read",
+                "params": {"uri": f"expediente://{exp_id_subvenciones}?summary=true"}
+            }
+        )
+
+    assert response.status_code == 200
+    content = json.loads(response.json()["result"]["contents"][0]["text"])
+    assert content["id"] == exp_id_subvenciones
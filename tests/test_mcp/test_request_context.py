@@ -0,0 +1,115 @@
+"""
+Tests del contexto por petición del servidor MCP.
+
+Casos de prueba:
+- El token de una petición no es visible desde otras tareas
+- Handlers del servidor core con 200 tokens distintos en paralelo
+- /rpc con 200 clientes en paralelo y tokens de distintos expedientes
+"""
+
+import asyncio
+import json
+import httpx
+import pytest
+from mcp import types
+
+from mcp_mock.mcp_expedientes.server import create_server
+from mcp_mock.mcp_expedientes.server_http import app
+from fixtures.tokens import token_consulta
+
+CLIENTES = 200
+
+
+def _peticiones(test_expedientes):
+    """
+    (token, expediente pedido, autorizado) por cliente: uno de cada cuatro
+    pide un expediente distinto al de su token.
+    """
+    peticiones = []
+    for i in range(CLIENTES):
+        propio = test_expedientes[i % len(test_expedientes)]
+        pedido = test_expedientes[(i + 1) % len(test_expedientes)] if i % 4 == 3 else propio
+        peticiones.append((token_consulta(propio), pedido, pedido == propio))
+    return peticiones
+
+
+@pytest.mark.asyncio
+async def test_token_is_request_scoped():
+    """set_token solo afecta a la tarea actual (y a las que lance)"""
+    _, context = create_server()
+
+    async def peticion(token: str) -> str:
+        with context.request_scope(token):
+            await asyncio.sleep(0)
+            return context.get_token()
+
+    tokens = [f"token-{i}" for i in range(10)]
+    assert await asyncio.gather(*(peticion(t) for t in tokens)) == tokens
+    assert context.token is None
+
+
+@pytest.mark.asyncio
+async def test_core_handlers_concurrent_tokens(test_expedientes):
+    """Cada llamada a call_tool se valida con el token de su propia petición"""
+    app_core, context = create_server()
+    handler = app_core.request_handlers[types.CallToolRequest]
+
+    async def cliente(token: str, exp_id: str) -> str:
+        context.set_token(token)
+        await asyncio.sleep(0)  # Otras peticiones fijan su token entre medias
+        result = await handler(types.CallToolRequest(
+            method="tools/call",
+            params=types.CallToolRequestParams(
+                name="consultar_expediente",
+                arguments={"expediente_id": exp_id, "summary": True}
+            )
+        ))
+        return result.root.content[0].text
+
+    peticiones = _peticiones(test_expedientes)
+    # Cada gather() ejecuta las corrutinas en tareas con su propia copia del contexto
+    textos = await asyncio.gather(*(cliente(token, exp_id) for token, exp_id, _ in peticiones))
+
+    for (_, exp_id, autorizado), texto in zip(peticiones, textos):
+        if autorizado:
+            assert json.loads(texto)["id"] == exp_id
+        else:
+            assert texto.startswith("ERROR 403")
+
+
+@pytest.mark.asyncio
+async def test_rpc_concurrent_clients(test_expedientes):
+    """200 clientes concurrentes en /rpc, cada uno con su token"""
+    peticiones = _peticiones(test_expedientes)
+
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app),
+        base_url="http://testserver"
+    ) as client:
+        async def cliente(i: int, token: str, exp_id: str) -> httpx.Response:
+            return await client.post(
+                "/rpc",
+                headers={"Authorization": f"Bearer {token}"},
+                json={
+                    "jsonrpc": "2.0",
+                    "id": i,
+                    "method": "tools/call",
+                    "params": {
+                        "name": "consultar_expediente",
+                        "arguments": {"expediente_id": exp_id, "summary": True}
+                    }
+                }
+            )
+
+        respuestas = await asyncio.gather(*(
+            cliente(i, token, exp_id) for i, (token, exp_id, _) in enumerate(peticiones)
+        ))
+
+    for i, ((_, exp_id, autorizado), response) in enumerate(zip(peticiones, respuestas)):
+        assert response.json()["id"] == i
+        if autorizado:
+            assert response.status_code == 200
+            content = json.loads(response.json()["result"]["content"][0]["text"])
+            assert content["id"] == exp_id
+        else:
+            assert response.status_code == 403
@@ -175,3 +175,100 @@ async def test_resource_uri_invalida():
         await get_resource(uri)
 
     assert exc_info.value.status_code == 400
+
+
+@pytest.fixture
+def many_expedientes(tmp_path, exp_id_subvenciones):
+    """Almacenamiento JSON temporal con 25 expedientes (EXP-A-xx y EXP-B-xx)"""
+    from mcp_mock.mcp_expedientes.storage import DATA_DIR, JsonFileStorage, set_storage
+
+    raw = (DATA_DIR / f"{exp_id_subvenciones}.json").read_bytes()
+    ids = [f"EXP-A-{i:02d}" for i in range(15)] + [f"EXP-B-{i:02d}" for i in range(10)]
+    for exp_id in ids:
+        (tmp_path / f"{exp_id}.json").write_bytes(raw.replace(exp_id_subvenciones.encode(), exp_id.encode()))
+
+    set_storage(JsonFileStorage(tmp_path))
+    yield ids
+    set_storage(None)
+
+
+@pytest.mark.asyncio
+async def test_list_resources_page_cursor(many_expedientes):
+    """Recorrer resources/list con nextCursor devuelve cada expediente una vez"""
+    from mcp_mock.mcp_expedientes.resources import list_resources_page
+
+    listed = []
+    cursor = None
+    pages = 0
+    while True:
+        page = await list_resources_page(cursor=cursor, page_size=10)
+        listed += [str(r.uri) for r in page.resources if str(r.uri).count("/") == 2]
+        pages += 1
+        cursor = page.nextCursor
+        if cursor is None:
+            break
+
+    assert pages == 3
+    assert listed == [f"expediente://{exp_id}" for exp_id in many_expedientes]
+
+
+@pytest.mark.asyncio
+async def test_list_resources_page_prefix(many_expedientes):
+    """El filtro por prefijo solo lista los expedientes que coinciden"""
+    from mcp_mock.mcp_expedientes.resources import list_resources_page
+
+    page = await list_resources_page(prefix="EXP-B-", page_size=100)
+
+    assert len(page.resources) == 10 * 3
+    assert page.nextCursor is None
+    assert all(str(r.uri).startswith("expediente://EXP-B-") for r in page.resources)
+
+
+@pytest.mark.asyncio
+async def test_list_resources_page_token_exp_id(many_expedientes):
+    """Con el expediente del token solo se lista ese expediente"""
+    from mcp_mock.mcp_expedientes.resources import list_resources_page
+
+    page = await list_resources_page(exp_id="EXP-A-03")
+    assert [str(r.uri) for r in page.resources] == [
+        "expediente://EXP-A-03",
+        "expediente://EXP-A-03/documentos",
+        "expediente://EXP-A-03/historial",
+    ]
+    assert page.nextCursor is None
+
+    page = await list_resources_page(exp_id="EXP-Z-99")
+    assert page.resources == []
+
+
+@pytest.mark.asyncio
+async def test_list_resources_page_invalid_cursor():
+    """Un cursor mal formado es un error 400"""
+    from mcp_mock.mcp_expedientes.auth import AuthError
+    from mcp_mock.mcp_expedientes.resources import list_resources_page
+
+    with pytest.raises(AuthError) as exc_info:
+        await list_resources_page(cursor="%%%")
+    assert exc_info.value.status_code == 400
+
+
+def test_rpc_resources_list_token_expediente(exp_id_subvenciones):
+    """resources/list por /rpc solo lista el expediente del token"""
+    from starlette.testclient import TestClient
+    from mcp_mock.mcp_expedientes.server_http import app
+
+    with TestClient(app) as client:
+        response = client.post(
+            "/rpc",
+            headers={"Authorization": f"Bearer {token_consulta(exp_id_subvenciones)}"},
+            json={"jsonrpc": "2.0", "id": 1, "method": "resources/list"}
+        )
+
+    assert response.status_code == 200
+    result = response.json()["result"]
+    assert {r["uri"] for r in result["resources"]} == {
+        f"expediente://{exp_id_subvenciones}",
+        f"expediente://{exp_id_subvenciones}/documentos",
+        f"expediente://{exp_id_subvenciones}/historial",
+    }
+    assert "nextCursor" not in result
@@ -150,3 +150,31 @@ def test_info_endpoint_no_requiere_token():
         data = response.json()
         assert "name" in data
         assert "version" in data
+
+
+def test_rpc_descarta_requests_con_plazo_agotado(exp_id_subvenciones):
+    """/rpc no ejecuta el trabajo que el cliente ya no espera (X-Request-Timeout-Ms)"""
+    from fixtures.tokens import token_consulta
+
+    body = {
+        "jsonrpc": "2.0",
+        "id": 7,
+        "method": "tools/call",
+        "params": {
+            "name": "consultar_expediente",
+            "arguments": {"expediente_id": exp_id_subvenciones, "summary": True}
+        }
+    }
+    headers = {"Authorization": f"Bearer {token_consulta(exp_id_subvenciones)}"}
+
+    with TestClient(app) as client:
+        response = client.post("/rpc", headers={**headers, "X-Request-Timeout-Ms": "0"}, json=body)
+        assert response.status_code == 504
+        assert response.json()["id"] == 7
+        assert response.json()["error"]["code"] == -32000
+
+        response = client.post("/rpc", headers={**headers, "X-Request-Timeout-Ms": "5000"}, json=body)
+        assert response.status_code == 200
+
+        response = client.post("/rpc", headers={**headers, "X-Request-Timeout-Ms": "0"}, json=[body, body])
+        assert [item["error"]["code"] for item in response.json()] == [-32000, -32000]
@@ -0,0 +1,130 @@
+"""
+Tests del cliente MCP stdio con pool de procesos (MCPStdioClient).
+
+Casos de prueba:
+- Tools, resources e interfaz síncrona a través del pool
+- Ejecuciones con distintos tokens comparten los procesos (_meta.token)
+- Reparto de llamadas concurrentes entre procesos
+- Reinicio de un proceso caído
+- Handshake sin respuesta o cancelado: el proceso no queda huérfano
+"""
+
+import asyncio
+import json
+import sys
+import pytest
+
+from backoffice.config.models import MCPServerConfig
+from backoffice.mcp.exceptions import MCPAuthError, MCPConnectionError
+from backoffice.mcp.stdio_client import MCPStdioClient, StdioWorker, close_stdio_pools, get_stdio_pool
+from backoffice.mcp.session_client import get_session_loop
+from fixtures.tokens import token_consulta
+
+
+@pytest.fixture
+def stdio_config(request):
+    """Servidor MCP Mock stdio con pool de 2 procesos (se paran al terminar)"""
+    yield MCPServerConfig(
+        id=f"stdio-{request.node.name}",
+        name="MCP Expedientes stdio",
+        description="Test",
+        type="stdio",
+        command=[sys.executable, "-m", "mcp_mock.mcp_expedientes.server_stdio"],
+        auth={"type": "jwt", "audience": "agentix-mcp-expedientes"},
+        pool_size=2,
+        timeout=30
+    )
+    asyncio.run(close_stdio_pools())
+
+
+def _pool(config: MCPServerConfig):
+    """Pool del servidor (se crea en el loop de sesiones)"""
+    async def get():
+        return get_stdio_pool(config)
+    return asyncio.run_coroutine_threadsafe(get(), get_session_loop()).result()
+
+
+@pytest.mark.asyncio
+async def test_stdio_pool_shared_by_runs(stdio_config, exp_id_subvenciones, exp_id_licencia):
+    """Dos ejecuciones con tokens distintos usan los mismos procesos"""
+    client = MCPStdioClient(stdio_config, token_consulta(exp_id_subvenciones))
+    otro = MCPStdioClient(stdio_config, token_consulta(exp_id_licencia))
+
+    tools = await client.list_tools()
+    assert "consultar_expediente" in [tool["name"] for tool in tools["tools"]]
+
+    resultados = await asyncio.gather(*(
+        c.call_tool("consultar_expediente", {"expediente_id": exp_id, "summary": True})
+        for _ in range(10)
+        for c, exp_id in ((client, exp_id_subvenciones), (otro, exp_id_licencia))
+    ))
+    ids = [json.loads(r["content"][0]["text"])["id"] for r in resultados]
+    assert ids == [exp_id_subvenciones, exp_id_licencia] * 10
+
+    with pytest.raises(MCPAuthError) as exc_info:
+        await client.call_tool("consultar_expediente", {"expediente_id": exp_id_licencia})
+    assert exc_info.value.codigo == "AUTH_PERMISSION_DENIED"
+
+    resource = await client.read_resource(f"expediente://{exp_id_subvenciones}?fields=id")
+    assert json.loads(resource["contents"][0]["text"]) == {"id": exp_id_subvenciones}
+
+    result = await asyncio.to_thread(
+        client.call_tool_sync,
+        "consultar_expediente",
+        {"expediente_id": exp_id_subvenciones, "summary": True}
+    )
+    assert json.loads(result["content"][0]["text"])["id"] == exp_id_subvenciones
+
+    # Las llamadas concurrentes se reparten entre los dos procesos
+    pool = _pool(stdio_config)
+    assert all(worker.requests > 1 for worker in pool.workers)
+
+
+@pytest.mark.asyncio
+async def test_stdio_pool_restarts_crashed_worker(stdio_config, exp_id_subvenciones):
+    """Un proceso caído se sustituye en la siguiente llamada"""
+    client = MCPStdioClient(stdio_config, token_consulta(exp_id_subvenciones))
+    await client.list_tools()
+
+    pool = _pool(stdio_config)
+    caido = pool.workers[0]
+    caido.process.kill()
+    await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(caido.process.wait(), get_session_loop()))
+
+    result = await client.call_tool("consultar_expediente", {"expediente_id": exp_id_subvenciones, "summary": True})
+    assert json.loads(result["content"][0]["text"])["id"] == exp_id_subvenciones
+    assert pool.restarts == 1
+    assert pool.workers[0] is not caido and pool.workers[0].alive
+
+
+# Proceso que lee stdin sin responder nunca (termina al cerrarse stdin)
+SILENT_COMMAND = [sys.executable, "-c", "import sys; sys.stdin.read()"]
+
+
+@pytest.mark.asyncio
+async def test_stdio_worker_handshake_timeout_stops_process():
+    """Un handshake sin respuesta falla con MCPConnectionError y para el proceso"""
+    worker = StdioWorker(SILENT_COMMAND, env={}, name="silencioso")
+
+    with pytest.raises(MCPConnectionError) as exc_info:
+        await worker.start(timeout=0.2)
+
+    assert exc_info.value.codigo == "MCP_CONNECTION_ERROR"
+    assert worker.process.returncode is not None
+    assert worker._reader.done()
+
+
+@pytest.mark.asyncio
+async def test_stdio_worker_cancelled_handshake_stops_process():
+    """Cancelar el arranque a mitad del handshake para el proceso"""
+    worker = StdioWorker(SILENT_COMMAND, env={}, name="silencioso")
+    task = asyncio.create_task(worker.start(timeout=30))
+    while worker._reader is None:
+        await asyncio.sleep(0.01)
+
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    assert worker.process.returncode is not None
+    assert worker._reader.done()
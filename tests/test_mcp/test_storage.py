@@ -0,0 +1,156 @@
+"""
+Tests de los backends de almacenamiento de expedientes.
+
+Casos de prueba:
+- Ida y vuelta sin pérdidas (JSON y SQLite)
+- Control de versión (409) en ambos backends
+- Importación de los JSON a SQLite
+- Tools ejecutadas sobre SQLite
+- Selección del backend
+"""
+
+import json
+import pytest
+
+from mcp_mock.mcp_expedientes.auth import AuthError
+from mcp_mock.mcp_expedientes.resources import list_expedientes, load_expediente
+from mcp_mock.mcp_expedientes.storage import (
+    DATA_DIR,
+    JsonFileStorage,
+    SqliteStorage,
+    create_storage,
+    set_storage,
+    write_stats,
+)
+from mcp_mock.mcp_expedientes.tools import call_tool
+
+
+@pytest.fixture
+def source():
+    """Expedientes de prueba (solo lectura)"""
+    return JsonFileStorage(DATA_DIR, cache_size=0)
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def storage(request, tmp_path, source):
+    """Backend vacío en un directorio temporal, con los expedientes de prueba cargados"""
+    if request.param == "json":
+        backend = JsonFileStorage(tmp_path)
+        for exp_id in source.list_ids():
+            (tmp_path / f"{exp_id}.json").write_bytes((DATA_DIR / f"{exp_id}.json").read_bytes())
+    else:
+        backend = SqliteStorage(tmp_path / "expedientes.db")
+        backend.import_expedientes(source.load(exp_id) for exp_id in source.list_ids())
+    yield backend
+    backend.close()
+
+
+@pytest.fixture
+def sqlite_storage(tmp_path, source):
+    """Almacenamiento global SQLite con los expedientes de prueba"""
+    backend = SqliteStorage(tmp_path / "expedientes.db")
+    backend.import_expedientes(source.load(exp_id) for exp_id in source.list_ids())
+    set_storage(backend)
+    yield backend
+    set_storage(None)
+
+
+def test_round_trip(storage, source, test_expedientes):
+    """Cada backend devuelve exactamente el expediente guardado"""
+    assert sorted(storage.list_ids()) == sorted(test_expedientes)
+
+    for exp_id in test_expedientes:
+        assert storage.load(exp_id) == source.load(exp_id)
+
+
+def test_save_and_conflict(storage, exp_id_subvenciones):
+    """save() incrementa la versión y rechaza copias obsoletas con 409"""
+    first = storage.load(exp_id_subvenciones, for_update=True)
+    stale = storage.load(exp_id_subvenciones, for_update=True)
+    version = first.version
+
+    first.datos["importe"] = 1234
+    first.documentos[0].texto_markdown = "# Texto actualizado"
+    storage.save(first)
+
+    reloaded = storage.load(exp_id_subvenciones)
+    assert reloaded.version == version + 1
+    assert reloaded.datos["importe"] == 1234
+    assert reloaded.documentos[0].texto_markdown == "# Texto actualizado"
+
+    with pytest.raises(AuthError) as exc_info:
+        storage.save(stale)
+    assert exc_info.value.status_code == 409
+
+
+def test_missing_expediente(storage):
+    """Un expediente inexistente retorna 404"""
+    with pytest.raises(AuthError) as exc_info:
+        storage.load("EXP-9999-999")
+    assert exc_info.value.status_code == 404
+
+
+def test_sqlite_skips_unchanged_texts(tmp_path, source, exp_id_subvenciones):
+    """En SQLite solo se reescriben los textos que cambian"""
+    backend = SqliteStorage(tmp_path / "expedientes.db")
+    expediente = source.load(exp_id_subvenciones, for_update=True)
+    expediente.documentos[0].texto_markdown = "x" * 100_000
+    backend.import_expedientes([expediente])
+
+    write_stats.reset()
+    expediente = backend.load(exp_id_subvenciones, for_update=True)
+    expediente.estado = "EN_REVISION"
+    backend.save(expediente)
+    backend.close()
+
+    assert write_stats.writes == 1
+    assert write_stats.bytes_written < 100_000
+
+
+@pytest.mark.asyncio
+async def test_tools_on_sqlite(sqlite_storage, exp_id_subvenciones):
+    """Las tools funcionan igual sobre el backend SQLite"""
+    historial_antes = len(load_expediente(exp_id_subvenciones).historial)
+
+    await call_tool(
+        "añadir_anotacion",
+        {"expediente_id": exp_id_subvenciones, "texto": "Anotación en SQLite"}
+    )
+    result = await call_tool("consultar_expediente", {"expediente_id": exp_id_subvenciones})
+
+    data = json.loads(result[0].text)
+    assert len(data["historial"]) == historial_antes + 1
+    assert data["historial"][-1]["detalles"] == "Anotación en SQLite"
+    assert exp_id_subvenciones in list_expedientes()
+
+
+def test_unknown_backend():
+    """Un backend desconocido es un error de configuración"""
+    with pytest.raises(ValueError):
+        create_storage("redis")
+
+
+def test_iter_ids_after_and_prefix(storage, test_expedientes):
+    """iter_ids() respeta el orden, el punto de partida y el prefijo"""
+    ids = sorted(test_expedientes)
+
+    assert list(storage.iter_ids()) == ids
+    assert list(storage.iter_ids(after=ids[0])) == ids[1:]
+    assert list(storage.iter_ids(prefix=ids[1])) == [ids[1]]
+    assert list(storage.iter_ids(prefix="NO-EXISTE")) == []
+
+
+def test_json_index_follows_writes(tmp_path, source, exp_id_subvenciones):
+    """El índice de IDs del backend JSON incluye expedientes nuevos y cambios externos"""
+    backend = JsonFileStorage(tmp_path)
+    assert backend.list_ids() == []
+
+    nuevo = source.load(exp_id_subvenciones, for_update=True)
+    nuevo.id = "EXP-NUEVO-001"
+    nuevo.version = 0
+    backend.save(nuevo)
+    assert backend.list_ids() == ["EXP-NUEVO-001"]
+
+    # Archivo añadido fuera del storage: se detecta por el mtime del directorio
+    (tmp_path / "EXP-EXTERNO-001.json").write_bytes((DATA_DIR / f"{exp_id_subvenciones}.json").read_bytes())
+    assert backend.list_ids() == ["EXP-EXTERNO-001", "EXP-NUEVO-001"]
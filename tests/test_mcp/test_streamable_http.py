@@ -0,0 +1,132 @@
+"""
+Tests del transporte MCP streamable HTTP (/mcp) con MCPSessionClient.
+
+Casos de prueba:
+- /mcp exige token JWT
+- Tools, resources e interfaz síncrona sobre una misma sesión
+- Llamadas concurrentes multiplexadas sobre la sesión
+- Errores de permisos y de token
+"""
+
+import asyncio
+import json
+import socket
+import threading
+import time
+import pytest
+import uvicorn
+from starlette.testclient import TestClient
+
+from backoffice.config.models import MCPServerConfig
+from backoffice.mcp.exceptions import MCPAuthError
+from backoffice.mcp.session_client import MCPSessionClient
+from mcp_mock.mcp_expedientes.server_http import app
+from fixtures.tokens import token_consulta, token_expirado
+
+
+@pytest.fixture(scope="module")
+def mcp_server_url():
+    """Servidor MCP Mock real (uvicorn) en un puerto libre"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="error"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    deadline = time.time() + 10
+    while not server.started and time.time() < deadline:
+        time.sleep(0.01)
+
+    yield f"http://127.0.0.1:{port}"
+
+    server.should_exit = True
+    thread.join(timeout=10)
+
+
+def _session_client(url: str, token: str) -> MCPSessionClient:
+    config = MCPServerConfig(
+        id="expedientes",
+        name="MCP Expedientes",
+        description="Test",
+        url=url,
+        type="streamable_http",
+        auth={"type": "jwt", "audience": "agentix-mcp-expedientes"},
+        timeout=10
+    )
+    return MCPSessionClient(server_config=config, token=token)
+
+
+def test_mcp_endpoint_requires_token():
+    """/mcp rechaza requests sin token antes de abrir sesión"""
+    with TestClient(app) as client:
+        response = client.post(
+            "/mcp",
+            json={"jsonrpc": "2.0", "id": 1, "method": "initialize", "params": {}}
+        )
+
+    assert response.status_code == 401
+    assert response.json()["error"] == "AUTH_INVALID_TOKEN"
+
+
+@pytest.mark.asyncio
+async def test_session_client_operations(mcp_server_url, exp_id_subvenciones):
+    """list_tools, call_tool, read_resource y call_tool_sync sobre la misma sesión"""
+    client = _session_client(mcp_server_url, token_consulta(exp_id_subvenciones))
+    try:
+        tools = await client.list_tools()
+        assert "consultar_expediente" in [tool["name"] for tool in tools["tools"]]
+        session = client._session
+
+        result = await client.call_tool(
+            "consultar_expediente", {"expediente_id": exp_id_subvenciones, "summary": True}
+        )
+        assert json.loads(result["content"][0]["text"])["id"] == exp_id_subvenciones
+
+        resource = await client.read_resource(f"expediente://{exp_id_subvenciones}?fields=id")
+        assert json.loads(resource["contents"][0]["text"]) == {"id": exp_id_subvenciones}
+
+        result = await asyncio.to_thread(
+            client.call_tool_sync,
+            "consultar_expediente",
+            {"expediente_id": exp_id_subvenciones, "summary": True}
+        )
+        assert json.loads(result["content"][0]["text"])["id"] == exp_id_subvenciones
+
+        assert client._session is session
+    finally:
+        await client.close()
+
+
+@pytest.mark.asyncio
+async def test_session_client_concurrent_calls(mcp_server_url, exp_id_subvenciones):
+    """Las llamadas concurrentes comparten una única sesión"""
+    client = _session_client(mcp_server_url, token_consulta(exp_id_subvenciones))
+    try:
+        results = await asyncio.gather(*(
+            client.call_tool("consultar_expediente", {"expediente_id": exp_id_subvenciones, "summary": True})
+            for _ in range(30)
+        ))
+        assert all(json.loads(r["content"][0]["text"])["id"] == exp_id_subvenciones for r in results)
+        assert client._session is not None
+    finally:
+        await client.close()
+
+    assert client._session is None
+
+
+@pytest.mark.asyncio
+async def test_session_client_errors(mcp_server_url, exp_id_subvenciones, exp_id_licencia):
+    """Permisos insuficientes y token expirado se traducen a MCPAuthError"""
+    client = _session_client(mcp_server_url, token_consulta(exp_id_subvenciones))
+    try:
+        with pytest.raises(MCPAuthError) as exc_info:
+            await client.call_tool("consultar_expediente", {"expediente_id": exp_id_licencia})
+        assert exc_info.value.codigo == "AUTH_PERMISSION_DENIED"
+    finally:
+        await client.close()
+
+    client = _session_client(mcp_server_url, token_expirado(exp_id_subvenciones))
+    with pytest.raises(MCPAuthError) as exc_info:
+        await client.list_tools()
+    assert exc_info.value.codigo == "AUTH_INVALID_TOKEN"
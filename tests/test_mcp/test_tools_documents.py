@@ -2,7 +2,7 @@
 Tests de tools MCP para documentos.
 
 Casos de prueba para las nuevas tools de gestión de documentos:
-- obtener_texto_documento
+- obtener_texto_documento (completo, por rangos y por SSE)
 - obtener_metadatos_documento
 - actualizar_metadatos_documento
 - crear_documento_desde_markdown
@@ -10,9 +10,13 @@ Casos de prueba para las nuevas tools de gestión de documentos:
 
 import json
 import pytest
+from starlette.testclient import TestClient
 
 from mcp_mock.mcp_expedientes.auth import AuthError
+from mcp_mock.mcp_expedientes.resources import load_expediente
+from mcp_mock.mcp_expedientes.server_http import app
 from mcp_mock.mcp_expedientes.tools import call_tool
+from fixtures.tokens import token_consulta
 
 
 # ========== Tests de Lectura ==========
@@ -64,6 +68,113 @@ async def test_obtener_texto_documento_not_found(exp_id_subvenciones):
     assert "no encontrado" in exc_info.value.message.lower()
 
 
+@pytest.mark.asyncio
+async def test_obtener_texto_documento_por_rangos(exp_id_subvenciones):
+    """
+    Given: Un documento con texto_markdown
+    When: Se lee con offset/length siguiendo next_offset
+    Then: Los fragmentos reconstruyen el texto completo
+    """
+    texto = next(
+        doc for doc in load_expediente(exp_id_subvenciones).documentos if doc.id == "DOC-002"
+    ).texto_markdown
+    fragmentos = []
+    offset = 0
+
+    while offset is not None:
+        result = await call_tool(
+            "obtener_texto_documento",
+            {
+                "expediente_id": exp_id_subvenciones,
+                "documento_id": "DOC-002",
+                "offset": offset,
+                "length": 100
+            }
+        )
+        response = json.loads(result[0].text)
+        assert response["total_length"] == len(texto)
+        assert len(response["texto_markdown"]) <= 100
+        fragmentos.append(response["texto_markdown"])
+        offset = response["next_offset"]
+
+    assert len(fragmentos) > 1
+    assert "".join(fragmentos) == texto
+    assert response["has_more"] is False
+
+
+@pytest.mark.asyncio
+async def test_obtener_texto_documento_rango_invalido(exp_id_subvenciones):
+    """
+    Given: Un offset mayor que el texto
+    When: Se invoca obtener_texto_documento
+    Then: Se retorna error 400
+    """
+    with pytest.raises(AuthError) as exc_info:
+        await call_tool(
+            "obtener_texto_documento",
+            {
+                "expediente_id": exp_id_subvenciones,
+                "documento_id": "DOC-002",
+                "offset": 10_000_000
+            }
+        )
+
+    assert exc_info.value.status_code == 400
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("arguments", [
+    {},
+    {"expediente_id": "EXP-2024-001", "documento_id": "DOC-002", "offset": "5"},
+])
+async def test_obtener_texto_documento_argumentos_invalidos(arguments):
+    """
+    Given: Argumentos que no cumplen el inputSchema de la tool
+    When: Se invoca obtener_texto_documento
+    Then: Se retorna error 400 (no un 500 de la propia tool)
+    """
+    with pytest.raises(AuthError) as exc_info:
+        await call_tool("obtener_texto_documento", arguments)
+
+    assert exc_info.value.status_code == 400
+    assert "Argumentos no válidos" in exc_info.value.message
+
+
+def test_obtener_texto_documento_stream_sse(exp_id_subvenciones):
+    """
+    Given: Un token válido
+    When: Se pide el texto por SSE en fragmentos de 64 caracteres
+    Then: Los eventos chunk reconstruyen el texto y el evento end da la longitud
+    """
+    texto = next(
+        doc for doc in load_expediente(exp_id_subvenciones).documentos if doc.id == "DOC-002"
+    ).texto_markdown
+
+    with TestClient(app) as client:
+        response = client.get(
+            f"/documentos/{exp_id_subvenciones}/DOC-002/texto?chunk_size=64",
+            headers={"Authorization": f"Bearer {token_consulta(exp_id_subvenciones)}"}
+        )
+        otro_expediente = client.get(
+            "/documentos/EXP-2024-002/DOC-002/texto",
+            headers={"Authorization": f"Bearer {token_consulta(exp_id_subvenciones)}"}
+        )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+
+    events = [
+        (block.split("\n")[0][len("event: "):], json.loads(block.split("\n")[1][len("data: "):]))
+        for block in response.text.strip().split("\n\n")
+    ]
+    chunks = [data for name, data in events if name == "chunk"]
+    assert "".join(c["texto_markdown"] for c in chunks) == texto
+    assert all(len(c["texto_markdown"]) <= 64 for c in chunks)
+    assert events[-1] == ("end", {"total_length": len(texto)})
+
+    assert otro_expediente.status_code == 403
+
+
 @pytest.mark.asyncio
 async def test_obtener_metadatos_documento_existente(exp_id_subvenciones):
     """